@@ -2,14 +2,29 @@ import streamlit as st
 import networkx as nx
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+import numpy as np
 import osmnx as ox
 import folium
 from folium.plugins import AntPath, Fullscreen
 from streamlit_folium import st_folium
+import functools
+import html
+import io
+import os
+import uuid
 import warnings
 
+from dan_duong import (ban_do, bieu_dien, bo_cuc, bo_nho_lo_trinh, danh_sach_canh, dia_danh, hieu_nang,
+                       luong_cuc_dai, ma_tran_od, o_ban_do, phan_cap, thuc_thi, vet_duyet)
+from dan_duong.dang_thoi import CAC_DON_VI, SO_VANH_TOI_DA
+from dan_duong.dich_vu import USER_AGENT, BoDanDuong
+from dan_duong.do_thi_phien import DoThiPhien
+from dan_duong.trong_so import CAC_MUC_TIEU
+from dan_duong.euler import chu_trinh_hierholzer, duong_di_euler
+
 warnings.filterwarnings("ignore")
-ox.settings.user_agent = "ung_dung_tim_duong_pleiku_v1"
+ox.settings.user_agent = USER_AGENT
 
 # -----------------------------------------------------------------------------
 # 1. CẤU HÌNH GIAO DIỆN
@@ -95,135 +110,284 @@ st.markdown("""
 
 # Khởi tạo Bộ nhớ đệm (Session State)
 if 'do_thi' not in st.session_state: st.session_state['do_thi'] = nx.Graph()
+# Bọc đồ thị phiên: phiên bản, dấu vân tay và các tính chất được ghi nhớ / cập nhật gia tăng
+if 'do_thi_phien' not in st.session_state: st.session_state['do_thi_phien'] = DoThiPhien(st.session_state['do_thi'])
 if 'lo_trinh_tim_duoc' not in st.session_state: st.session_state['lo_trinh_tim_duoc'] = []
 if 'chi_tiet_lo_trinh' not in st.session_state: st.session_state['chi_tiet_lo_trinh'] = []
+if 'thoi_gian_lo_trinh' not in st.session_state: st.session_state['thoi_gian_lo_trinh'] = 0.0
 if 'tam_ban_do' not in st.session_state: st.session_state['tam_ban_do'] = [13.9785, 108.0051]
 if 'ten_diem_dau' not in st.session_state: st.session_state['ten_diem_dau'] = "Điểm A"
 if 'ten_diem_cuoi' not in st.session_state: st.session_state['ten_diem_cuoi'] = "Điểm B"
 if 'bounds_ban_do' not in st.session_state: st.session_state['bounds_ban_do'] = None
 if 'log_text' not in st.session_state: st.session_state['log_text'] = ""  # Thêm biến lưu vết
+if 'so_nut_da_duyet' not in st.session_state: st.session_state['so_nut_da_duyet'] = 0
+if 'toa_do_lo_trinh' not in st.session_state: st.session_state['toa_do_lo_trinh'] = []
+if 'lo_trinh_thay_the' not in st.session_state: st.session_state['lo_trinh_thay_the'] = []
+if 'dang_thoi' not in st.session_state: st.session_state['dang_thoi'] = None
+if 'diem_bam_dang_thoi' not in st.session_state: st.session_state['diem_bam_dang_thoi'] = None
+if 'vet_duyet' not in st.session_state: st.session_state['vet_duyet'] = None  # vết từng bước của lần chạy gần nhất
+if 'ma_phien' not in st.session_state: st.session_state['ma_phien'] = uuid.uuid4().hex  # khoá việc nền của phiên
 
 
 # -----------------------------------------------------------------------------
-# HÀM XỬ LÝ 1: TRÍCH XUẤT THÔNG TIN LỘ TRÌNH
+# HÀM XỬ LÝ 1: ĐO HIỆU NĂNG (BẢNG "⏱️ HIỆU NĂNG" Ở MỖI TAB)
 # -----------------------------------------------------------------------------
-def lay_du_lieu_canh_an_toan(G, u, v, khoa_trong_so='length'):
-    data = G.get_edge_data(u, v)
-    if data is None: return {}
-    if isinstance(data, dict) and any(isinstance(k, int) for k in data.keys()):
-        best = None;
-        min_w = float('inf')
-        for key, attr in data.items():
-            w = attr.get(khoa_trong_so, attr.get('weight', float('inf')))
-            if w < min_w: min_w = w; best = attr
-        return best or next(iter(data.values()))
-    return data
-
-
-def lay_thong_tin_lo_trinh(do_thi, danh_sach_nut):
-    if not danh_sach_nut or len(danh_sach_nut) < 2: return []
-    cac_buoc_di = []
-    ten_duong_hien_tai = None;
-    quang_duong_hien_tai = 0
-
-    for u, v in zip(danh_sach_nut[:-1], danh_sach_nut[1:]):
-        du_lieu_canh = lay_du_lieu_canh_an_toan(do_thi, u, v)
-        do_dai = du_lieu_canh.get('length', 0)
-        ten = du_lieu_canh.get('name', 'Đường nội bộ')
-        if isinstance(ten, list): ten = " / ".join(ten)
-
-        if ten == ten_duong_hien_tai:
-            quang_duong_hien_tai += do_dai
-        else:
-            if ten_duong_hien_tai: cac_buoc_di.append({"ten": ten_duong_hien_tai, "do_dai": quang_duong_hien_tai})
-            ten_duong_hien_tai = ten;
-            quang_duong_hien_tai = do_dai
-
-    if ten_duong_hien_tai: cac_buoc_di.append({"ten": ten_duong_hien_tai, "do_dai": quang_duong_hien_tai})
-    return cac_buoc_di
+def bat_dau_do(ten, tab, **thong_tin):
+    # cProfile/tracemalloc chỉ áp dụng cho MỘT lần chạy: bật công tắc thì lần chạy kế tiếp dùng, rồi tự tắt
+    chi_tiet = st.session_state.get(f"do_chi_tiet_{tab}", False)
+    if chi_tiet:
+        st.session_state[f"tat_do_chi_tiet_{tab}"] = True
+    lan_do = hieu_nang.LanDo(ten, chi_tiet=chi_tiet, tab=tab, **thong_tin)
+    st.session_state[f"hieu_nang_{tab}"] = lan_do
+    return lan_do
+
+
+def ve_bang_hieu_nang(tab):
+    with st.expander("⏱️ Hiệu năng lần chạy gần nhất"):
+        if st.session_state.pop(f"tat_do_chi_tiet_{tab}", False):
+            st.session_state[f"do_chi_tiet_{tab}"] = False
+        st.toggle("Ghi cProfile + tracemalloc cho lần chạy kế tiếp", key=f"do_chi_tiet_{tab}")
+        lan_do = st.session_state.get(f"hieu_nang_{tab}")
+        if lan_do is None:
+            st.caption("Chưa có lần chạy nào.")
+            return
+        tong_giai_doan = sum(g["thoi_gian_ms"] for g in lan_do.cac_giai_doan)
+        st.caption(f"{lan_do.ten} · tổng các giai đoạn {tong_giai_doan:.1f} ms · mã `{lan_do.ma}` "
+                   "(mỗi giai đoạn cũng được ghi thành một dòng JSON, xem PLEIKU_PERF_LOG)")
+        st.dataframe(lan_do.bang(), hide_index=True, use_container_width=True)
+        bao_cao = lan_do.bao_cao_profile()
+        if bao_cao:
+            st.code(bao_cao, language="text")
 
 
 # -----------------------------------------------------------------------------
 # HÀM XỬ LÝ 2: VẼ ĐỒ THỊ LÝ THUYẾT (TAB 1) 
 # -----------------------------------------------------------------------------
+NGUONG_DO_THI_LON = 300  # số đỉnh: lớn hơn thì dùng bố cục pivot MDS, vẽ theo lô và bỏ nhãn
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def tinh_bo_cuc(dau_van_tay, _do_thi, lon):
+    # Khoá theo dấu vân tay đồ thị: bố cục dùng lại giữa các lần rerun và giữa các hình kết quả
+    return bo_cuc.bo_cuc(_do_thi, lon=lon)
+
+
+def ve_do_thi_lon(do_thi, vi_tri, duong_di, danh_sach_canh, truc):
+    # Một LineCollection cho mọi cạnh + một scatter cho mọi đỉnh thay vì một artist cho mỗi phần tử
+    def doan_thang(cac_canh):
+        return [(vi_tri[u], vi_tri[v]) for u, v in cac_canh]
+
+    xy = np.array(list(vi_tri.values())).reshape(-1, 2)
+    co_diem = max(1.0, 2000 / max(len(xy), 1))
+    truc.add_collection(LineCollection(doan_thang(do_thi.edges()), colors='#BDC3C7', linewidths=0.4,
+                                       rasterized=True))
+    truc.scatter(xy[:, 0], xy[:, 1], s=co_diem, c='#5DADE2', linewidths=0, rasterized=True)
+
+    canh_noi_bat = list(zip(duong_di, duong_di[1:])) if duong_di else []
+    canh_noi_bat += list(danh_sach_canh or [])
+    if canh_noi_bat:
+        truc.add_collection(LineCollection(doan_thang(canh_noi_bat), colors='#E74C3C', linewidths=1.5))
+        nut_noi_bat = np.array([vi_tri[n] for canh in canh_noi_bat for n in canh])
+        truc.scatter(nut_noi_bat[:, 0], nut_noi_bat[:, 1], s=co_diem * 3, c='#E74C3C', linewidths=0)
+    truc.autoscale()
+    truc.set_axis_off()
+
+
 def ve_do_thi_ly_thuyet(do_thi, duong_di=None, danh_sach_canh=None, tieu_de=""):
     is_directed = do_thi.is_directed()
+    do_thi_lon = do_thi.number_of_nodes() > NGUONG_DO_THI_LON
 
     hinh_ve, truc = plt.subplots(figsize=(7, 5))
     try:
-        vi_tri = nx.spring_layout(do_thi, seed=42)
-        nx.draw(do_thi, vi_tri, with_labels=True, node_color='#D6EAF8', edge_color='#BDC3C7', node_size=600,
-                font_weight='bold', ax=truc, arrows=is_directed)
+        phien = st.session_state['do_thi_phien']
+        dau_van_tay = phien.dau_van_tay if phien.do_thi is do_thi else bo_cuc.dau_van_tay_do_thi(do_thi)
+        vi_tri = tinh_bo_cuc(dau_van_tay, do_thi, do_thi_lon)
+        if do_thi_lon:
+            ve_do_thi_lon(do_thi, vi_tri, duong_di, danh_sach_canh, truc)
+            tieu_de = f"{tieu_de} ({do_thi.number_of_nodes()} đỉnh, {do_thi.number_of_edges()} cạnh)"
+        else:
+            nx.draw(do_thi, vi_tri, with_labels=True, node_color='#D6EAF8', edge_color='#BDC3C7', node_size=600,
+                    font_weight='bold', ax=truc, arrows=is_directed)
         
-        # Kiểm tra xem có cạnh nào có thuộc tính 'weight' không
-        co_trong_so = any('weight' in data for u, v, data in do_thi.edges(data=True))
-        if co_trong_so:
-            nhan_canh = nx.get_edge_attributes(do_thi, 'weight')
-            nx.draw_networkx_edge_labels(do_thi, vi_tri, edge_labels=nhan_canh, font_size=9, ax=truc)
-        # ----------------------------------------------
-
-        if duong_di:
-            canh_duong_di = list(zip(duong_di, duong_di[1:]))
-            nx.draw_networkx_nodes(do_thi, vi_tri, nodelist=duong_di, node_color='#E74C3C', node_size=700, ax=truc)
-            nx.draw_networkx_edges(do_thi, vi_tri, edgelist=canh_duong_di, width=3, edge_color='#E74C3C', ax=truc,
-                                   arrows=is_directed)
-
-        if danh_sach_canh:
-            cac_nut = set()
-            for u, v in danh_sach_canh:
-                cac_nut.add(u);
-                cac_nut.add(v)
-
-            nx.draw_networkx_nodes(do_thi, vi_tri, nodelist=list(cac_nut), node_color='#E74C3C', node_size=700, ax=truc)
-            nx.draw_networkx_edges(do_thi, vi_tri, edgelist=danh_sach_canh, width=3, edge_color='#E74C3C', ax=truc,
-                                   arrows=is_directed)
+            # Kiểm tra xem có cạnh nào có thuộc tính 'weight' không
+            co_trong_so = any('weight' in data for u, v, data in do_thi.edges(data=True))
+            if co_trong_so:
+                nhan_canh = nx.get_edge_attributes(do_thi, 'weight')
+                nx.draw_networkx_edge_labels(do_thi, vi_tri, edge_labels=nhan_canh, font_size=9, ax=truc)
+            # ----------------------------------------------
+
+            if duong_di:
+                canh_duong_di = list(zip(duong_di, duong_di[1:]))
+                nx.draw_networkx_nodes(do_thi, vi_tri, nodelist=duong_di, node_color='#E74C3C', node_size=700, ax=truc)
+                nx.draw_networkx_edges(do_thi, vi_tri, edgelist=canh_duong_di, width=3, edge_color='#E74C3C', ax=truc,
+                                       arrows=is_directed)
+
+            if danh_sach_canh:
+                cac_nut = set()
+                for u, v in danh_sach_canh:
+                    cac_nut.add(u);
+                    cac_nut.add(v)
+
+                nx.draw_networkx_nodes(do_thi, vi_tri, nodelist=list(cac_nut), node_color='#E74C3C', node_size=700, ax=truc)
+                nx.draw_networkx_edges(do_thi, vi_tri, edgelist=danh_sach_canh, width=3, edge_color='#E74C3C', ax=truc,
+                                       arrows=is_directed)
     except Exception as e:
         st.error(f"Lỗi vẽ hình: {e}")
 
     truc.set_title(tieu_de, color="#2C3E50", fontsize=12)
     st.pyplot(hinh_ve)
+    plt.close(hinh_ve)
+
+
+# -----------------------------------------------------------------------------
+# HÀM XỬ LÝ 2B: BIỂU DIỄN DỮ LIỆU DẠNG THƯA (TAB 1)
+# -----------------------------------------------------------------------------
+NGUONG_MA_TRAN_DAY = 200  # số đỉnh: lớn hơn thì ma trận kề chỉ hiện tổng quan + cửa sổ
+KICH_THUOC_TRANG = 100
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def ma_tran_ke_thua(dau_van_tay, _do_thi):
+    return bieu_dien.ma_tran_thua(_do_thi)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def xuat_ma_tran_ke(dau_van_tay, _do_thi, dinh_dang):
+    # Ghi tuần tự từ CSR; kết quả được cache để các lần rerun không ghi lại
+    A, cac_nut = ma_tran_ke_thua(dau_van_tay, _do_thi)
+    ghi = bieu_dien.ghi_matrix_market if dinh_dang == "mtx" else bieu_dien.ghi_npz
+    return ghi(A, cac_nut, io.BytesIO()).getvalue()
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def xuat_danh_sach_canh(dau_van_tay, _do_thi, dinh_dang):
+    # dinh_dang: "csv", "tsv.gz", ... - ghi theo khối cạnh, cache theo dấu vân tay đồ thị
+    return danh_sach_canh.ghi_danh_sach_canh(_do_thi, io.BytesIO(), dinh_dang.split(".")[0],
+                                             nen=dinh_dang.endswith(".gz")).getvalue()
+
+
+def chon_trang(tong, khoa):
+    """Ô chọn trang khi có nhiều hơn một trang; trả về vị trí bắt đầu của trang."""
+    so_trang = max(1, -(-tong // KICH_THUOC_TRANG))
+    if so_trang == 1:
+        return 0
+    trang = st.number_input(f"Trang (1 - {so_trang}, {KICH_THUOC_TRANG} dòng/trang):", 1, so_trang, 1, key=khoa)
+    return (int(trang) - 1) * KICH_THUOC_TRANG
 
 
 # -----------------------------------------------------------------------------
 # HÀM XỬ LÝ 3: THUẬT TOÁN FLEURY
 # -----------------------------------------------------------------------------
-def thuat_toan_fleury(G_input):
-    G = G_input.copy()
-    bac_le = [v for v, d in G.degree() if d % 2 == 1]
-    if len(bac_le) not in [0, 2]:
-        return None, "Đồ thị không có Đường đi/Chu trình Euler (Số đỉnh bậc lẻ phải là 0 hoặc 2)."
-
-    u = bac_le[0] if len(bac_le) == 2 else list(G.nodes())[0]
-    path = [u]
-    edges_path = []
-
-    while G.number_of_edges() > 0:
-        neighbors = list(G.neighbors(u))
-        if not neighbors: return None, "Lỗi: Đồ thị bị ngắt quãng."
-
-        next_v = None
-        for v in neighbors:
-            if G.degree(u) == 1:
-                next_v = v;
-                break
-
-            G.remove_edge(u, v)
-            if nx.has_path(G, u, v):
-                next_v = v
-                G.add_edge(u, v)
-                break
-            else:
-                G.add_edge(u, v, weight=1)
+# Hierholzer O(V + E) thay cho "xoá cạnh + nx.has_path" O(E^2): dan_duong.euler.duong_di_euler,
+# không sao chép hay sửa trọng số của đồ thị, hỗ trợ cả có hướng; trả về (danh sách cạnh, thông báo).
+# Gọi thẳng hàm của module (không bọc trong script) để BoThucThi pickle được việc.
+thuat_toan_fleury = duong_di_euler
+
 
-        if next_v is None: next_v = neighbors[0]
+# -----------------------------------------------------------------------------
+# HÀM XỬ LÝ 3B: VẾT DUYỆT TỪNG BƯỚC (TAB 1)
+# -----------------------------------------------------------------------------
+# Số bước gần nhất giữ trong bộ nhớ phiên; vết đầy đủ tải về được dạng .tsv.gz
+SUC_CHUA_VET = int(os.environ.get("PLEIKU_TRACE_BUFFER", vet_duyet.SUC_CHUA_MAC_DINH))
+
+
+def bat_dau_vet(ten, tao_buoc):
+    # tao_buoc: hàm không đối số trả về generator mới; chỉ đọc trang đầu, phần còn lại đọc khi người dùng bấm.
+    # Đồ thị / đỉnh phải gắn qua tham số mặc định: biến toàn cục của script đổi ở các lần chạy sau
+    vet = vet_duyet.VetDuyet(ten, tao_buoc, SUC_CHUA_VET, phien_ban=st.session_state['do_thi_phien'].phien_ban)
+    vet.doc_them()
+    st.session_state['vet_duyet'] = vet
+
+
+def ve_vet_duyet():
+    vet = st.session_state['vet_duyet']
+    if vet is None:
+        return
+    if vet.thong_tin["phien_ban"] != st.session_state['do_thi_phien'].phien_ban:
+        st.caption(f"Vết {vet.ten} thuộc đồ thị trước khi sửa - hãy chạy lại thuật toán.")
+        return
+    c_doc, c_het, c_tai = st.columns(3)
+    if c_doc.button(f"▶ Đọc thêm {vet_duyet.SO_BUOC_MOI_LAN} bước", disabled=vet.het, use_container_width=True):
+        vet.doc_them()
+    if c_het.button("⏭ Đọc tới cuối", disabled=vet.het, use_container_width=True):
+        vet.doc_het()
+    # Tạo tệp khi bấm tải (luồng riêng của Streamlit): chạy lại generator, nén theo khối
+    c_tai.download_button("💾 Toàn bộ vết (.tsv.gz)", data=lambda: vet_duyet.xuat_tsv_gz(vet.tao_buoc),
+                          file_name=f"vet_{vet.ten.split()[0].lower()}.tsv.gz", mime="application/gzip",
+                          use_container_width=True)
+    st.caption(f"{vet.ten}: đã đọc {vet.so_da_doc} bước{' (hết)' if vet.het else ''}; "
+               f"giữ {len(vet.vong_dem)} bước gần nhất (tối đa {vet.vong_dem.maxlen}).")
+    dau = chon_trang(len(vet.vong_dem), "trang_vet_duyet")
+    dong = "\n".join(f"{stt:>7}  {mo_ta}" for stt, mo_ta in vet.trang(dau, KICH_THUOC_TRANG))
+    st.markdown(f'<div class="khung-log">{html.escape(dong)}</div>', unsafe_allow_html=True)
 
-        if G.has_edge(u, next_v):
-            G.remove_edge(u, next_v)
-            edges_path.append((u, next_v))
-            path.append(next_v)
-            u = next_v
 
-    return edges_path, "Thành công"
+# -----------------------------------------------------------------------------
+# HÀM XỬ LÝ 3C: CHẠY THUẬT TOÁN NGOÀI LUỒNG SCRIPT (HẠN CHÓT, HUỶ, TIẾN ĐỘ)
+# -----------------------------------------------------------------------------
+HAN_CHOT_THUAT_TOAN = float(os.environ.get("PLEIKU_JOB_TIMEOUT", thuc_thi.HAN_CHOT_MAC_DINH))
+HAN_CHOT_GEOCODE = float(os.environ.get("PLEIKU_GEOCODE_TIMEOUT", 20))
+HAN_CHOT_OD = float(os.environ.get("PLEIKU_OD_TIMEOUT", 120))
+HAN_CHOT_TIM_DUONG = float(os.environ.get("PLEIKU_ROUTE_TIMEOUT", thuc_thi.HAN_CHOT_MAC_DINH))
+
+
+@st.cache_resource
+def tai_bo_thuc_thi():
+    # Một bộ cho cả tiến trình Streamlit: giới hạn số thuật toán nặng chạy cùng lúc của mọi phiên.
+    # Tiến trình con sống lâu, tạo từ forkserver đã nạp sẵn các module thuật toán Tab 1
+    return thuc_thi.BoThucThi(int(os.environ.get("PLEIKU_WORKERS", 0)) or None,
+                              nap_truoc=("networkx", "dan_duong.euler", "dan_duong.luong_cuc_dai",
+                                         "dan_duong.ma_tran_od", "dan_duong.vet_duyet"))
+
+
+def do_thi_chung():
+    # Đồ thị phiên cho chay_nen(chung=...): khoá theo dấu vân tay, tiến trình con đã giữ đúng nội dung
+    # này (của phiên này hay phiên khác) thì không phải pickle gửi lại cả đồ thị mỗi lần bấm nút
+    phien = st.session_state['do_thi_phien']
+    return ("do_thi_phien", phien.dau_van_tay), phien.do_thi
+
+
+def chay_nen(ten, ham, han_chot=HAN_CHOT_THUAT_TOAN, o="tab1", lan_do=None, ban_ghi=None, chung=None):
+    # ham: hàm pickle được (functools.partial của một hàm trong dan_duong), vì việc được gửi sang
+    # tiến trình con của BoThucThi; lambda của script không gửi được. Không đối số, hoặc nhận đối
+    # tượng của chung=(khoá, đối tượng) - con giữ lại đối tượng theo khoá cho các lần sau.
+    # Chạy trong tiến trình con; bấm nút khác giữa chừng dừng lượt chạy script ở thanh tiến độ
+    # và huỷ luôn việc nền. Quá hạn -> thuc_thi.HetHan. o: ô giao diện - mỗi phiên một việc mỗi ô,
+    # gửi việc mới ở cùng ô thì huỷ việc cũ. ban_ghi (giai đoạn của lan_do) nhận số liệu đo trong
+    # tiến trình con: thời gian / CPU / đỉnh RSS của chính việc, cProfile nếu lan_do đo chi tiết.
+    thanh = st.progress(0.0, text=f"{ten}: đang bắt đầu ...")
+
+    def khi_tien_do(ti_le, thong_diep, so_giay):
+        # Thuật toán không báo tỉ lệ thì thanh chạy theo thời gian so với hạn chót
+        thanh.progress(min(1.0, ti_le if ti_le is not None else so_giay / han_chot),
+                       text=f"{ten}: {thong_diep or 'đang chạy'} · {so_giay:.1f}/{han_chot:g} s")
+
+    try:
+        return tai_bo_thuc_thi().chay((st.session_state['ma_phien'], o), ham, han_chot, khi_tien_do, so_lieu=ban_ghi,
+                                      chi_tiet=lan_do is not None and lan_do.chi_tiet, chung=chung)
+    except thuc_thi.DaHuy:
+        # Đã có lượt chạy mới của cùng phiên thay thế
+        st.warning(f"{ten}: đã huỷ.")
+        st.stop()
+    finally:
+        thanh.empty()
+
+
+def chay_tai_cho(ten, ham, han_chot=HAN_CHOT_TIM_DUONG):
+    # Như chay_nen cho việc phải chạy trên luồng script vì dùng dữ liệu của tiến trình Streamlit (Tab 2:
+    # bộ nhớ đệm lộ trình, lớp ùn tắc, các ô bản đồ tỉnh đã nạp). Hạn chót và thanh tiến độ được kiểm tra
+    # ở các điểm bao_tien_do trong vòng tìm kiếm; bấm lại giữa chừng thì Streamlit dừng lượt cũ tại đó.
+    thanh = st.progress(0.0, text=f"{ten}: đang bắt đầu ...")
+
+    def khi_tien_do(ti_le, thong_diep, so_giay):
+        thanh.progress(min(1.0, ti_le if ti_le is not None else so_giay / han_chot),
+                       text=f"{ten}: {thong_diep or 'đang chạy'} · {so_giay:.1f}/{han_chot:g} s")
+
+    try:
+        with thuc_thi.han_chot_tai_cho(han_chot, khi_tien_do):
+            return ham()
+    finally:
+        thanh.empty()
 
 
 # -----------------------------------------------------------------------------
@@ -255,90 +419,148 @@ with tab_ly_thuyet:
 
         mac_dinh = "A B 4\nA C 2\nB C 5\nB D 10\nC E 3\nD F 11\nE D 4\nC D 1"
         du_lieu_nhap = st.text_area("Nhập danh sách cạnh (u v w):", mac_dinh, height=150)
+        # Tệp lớn: đọc theo khối, trọng số thực, báo lỗi theo số dòng (ưu tiên hơn ô nhập tay)
+        tep_canh = st.file_uploader("Hoặc tải tệp danh sách cạnh (.txt, .csv, .tsv, có thể nén .gz):",
+                                    type=["txt", "csv", "tsv", "gz"])
 
-        c_nut_tao, c_nut_luu = st.columns([1, 1])
+        c_nut_tao, c_dinh_dang, c_nut_luu = st.columns([1, 0.8, 1])
         with c_nut_tao:
             if st.button("🚀 Khởi tạo", use_container_width=True):
                 try:
-                    G_moi = nx.DiGraph() if co_huong else nx.Graph()
-                    for dong in du_lieu_nhap.split('\n'):
-                        phan = dong.split()
-                        if len(phan) >= 2:
-                            u, v = phan[0], phan[1]
-                            
-                            if co_trong_so_input:
-                                # Nếu chọn có trọng số: Cố gắng lấy số thứ 3, không có thì mặc định 1
-                                trong_so = int(phan[2]) if len(phan) > 2 else 1
-                                G_moi.add_edge(u, v, weight=trong_so)
-                            else:
-                                # Nếu chọn không trọng số: Chỉ thêm cạnh, KHÔNG thêm thuộc tính weight
-                                G_moi.add_edge(u, v)
-                            # --------------------------
-
-                    st.session_state['do_thi'] = G_moi
-                    st.session_state['log_text'] = "Đã khởi tạo đồ thị mới.\n"  # Reset log
-                    st.success("Tạo thành công!")
-                except ValueError:
-                    st.error("Lỗi: Trọng số phải là số nguyên!")
+                    nguon = tep_canh if tep_canh is not None else io.StringIO(du_lieu_nhap)
+                    ket_qua_nhap = danh_sach_canh.doc_danh_sach_canh(nguon, co_huong=co_huong,
+                                                                     co_trong_so=co_trong_so_input)
+                    # Chỉ áp dụng phần khác so với đồ thị hiện tại; đổi quá nhiều thì dựng lại
+                    phien = st.session_state['do_thi_phien']
+                    so_them, so_xoa, so_doi, dung_lai = phien.dong_bo(ket_qua_nhap.do_thi)
+                    st.session_state['do_thi'] = phien.do_thi
+                    if dung_lai:
+                        st.session_state['log_text'] = "Đã khởi tạo đồ thị mới.\n"  # Reset log
+                    else:
+                        st.session_state['log_text'] = (f"Đã cập nhật đồ thị: +{so_them} / -{so_xoa} cạnh, "
+                                                        f"{so_doi} cạnh đổi trọng số.\n")
+                    st.success(f"Tạo thành công! ({ket_qua_nhap.so_canh_doc} cạnh hợp lệ)")
+                    if ket_qua_nhap.so_loi:
+                        st.warning(f"Bỏ qua {ket_qua_nhap.so_loi} dòng lỗi.")
+                        st.dataframe(pd.DataFrame(ket_qua_nhap.cac_loi, columns=["Dòng", "Nội dung", "Lỗi"]),
+                                     height=150, use_container_width=True, hide_index=True)
                 except Exception as e:
                     st.error(f"Lỗi dữ liệu: {e}")
 
+        with c_dinh_dang:
+            dinh_dang_luu = st.selectbox("Định dạng:", ["txt", "csv", "tsv", "txt.gz", "csv.gz", "tsv.gz"],
+                                         label_visibility="collapsed")
         with c_nut_luu:
+            if st.session_state['do_thi'].number_of_edges() > 0:
+                du_lieu_luu = xuat_danh_sach_canh(st.session_state['do_thi_phien'].dau_van_tay,
+                                                  st.session_state['do_thi'], dinh_dang_luu)
+                ten_tep_luu = f"graph_data.{dinh_dang_luu}"
+            else:
+                # Chưa khởi tạo: lưu nguyên nội dung ô nhập như trước
+                du_lieu_luu, ten_tep_luu = du_lieu_nhap, "graph_data.txt"
             st.download_button(
-                label="💾 Lưu đồ thị (.txt)",
-                data=du_lieu_nhap,
-                file_name="graph_data.txt",
-                mime="text/plain",
+                label="💾 Lưu đồ thị",
+                data=du_lieu_luu,
+                file_name=ten_tep_luu,
+                mime="application/gzip" if ten_tep_luu.endswith(".gz") else "text/plain",
                 use_container_width=True
             )
 
+        # Sửa từng cạnh trên đồ thị đang có: các tính chất được cập nhật gia tăng, không dựng lại
+        c_canh_sua, c_nut_them, c_nut_xoa = st.columns([1.6, 1, 1])
+        canh_sua = c_canh_sua.text_input("Cạnh (u v w):", placeholder="A F 7", label_visibility="collapsed")
+        thao_tac_sua = None
+        if c_nut_them.button("➕ Thêm cạnh", use_container_width=True):
+            thao_tac_sua = "them"
+        if c_nut_xoa.button("➖ Xoá cạnh", use_container_width=True):
+            thao_tac_sua = "xoa"
+        if thao_tac_sua:
+            phan = canh_sua.split()
+            phien = st.session_state['do_thi_phien']
+            if len(phan) < 2:
+                st.error("Nhập cạnh dạng: u v [w]")
+            elif thao_tac_sua == "xoa":
+                if phien.xoa_canh(phan[0], phan[1]):
+                    st.session_state['log_text'] = f"Đã xoá cạnh {phan[0]} - {phan[1]}.\n"
+                else:
+                    st.warning(f"Không có cạnh {phan[0]} - {phan[1]}.")
+            else:
+                try:
+                    w = (float(phan[2]) if len(phan) > 2 else 1) if co_trong_so_input else None
+                    if w is not None and w == int(w):
+                        w = int(w)
+                    if phien.them_canh(phan[0], phan[1], w):
+                        st.session_state['log_text'] = f"Đã thêm cạnh {phan[0]} - {phan[1]}.\n"
+                except ValueError:
+                    st.error("Trọng số không phải là số")
+            st.session_state['do_thi'] = phien.do_thi
+
     with cot_phai:
         if len(st.session_state['do_thi']) > 0:
             ve_do_thi_ly_thuyet(st.session_state['do_thi'], tieu_de="Hình ảnh trực quan")
+            tk_phien = st.session_state['do_thi_phien'].thong_ke()
+            st.caption(f"Phiên bản {tk_phien['phien_ban']} · {tk_phien['so_thanh_phan']} thành phần liên thông · "
+                       f"{tk_phien['so_dinh_bac_le']} đỉnh bậc lẻ/lệch bậc · tính chất dùng lại "
+                       f"{tk_phien['so_lan_trung']}/{tk_phien['so_lan_trung'] + tk_phien['so_lan_tinh']} lần")
 
     if len(st.session_state['do_thi']) > 0:
         st.divider()
+        # Quy mô đồ thị gắn vào mỗi lần đo hiệu năng của các nút thuật toán
+        quy_mo = {"so_dinh": st.session_state['do_thi'].number_of_nodes(),
+                  "so_canh": st.session_state['do_thi'].number_of_edges()}
         c1, c2, c3 = st.columns(3)
 
         with c1:
             st.info("1. Biểu diễn dữ liệu ")
             dang_xem = st.selectbox("Chọn cách xem:", ["Ma trận kề", "Danh sách kề", "Danh sách cạnh"])
 
+            do_thi = st.session_state['do_thi']
+            phien = st.session_state['do_thi_phien']
             if dang_xem == "Ma trận kề":
-                df = pd.DataFrame(nx.adjacency_matrix(st.session_state['do_thi']).todense(),
-                                  index=st.session_state['do_thi'].nodes(),
-                                  columns=st.session_state['do_thi'].nodes())
-                st.dataframe(df, height=200, use_container_width=True)
+                A, cac_nut = ma_tran_ke_thua(phien.dau_van_tay, do_thi)
+                if A.shape[0] <= NGUONG_MA_TRAN_DAY:
+                    st.dataframe(bieu_dien.cua_so_ma_tran(A, cac_nut, 0, 0, A.shape[0]), height=200,
+                                 use_container_width=True)
+                else:
+                    # Đồ thị lớn: tổng quan + một cửa sổ KICH_THUOC_TRANG x KICH_THUOC_TRANG, không dựng bảng dày
+                    tom_tat = bieu_dien.tom_tat_ma_tran(A)
+                    st.caption(f"{tom_tat['so_dinh']} đỉnh, {tom_tat['so_phan_tu_khac_0']} phần tử khác 0, "
+                               f"mật độ {tom_tat['mat_do']:.2e}; bậc {tom_tat['bac_nho_nhat']} - "
+                               f"{tom_tat['bac_lon_nhat']} (TB {tom_tat['bac_trung_binh']:.2f}); "
+                               f"CSR {tom_tat['bo_nho_csr'] / 1e6:.2f} MB thay vì {tom_tat['bo_nho_day'] / 1e9:.2f} GB")
+                    st.bar_chart(tom_tat['phan_bo_bac'], height=150)
+                    c_hang, c_cot = st.columns(2)
+                    hang_dau = c_hang.number_input("Từ hàng:", 0, A.shape[0] - 1, 0, step=KICH_THUOC_TRANG)
+                    cot_dau = c_cot.number_input("Từ cột:", 0, A.shape[0] - 1, 0, step=KICH_THUOC_TRANG)
+                    st.dataframe(bieu_dien.cua_so_ma_tran(A, cac_nut, int(hang_dau), int(cot_dau), KICH_THUOC_TRANG),
+                                 height=200, use_container_width=True)
+
+                c_mtx, c_npz = st.columns(2)
+                dau_van_tay = phien.dau_van_tay
+                c_mtx.download_button("💾 Matrix Market", data=xuat_ma_tran_ke(dau_van_tay, do_thi, "mtx"),
+                                      file_name="ma_tran_ke.mtx", mime="text/plain", use_container_width=True)
+                c_npz.download_button("💾 NPZ", data=xuat_ma_tran_ke(dau_van_tay, do_thi, "npz"),
+                                      file_name="ma_tran_ke.npz", mime="application/octet-stream",
+                                      use_container_width=True)
 
             elif dang_xem == "Danh sách kề":
-                adj_raw = nx.to_dict_of_dicts(st.session_state['do_thi'])
-                table_data = []
-                for node, neighbors in adj_raw.items():
-                    # Hiển thị trọng số nếu có, không thì để trống
-                    neighbors_str = ", ".join([f"{n} (w={w.get('weight', 'N/A')})" for n, w in neighbors.items()])
-                    table_data.append({"Đỉnh nguồn": node, "Các đỉnh kề & Trọng số": neighbors_str})
-
-                if table_data:
-                    st.dataframe(pd.DataFrame(table_data), height=200, use_container_width=True, hide_index=True)
+                dau = chon_trang(do_thi.number_of_nodes(), "trang_danh_sach_ke")
+                bang = bieu_dien.trang_danh_sach_ke(do_thi, dau, KICH_THUOC_TRANG)
+                if not bang.empty:
+                    st.dataframe(bang, height=200, use_container_width=True, hide_index=True)
                 else:
                     st.warning("Đồ thị trống.")
 
             else:
-                data_canh = []
-                for u, v, data in st.session_state['do_thi'].edges(data=True):
-                    data_canh.append({
-                        "Đỉnh đầu": u,
-                        "Đỉnh cuối": v,
-                        "Trọng số": data.get('weight', 'Không có') # Hiển thị 'Không có' nếu không trọng số
-                    })
-
-                if data_canh:
-                    st.dataframe(pd.DataFrame(data_canh), height=200, use_container_width=True, hide_index=True)
+                dau = chon_trang(do_thi.number_of_edges(), "trang_danh_sach_canh")
+                bang = bieu_dien.trang_danh_sach_canh(do_thi, dau, KICH_THUOC_TRANG)
+                if not bang.empty:
+                    st.dataframe(bang, height=200, use_container_width=True, hide_index=True)
                 else:
                     st.warning("Đồ thị chưa có cạnh nào.")
 
             if st.button("Kiểm tra 2 phía"):
-                kq = nx.is_bipartite(st.session_state['do_thi'])
+                kq = st.session_state['do_thi_phien'].la_hai_phia()
                 st.write(f"Kết quả: {'✅ Có' if kq else '❌ Không'}")
 
         with c2:
@@ -351,38 +573,59 @@ with tab_ly_thuyet:
             with c2a:
                 if st.button("Chạy BFS"):
                     try:
-                        edges_bfs = list(nx.bfs_tree(st.session_state['do_thi'], nut_bat_dau).edges())
-                        st.session_state[
-                            'log_text'] = f"--- BFS từ {nut_bat_dau} ---\nThứ tự duyệt: {edges_bfs}\n"  # Log trace
-                        ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=edges_bfs, tieu_de="Duyệt BFS")
+                        with bat_dau_do("BFS", "tab1", **quy_mo) as lan_do:
+                            with lan_do.giai_doan("thuat_toan") as ban_ghi:
+                                edges_bfs = st.session_state['do_thi_phien'].cay_bfs(nut_bat_dau)
+                                ban_ghi["so_nut_da_duyet"] = len(edges_bfs) + 1
+                            st.session_state['log_text'] = (f"--- BFS từ {nut_bat_dau} ---\n"
+                                                            f"{len(edges_bfs)} cạnh cây, xem từng bước bên dưới.\n")
+                            bat_dau_vet(f"BFS từ {nut_bat_dau}", lambda G=st.session_state['do_thi'], s=nut_bat_dau:
+                                        vet_duyet.buoc_bfs(G, s))
+                            with lan_do.giai_doan("ve_do_thi"):
+                                ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=edges_bfs,
+                                                    tieu_de="Duyệt BFS")
                     except:
                         st.error("Lỗi chạy BFS")
             with c2b:
                 if st.button("Chạy DFS"):
                     try:
-                        edges_dfs = list(nx.dfs_tree(st.session_state['do_thi'], nut_bat_dau).edges())
-                        st.session_state[
-                            'log_text'] = f"--- DFS từ {nut_bat_dau} ---\nThứ tự duyệt: {edges_dfs}\n"  # Log trace
-                        ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=edges_dfs, tieu_de="Duyệt DFS")
+                        with bat_dau_do("DFS", "tab1", **quy_mo) as lan_do:
+                            with lan_do.giai_doan("thuat_toan") as ban_ghi:
+                                edges_dfs = st.session_state['do_thi_phien'].cay_dfs(nut_bat_dau)
+                                ban_ghi["so_nut_da_duyet"] = len(edges_dfs) + 1
+                            st.session_state['log_text'] = (f"--- DFS từ {nut_bat_dau} ---\n"
+                                                            f"{len(edges_dfs)} cạnh cây, xem từng bước bên dưới.\n")
+                            bat_dau_vet(f"DFS từ {nut_bat_dau}", lambda G=st.session_state['do_thi'], s=nut_bat_dau:
+                                        vet_duyet.buoc_dfs(G, s))
+                            with lan_do.giai_doan("ve_do_thi"):
+                                ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=edges_dfs,
+                                                    tieu_de="Duyệt DFS")
                     except:
                         st.error("Lỗi chạy DFS")
 
             if st.button("Chạy Dijkstra"):
                 try:
-                    # Nếu đồ thị không có trọng số, Dijkstra sẽ coi như trọng số = 1 (mặc định của NetworkX)
-                    duong_ngan_nhat = nx.shortest_path(st.session_state['do_thi'], nut_bat_dau, nut_ket_thuc,
-                                                       weight='weight')
-                    try:
-                        chi_phi = nx.shortest_path_length(st.session_state['do_thi'], nut_bat_dau, nut_ket_thuc,
-                                                        weight='weight')
-                    except:
-                        chi_phi = len(duong_ngan_nhat) - 1 # Fallback nếu không tính được length theo weight
-
-                    st.session_state[
-                        'log_text'] = f"--- Dijkstra ({nut_bat_dau} -> {nut_ket_thuc}) ---\nĐường đi: {duong_ngan_nhat}\nTổng trọng số: {chi_phi}\n"  # Log trace
-                    ve_do_thi_ly_thuyet(st.session_state['do_thi'], duong_di=duong_ngan_nhat,
-                                        tieu_de=f"Đường đi ngắn nhất (Dijkstra) - W={chi_phi}")
-                except:
+                    with bat_dau_do("Dijkstra", "tab1", **quy_mo) as lan_do:
+                        with lan_do.giai_doan("thuat_toan") as ban_ghi:
+                            # Nếu đồ thị không có trọng số, Dijkstra sẽ coi như trọng số = 1 (mặc định của NetworkX).
+                            # Một lượt cho cả đường đi lẫn tổng trọng số, chạy trong tiến trình con
+                            # so_nut_da_duyet và số liệu của tiến trình con được ghi thẳng vào ban_ghi
+                            chi_phi, duong_ngan_nhat = chay_nen("Dijkstra", functools.partial(
+                                vet_duyet.dijkstra_dem_nut_chot, nguon=nut_bat_dau, dich=nut_ket_thuc),
+                                lan_do=lan_do, ban_ghi=ban_ghi, chung=do_thi_chung())
+
+                        st.session_state['log_text'] = (f"--- Dijkstra ({nut_bat_dau} -> {nut_ket_thuc}) ---\n"
+                                                        f"Đường đi: {vet_duyet.rut_gon(duong_ngan_nhat)}\n"
+                                                        f"Tổng trọng số: {chi_phi}\n")
+                        bat_dau_vet(f"Dijkstra ({nut_bat_dau} -> {nut_ket_thuc})",
+                                    lambda G=st.session_state['do_thi'], s=nut_bat_dau, t=nut_ket_thuc:
+                                    vet_duyet.buoc_dijkstra(G, s, t))
+                        with lan_do.giai_doan("ve_do_thi"):
+                            ve_do_thi_ly_thuyet(st.session_state['do_thi'], duong_di=duong_ngan_nhat,
+                                                tieu_de=f"Đường đi ngắn nhất (Dijkstra) - W={chi_phi}")
+                except thuc_thi.HetHan as e:
+                    st.error(f"Dijkstra: {e}, đã dừng.")
+                except Exception:
                     st.error("Không tìm thấy đường đi!")
 
         with c3:
@@ -391,50 +634,67 @@ with tab_ly_thuyet:
 
             with cot_k1:
                 if st.button(" Prim"):
-                    if not co_huong and nx.is_connected(st.session_state['do_thi']):
-                        cay = nx.minimum_spanning_tree(st.session_state['do_thi'], algorithm='prim')
-                        w_cay = cay.size(weight='weight') # Sẽ trả về số cạnh nếu không có trọng số
-                        st.session_state[
-                            'log_text'] = f"--- Prim MST ---\nCác cạnh trong cây khung: {list(cay.edges())}\nTổng trọng số: {w_cay}\n"  # Log trace
-                        ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=list(cay.edges()),
-                                            tieu_de=f"Prim MST (W={w_cay})")
+                    phien = st.session_state['do_thi_phien']
+                    if not phien.co_huong and phien.lien_thong():
+                        with bat_dau_do("Prim", "tab1", **quy_mo) as lan_do:
+                            with lan_do.giai_doan("thuat_toan") as ban_ghi:
+                                # Cây khung nhỏ nhất được duy trì gia tăng qua các lần sửa cạnh
+                                canh_cay, w_cay = phien.cay_khung()
+                                cay = nx.Graph(canh_cay)
+                                ban_ghi["so_canh_ket_qua"] = cay.number_of_edges()
+                            st.session_state['log_text'] = (f"--- Prim MST ---\n{len(canh_cay)} cạnh trong "
+                                                            f"cây khung, tổng trọng số: {w_cay}\n")
+                            bat_dau_vet("Prim MST", lambda c=canh_cay: vet_duyet.buoc_canh(c, "canh_cay"))
+                            with lan_do.giai_doan("ve_do_thi"):
+                                ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=list(cay.edges()),
+                                                    tieu_de=f"Prim MST (W={w_cay})")
                     else:
                         st.error("Lỗi: Chỉ áp dụng cho đồ thị Vô hướng & Liên thông")
             with cot_k2:
                 if st.button(" Kruskal"):
-                    if not co_huong and nx.is_connected(st.session_state['do_thi']):
-                        cay = nx.minimum_spanning_tree(st.session_state['do_thi'], algorithm='kruskal')
-                        w_cay = cay.size(weight='weight')
-                        st.session_state[
-                            'log_text'] = f"--- Kruskal MST ---\nCác cạnh trong cây khung: {list(cay.edges())}\nTổng trọng số: {w_cay}\n"  # Log trace
-                        ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=list(cay.edges()),
-                                            tieu_de=f"Kruskal MST (W={w_cay})")
+                    phien = st.session_state['do_thi_phien']
+                    if not phien.co_huong and phien.lien_thong():
+                        with bat_dau_do("Kruskal", "tab1", **quy_mo) as lan_do:
+                            with lan_do.giai_doan("thuat_toan") as ban_ghi:
+                                # Cây khung nhỏ nhất được duy trì gia tăng qua các lần sửa cạnh
+                                canh_cay, w_cay = phien.cay_khung()
+                                cay = nx.Graph(canh_cay)
+                                ban_ghi["so_canh_ket_qua"] = cay.number_of_edges()
+                            st.session_state['log_text'] = (f"--- Kruskal MST ---\n{len(canh_cay)} cạnh trong "
+                                                            f"cây khung, tổng trọng số: {w_cay}\n")
+                            bat_dau_vet("Kruskal MST", lambda c=canh_cay: vet_duyet.buoc_canh(c, "canh_cay"))
+                            with lan_do.giai_doan("ve_do_thi"):
+                                ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=list(cay.edges()),
+                                                    tieu_de=f"Kruskal MST (W={w_cay})")
                     else:
                         st.error("Lỗi: Chỉ áp dụng cho đồ thị Vô hướng & Liên thông")
 
+            cac_thuat_toan_luong = list(luong_cuc_dai.CAC_THUAT_TOAN)
+            thuat_toan_luong = st.selectbox("Thuật toán luồng cực đại:", cac_thuat_toan_luong,
+                                            index=cac_thuat_toan_luong.index(luong_cuc_dai.MAC_DINH))
             if st.button("Ford-Fulkerson"):
                 is_directed_actual = st.session_state['do_thi'].is_directed()
                 if is_directed_actual:
                     try:
-                        # Ford-Fulkerson cần capacity, ta lấy weight làm capacity
-                        # Nếu không có weight (không trọng số), ta gán capacity = 1 tạm thời để chạy
-                        G_ff = st.session_state['do_thi'].copy()
-                        if not co_trong_so_input:
-                             nx.set_edge_attributes(G_ff, 1, 'weight')
-
-                        val, flow_dict = nx.maximum_flow(G_ff, nut_bat_dau, nut_ket_thuc,
-                                                         capacity='weight')
-                        canh_luong = []
-                        log_flow = ""
-                        for u in flow_dict:
-                            for v, f in flow_dict[u].items():
-                                if f > 0:
-                                    canh_luong.append((u, v))
-                                    log_flow += f"({u}->{v}: {f}), "
-                        st.session_state[
-                            'log_text'] = f"--- Ford-Fulkerson ---\nLuồng cực đại: {val}\nChi tiết luồng: {log_flow}\n"  # Log trace
-                        ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=canh_luong,
-                                            tieu_de=f"Luồng cực đại: {val}")
+                        # Sức chứa lấy từ weight; đồ thị không trọng số thì mọi cạnh có sức chứa 1.
+                        # Thuật toán chạy trên mảng thặng dư riêng, không sửa đồ thị mà tiến trình con giữ lại
+                        with bat_dau_do(f"Ford-Fulkerson ({thuat_toan_luong})", "tab1", thuat_toan=thuat_toan_luong,
+                                        **quy_mo) as lan_do:
+                            with lan_do.giai_doan("thuat_toan") as ban_ghi:
+                                kq_luong = chay_nen("Ford-Fulkerson", functools.partial(
+                                    luong_cuc_dai.luong_cuc_dai, nguon=nut_bat_dau, dich=nut_ket_thuc,
+                                    thuat_toan=thuat_toan_luong, capacity='weight' if co_trong_so_input else None),
+                                    lan_do=lan_do, ban_ghi=ban_ghi, chung=do_thi_chung())
+                                canh_luong = kq_luong.cac_canh_co_luong()
+                                ban_ghi["so_canh_ket_qua"] = len(canh_luong)
+                                ban_ghi["so_canh_cat"] = len(kq_luong.chi_so_cat())
+                            # Tóm tắt gọn (lát cắt, các cạnh luồng lớn nhất) thay cho toàn bộ flow_dict
+                            st.session_state['log_text'] = f"--- Ford-Fulkerson ---\n{kq_luong.tom_tat()}"  # Log trace
+                            bat_dau_vet(f"Ford-Fulkerson ({thuat_toan_luong})",
+                                        lambda kq=kq_luong: vet_duyet.buoc_luong(kq))
+                            with lan_do.giai_doan("ve_do_thi"):
+                                ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=canh_luong,
+                                                    tieu_de=f"Luồng cực đại: {kq_luong.gia_tri}")
                     except Exception as e:
                         st.error(f"Lỗi: {e}")
                 else:
@@ -445,55 +705,95 @@ with tab_ly_thuyet:
 
             with col_fleury:
                 if st.button("Fleury"):
-                    if st.session_state['do_thi'].is_directed():
-                        st.error("Fleury cơ bản chỉ áp dụng cho VÔ HƯỚNG.")
-                    elif not nx.is_connected(st.session_state['do_thi']):
-                        st.error("Đồ thị phải liên thông!")
+                    # Điều kiện bậc đã có sẵn (O(1)); tính liên thông của các cạnh được kiểm tra trong thuat_toan_fleury
+                    loi_bac = st.session_state['do_thi_phien'].loi_bac_euler()
+                    if loi_bac:
+                        st.error(loi_bac)
                     else:
-                        with st.spinner("Đang chạy Fleury ..."):
-                            ds_canh, msg = thuat_toan_fleury(st.session_state['do_thi'])
-                            if ds_canh:
-                                st.session_state[
-                                    'log_text'] = f"--- Fleury ---\nChu trình/Đường đi Euler: {ds_canh}\n"  # Log trace
-                                st.info(f"Kết quả Fleury: {ds_canh}")
-                                ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=ds_canh,
-                                                    tieu_de="Fleury")
-                            else:
-                                st.error(msg)
+                        try:
+                            with bat_dau_do("Fleury", "tab1", **quy_mo) as lan_do:
+                                with lan_do.giai_doan("thuat_toan") as ban_ghi:
+                                    ds_canh, msg = chay_nen("Fleury", thuat_toan_fleury, lan_do=lan_do,
+                                                            ban_ghi=ban_ghi, chung=do_thi_chung())
+                                    ban_ghi["so_canh_ket_qua"] = len(ds_canh or [])
+                                if ds_canh:
+                                    st.session_state['log_text'] = (f"--- Fleury ---\nChu trình/Đường đi Euler: "
+                                                                    f"{len(ds_canh)} cạnh, xem từng bước bên dưới.\n")
+                                    st.info(f"Kết quả Fleury: {vet_duyet.rut_gon(ds_canh)}")
+                                    # Dùng lại kết quả từ tiến trình con: chạy lại thuật toán để đọc vết
+                                    # sẽ chặn luồng script đúng như lúc chưa có việc nền
+                                    bat_dau_vet("Fleury", lambda c=ds_canh: vet_duyet.buoc_canh(c))
+                                    with lan_do.giai_doan("ve_do_thi"):
+                                        ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=ds_canh,
+                                                            tieu_de="Fleury")
+                                else:
+                                    st.error(msg)
+                        except thuc_thi.HetHan as e:
+                            st.error(f"Fleury: {e}, đã dừng.")
+                        except Exception as e:
+                            # vd. tiến trình con bị dừng bất thường (thiếu bộ nhớ)
+                            st.error(f"Lỗi: {e}")
 
             with col_hierholzer:
                 if st.button("Hierholzer"):
                     try:
-                        if nx.is_eulerian(st.session_state['do_thi']):
-                            ct = list(nx.eulerian_circuit(st.session_state['do_thi']))
-                            ds_canh = [(u, v) for u, v in ct]
-                            st.session_state[
-                                'log_text'] = f"--- Hierholzer ---\nChu trình Euler: {ds_canh}\n"  # Log trace
-                            st.success(f"Chu trình Euler (Hierholzer): {ds_canh}")
-                            ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=ds_canh,
-                                                tieu_de="Hierholzer Circuit")
-                        else:
-                            st.warning("Hierholzer chỉ tìm CHU TRÌNH (Circuit). Đồ thị này không có chu trình Euler.")
+                        with bat_dau_do("Hierholzer", "tab1", **quy_mo) as lan_do:
+                            with lan_do.giai_doan("thuat_toan") as ban_ghi:
+                                co_chu_trinh = st.session_state['do_thi_phien'].la_euler()
+                                if co_chu_trinh:
+                                    ds_canh = chay_nen("Hierholzer", chu_trinh_hierholzer, lan_do=lan_do,
+                                                       ban_ghi=ban_ghi, chung=do_thi_chung())
+                                    ban_ghi["so_canh_ket_qua"] = len(ds_canh)
+                            if co_chu_trinh:
+                                st.session_state['log_text'] = (f"--- Hierholzer ---\nChu trình Euler: "
+                                                                f"{len(ds_canh)} cạnh, xem từng bước bên dưới.\n")
+                                st.success(f"Chu trình Euler (Hierholzer): {vet_duyet.rut_gon(ds_canh)}")
+                                bat_dau_vet("Hierholzer", lambda c=ds_canh: vet_duyet.buoc_canh(c))
+                                with lan_do.giai_doan("ve_do_thi"):
+                                    ve_do_thi_ly_thuyet(st.session_state['do_thi'], danh_sach_canh=ds_canh,
+                                                        tieu_de="Hierholzer Circuit")
+                            else:
+                                st.warning("Hierholzer chỉ tìm CHU TRÌNH (Circuit). Đồ thị này không có chu trình Euler.")
                     except Exception as e:
                         st.error(f"Lỗi: {e}")
 
     if len(st.session_state['do_thi']) > 0:
         st.divider()
         st.subheader("📜 Log chạy thuật toán")
-        st.markdown(f'<div class="khung-log">{st.session_state["log_text"]}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="khung-log">{html.escape(st.session_state["log_text"])}</div>', unsafe_allow_html=True)
+        ve_vet_duyet()
+
+    ve_bang_hieu_nang("tab1")
 
 # =============================================================================
 # TAB 2: BẢN ĐỒ PLEIKU
 # =============================================================================
 with tab_ban_do:
-    @st.cache_resource
-    def tai_ban_do_pleiku():
-        return ox.graph_from_point((13.9800, 108.0000), dist=3200, network_type='drive')
+    # Ưu tiên snapshot cục bộ (python -m dan_duong.ban_do build); PLEIKU_OFFLINE=1 cấm tải từ Overpass
+    THU_MUC_SNAPSHOT = os.environ.get("PLEIKU_SNAPSHOT", ban_do.THU_MUC_MAC_DINH)
+    CHE_DO_OFFLINE = os.environ.get("PLEIKU_OFFLINE", "0") == "1"
 
+    @st.cache_resource
+    def tai_bo_dan_duong():
+        # Bản đồ, CSR, bảng cạnh, chỉ mục không gian, danh bạ, phân cấp co và hai bộ nhớ đệm (geocode,
+        # lộ trình) nạp một lần cho cả tiến trình; mọi phiên Streamlit dùng chung
+        return BoDanDuong.tai(
+            THU_MUC_SNAPSHOT, offline=CHE_DO_OFFLINE,
+            tep_geocode=os.environ.get("PLEIKU_GEOCODE_CACHE", dia_danh.TEP_BO_NHO_GEOCODE),
+            suc_chua_lo_trinh=int(os.environ.get("PLEIKU_ROUTE_CACHE_SIZE", bo_nho_lo_trinh.SUC_CHUA_MAC_DINH)),
+            # Bộ ô cả tỉnh (python -m dan_duong.o_ban_do build) là tuỳ chọn; không có thì chỉ tìm trong TP
+            thu_muc_o=os.environ.get("PLEIKU_TILES", o_ban_do.THU_MUC_MAC_DINH),
+            so_o_toi_da=int(os.environ.get("PLEIKU_TILE_CACHE_SIZE", o_ban_do.SO_O_TOI_DA)))
+
+
+    MAU_LO_TRINH_THAY_THE = ["#16A085", "#D35400"]
+    # Xanh (gần) -> đỏ (xa); n vành lấy n màu cách đều trên dải này
+    MAU_VANH_DANG_THOI = ["#1A9850", "#66BD63", "#A6D96A", "#D9EF8B", "#FFFFBF",
+                          "#FEE08B", "#FDAE61", "#F46D43", "#D73027", "#A50026"]
 
     with st.spinner("Đang tải dữ liệu bản đồ TP. Pleiku (bạn chờ xíu ...)"):
         try:
-            Do_thi_Pleiku = tai_ban_do_pleiku()
+            Bo_dan_duong = tai_bo_dan_duong()
             st.success("✅ Đã tải xong bản đồ!")
         except:
             st.error("Lỗi tải bản đồ, vui lòng thử lại!")
@@ -508,76 +808,131 @@ with tab_ban_do:
         start_query = c1.text_input("📍 Điểm xuất phát:", value="Quảng trường Đại Đoàn Kết")
         end_query = c2.text_input("🏁 Điểm đến:", value="Sân bay Pleiku")
 
-        thuat_toan_tim_duong = c3.selectbox("Thuật toán:", ["Dijkstra", "BFS", "DFS"])
+        thuat_toan_tim_duong = c3.selectbox("Thuật toán:", Bo_dan_duong.cac_thuat_toan())
+        muc_tieu = c3.selectbox("Tối ưu theo:", list(CAC_MUC_TIEU), format_func=CAC_MUC_TIEU.get,
+                                help="Thời gian theo maxspeed / loại đường (và lớp ùn tắc nếu có); "
+                                     "ưu tiên: đường không tên tốn gấp đôi, mỗi nút giao phạt thêm vài giây")
+        so_lo_trinh = c3.select_slider("Số lộ trình gợi ý:", options=[1, 2, 3], value=1,
+                                       help="Thêm lộ trình thay thế: không vòng vèo, không dài hơn 40% và "
+                                            "trùng không quá 60% với các lộ trình khác")
         nut_tim_duong = st.form_submit_button("🚀 TÌM ĐƯỜNG NGAY", type="primary", use_container_width=True)
 
+    lan_do = None  # chỉ đo khi vừa bấm tìm đường, không đo các lần vẽ lại do widget khác
     if nut_tim_duong:
-        with st.spinner(f"Đang tìm vị trí '{start_query}' và '{end_query}' trên bản đồ..."):
+        with st.spinner(f"Đang tìm vị trí '{start_query}' và '{end_query}' trên bản đồ..."), \
+                bat_dau_do(f"Tìm đường ({thuat_toan_tim_duong})", "tab2", thuat_toan=thuat_toan_tim_duong,
+                           muc_tieu=muc_tieu) as lan_do:
             try:
                 try:
-                    q_start = start_query if "Gia Lai" in start_query else f"{start_query}, Gia Lai, Viet Nam"
-                    q_end   = end_query   if "Gia Lai" in end_query   else f"{end_query}, Gia Lai, Viet Nam"
-
-
-                    # ox.geocode trả về (lat, lon)
-                    start_point = ox.geocode(q_start)
-                    end_point = ox.geocode(q_end)
+                    # tim_toa_do trả về (lat, lon); hai điểm được tra đồng thời, chờ chung một hạn chót
+                    with lan_do.giai_doan("geocode"):
+                        start_point, end_point = tai_bo_thuc_thi().chay_io(
+                            lambda q=start_query: Bo_dan_duong.tim_toa_do(q),
+                            lambda q=end_query: Bo_dan_duong.tim_toa_do(q),
+                            han_chot=HAN_CHOT_GEOCODE)
+                except thuc_thi.HetHan:
+                    st.error(f"❌ Dịch vụ tìm địa điểm không trả lời sau {HAN_CHOT_GEOCODE:g} giây, hãy thử lại.")
+                    st.stop()
+                except dia_danh.NhieuUngVien as e:
+                    # Chỉ có tên gần đúng: cho người dùng chọn lại thay vì dẫn tới một địa điểm khác
+                    st.error(f"❌ {e}. Hãy nhập lại đúng một trong các tên trên.")
+                    st.stop()
                 except Exception:
                     st.error("❌ Không tìm thấy địa điểm! Hãy thử nhập tên cụ thể hơn.")
                     st.stop()
-                nut_goc = ox.distance.nearest_nodes(Do_thi_Pleiku, start_point[1], start_point[0])
-                nut_dich = ox.distance.nearest_nodes(Do_thi_Pleiku, end_point[1], end_point[0])
-
-                # 3. CHẠY THUẬT TOÁN
-                duong_di = []
+                # Chuyến có đầu mút ngoài bản đồ thành phố: tìm trên bộ ô cả tỉnh (nếu đã dựng)
+                dung_ban_do_tinh = Bo_dan_duong.can_ban_do_tinh(start_point, end_point)
+                if not dung_ban_do_tinh:
+                    # Chiếu cả hai điểm lên cạnh gần nhất; lộ trình bắt đầu / kết thúc ngay tại điểm chiếu
+                    # (phần cạnh đi dở được tính vào quãng đường) thay vì ở nút gần nhất
+                    with lan_do.giai_doan("gan_vao_do_thi"):
+                        cac_nguon = Bo_dan_duong.gan_diem_tren_canh([start_point], "nguon")[0]
+                        cac_dich = Bo_dan_duong.gan_diem_tren_canh([end_point], "dich")[0]
+
+                # 3. CHẠY THUẬT TOÁN (trên mảng CSR, kết quả ánh xạ ngược về id OSM).
+                # Chuyến đã có người hỏi (ở bất kỳ phiên nào) được lấy thẳng từ bộ nhớ đệm lộ trình.
                 try:
-                    if "Dijkstra" in thuat_toan_tim_duong:
-                        duong_di = nx.shortest_path(Do_thi_Pleiku, nut_goc, nut_dich, weight='length')
+                    if dung_ban_do_tinh:
+                        st.info("🗺️ Chuyến đi ra ngoài bản đồ TP. Pleiku: tìm bằng A* trên bản đồ cả tỉnh, "
+                                "chỉ nạp các ô bản đồ mà lượt tìm kiếm đi qua.")
+
+                    elif thuat_toan_tim_duong == "Dijkstra":
                         st.success(f"✅ Đang chạy Dijkstra: Tìm đường ngắn nhất theo quãng đường (km).")
 
+                    elif thuat_toan_tim_duong == "Contraction Hierarchy":
+                        st.success(f"✅ Đang chạy Contraction Hierarchy: Dijkstra hai chiều trên đồ thị đã tiền xử lý.")
+
+                    elif thuat_toan_tim_duong == "A*":
+                        st.success(f"✅ Đang chạy A*: Dijkstra có định hướng về đích (heuristic khoảng cách chim bay).")
+
+                    elif thuat_toan_tim_duong == "Dijkstra hai chiều":
+                        st.success(f"✅ Đang chạy Dijkstra hai chiều: Tìm đồng thời từ điểm đầu và điểm đích.")
+
+                    elif thuat_toan_tim_duong == "A* hai chiều":
+                        st.success(f"✅ Đang chạy A* hai chiều: Tìm từ hai phía, cả hai đều hướng về nhau.")
+
                     elif "BFS" in thuat_toan_tim_duong:
-                        # Trong NetworkX, shortest_path với weight=None chính là thuật toán BFS
-                        duong_di = nx.shortest_path(Do_thi_Pleiku, nut_goc, nut_dich, weight=None)
                         st.info(f"✅ Đang chạy BFS : Tìm đường đi qua ít địa điểm trung gian nhất.")
 
                     elif "DFS" in thuat_toan_tim_duong:
-
-                        cay_dfs = nx.dfs_tree(Do_thi_Pleiku, source=nut_goc)
-
-                        if nut_dich in cay_dfs:
-                            duong_di = nx.shortest_path(cay_dfs, nut_goc, nut_dich)
-                            st.warning(f"⚠️ Đang chạy DFS: Đường đi có thể rất dài đấy nhóe .")
+                        # Cùng cây DFS như nx.dfs_tree; không tới được đích -> NetworkXNoPath
+                        st.warning(f"⚠️ Đang chạy DFS: Đường đi có thể rất dài đấy nhóe .")
+
+                    # Giai đoạn này bao trùm tim_duong / dung_lo_trinh / chi_tiet_lo_trinh (chỉ có khi trượt bộ nhớ)
+                    with lan_do.giai_doan("lay_lo_trinh") as ban_ghi:
+                        if dung_ban_do_tinh:
+                            ket_qua, co_san = chay_tai_cho("A* cả tỉnh", lambda: Bo_dan_duong.tim_duong_tinh(
+                                start_point, end_point, muc_tieu, lan_do))
+                            cac_lo_trinh = [ket_qua]
                         else:
-                            raise nx.NetworkXNoPath  # Không tìm thấy đích trong cây DFS
-
+                            cac_lo_trinh, co_san = chay_tai_cho(thuat_toan_tim_duong, lambda: (
+                                Bo_dan_duong.tim_cac_lo_trinh_dau_mut(cac_nguon, cac_dich, thuat_toan_tim_duong,
+                                                                      so_lo_trinh, lan_do, muc_tieu)))
+                            ket_qua = cac_lo_trinh[0]
+                        ban_ghi["tu_bo_nho_dem"] = co_san
+                        ban_ghi["so_nut_da_duyet"] = ket_qua.so_nut_da_duyet
+                    if co_san:
+                        st.caption("⚡ Lộ trình lấy từ bộ nhớ đệm (đã có người tìm chuyến này).")
+                    if len(cac_lo_trinh) < so_lo_trinh and not dung_ban_do_tinh:
+                        st.info(f"Chỉ tìm được {len(cac_lo_trinh)} lộ trình đủ khác biệt cho chuyến này.")
+
+                except thuc_thi.HetHan as e:
+                    st.error(f"⛔ Tìm đường: {e}, đã dừng. Hãy thử thuật toán khác hoặc hai điểm gần nhau hơn.")
+                    st.stop()
                 except nx.NetworkXNoPath:
                     st.error(
                         f"⛔ Không có đường đi từ '{start_query}' đến '{end_query}' (Có thể do đường 1 chiều hoặc khu vực bị cô lập).")
                     st.session_state['lo_trinh_tim_duoc'] = []
+                    st.session_state['toa_do_lo_trinh'] = []
+                    st.session_state['lo_trinh_thay_the'] = []
                     st.stop()
                 except Exception as e:
                     st.error(f"Lỗi thuật toán: {e}")
                     st.stop()
                 # 4. LƯU SESSION
-                st.session_state['lo_trinh_tim_duoc'] = duong_di
-                st.session_state['chi_tiet_lo_trinh'] = lay_thong_tin_lo_trinh(Do_thi_Pleiku, duong_di)
+                st.session_state['lo_trinh_tim_duoc'] = ket_qua.duong_di
+                st.session_state['so_nut_da_duyet'] = ket_qua.so_nut_da_duyet
+                st.session_state['chi_tiet_lo_trinh'] = ket_qua.chi_tiet
+                st.session_state['thoi_gian_lo_trinh'] = ket_qua.thoi_gian
                 st.session_state['tam_ban_do'] = [(start_point[0] + end_point[0]) / 2,
                                                   (start_point[1] + end_point[1]) / 2]
                 st.session_state['ten_diem_dau'] = start_query
                 st.session_state['ten_diem_cuoi'] = end_query
-
-                if duong_di:
-                    nodes_data = [Do_thi_Pleiku.nodes[n] for n in duong_di]
-                    lats = [d['y'] for d in nodes_data]
-                    lons = [d['x'] for d in nodes_data]
-                    # Sw [lat, lon], Ne [lat, lon]
-                    st.session_state['bounds_ban_do'] = [[min(lats), min(lons)], [max(lats), max(lons)]]
+                # Polyline ghép sẵn từ bảng cạnh, rút gọn Douglas-Peucker theo mức zoom vừa khung lộ trình
+                st.session_state['toa_do_lo_trinh'] = ket_qua.toa_do
+                st.session_state['lo_trinh_thay_the'] = cac_lo_trinh[1:]
+                # Sw [lat, lon], Ne [lat, lon] - bao trọn mọi lộ trình
+                cac_khung = np.array([lt.khung for lt in cac_lo_trinh])
+                st.session_state['bounds_ban_do'] = [cac_khung[:, 0].min(axis=0).tolist(),
+                                                     cac_khung[:, 1].max(axis=0).tolist()]
 
             except Exception as e:
                 st.error(f"Không tìm thấy đường đi hoặc địa điểm: {e}")
                 st.session_state['lo_trinh_tim_duoc'] = []
+                st.session_state['toa_do_lo_trinh'] = []
 
-    if st.session_state['lo_trinh_tim_duoc']:
+    # Theo polyline chứ không theo dãy nút: điểm đến ngay phía trước điểm đi trên cùng cạnh không qua nút nào
+    if st.session_state['toa_do_lo_trinh']:
         duong_di = st.session_state['lo_trinh_tim_duoc']
         chi_tiet = st.session_state['chi_tiet_lo_trinh']
         tong_km = sum(d['do_dai'] for d in chi_tiet) / 1000
@@ -585,8 +940,10 @@ with tab_ban_do:
         st.markdown(f"""
         <div class="hop-thong-ke">
             <div class="muc-thong-ke"><div class="gia-tri-thong-ke">{tong_km:.2f} km</div><div class="nhan-thong-ke">Tổng quãng đường</div></div>
+            <div class="muc-thong-ke"><div class="gia-tri-thong-ke">{st.session_state['thoi_gian_lo_trinh'] / 60:.0f} phút</div><div class="nhan-thong-ke">Thời gian ước tính</div></div>
             <div class="muc-thong-ke"><div class="gia-tri-thong-ke">{len(chi_tiet)}</div><div class="nhan-thong-ke">Số đoạn đường</div></div>
             <div class="muc-thong-ke"><div class="gia-tri-thong-ke">{len(duong_di)}</div><div class="nhan-thong-ke">Số Node đi qua</div></div>
+            <div class="muc-thong-ke"><div class="gia-tri-thong-ke">{st.session_state['so_nut_da_duyet']}</div><div class="nhan-thong-ke">Số Node đã duyệt</div></div>
         </div>
         """, unsafe_allow_html=True)
 
@@ -621,48 +978,200 @@ with tab_ban_do:
                 st.markdown(html_content, unsafe_allow_html=True)
 
         with cot_ban_do:
-            m = folium.Map(location=st.session_state['tam_ban_do'], zoom_start=14, tiles="OpenStreetMap")
-            Fullscreen().add_to(m)
-
-            start_node_data = Do_thi_Pleiku.nodes[duong_di[0]]
-            end_node_data = Do_thi_Pleiku.nodes[duong_di[-1]]
-
-            coord_start = (start_node_data['y'], start_node_data['x'])
-            coord_end = (end_node_data['y'], end_node_data['x'])
-
-            folium.Marker(coord_start, icon=folium.Icon(color="green", icon="play", prefix='fa'),
-                          popup=f"BẮT ĐẦU: {st.session_state['ten_diem_dau']}").add_to(m)
-
-            folium.Marker(coord_end, icon=folium.Icon(color="red", icon="flag", prefix='fa'),
-                          popup=f"KẾT THÚC: {st.session_state['ten_diem_cuoi']}").add_to(m)
-
-            toa_do_duong_di = []
-            toa_do_duong_di.append(coord_start)
-
-            for u, v in zip(duong_di[:-1], duong_di[1:]):
-                canh = lay_du_lieu_canh_an_toan(Do_thi_Pleiku, u, v)
-                if 'geometry' in canh:
-                    xs, ys = canh['geometry'].xy
-                    points = list(zip(ys, xs))
-                    toa_do_duong_di.extend(points[1:])
-                else:
-                    nut_v = Do_thi_Pleiku.nodes[v]
-                    toa_do_duong_di.append((nut_v['y'], nut_v['x']))
-
-            mau_sac = "orange" if "DFS" in thuat_toan_tim_duong else (
-                "purple" if "BFS" in thuat_toan_tim_duong else "#3498DB")
-
-            AntPath(toa_do_duong_di, color=mau_sac, weight=5, opacity=0.8, delay=1000).add_to(m)
-
-            if coord_start: folium.PolyLine([coord_start, toa_do_duong_di[0]], color="gray", weight=2,
-                                            dash_array='5, 5').add_to(m)
-            if 'bounds_ban_do' in st.session_state and st.session_state['bounds_ban_do']:
-                m.fit_bounds(st.session_state['bounds_ban_do'])
-
-            st_folium(m, width=900, height=600, returned_objects=[])
+            # Lập đối tượng folium; st_folium bên dưới sinh HTML và gửi sang trình duyệt
+            with hieu_nang.giai_doan(lan_do, "dung_ban_do_folium") as ban_ghi:
+                m = folium.Map(location=st.session_state['tam_ban_do'], zoom_start=14, tiles="OpenStreetMap")
+                Fullscreen().add_to(m)
+
+                toa_do_duong_di = st.session_state['toa_do_lo_trinh']
+                coord_start = tuple(toa_do_duong_di[0])
+                coord_end = tuple(toa_do_duong_di[-1])
+
+                folium.Marker(coord_start, icon=folium.Icon(color="green", icon="play", prefix='fa'),
+                              popup=f"BẮT ĐẦU: {st.session_state['ten_diem_dau']}").add_to(m)
+
+                folium.Marker(coord_end, icon=folium.Icon(color="red", icon="flag", prefix='fa'),
+                              popup=f"KẾT THÚC: {st.session_state['ten_diem_cuoi']}").add_to(m)
+
+                mau_sac = "orange" if "DFS" in thuat_toan_tim_duong else (
+                    "purple" if "BFS" in thuat_toan_tim_duong else "#3498DB")
+
+                # Lộ trình thay thế vẽ trước (nằm dưới), mảnh và nhạt hơn lộ trình chính
+                for i, lt in enumerate(st.session_state['lo_trinh_thay_the']):
+                    km = sum(d['do_dai'] for d in lt.chi_tiet) / 1000
+                    AntPath(lt.toa_do, color=MAU_LO_TRINH_THAY_THE[i % len(MAU_LO_TRINH_THAY_THE)], weight=4,
+                            opacity=0.6, delay=1400, tooltip=f"Lộ trình {i + 2}: {km:.2f} km").add_to(m)
+
+                AntPath(toa_do_duong_di, color=mau_sac, weight=5, opacity=0.8, delay=1000,
+                        tooltip=f"Lộ trình 1: {tong_km:.2f} km").add_to(m)
+
+                if coord_start: folium.PolyLine([coord_start, toa_do_duong_di[0]], color="gray", weight=2,
+                                                dash_array='5, 5').add_to(m)
+                if 'bounds_ban_do' in st.session_state and st.session_state['bounds_ban_do']:
+                    m.fit_bounds(st.session_state['bounds_ban_do'])
+                ban_ghi["so_diem_ve"] = len(toa_do_duong_di) + sum(
+                    len(lt.toa_do) for lt in st.session_state['lo_trinh_thay_the'])
+
+            with hieu_nang.giai_doan(lan_do, "st_folium"):
+                st_folium(m, width=900, height=600, returned_objects=[])
+
+        # --- SO SÁNH CÁC LỘ TRÌNH (khi bật lộ trình thay thế) ---
+        if st.session_state['lo_trinh_thay_the']:
+            st.markdown("### 🛣️ So sánh lộ trình")
+            cac_lo_trinh = [(mau_sac, chi_tiet, len(duong_di), st.session_state['thoi_gian_lo_trinh'])] + [
+                (MAU_LO_TRINH_THAY_THE[i % len(MAU_LO_TRINH_THAY_THE)], lt.chi_tiet, len(lt.duong_di), lt.thoi_gian)
+                for i, lt in enumerate(st.session_state['lo_trinh_thay_the'])]
+            for i, (cot, (mau, ct, so_nut, thoi_gian)) in enumerate(zip(st.columns(len(cac_lo_trinh)),
+                                                                        cac_lo_trinh)):
+                km = sum(d['do_dai'] for d in ct) / 1000
+                cot.markdown(f'<span style="color:{mau}; font-weight:700;">■ Lộ trình {i + 1}</span>',
+                             unsafe_allow_html=True)
+                cot.metric("Quãng đường", f"{km:.2f} km",
+                           delta=None if i == 0 else f"{(km / tong_km - 1) * 100:+.0f}%", delta_color="inverse")
+                cot.caption(f"{len(ct)} đoạn đường · {so_nut} node · ~{thoi_gian / 60:.0f} phút")
+                cot.dataframe(pd.DataFrame(ct).rename(columns={'ten': 'Đường', 'do_dai': 'Dài (m)'}).round(0),
+                              height=240, hide_index=True, use_container_width=True)
 
     else:
         m = folium.Map(location=[13.9785, 108.0051], zoom_start=14, tiles="OpenStreetMap")
         st_folium(m, width=1200, height=600, returned_objects=[])
 
+    # --- VÙNG TỚI ĐƯỢC (ISOCHRONE) ---
+    with st.expander("🕒 Vùng tới được trong N phút / N mét"):
+        st.caption("Một lượt tìm kiếm có giới hạn cho mọi vành; thời gian theo maxspeed của OSM hoặc tốc độ "
+                   "thường gặp của loại đường. Bấm lên bản đồ bên dưới để lấy điểm đó làm điểm xuất phát.")
+        c_diem, c_don_vi, c_vanh, c_buoc = st.columns([1.6, 0.8, 1, 0.8])
+        diem_dang_thoi = c_diem.text_input("📍 Điểm xuất phát:", value="Quảng trường Đại Đoàn Kết",
+                                           key="ten_diem_dang_thoi")
+        don_vi = c_don_vi.radio("Đơn vị:", list(CAC_DON_VI), format_func=lambda d: CAC_DON_VI[d][0],
+                                horizontal=True)
+        so_vanh = c_vanh.slider("Số vành:", 1, SO_VANH_TOI_DA, 5)
+        buoc = c_buoc.number_input(f"Mỗi vành ({CAC_DON_VI[don_vi][0]}):", min_value=1.0,
+                                   value=2.0 if don_vi == "phut" else 500.0, key=f"buoc_dang_thoi_{don_vi}")
+        kieu_ve = st.radio("Hiển thị:", ["Vùng (đa giác)", "Đoạn đường tô màu"], horizontal=True)
+
+        diem_bam = st.session_state['diem_bam_dang_thoi']
+        if diem_bam is not None:
+            c_bam, c_bo = st.columns([3, 1])
+            c_bam.caption(f"Dùng điểm vừa bấm: {diem_bam[0]:.5f}, {diem_bam[1]:.5f}")
+            if c_bo.button("Bỏ điểm đã bấm", use_container_width=True):
+                st.session_state['diem_bam_dang_thoi'] = diem_bam = None
+
+        if st.button("🕒 Tính vùng tới được", use_container_width=True):
+            cac_moc = [buoc * (i + 1) for i in range(so_vanh)]
+            with bat_dau_do("Vùng tới được", "tab2", don_vi=don_vi, so_vanh=so_vanh) as lan_do_dt:
+                try:
+                    with lan_do_dt.giai_doan("geocode"):
+                        diem = diem_bam if diem_bam is not None else tai_bo_thuc_thi().chay_io(
+                            lambda q=diem_dang_thoi: Bo_dan_duong.tim_toa_do(q), han_chot=HAN_CHOT_GEOCODE)[0]
+                    st.session_state['dang_thoi'] = (diem, Bo_dan_duong.tinh_dang_thoi(diem, cac_moc, don_vi,
+                                                                                       lan_do_dt))
+                except nx.NetworkXNoPath:
+                    st.warning("Không có đoạn đường nào đi được từ điểm này (đường một chiều hoặc khu vực cô lập).")
+                    st.session_state['dang_thoi'] = None
+                except Exception as e:
+                    st.error(f"Không tính được vùng tới được: {e}")
+                    st.session_state['dang_thoi'] = None
+
+        m_dt = folium.Map(location=st.session_state['tam_ban_do'], zoom_start=13, tiles="OpenStreetMap")
+        if st.session_state['dang_thoi'] is not None:
+            diem, kq_dt = st.session_state['dang_thoi']
+            mau = [MAU_VANH_DANG_THOI[i] for i in np.linspace(0, len(MAU_VANH_DANG_THOI) - 1,
+                                                              len(kq_dt.cac_moc)).round().astype(int)]
+            # Vành xa vẽ trước để vành gần nằm trên
+            for i in reversed(range(len(kq_dt.cac_moc))):
+                nhan = f"{kq_dt.nhan[i]} · {kq_dt.so_nut[i]} nút"
+                nhom = folium.FeatureGroup(name=kq_dt.nhan[i])
+                if kieu_ve == "Vùng (đa giác)":
+                    if kq_dt.vung[i] is None:
+                        continue
+                    folium.GeoJson(kq_dt.vung[i], tooltip=nhan,
+                                   style_function=lambda _, c=mau[i]: {"fillColor": c, "color": c, "weight": 1,
+                                                                       "fillOpacity": 0.45}).add_to(nhom)
+                else:
+                    if not kq_dt.doan[i]:
+                        continue
+                    folium.PolyLine(kq_dt.doan[i], color=mau[i], weight=3, opacity=0.9, tooltip=nhan).add_to(nhom)
+                nhom.add_to(m_dt)
+            folium.Marker(list(diem), icon=folium.Icon(color="green", icon="play", prefix='fa')).add_to(m_dt)
+            folium.LayerControl(collapsed=True).add_to(m_dt)
+            m_dt.fit_bounds(kq_dt.khung)
+        elif diem_bam is not None:
+            folium.Marker(diem_bam, icon=folium.Icon(color="green", icon="play", prefix='fa')).add_to(m_dt)
+        du_lieu_ban_do = st_folium(m_dt, width=1200, height=500, returned_objects=["last_clicked"],
+                                   key="ban_do_dang_thoi")
+        # st_folium trả lại lần bấm cuối ở mọi lần vẽ lại: chỉ nhận khi đó là lần bấm mới
+        bam = (du_lieu_ban_do or {}).get("last_clicked")
+        if bam and bam != st.session_state.get('lan_bam_dang_thoi'):
+            st.session_state['lan_bam_dang_thoi'] = bam
+            st.session_state['diem_bam_dang_thoi'] = (bam["lat"], bam["lng"])
+            st.rerun()
+
+    # --- LỚP ÙN TẮC (chung cho mọi phiên) ---
+    with st.expander("🚦 Lớp ùn tắc"):
+        st.caption("CSV có cột `toc_do` (km/h, 0 = cấm đường) và cạnh: `canh` (chỉ số cạnh snapshot) hoặc "
+                   "`u`, `v` (mã nút OSM hai đầu). Áp dụng cho mục tiêu thời gian / ưu tiên và vùng tới được; "
+                   "không phải dựng lại đồ thị.")
+        tep_un_tac = st.file_uploader("Tốc độ theo cạnh", type="csv", key="lop_un_tac")
+        c_ap_dung, c_dat_lai, c_trang_thai = st.columns([1, 1, 2])
+        if tep_un_tac is not None and c_ap_dung.button("🚦 Áp dụng", use_container_width=True):
+            try:
+                so_dong, so_canh, so_loi = Bo_dan_duong.ap_dung_lop_un_tac(tep_un_tac)
+                st.success(f"Đã cập nhật {so_canh} cạnh từ {so_dong} dòng"
+                           + (f" ({so_loi} dòng không khớp cạnh nào, bỏ qua)." if so_loi else "."))
+            except Exception as e:
+                st.error(f"Không đọc được lớp ùn tắc: {e}")
+        if c_dat_lai.button("↩️ Về tốc độ tự do", use_container_width=True):
+            Bo_dan_duong.dat_lai_toc_do()
+        tk_trong_so = Bo_dan_duong.thong_ke()
+        c_trang_thai.caption(f"Phiên bản trọng số {tk_trong_so['phien_ban_trong_so']} · "
+                             f"{tk_trong_so['so_canh_un_tac']} cạnh đang khác tốc độ tự do")
+
+    # --- THỐNG KÊ BỘ NHỚ ĐỆM LỘ TRÌNH (chung cho mọi phiên) ---
+    with st.expander("⚡ Bộ nhớ đệm lộ trình"):
+        tk = Bo_dan_duong.bo_nho.thong_ke()
+        c_muc, c_trung, c_truot, c_gop, c_loai = st.columns(5)
+        c_muc.metric("Số lộ trình", f"{tk['so_muc']}/{tk['suc_chua']}")
+        c_trung.metric("Trúng", tk['trung'], help=f"Tỉ lệ dùng lại: {tk['ti_le_trung']:.0%}")
+        c_truot.metric("Trượt (phải tính)", tk['truot'])
+        c_gop.metric("Gộp yêu cầu", tk['gop'], help="Chờ phiên khác đang tính cùng chuyến")
+        c_loai.metric("Bị loại (LRU)", tk['loai'])
+        if Bo_dan_duong.do_thi_o is not None:
+            tk_o = Bo_dan_duong.do_thi_o.thong_ke()
+            st.caption(f"🗺️ Bản đồ cả tỉnh: {tk_o['so_o_thuong_tru']}/{tk_o['so_o_toi_da']} ô trong bộ nhớ "
+                       f"({tk_o['so_byte_thuong_tru'] / 1e6:.1f} MB) trên tổng {tk_o['so_o']} ô · "
+                       f"{tk_o['so_lan_nap']} lần nạp, {tk_o['so_lan_loai']} lần loại")
+
+    ve_bang_hieu_nang("tab2")
+
+    # --- MA TRẬN KHOẢNG CÁCH OD (điều phối xe) ---
+    with st.expander("📊 Ma trận khoảng cách nhiều điểm (CSV)"):
+        st.caption("Mỗi tệp CSV có cột `lat`, `lon` (hoặc `osmid`), cột `ten` là tuỳ chọn. "
+                   "Mỗi điểm đi chỉ chạy một lượt Dijkstra tới mọi điểm đến; "
+                   f"ma trận chạy nền, tối đa {HAN_CHOT_OD:g} giây.")
+        c_di, c_den = st.columns(2)
+        tep_di = c_di.file_uploader("Điểm đi", type="csv", key="od_diem_di")
+        tep_den = c_den.file_uploader("Điểm đến", type="csv", key="od_diem_den")
+        if tep_di is not None and tep_den is not None and st.button("📐 Tính ma trận", use_container_width=True):
+            try:
+                # Đọc CSV và gắn điểm vào cạnh (nhanh) ngay trên luồng script; phần Dijkstra chạy nền
+                ten_di, diem_di = ma_tran_od.doc_diem_csv(tep_di)
+                ten_den, diem_den = ma_tran_od.doc_diem_csv(tep_den)
+                hat_di = ma_tran_od.cac_hat_giong(Bo_dan_duong.csr, diem_di, Bo_dan_duong.ban_do,
+                                                  Bo_dan_duong.chi_muc, "nguon")
+                hat_den = ma_tran_od.cac_hat_giong(Bo_dan_duong.csr, diem_den, Bo_dan_duong.ban_do,
+                                                   Bo_dan_duong.chi_muc, "dich")
+                # CSR của bản đồ chỉ gửi sang mỗi tiến trình con một lần (khoá theo dấu vân tay)
+                csr_chung = (("csr", *phan_cap.dau_van_tay(Bo_dan_duong.csr).tolist()), Bo_dan_duong.csr)
+                bang_od = chay_nen("Ma trận OD", functools.partial(
+                    ma_tran_od.ma_tran_khoang_cach_diem, hat_nguon=hat_di, hat_dich=hat_den, so_tien_trinh=1),
+                    han_chot=HAN_CHOT_OD, o="od", chung=csr_chung).thanh_bang(ten_di, ten_den)
+                st.dataframe(bang_od.style.format("{:.2f} km"), use_container_width=True)
+                st.download_button("💾 Tải ma trận (.csv)", data=bang_od.to_csv(float_format="%.3f"),
+                                   file_name="ma_tran_khoang_cach_km.csv", mime="text/csv")
+            except thuc_thi.HetHan as e:
+                st.error(f"Ma trận OD: {e}, đã dừng. Hãy bớt số điểm.")
+            except Exception as e:
+                st.error(f"Lỗi dữ liệu: {e}")
+
 
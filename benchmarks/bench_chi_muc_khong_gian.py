@@ -0,0 +1,67 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: GẮN TỌA ĐỘ VÀO ĐỒ THỊ
+# -----------------------------------------------------------------------------
+# So sánh ox.distance.nearest_nodes (gọi từng điểm và gọi theo lô) với chỉ mục
+# KDTree dựng sẵn (bat_nut / bat_canh) cho 1, 1.000 và 100.000 điểm ngẫu nhiên.
+# Gọi từng điểm bằng osmnx rất chậm nên chỉ đo tối đa --toi-da-tung-diem điểm
+# rồi ngoại suy tuyến tính (đánh dấu "ước tính").
+#
+#     python benchmarks/bench_chi_muc_khong_gian.py [--snapshot DIR] [--toi-da-tung-diem 200]
+# -----------------------------------------------------------------------------
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import osmnx as ox
+
+from dan_duong import ban_do
+from dan_duong.chi_muc_khong_gian import ChiMucKhongGian
+
+
+def do(ham):
+    t0 = time.perf_counter()
+    ham()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    parser.add_argument("--so-diem", type=int, nargs="+", default=[1, 1000, 100000])
+    parser.add_argument("--toi-da-tung-diem", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ban_do_nen = ban_do.tai(args.snapshot)
+    G = ban_do.thanh_do_thi(ban_do_nen)
+
+    t0 = time.perf_counter()
+    chi_muc = ChiMucKhongGian.tu_ban_do(ban_do_nen)
+    print(f"{ban_do_nen.so_nut} nút, {ban_do_nen.so_canh} cạnh; "
+          f"dựng chỉ mục: {time.perf_counter() - t0:.2f} s\n")
+
+    rng = np.random.default_rng(args.seed)
+    x, y = np.asarray(ban_do_nen.nut_x), np.asarray(ban_do_nen.nut_y)
+
+    print(f"{'Số điểm':>8} {'ox từng điểm (s)':>20} {'ox theo lô (s)':>15} "
+          f"{'bat_nut (s)':>12} {'bat_canh (s)':>13}")
+    for n in args.so_diem:
+        lon = rng.uniform(x.min(), x.max(), n)
+        lat = rng.uniform(y.min(), y.max(), n)
+
+        m = min(n, args.toi_da_tung_diem)
+        tung_diem = do(lambda: [ox.distance.nearest_nodes(G, lon[i], lat[i]) for i in range(m)]) * n / m
+        nhan = f"{tung_diem:.4f}" + (" (ước tính)" if m < n else "")
+
+        theo_lo = do(lambda: ox.distance.nearest_nodes(G, lon, lat))
+        nut = do(lambda: chi_muc.bat_nut(lat, lon))
+        canh = do(lambda: chi_muc.bat_canh(lat, lon))
+        print(f"{n:>8} {nhan:>20} {theo_lo:>15.4f} {nut:>12.4f} {canh:>13.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: NETWORKX vs LÕI CSR
+# -----------------------------------------------------------------------------
+# Đo độ trễ mỗi truy vấn (Dijkstra / BFS / DFS) trên cùng các cặp điểm ngẫu nhiên
+# và bộ nhớ của MultiDiGraph so với các mảng CSR; sau đó so sánh số nút đã duyệt
+# của các chế độ có định hướng (A*, hai chiều) với Dijkstra.
+#
+#     python benchmarks/bench_dinh_tuyen.py [--snapshot DIR] [--so-cap 50]
+# -----------------------------------------------------------------------------
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx
+
+from dan_duong import ban_do
+from dan_duong.dinh_tuyen import DoThiCSR
+
+
+def do_trung_vi(ham, cac_cap):
+    cac_lan = []
+    for s, t in cac_cap:
+        t0 = time.perf_counter()
+        try:
+            ham(s, t)
+        except nx.NetworkXNoPath:
+            pass
+        cac_lan.append(time.perf_counter() - t0)
+    return statistics.median(cac_lan) * 1000
+
+
+def nx_dfs(G, s, t):
+    cay = nx.dfs_tree(G, source=s)
+    if t not in cay:
+        raise nx.NetworkXNoPath
+    return nx.shortest_path(cay, s, t)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    parser.add_argument("--so-cap", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ban_do_nen = ban_do.tai(args.snapshot, mmap=False)
+
+    tracemalloc.start()
+    G = ban_do.thanh_do_thi(ban_do_nen)
+    bo_nho_nx = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    csr = DoThiCSR.tu_ban_do(ban_do_nen)
+    bo_nho_csr = sum(a.nbytes for a in (csr.indptr, csr.indices, csr.trong_so, csr.canh_goc,
+                                        csr.nut_osmid, csr.nut_x, csr.nut_y))
+
+    rnd = random.Random(args.seed)
+    cac_nut = list(G.nodes())
+    cac_cap = [(rnd.choice(cac_nut), rnd.choice(cac_nut)) for _ in range(args.so_cap)]
+    cac_cap_csr = [(csr.chi_so(s), csr.chi_so(t)) for s, t in cac_cap]
+
+    print(f"{G.number_of_nodes()} nút, {G.number_of_edges()} cạnh, {args.so_cap} cặp điểm\n")
+    print(f"{'Thuật toán':<10} {'networkx (ms)':>14} {'CSR (ms)':>10} {'tăng tốc':>9}")
+    for ten, ham_nx, ham_csr in [
+        ("Dijkstra", lambda s, t: nx.shortest_path(G, s, t, weight="length"), csr.dijkstra),
+        ("BFS", lambda s, t: nx.shortest_path(G, s, t, weight=None), csr.bfs),
+        ("DFS", lambda s, t: nx_dfs(G, s, t), csr.dfs),
+    ]:
+        t_nx = do_trung_vi(ham_nx, cac_cap)
+        t_csr = do_trung_vi(ham_csr, cac_cap_csr)
+        print(f"{ten:<10} {t_nx:>14.3f} {t_csr:>10.3f} {t_nx / t_csr:>8.1f}x")
+
+    print(f"\nBộ nhớ: MultiDiGraph {bo_nho_nx / 1e6:.1f} MB, CSR {bo_nho_csr / 1e6:.2f} MB")
+
+    print(f"\n{'Chế độ':<20} {'ms / truy vấn':>14} {'nút đã duyệt (TB)':>18}")
+    for ten, ham in [("Dijkstra", csr.dijkstra), ("A*", csr.a_sao),
+                     ("Dijkstra hai chiều", csr.dijkstra_hai_chieu), ("A* hai chiều", csr.a_sao_hai_chieu)]:
+        so_duyet = []
+        for s, t in cac_cap_csr:
+            try:
+                so_duyet.append(ham(s, t).so_nut_da_duyet)
+            except nx.NetworkXNoPath:
+                pass
+        print(f"{ten:<20} {do_trung_vi(ham, cac_cap_csr):>14.3f} {statistics.mean(so_duyet):>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: ĐƯỜNG ĐI EULER
+# -----------------------------------------------------------------------------
+# So sánh Fleury cũ (xoá cạnh + nx.has_path, O(E^2)), nx.eulerian_circuit và
+# duong_di_euler (Hierholzer trên mảng kề) trên đồ thị Euler ngẫu nhiên: một chu
+# trình ngẫu nhiên dài E cạnh qua n = E / 5 đỉnh, vô hướng và có hướng.
+# Fleury cũ chỉ được chạy tới --toi-da-fleury-cu cạnh.
+#
+#     python benchmarks/bench_euler.py [--so-canh 1000 10000 100000 1000000]
+# -----------------------------------------------------------------------------
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx
+
+from dan_duong.euler import duong_di_euler
+
+
+def fleury_cu(G_input):
+    # Bản sao nguyên văn của thuat_toan_fleury trước khi chuyển sang Hierholzer
+    G = G_input.copy()
+    bac_le = [v for v, d in G.degree() if d % 2 == 1]
+    if len(bac_le) not in [0, 2]:
+        return None, "Đồ thị không có Đường đi/Chu trình Euler (Số đỉnh bậc lẻ phải là 0 hoặc 2)."
+
+    u = bac_le[0] if len(bac_le) == 2 else list(G.nodes())[0]
+    path = [u]
+    edges_path = []
+
+    while G.number_of_edges() > 0:
+        neighbors = list(G.neighbors(u))
+        if not neighbors: return None, "Lỗi: Đồ thị bị ngắt quãng."
+
+        next_v = None
+        for v in neighbors:
+            if G.degree(u) == 1:
+                next_v = v;
+                break
+
+            G.remove_edge(u, v)
+            if nx.has_path(G, u, v):
+                next_v = v
+                G.add_edge(u, v)
+                break
+            else:
+                G.add_edge(u, v, weight=1)
+
+        if next_v is None: next_v = neighbors[0]
+
+        if G.has_edge(u, next_v):
+            G.remove_edge(u, next_v)
+            edges_path.append((u, next_v))
+            path.append(next_v)
+            u = next_v
+
+    return edges_path, "Thành công"
+
+
+def do_thi_euler_ngau_nhien(so_canh, co_huong, seed):
+    rnd = random.Random(seed)
+    so_nut = max(3, so_canh // 5)
+    # Bắt đầu bằng một vòng qua mọi đỉnh để không có đỉnh cô lập (nx.eulerian_circuit đòi hỏi)
+    vong = list(range(so_nut)) + [rnd.randrange(so_nut) for _ in range(so_canh - so_nut)]
+    G = nx.MultiDiGraph() if co_huong else nx.MultiGraph()
+    G.add_edges_from((u, v, {"weight": rnd.randint(1, 9)}) for u, v in zip(vong, vong[1:] + vong[:1]))
+    return G
+
+
+def do(ham):
+    t0 = time.perf_counter()
+    ham()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--so-canh", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--toi-da-fleury-cu", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'Loại':<10} {'Số cạnh':>9} {'Fleury cũ (s)':>14} {'nx.eulerian_circuit (s)':>24} {'duong_di_euler (s)':>19}")
+    for co_huong in (False, True):
+        for so_canh in args.so_canh:
+            G = do_thi_euler_ngau_nhien(so_canh, co_huong, args.seed)
+            cu = f"{do(lambda: fleury_cu(G)):.3f}" if so_canh <= args.toi_da_fleury_cu else "-"
+            t_nx = do(lambda: list(nx.eulerian_circuit(G)))
+            ket_qua = []
+            t_moi = do(lambda: ket_qua.append(duong_di_euler(G)))
+            assert len(ket_qua[0][0]) == so_canh
+            print(f"{'có hướng' if co_huong else 'vô hướng':<10} {so_canh:>9} {cu:>14} {t_nx:>24.3f} {t_moi:>19.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: LUỒNG CỰC ĐẠI
+# -----------------------------------------------------------------------------
+# So sánh nx.maximum_flow (mặc định preflow-push của networkx, gồm cả sao chép đồ thị
+# như nút Ford-Fulkerson cũ) với các thuật toán của dan_duong.luong_cuc_dai trên hai họ
+# đồ thị:
+# - đường phố: lưới có hướng, sức chứa theo loại đường, nguồn / đích gom mép tây / đông
+#   (nhiều đường tăng luồng ngắn, bậc thấp);
+# - dày: G(n, p) có hướng, sức chứa 1..100 (bậc cao, lát cắt nằm sát nguồn / đích).
+# Edmonds-Karp và Dinic được đo cả bản scipy (mặc định khi sức chứa nguyên) lẫn bản
+# Python; các bản Python chỉ chạy tới --toi-da-python cạnh, networkx tới --toi-da-nx.
+#
+#     python benchmarks/bench_luong_cuc_dai.py [--luoi 30 80 150] [--day 200 500 1000]
+# -----------------------------------------------------------------------------
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx
+
+import du_lieu_tong_hop as du_lieu
+from dan_duong.luong_cuc_dai import CAC_THUAT_TOAN, MangDu, luong_cuc_dai
+
+CAC_CA = [(ten, False) for ten in CAC_THUAT_TOAN] + [("Edmonds-Karp", True), ("Dinic", True)]
+
+
+def do(ham):
+    t0 = time.perf_counter()
+    ket_qua = ham()
+    return time.perf_counter() - t0, ket_qua
+
+
+def chay(ten_ho, G, nguon, dich, args):
+    so_canh = G.number_of_edges()
+    o = [f"{ten_ho:<22} {so_canh:>9}"]
+    if so_canh <= args.toi_da_nx:
+        t_nx, (gia_tri_nx, _) = do(lambda: nx.maximum_flow(G.copy(), nguon, dich, capacity="weight"))
+        o.append(f"{t_nx:>9.3f}")
+    else:
+        gia_tri_nx = None
+        o.append(f"{'-':>9}")
+
+    t_dung, mang = do(lambda: MangDu.tu_do_thi(G))
+    o.append(f"{t_dung:>8.3f}")
+    nhanh_nhat = None
+    for ten, chi_python in CAC_CA:
+        if (chi_python or ten in ("Preflow-push", "Boykov-Kolmogorov")) and so_canh > args.toi_da_python:
+            o.append(f"{'-':>9}")
+            continue
+        t, ket_qua = do(lambda: luong_cuc_dai(G, nguon, dich, ten, mang=mang, chi_python=chi_python))
+        assert gia_tri_nx is None or ket_qua.gia_tri == gia_tri_nx, (ten, ket_qua.gia_tri, gia_tri_nx)
+        o.append(f"{t:>9.3f}")
+        if nhanh_nhat is None or t < nhanh_nhat[1]:
+            nhanh_nhat = (f"{ten}{' (Python)' if chi_python else ''}", t)
+    print(" ".join(o) + f"  {nhanh_nhat[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--luoi", type=int, nargs="+", default=[30, 80, 150], help="cạnh lưới đường phố (số nút / hàng)")
+    parser.add_argument("--day", type=int, nargs="+", default=[200, 500, 1000], help="số nút đồ thị dày")
+    parser.add_argument("--mat-do", type=float, default=0.1)
+    parser.add_argument("--toi-da-nx", type=int, default=100_000)
+    parser.add_argument("--toi-da-python", type=int, default=60_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tieu_de = [f"{'Đồ thị':<22} {'Số cạnh':>9} {'nx (s)':>9} {'dựng (s)':>8}"]
+    tieu_de += [f"{(ten[:6] + ('/py' if py else '')):>9}" for ten, py in CAC_CA]
+    print(" ".join(tieu_de) + "  nhanh nhất")
+    for canh in args.luoi:
+        chay(f"đường phố {canh}x{canh}", du_lieu.luong_duong_pho(canh, canh, seed=args.seed), "s", "t", args)
+    for so_nut in args.day:
+        G = du_lieu.luong_day(so_nut, args.mat_do, seed=args.seed)
+        chay(f"dày n={so_nut} p={args.mat_do}", G, 0, so_nut - 1, args)
+    print("(giây, lần chạy đầu; cột /py là bản Python của cùng thuật toán)")
+
+
+if __name__ == "__main__":
+    main()
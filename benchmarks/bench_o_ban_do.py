@@ -0,0 +1,145 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: BẢN ĐỒ CẢ TỈNH THEO Ô (o_ban_do) vs ĐỒ THỊ NGUYÊN KHỐI
+# -----------------------------------------------------------------------------
+# Các chuyến dài xuyên tỉnh (hai đầu cách nhau ít nhất --khoang-cach-toi-thieu km):
+# độ trễ khi mới khởi động (chưa ô nào trong bộ nhớ) và khi đã nóng, số ô phải nạp,
+# bộ nhớ Python cấp phát (tracemalloc) so với nạp nguyên khối - CSR + bảng cạnh trong
+# bộ nhớ, và MultiDiGraph networkx như tai_ban_do_pleiku() cũ.
+#
+# Mặc định dùng lưới đường phố tổng hợp cỡ một tỉnh (~150 km mỗi chiều); --snapshot
+# chỉ tới snapshot thật của cả tỉnh (python -m dan_duong.ban_do build --graphml ...).
+#
+#     python benchmarks/bench_o_ban_do.py [--snapshot DIR] [--so-chuyen 10] [--so-o-toi-da 128]
+# -----------------------------------------------------------------------------
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import du_lieu_tong_hop as du_lieu
+from dan_duong import ban_do, do_thi_gon, o_ban_do
+from dan_duong.dinh_tuyen import khoang_cach_haversine
+
+
+def bo_nho_cap_phat(ham):
+    """(kết quả, MB còn giữ sau khi ham() trả về, MB đỉnh trong lúc chạy)."""
+    gc.collect()
+    tracemalloc.start()
+    ket_qua = ham()
+    hien_tai, dinh = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ket_qua, hien_tai / 1e6, dinh / 1e6
+
+
+def cac_chuyen_dai(ban_do_nen, so_chuyen, toi_thieu_km, seed):
+    rng = np.random.default_rng(seed)
+    lat, lon = np.radians(ban_do_nen.nut_y), np.radians(ban_do_nen.nut_x)
+    cac_chuyen = []
+    for _ in range(so_chuyen * 200):
+        s, t = (int(x) for x in rng.integers(ban_do_nen.so_nut, size=2))
+        if khoang_cach_haversine(lat[s], lon[s], lat[t], lon[t]) >= toi_thieu_km * 1000:
+            cac_chuyen.append((s, t))
+            if len(cac_chuyen) == so_chuyen:
+                break
+    return cac_chuyen
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshot", help="snapshot cả tỉnh; mặc định sinh lưới tổng hợp")
+    parser.add_argument("--luoi", type=int, nargs=2, default=(200, 200), metavar=("HANG", "COT"))
+    parser.add_argument("--buoc", type=float, default=0.0075, help="độ giữa hai nút lưới tổng hợp")
+    parser.add_argument("--kich-thuoc-o", type=float, default=o_ban_do.KICH_THUOC_O_MAC_DINH)
+    parser.add_argument("--so-o-toi-da", type=int, default=o_ban_do.SO_O_TOI_DA)
+    parser.add_argument("--so-chuyen", type=int, default=10)
+    parser.add_argument("--khoang-cach-toi-thieu", type=float, default=80.0, help="km chim bay")
+    parser.add_argument("--muc-tieu", default="do_dai")
+    parser.add_argument("--bo-qua-networkx", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as thu_muc_tam:
+        thu_muc_snapshot = args.snapshot
+        if thu_muc_snapshot is None:
+            thu_muc_snapshot = os.path.join(thu_muc_tam, "snapshot")
+            ban_do.luu(ban_do.tu_do_thi(du_lieu.luoi_duong_pho(*args.luoi, seed=args.seed, buoc=args.buoc)),
+                       thu_muc_snapshot)
+        ban_do_nen = ban_do.tai(thu_muc_snapshot)
+
+        thu_muc_o = os.path.join(thu_muc_tam, "o")
+        t0 = time.perf_counter()
+        o_ban_do.xay(ban_do_nen, thu_muc_o, args.kich_thuoc_o)
+        manifest = o_ban_do.DoThiTheoO.tai(thu_muc_o).manifest
+        print(f"{ban_do_nen.so_nut} nút, {ban_do_nen.so_canh} cạnh -> {manifest['so_o']} ô "
+              f"({manifest['so_canh_bien']} cạnh vắt biên), dựng {time.perf_counter() - t0:.1f} s")
+
+        cac_chuyen = cac_chuyen_dai(ban_do_nen, args.so_chuyen, args.khoang_cach_toi_thieu, args.seed)
+        if not cac_chuyen:
+            sys.exit("Không có cặp nút nào đủ xa; giảm --khoang-cach-toi-thieu")
+        osmid = np.asarray(ban_do_nen.nut_osmid)
+        lat, lon = np.asarray(ban_do_nen.nut_y), np.asarray(ban_do_nen.nut_x)
+
+        # --- Theo ô: mỗi chuyến trên một DoThiTheoO mới (lạnh) rồi chạy lại (nóng) ---
+        lanh, nong, so_nap, so_duyet, dinh_mb, con_giu_mb = [], [], [], [], [], []
+        for s, t in cac_chuyen:
+            def mot_chuyen():
+                do_thi = o_ban_do.DoThiTheoO.tai(thu_muc_o, args.so_o_toi_da)
+                t1 = time.perf_counter()
+                nguon, dich = do_thi.nut_gan_nhat(lat[s], lon[s]), do_thi.nut_gan_nhat(lat[t], lon[t])
+                ket_qua = do_thi.a_sao(nguon, dich, args.muc_tieu)
+                lo_trinh = do_thi.dung_lo_trinh(ket_qua)
+                lanh.append(time.perf_counter() - t1)
+                assert lo_trinh.duong_di[0] == osmid[s] and lo_trinh.duong_di[-1] == osmid[t]
+                so_nap.append(do_thi.thong_ke()["so_lan_nap"])
+                so_duyet.append(ket_qua.so_nut_da_duyet)
+                return do_thi, nguon, dich
+
+            do_thi, nguon, dich = mot_chuyen()
+            t1 = time.perf_counter()
+            do_thi.dung_lo_trinh(do_thi.a_sao(nguon, dich, args.muc_tieu))
+            nong.append(time.perf_counter() - t1)
+            # Đo bộ nhớ ở một lượt lạnh riêng: tracemalloc làm chậm đáng kể mọi phép cấp phát
+            _, con_giu, dinh = bo_nho_cap_phat(mot_chuyen)
+            con_giu_mb.append(con_giu)
+            dinh_mb.append(dinh)
+        del lanh[1::2], so_nap[1::2], so_duyet[1::2]
+
+        # --- Nguyên khối ---
+        (csr, _), csr_mb, _ = bo_nho_cap_phat(lambda: do_thi_gon.xay(ban_do.tai(thu_muc_snapshot, mmap=False)))
+        csr.he_so_heuristic()
+        nguyen_khoi = []
+        for s, t in cac_chuyen:
+            t1 = time.perf_counter()
+            csr.a_sao(s, t)
+            nguyen_khoi.append(time.perf_counter() - t1)
+        nx_mb = None
+        if not args.bo_qua_networkx:
+            _, nx_mb, _ = bo_nho_cap_phat(lambda: ban_do.thanh_do_thi(ban_do_nen))
+
+    def ms(cac_lan):
+        return f"{statistics.median(cac_lan) * 1000:8.1f} ms (max {max(cac_lan) * 1000:.1f})"
+
+    print(f"\n{len(cac_chuyen)} chuyến >= {args.khoang_cach_toi_thieu:g} km, mục tiêu {args.muc_tieu}, "
+          f"trung vị {statistics.median(so_duyet):.0f} nút đã duyệt")
+    print(f"  Theo ô, lạnh (gồm nạp ô)       {ms(lanh)}   {statistics.median(so_nap):.0f} lần nạp ô "
+          f"(LRU {args.so_o_toi_da}/{manifest['so_o']} ô)")
+    print(f"  Theo ô, nóng                   {ms(nong)}")
+    print(f"  CSR nguyên khối (A*)           {ms(nguyen_khoi)}")
+    print("\nBộ nhớ Python cấp phát:")
+    print(f"  Theo ô: đỉnh một chuyến lạnh   {statistics.median(dinh_mb):8.1f} MB (max {max(dinh_mb):.1f})")
+    print(f"  Theo ô: giữ lại sau chuyến     {statistics.median(con_giu_mb):8.1f} MB")
+    print(f"  CSR + bảng cạnh nguyên khối    {csr_mb:8.1f} MB")
+    if nx_mb is not None:
+        print(f"  MultiDiGraph networkx          {nx_mb:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
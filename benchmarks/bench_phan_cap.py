@@ -0,0 +1,84 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: CONTRACTION HIERARCHY vs DIJKSTRA
+# -----------------------------------------------------------------------------
+# Thời gian tiền xử lý, kích thước chỉ mục và độ trễ truy vấn của phân cấp co so
+# với Dijkstra thường (networkx và lõi CSR) trên cùng các cặp điểm ngẫu nhiên.
+#
+#     python benchmarks/bench_phan_cap.py [--snapshot DIR] [--so-cap 200]
+# -----------------------------------------------------------------------------
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx
+
+from dan_duong import ban_do
+from dan_duong.dinh_tuyen import DoThiCSR
+from dan_duong.phan_cap import PhanCap
+
+
+def do_trung_vi(ham, cac_cap):
+    cac_lan = []
+    for s, t in cac_cap:
+        t0 = time.perf_counter()
+        try:
+            ham(s, t)
+        except nx.NetworkXNoPath:
+            pass
+        cac_lan.append(time.perf_counter() - t0)
+    return statistics.median(cac_lan) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    parser.add_argument("--so-cap", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ban_do_nen = ban_do.tai(args.snapshot)
+    G = ban_do.thanh_do_thi(ban_do_nen)
+    csr = DoThiCSR.tu_ban_do(ban_do_nen)
+
+    t0 = time.perf_counter()
+    phan_cap = PhanCap.xay(csr)
+    thoi_gian_xay = time.perf_counter() - t0
+    with tempfile.TemporaryDirectory() as thu_muc:
+        duong_dan = phan_cap.luu(os.path.join(thu_muc, "phan_cap.npz"))
+        kich_thuoc = os.path.getsize(duong_dan)
+
+    rnd = random.Random(args.seed)
+    cac_cap = [(rnd.randrange(csr.so_nut), rnd.randrange(csr.so_nut)) for _ in range(args.so_cap)]
+    cac_cap_osm = [(int(csr.nut_osmid[s]), int(csr.nut_osmid[t])) for s, t in cac_cap]
+
+    # Kiểm tra độ dài trùng khớp trước khi đo
+    sai_khac = 0
+    for s, t in cac_cap:
+        try:
+            sai_khac += csr.dijkstra(s, t).do_dai != phan_cap.tim_duong(s, t, csr).do_dai
+        except nx.NetworkXNoPath:
+            pass
+
+    print(f"{csr.so_nut} nút, {csr.so_canh} cạnh CSR")
+    print(f"Tiền xử lý: {thoi_gian_xay:.2f} s, {phan_cap.so_canh} cạnh phân cấp "
+          f"({phan_cap.so_duong_tat} đường tắt), tệp {kich_thuoc / 1e6:.2f} MB")
+    print(f"Số cặp lệch độ dài so với Dijkstra: {sai_khac}/{len(cac_cap)}\n")
+
+    print(f"{'Phương pháp':<26} {'ms / truy vấn (trung vị)':>25}")
+    for ten, ham, cap in [
+        ("nx.shortest_path", lambda s, t: nx.shortest_path(G, s, t, weight="length"), cac_cap_osm),
+        ("Dijkstra CSR (scipy)", csr.dijkstra, cac_cap),
+        ("Dijkstra hai chiều CSR", csr.dijkstra_hai_chieu, cac_cap),
+        ("Phân cấp co (đã bung)", phan_cap.tim_duong, cac_cap),
+    ]:
+        print(f"{ten:<26} {do_trung_vi(ham, cap):>25.3f}")
+
+
+if __name__ == "__main__":
+    main()
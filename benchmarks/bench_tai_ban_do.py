@@ -0,0 +1,91 @@
+# -----------------------------------------------------------------------------
+# BENCHMARK: THỜI GIAN TẢI BẢN ĐỒ
+# -----------------------------------------------------------------------------
+# So sánh 3 cách có được đồ thị Pleiku khi một tiến trình khởi động:
+#   1. Tải trực tiếp từ Overpass (cách cũ của tai_ban_do_pleiku)
+#   2. ox.load_graphml từ tệp GraphML cục bộ
+#   3. Snapshot .npy (chỉ mảng mmap, và dựng lại MultiDiGraph đầy đủ)
+#   4. CSR + bảng cạnh của Tab 2: dựng lại trong tiến trình, hay mmap đồ thị gọn đã lưu
+#
+#     python benchmarks/bench_tai_ban_do.py [--snapshot DIR] [--khong-mang] [--lap 5]
+# -----------------------------------------------------------------------------
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dan_duong import ban_do, do_thi_gon
+
+
+def do_thoi_gian(ham, so_lan):
+    cac_lan = []
+    for _ in range(so_lan):
+        t0 = time.perf_counter()
+        ket_qua = ham()
+        cac_lan.append(time.perf_counter() - t0)
+    return ket_qua, cac_lan
+
+
+def in_dong(ten, cac_lan):
+    print(f"{ten:<38} {statistics.median(cac_lan) * 1000:>10.1f} ms   (min {min(cac_lan) * 1000:.1f} ms, "
+          f"{len(cac_lan)} lần)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    parser.add_argument("--khong-mang", action="store_true", help="bỏ qua phép đo tải từ Overpass")
+    parser.add_argument("--lap", type=int, default=5)
+    args = parser.parse_args()
+
+    import osmnx as ox
+
+    G = None
+    if not args.khong_mang:
+        try:
+            # Tắt cache HTTP của osmnx để đo đúng một lần khởi động lạnh
+            ox.settings.use_cache = False
+            G, cac_lan = do_thoi_gian(ban_do.tai_tu_mang, 1)
+            in_dong("Overpass (ox.graph_from_point)", cac_lan)
+        except Exception as e:
+            print(f"Bỏ qua Overpass: {e}")
+
+    if not ban_do.co_snapshot(args.snapshot):
+        if G is None:
+            sys.exit(f"Chưa có snapshot tại {args.snapshot}; hãy chạy: python -m dan_duong.ban_do build")
+        ban_do.luu(ban_do.tu_do_thi(G), args.snapshot)
+    if G is None:
+        G = ban_do.thanh_do_thi(ban_do.tai(args.snapshot))
+
+    with tempfile.TemporaryDirectory() as thu_muc:
+        tep_graphml = os.path.join(thu_muc, "pleiku.graphml")
+        ox.save_graphml(G, tep_graphml)
+        _, cac_lan = do_thoi_gian(lambda: ox.load_graphml(tep_graphml), args.lap)
+        in_dong("ox.load_graphml", cac_lan)
+        kich_thuoc_graphml = os.path.getsize(tep_graphml)
+
+    _, cac_lan = do_thoi_gian(lambda: ban_do.tai(args.snapshot), args.lap)
+    in_dong("Snapshot: chỉ mảng (mmap)", cac_lan)
+    _, cac_lan = do_thoi_gian(lambda: ban_do.thanh_do_thi(ban_do.tai(args.snapshot)), args.lap)
+    in_dong("Snapshot: dựng lại MultiDiGraph", cac_lan)
+
+    ban_do_nen = ban_do.tai(args.snapshot)
+    _, cac_lan = do_thoi_gian(lambda: do_thi_gon.xay(ban_do_nen), args.lap)
+    in_dong("CSR + bảng cạnh: dựng lại", cac_lan)
+    do_thi_gon.tai_hoac_xay(args.snapshot, ban_do_nen)
+    _, cac_lan = do_thoi_gian(lambda: do_thi_gon.tai(do_thi_gon.duong_dan_mac_dinh(args.snapshot), ban_do_nen),
+                              args.lap)
+    in_dong("CSR + bảng cạnh: đồ thị gọn (mmap)", cac_lan)
+
+    kich_thuoc_snapshot = sum(os.path.getsize(os.path.join(args.snapshot, t)) for t in os.listdir(args.snapshot)
+                              if os.path.isfile(os.path.join(args.snapshot, t)))
+    print(f"\nKích thước: GraphML {kich_thuoc_graphml / 1e6:.2f} MB, snapshot {kich_thuoc_snapshot / 1e6:.2f} MB "
+          f"({G.number_of_nodes()} nút, {G.number_of_edges()} cạnh)")
+
+
+if __name__ == "__main__":
+    main()
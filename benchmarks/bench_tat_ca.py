@@ -0,0 +1,308 @@
+# -----------------------------------------------------------------------------
+# BỘ BENCHMARK TỔNG HỢP (CHẠY NGOẠI TUYẾN)
+# -----------------------------------------------------------------------------
+# Đo mọi thuật toán mà app đang dùng trên dữ liệu tổng hợp có seed cố định
+# (benchmarks/du_lieu_tong_hop.py) và, nếu có, snapshot Pleiku đã đóng băng:
+# - Tab 2: biên dịch CSR / bảng cạnh, Dijkstra, A*, hai chiều, BFS, DFS (mỗi truy vấn)
+#   và bước dựng lộ trình (chi tiết + polyline) thay cho lay_thong_tin_lo_trinh cũ,
+#   3 lộ trình thay thế (nút trung gian trên hai cây đường đi ngắn nhất), vùng tới được
+#   10 vành (một lượt Dijkstra có giới hạn, cắt cạnh và dựng đa giác).
+# - Tab 1: BFS/DFS/Dijkstra của networkx, Prim và Kruskal (nx.minimum_spanning_tree),
+#   nx.maximum_flow và từng thuật toán của luong_cuc_dai (mạng luồng phân tầng và lưới đường
+#   phố), thuat_toan_fleury (= duong_di_euler), nx.eulerian_circuit, nx.is_bipartite;
+#   một lần sửa cạnh rồi hỏi lại liên thông / hai phía / bậc Euler / cây khung: gia tăng
+#   trên DoThiPhien so với tính lại từ đầu bằng networkx; vết duyệt từng bước: trang
+#   đầu của BFS (đọc lười vào vòng đệm) và xuất toàn bộ vết DFS dạng .tsv.gz; Fleury chạy qua
+#   BoThucThi (gửi việc sang tiến trình con sống lâu + nhận kết quả về) để thấy chi phí của
+#   việc nền.
+#
+# Kết quả ghi ra JSON (thời gian trung vị / nhỏ nhất của --lap lần đo); --moc so sánh
+# với một lần chạy trước (cùng máy) và trả mã thoát 1 nếu có ca chậm hơn --nguong lần.
+#
+#     python benchmarks/bench_tat_ca.py [--quy-mo nho vua lon] [--lap 5] [--ra ket_qua.json]
+#                                       [--moc moc_chuan.json] [--nguong 1.25] [--loc dijkstra]
+# -----------------------------------------------------------------------------
+import argparse
+import functools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx
+import numpy as np
+import scipy
+
+import du_lieu_tong_hop as du_lieu
+from dan_duong import ban_do, lo_trinh
+from dan_duong.dang_thoi import BoDangThoi
+from dan_duong.dinh_tuyen import DoThiCSR
+from dan_duong.do_thi_phien import DoThiPhien
+from dan_duong.euler import duong_di_euler
+from dan_duong.lo_trinh_thay_the import tim_lo_trinh_thay_the
+from dan_duong.thuc_thi import BoThucThi
+from dan_duong.trong_so import BangTrongSo
+from dan_duong.vet_duyet import VetDuyet, buoc_bfs, buoc_dfs, xuat_tsv_gz
+from dan_duong.luong_cuc_dai import CAC_THUAT_TOAN as CAC_THUAT_TOAN_LUONG
+from dan_duong.luong_cuc_dai import luong_cuc_dai
+
+# Quy mô -> tham số của từng bộ sinh
+CAC_QUY_MO = {
+    "nho": {"luoi": (20, 20), "ngau_nhien": 500, "tab1": 500, "euler": 2_000, "luong": (10, 10)},
+    "vua": {"luoi": (60, 60), "ngau_nhien": 5_000, "tab1": 5_000, "euler": 20_000, "luong": (30, 30)},
+    "lon": {"luoi": (150, 150), "ngau_nhien": 20_000, "tab1": 20_000, "euler": 200_000, "luong": (60, 60)},
+}
+CAC_CHE_DO_TIM_DUONG = ["dijkstra", "a_sao", "dijkstra_hai_chieu", "a_sao_hai_chieu", "bfs", "dfs"]
+
+
+def do_thoi_gian(ham, lap):
+    """(trung vị, nhỏ nhất) mili-giây của lap lần gọi ham(), sau một lần chạy làm nóng."""
+    ham()
+    cac_lan = []
+    for _ in range(lap):
+        t0 = time.perf_counter()
+        ham()
+        cac_lan.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(cac_lan), min(cac_lan)
+
+
+class BoDo:
+    def __init__(self, lap, loc=None):
+        self.lap = lap
+        self.loc = loc
+        self.ket_qua = []
+
+    def do(self, bo_du_lieu, ten, ham, so_truy_van=1, **thong_tin):
+        """Đo ham (chạy so_truy_van truy vấn mỗi lần gọi); thời gian ghi lại là của MỘT truy vấn."""
+        khoa = f"{bo_du_lieu}/{ten}"
+        if self.loc and not any(l in khoa for l in self.loc):
+            return
+        trung_vi, nho_nhat = do_thoi_gian(ham, self.lap)
+        ban_ghi = {"khoa": khoa, "bo_du_lieu": bo_du_lieu, "ten": ten, "so_lan": self.lap,
+                   "trung_vi_ms": trung_vi / so_truy_van, "nho_nhat_ms": nho_nhat / so_truy_van, **thong_tin}
+        self.ket_qua.append(ban_ghi)
+        print(f"  {khoa:<55} {ban_ghi['trung_vi_ms']:>11.3f} ms  (min {ban_ghi['nho_nhat_ms']:.3f})", flush=True)
+
+
+def cac_cap_ngau_nhien(csr, so_cap, seed):
+    rnd = random.Random(seed)
+    return [(rnd.randrange(csr.so_nut), rnd.randrange(csr.so_nut)) for _ in range(so_cap)]
+
+
+def chay_het(ham_tim, cac_cap):
+    for s, t in cac_cap:
+        try:
+            ham_tim(s, t)
+        except nx.NetworkXNoPath:
+            pass
+
+
+def do_mang_duong(bo_do, ten, ban_do_nen, so_cap, seed, **thong_tin):
+    """Các ca Tab 2 trên một BanDo."""
+    thong_tin = dict(thong_tin, so_nut=ban_do_nen.so_nut, so_canh=ban_do_nen.so_canh)
+    bo_do.do(ten, "bien_dich_csr", lambda: DoThiCSR.tu_ban_do(ban_do_nen), **thong_tin)
+    csr = DoThiCSR.tu_ban_do(ban_do_nen)
+    bo_do.do(ten, "bang_canh", lambda: lo_trinh.BangCanh.tu_ban_do(ban_do_nen, csr), **thong_tin)
+    bang_canh = lo_trinh.BangCanh.tu_ban_do(ban_do_nen, csr)
+    # Làm nóng các bộ đệm lười (danh sách kề Python, hệ số heuristic) trước khi đo từng truy vấn
+    csr.ke_python(), csr.ke_nguoc_python(), csr.toa_do_python(), csr.he_so_heuristic()
+
+    cac_cap = cac_cap_ngau_nhien(csr, so_cap, seed)
+    for che_do in CAC_CHE_DO_TIM_DUONG:
+        ham_tim = getattr(csr, che_do)
+        bo_do.do(ten, f"tim_duong/{che_do}", lambda: chay_het(ham_tim, cac_cap), so_truy_van=len(cac_cap),
+                 **thong_tin)
+    bo_do.do(ten, "lo_trinh_thay_the/k3", lambda: chay_het(lambda s, t: tim_lo_trinh_thay_the(csr, s, t, 3), cac_cap),
+             so_truy_van=len(cac_cap), **thong_tin)
+
+    cac_duong = []
+    for s, t in cac_cap:
+        try:
+            cac_duong.append(csr.dijkstra(s, t).duong_di)
+        except nx.NetworkXNoPath:
+            pass
+
+    def dung_lo_trinh():
+        for duong_di in cac_duong:
+            phan_tu = csr.phan_tu_canh(duong_di)
+            bang_canh.chi_tiet(phan_tu)
+            lo_trinh.toa_do_hien_thi(bang_canh, phan_tu)
+
+    bo_do.do(ten, "dung_lo_trinh", dung_lo_trinh, so_truy_van=max(1, len(cac_duong)), **thong_tin)
+
+    bo_dang_thoi = BoDangThoi.tu_ban_do(ban_do_nen, csr, bang_canh)
+    nguon = int(np.argmax(np.diff(csr.indptr)))  # nút bậc cao nhất: chắc chắn có cạnh đi ra
+    bo_do.do(ten, "dang_thoi/10_vanh", lambda: bo_dang_thoi.tinh(nguon, range(1, 11), "phut"), **thong_tin)
+
+    # Đổi mục tiêu không tính lại gì; lớp ùn tắc 10% số cạnh là một lượt vector hoá
+    bang_trong_so = BangTrongSo.tu_ban_do(ban_do_nen, csr)
+    csr_thoi_gian = bang_trong_so.do_thi("thoi_gian")
+    csr_thoi_gian.he_so_heuristic()
+    bo_do.do(ten, "tim_duong/a_sao_thoi_gian", lambda: chay_het(csr_thoi_gian.a_sao, cac_cap),
+             so_truy_van=len(cac_cap), **thong_tin)
+    rng = np.random.default_rng(seed)
+    phan_tu = rng.choice(csr.so_canh, size=max(1, csr.so_canh // 10), replace=False)
+    toc_do = rng.uniform(5, 40, size=len(phan_tu))
+    bo_do.do(ten, "trong_so/lop_un_tac_10pt", lambda: bang_trong_so.cap_nhat_toc_do(phan_tu, toc_do), **thong_tin)
+
+
+def do_tab_1(bo_do, quy_mo, tham_so, seed):
+    G = du_lieu.do_thi_co_trong_so(tham_so["tab1"], seed=seed)
+    ten = f"co_trong_so_{tham_so['tab1']}"
+    thong_tin = {"quy_mo": quy_mo, "so_nut": G.number_of_nodes(), "so_canh": G.number_of_edges()}
+    nguon, dich = 0, G.number_of_nodes() - 1
+    bo_do.do(ten, "nx_bfs_tree", lambda: list(nx.bfs_tree(G, nguon).edges()), **thong_tin)
+    bo_do.do(ten, "nx_dfs_tree", lambda: list(nx.dfs_tree(G, nguon).edges()), **thong_tin)
+    bo_do.do(ten, "nx_dijkstra", lambda: nx.shortest_path(G, nguon, dich, weight="weight"), **thong_tin)
+    bo_do.do(ten, "prim", lambda: nx.minimum_spanning_tree(G, algorithm="prim"), **thong_tin)
+    bo_do.do(ten, "kruskal", lambda: nx.minimum_spanning_tree(G, algorithm="kruskal"), **thong_tin)
+
+    # Mỗi lần sửa: xoá một cạnh rồi thêm lại, sau mỗi bước hỏi các tính chất mà nút Tab 1 cần
+    cac_canh = random.Random(seed).sample(list(G.edges(data="weight")), 10)
+    phien = DoThiPhien(G.copy())
+
+    def sua_gia_tang():
+        for u, v, w in cac_canh:
+            for sua in (lambda: phien.xoa_canh(u, v), lambda: phien.them_canh(u, v, w)):
+                sua()
+                phien.lien_thong(), phien.la_hai_phia(), phien.loi_bac_euler(), phien.cay_khung()
+
+    H = G.copy()
+
+    def tinh_lai():
+        for u, v, w in cac_canh:
+            for sua in (lambda: H.remove_edge(u, v), lambda: H.add_edge(u, v, weight=w)):
+                sua()
+                nx.is_connected(H), nx.is_bipartite(H), [n for n, d in H.degree() if d % 2]
+                nx.minimum_spanning_tree(H)
+
+    bo_do.do(ten, "phien/sua_canh_gia_tang", sua_gia_tang, so_truy_van=2 * len(cac_canh), **thong_tin)
+    bo_do.do(ten, "phien/sua_canh_tinh_lai", tinh_lai, so_truy_van=2 * len(cac_canh), **thong_tin)
+    bo_do.do(ten, "vet/bfs_trang_dau", lambda: VetDuyet("BFS", lambda: buoc_bfs(G, nguon)).doc_them(), **thong_tin)
+    bo_do.do(ten, "vet/xuat_dfs_tsv_gz", lambda: xuat_tsv_gz(lambda: buoc_dfs(G, nguon)), **thong_tin)
+
+    hang, cot = tham_so["luoi"]
+    L = du_lieu.luoi_vo_huong(hang, cot)
+    bo_do.do(f"luoi_vo_huong_{hang}x{cot}", "is_bipartite", lambda: nx.is_bipartite(L), quy_mo=quy_mo,
+             so_nut=L.number_of_nodes(), so_canh=L.number_of_edges())
+
+    so_tang, do_rong = tham_so["luong"]
+    hang, cot = tham_so["luoi"]
+    for ten, F in ((f"mang_luong_{so_tang}x{do_rong}", du_lieu.mang_luong(so_tang, do_rong, seed=seed)),
+                   (f"luong_duong_pho_{hang}x{cot}", du_lieu.luong_duong_pho(hang, cot, seed=seed))):
+        thong_tin = {"quy_mo": quy_mo, "so_nut": F.number_of_nodes(), "so_canh": F.number_of_edges()}
+        bo_do.do(ten, "maximum_flow", lambda: nx.maximum_flow(F, "s", "t", capacity="weight"), **thong_tin)
+        for thuat_toan in CAC_THUAT_TOAN_LUONG:
+            bo_do.do(ten, f"luong_cuc_dai/{thuat_toan}", lambda: luong_cuc_dai(F, "s", "t", thuat_toan), **thong_tin)
+
+    for co_huong in (False, True):
+        E = du_lieu.do_thi_euler(tham_so["euler"], co_huong=co_huong, seed=seed)
+        ten = f"euler_{'co_huong' if co_huong else 'vo_huong'}_{tham_so['euler']}"
+        thong_tin = {"quy_mo": quy_mo, "so_nut": E.number_of_nodes(), "so_canh": E.number_of_edges()}
+        bo_do.do(ten, "thuat_toan_fleury", lambda: duong_di_euler(E), **thong_tin)
+        bo_do.do(ten, "nx_eulerian_circuit", lambda: list(nx.eulerian_circuit(E)), **thong_tin)
+        bo_thuc_thi = BoThucThi(1)
+        try:
+            bo_do.do(ten, "thuc_thi/fleury_tien_trinh_con",
+                     lambda: bo_thuc_thi.chay("bench", functools.partial(duong_di_euler, E)), **thong_tin)
+        finally:
+            bo_thuc_thi.dong()
+
+
+def moi_truong():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {"luc": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit, "python": platform.python_version(),
+            "nen_tang": platform.platform(), "so_cpu": os.cpu_count(), "networkx": nx.__version__,
+            "numpy": np.__version__, "scipy": scipy.__version__}
+
+
+def so_sanh(ket_qua, moc, nguong):
+    """In bảng so sánh với lần chạy mốc; trả về danh sách khoá bị chậm đi quá nguong lần.
+
+    So theo thời gian nhỏ nhất: ít bị nhiễu bởi tiến trình khác trên máy hơn trung vị.
+    """
+    cu = {r["khoa"]: r for r in moc["ket_qua"]}
+    cham_hon = []
+    print(f"\nSo sánh với mốc ({moc['moi_truong'].get('commit') or '?'}, {moc['moi_truong'].get('luc')}):")
+    print(f"  {'Ca đo (min)':<55} {'mốc (ms)':>11} {'nay (ms)':>11} {'tỉ lệ':>7}")
+    for r in ket_qua:
+        goc = cu.get(r["khoa"])
+        if goc is None:
+            continue
+        if goc.get("van_tay") != r.get("van_tay"):
+            # Snapshot đã đổi: số liệu không còn so sánh được
+            print(f"  {r['khoa']:<55} {'(dữ liệu khác mốc, bỏ qua)':>31}")
+            continue
+        ti_le = r["nho_nhat_ms"] / goc["nho_nhat_ms"] if goc["nho_nhat_ms"] > 0 else float("inf")
+        danh_dau = ""
+        if ti_le > nguong:
+            danh_dau = "  <-- CHẬM HƠN"
+            cham_hon.append(r["khoa"])
+        elif ti_le < 1 / nguong:
+            danh_dau = "  nhanh hơn"
+        print(f"  {r['khoa']:<55} {goc['nho_nhat_ms']:>11.3f} {r['nho_nhat_ms']:>11.3f} {ti_le:>6.2f}x{danh_dau}")
+    return cham_hon
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quy-mo", nargs="+", choices=list(CAC_QUY_MO), default=["nho", "vua"])
+    parser.add_argument("--lap", type=int, default=5)
+    parser.add_argument("--so-cap", type=int, default=20, help="số cặp điểm cho mỗi chế độ tìm đường")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    parser.add_argument("--ra", default=None, help="tệp JSON kết quả (mặc định benchmarks/ket_qua/<thời điểm>.json)")
+    parser.add_argument("--moc", default=None, help="tệp JSON của một lần chạy trước để so sánh")
+    parser.add_argument("--nguong", type=float, default=1.25, help="chậm hơn mốc quá chừng này lần là hồi quy")
+    parser.add_argument("--loc", nargs="+", default=None, help="chỉ chạy các ca có khoá chứa một trong các chuỗi này")
+    args = parser.parse_args()
+
+    bo_do = BoDo(args.lap, args.loc)
+    for quy_mo in args.quy_mo:
+        tham_so = CAC_QUY_MO[quy_mo]
+        print(f"[{quy_mo}]", flush=True)
+        hang, cot = tham_so["luoi"]
+        do_mang_duong(bo_do, f"luoi_{hang}x{cot}",
+                      ban_do.tu_do_thi(du_lieu.luoi_duong_pho(hang, cot, seed=args.seed)),
+                      args.so_cap, args.seed, quy_mo=quy_mo)
+        do_mang_duong(bo_do, f"ngau_nhien_{tham_so['ngau_nhien']}",
+                      ban_do.tu_do_thi(du_lieu.hinh_hoc_ngau_nhien(tham_so["ngau_nhien"], seed=args.seed)),
+                      args.so_cap, args.seed, quy_mo=quy_mo)
+        do_tab_1(bo_do, quy_mo, tham_so, args.seed)
+
+    ban_do_pleiku, van_tay = du_lieu.snapshot_pleiku(args.snapshot)
+    if ban_do_pleiku is None:
+        print(f"[pleiku] bỏ qua: chưa có snapshot tại {args.snapshot} (python -m dan_duong.ban_do build)")
+    else:
+        print(f"[pleiku] vân tay {van_tay}", flush=True)
+        do_mang_duong(bo_do, "pleiku", ban_do_pleiku, args.so_cap, args.seed, quy_mo="pleiku", van_tay=van_tay)
+
+    ket_qua = {"moi_truong": moi_truong(), "tham_so": vars(args), "ket_qua": bo_do.ket_qua}
+    ra = args.ra or os.path.join(os.path.dirname(os.path.abspath(__file__)), "ket_qua",
+                                 time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(ra)), exist_ok=True)
+    with open(ra, "w", encoding="utf-8") as f:
+        json.dump(ket_qua, f, ensure_ascii=False, indent=1)
+    print(f"\nĐã ghi {len(bo_do.ket_qua)} ca đo vào {ra}")
+
+    if args.moc:
+        with open(args.moc, encoding="utf-8") as f:
+            moc = json.load(f)
+        cham_hon = so_sanh(bo_do.ket_qua, moc, args.nguong)
+        if cham_hon:
+            print(f"\n{len(cham_hon)} ca chậm hơn mốc quá {args.nguong}x")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
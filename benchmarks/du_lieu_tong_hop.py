@@ -0,0 +1,192 @@
+# -----------------------------------------------------------------------------
+# DỮ LIỆU TỔNG HỢP CHO BENCHMARK
+# -----------------------------------------------------------------------------
+# Các bộ sinh đồ thị có seed cố định (cùng tham số -> cùng đồ thị trên mọi máy):
+# - luoi_duong_pho: lưới đường phố kiểu osmnx quanh Pleiku (đường một chiều, tên
+#   đường, geometry, cạnh song song) -> dùng cho định tuyến Tab 2.
+# - hinh_hoc_ngau_nhien: đồ thị hình học ngẫu nhiên (random geometric graph) cũng ở
+#   dạng mạng đường, bậc không đều như khu dân cư.
+# - do_thi_co_trong_so / do_thi_euler / mang_luong: đồ thị cho các nút Tab 1.
+# - luong_duong_pho / luong_day: mạng luồng kiểu đường phố (sức chứa theo loại đường,
+#   nguồn / đích gom cả một mép lưới) và mạng luồng dày cho benchmark luồng cực đại.
+# - snapshot_pleiku: snapshot bản đồ thật đã đóng băng, kèm vân tay để chỉ so sánh
+#   kết quả trên đúng cùng dữ liệu.
+# -----------------------------------------------------------------------------
+import hashlib
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx
+import numpy as np
+from shapely.geometry import LineString
+
+from dan_duong import ban_do
+from dan_duong.dinh_tuyen import BAN_KINH_TRAI_DAT
+
+GOC_LAT, GOC_LON = 13.93, 107.95  # góc tây nam khung Pleiku
+TEN_DUONG = ["Trần Hưng Đạo", "Hùng Vương", "Lê Lợi", "Phạm Văn Đồng", "Nguyễn Tất Thành", "Quang Trung",
+             "Lý Thái Tổ", "Cách Mạng Tháng Tám", "Trường Chinh", "Lê Duẩn"]
+LOAI_DUONG = ["primary", "secondary", "tertiary", "residential", "unclassified"]
+
+
+def _haversine(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * BAN_KINH_TRAI_DAT * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def _thanh_mang_duong(lat, lon, cac_canh, seed, ti_le_mot_chieu=0.15, ti_le_hinh_hoc=0.4, ti_le_song_song=0.03):
+    """MultiDiGraph kiểu osmnx từ toạ độ nút và danh sách cạnh vô hướng (i, j)."""
+    rnd = random.Random(seed)
+    G = nx.MultiDiGraph(crs="epsg:4326", simplified=True)
+    osmid = [1_000_000 + i for i in range(len(lat))]
+    G.add_nodes_from((osmid[i], {"y": float(lat[i]), "x": float(lon[i]), "street_count": 0}) for i in range(len(lat)))
+    for i, j in cac_canh:
+        du_lieu = {"osmid": rnd.randrange(10 ** 9), "highway": rnd.choice(LOAI_DUONG), "reversed": False}
+        r = rnd.random()
+        if r < 0.7:
+            du_lieu["name"] = rnd.choice(TEN_DUONG)
+        elif r < 0.75:
+            du_lieu["name"] = rnd.sample(TEN_DUONG, 2)
+        if rnd.random() < ti_le_hinh_hoc:
+            # Một điểm gãy lệch khỏi đường thẳng: cạnh có geometry và dài hơn đường chim bay
+            giua_lat = (lat[i] + lat[j]) / 2 + rnd.uniform(-1, 1) * abs(lat[i] - lat[j] + 1e-4) * 0.2
+            giua_lon = (lon[i] + lon[j]) / 2 + rnd.uniform(-1, 1) * abs(lon[i] - lon[j] + 1e-4) * 0.2
+            du_lieu["geometry"] = LineString([(lon[i], lat[i]), (giua_lon, giua_lat), (lon[j], lat[j])])
+            du_lieu["length"] = float(_haversine(lat[i], lon[i], giua_lat, giua_lon)
+                                      + _haversine(giua_lat, giua_lon, lat[j], lon[j]))
+        else:
+            du_lieu["length"] = float(_haversine(lat[i], lon[i], lat[j], lon[j]))
+        mot_chieu = rnd.random() < ti_le_mot_chieu
+        du_lieu["oneway"] = mot_chieu
+        G.add_edge(osmid[i], osmid[j], **du_lieu)
+        if not mot_chieu:
+            nguoc = dict(du_lieu, reversed=True)
+            if "geometry" in du_lieu:
+                nguoc["geometry"] = LineString(list(du_lieu["geometry"].coords)[::-1])
+            G.add_edge(osmid[j], osmid[i], **nguoc)
+    # Cạnh song song dài hơn (đường gom, làn phụ) như dữ liệu OSM thật
+    cac_canh_co = list(G.edges(keys=True, data=True))
+    for u, v, _, du_lieu in rnd.sample(cac_canh_co, int(len(cac_canh_co) * ti_le_song_song)):
+        phu = {k: w for k, w in du_lieu.items() if k != "geometry"}
+        phu["length"] = du_lieu["length"] * rnd.uniform(1.05, 1.4)
+        G.add_edge(u, v, **phu)
+    return G
+
+
+def luoi_duong_pho(so_hang, so_cot, seed=42, buoc=0.0015):
+    """Lưới so_hang x so_cot nút (~165 m mỗi ô), lệch ngẫu nhiên nhẹ, thiếu ~8% đoạn đường."""
+    rng = np.random.default_rng(seed)
+    i, j = np.divmod(np.arange(so_hang * so_cot), so_cot)
+    lat = GOC_LAT + i * buoc + rng.uniform(-0.2, 0.2, len(i)) * buoc
+    lon = GOC_LON + j * buoc + rng.uniform(-0.2, 0.2, len(j)) * buoc
+    cac_canh = []
+    for a in range(so_hang * so_cot):
+        r, c = divmod(a, so_cot)
+        if c + 1 < so_cot and rng.random() < 0.92:
+            cac_canh.append((a, a + 1))
+        if r + 1 < so_hang and rng.random() < 0.92:
+            cac_canh.append((a, a + so_cot))
+    return _thanh_mang_duong(lat, lon, cac_canh, seed)
+
+
+def hinh_hoc_ngau_nhien(so_nut, bac_trung_binh=6, seed=42, canh_khung=0.15):
+    """Random geometric graph trong khung canh_khung độ, bán kính chọn để bậc trung bình ~ bac_trung_binh."""
+    ban_kinh = math.sqrt(bac_trung_binh / (math.pi * so_nut))
+    R = nx.random_geometric_graph(so_nut, ban_kinh, seed=seed)
+    vi_tri = np.array([R.nodes[n]["pos"] for n in range(so_nut)])
+    lat = GOC_LAT + vi_tri[:, 1] * canh_khung
+    lon = GOC_LON + vi_tri[:, 0] * canh_khung
+    return _thanh_mang_duong(lat, lon, list(R.edges()), seed)
+
+
+def do_thi_co_trong_so(so_nut, bac_trung_binh=6, seed=42):
+    """Đồ thị vô hướng liên thông, trọng số nguyên 1..20 - như đồ thị người dùng nhập ở Tab 1."""
+    rnd = random.Random(seed)
+    G = nx.Graph()
+    # Cây khung ngẫu nhiên bảo đảm liên thông (Prim/Kruskal trong app đòi hỏi), rồi thêm cạnh ngẫu nhiên
+    for v in range(1, so_nut):
+        G.add_edge(rnd.randrange(v), v, weight=rnd.randint(1, 20))
+    while G.number_of_edges() < so_nut * bac_trung_binh // 2:
+        u, v = rnd.randrange(so_nut), rnd.randrange(so_nut)
+        if u != v:
+            G.add_edge(u, v, weight=rnd.randint(1, 20))
+    return G
+
+
+def luoi_vo_huong(so_hang, so_cot):
+    """Lưới vô hướng (hai phía) - nx.is_bipartite phải duyệt hết đồ thị."""
+    return nx.convert_node_labels_to_integers(nx.grid_2d_graph(so_hang, so_cot))
+
+
+def do_thi_euler(so_canh, co_huong=False, seed=42):
+    """Một chu trình ngẫu nhiên dài so_canh cạnh qua so_canh / 5 đỉnh (cùng cách sinh với bench_euler)."""
+    rnd = random.Random(seed)
+    so_nut = max(3, so_canh // 5)
+    vong = list(range(so_nut)) + [rnd.randrange(so_nut) for _ in range(so_canh - so_nut)]
+    G = nx.MultiDiGraph() if co_huong else nx.MultiGraph()
+    G.add_edges_from((u, v, {"weight": rnd.randint(1, 9)}) for u, v in zip(vong, vong[1:] + vong[:1]))
+    return G
+
+
+def mang_luong(so_tang, do_rong, seed=42):
+    """Mạng luồng phân tầng: 's' -> so_tang tầng x do_rong đỉnh -> 't', sức chứa ở thuộc tính weight."""
+    rnd = random.Random(seed)
+    G = nx.DiGraph()
+    tang = [[f"{k}_{i}" for i in range(do_rong)] for k in range(so_tang)]
+    for v in tang[0]:
+        G.add_edge("s", v, weight=rnd.randint(10, 50))
+    for v in tang[-1]:
+        G.add_edge(v, "t", weight=rnd.randint(10, 50))
+    for truoc, sau in zip(tang, tang[1:]):
+        for u in truoc:
+            for v in rnd.sample(sau, min(3, do_rong)):
+                G.add_edge(u, v, weight=rnd.randint(1, 30))
+    return G
+
+
+SUC_CHUA_LOAI_DUONG = {"primary": 3600, "secondary": 2400, "tertiary": 1600, "residential": 800, "unclassified": 600}
+
+
+def luong_duong_pho(so_hang, so_cot, seed=42):
+    """Lưới đường phố có hướng, sức chứa (xe/giờ) theo loại đường; 's' nối mép tây, 't' nối mép đông."""
+    G = nx.DiGraph()
+    for u, v, du_lieu in luoi_duong_pho(so_hang, so_cot, seed).edges(data=True):
+        suc_chua = SUC_CHUA_LOAI_DUONG[du_lieu["highway"]]
+        if G.has_edge(u, v):
+            G[u][v]["weight"] += suc_chua  # cạnh song song (đường gom) cộng thêm sức chứa
+        else:
+            G.add_edge(u, v, weight=suc_chua)
+    for hang in range(so_hang):
+        G.add_edge("s", 1_000_000 + hang * so_cot, weight=10 ** 6)
+        G.add_edge(1_000_000 + hang * so_cot + so_cot - 1, "t", weight=10 ** 6)
+    return G
+
+
+def luong_day(so_nut, mat_do=0.2, seed=42):
+    """Đồ thị có hướng ngẫu nhiên G(n, p) dày, sức chứa nguyên 1..100, nguồn 0 và đích so_nut - 1."""
+    rnd = random.Random(seed)
+    G = nx.gnp_random_graph(so_nut, mat_do, seed=seed, directed=True)
+    for _, _, du_lieu in G.edges(data=True):
+        du_lieu["weight"] = rnd.randint(1, 100)
+    return G
+
+
+def van_tay_ban_do(ban_do_nen):
+    """Băm các mảng định tuyến: hai lần chạy chỉ so sánh được khi vân tay giống nhau."""
+    h = hashlib.blake2b(digest_size=12)
+    for mang in (ban_do_nen.canh_u, ban_do_nen.canh_v, ban_do_nen.canh_length, ban_do_nen.nut_x, ban_do_nen.nut_y):
+        h.update(np.ascontiguousarray(mang).tobytes())
+    return h.hexdigest()
+
+
+def snapshot_pleiku(thu_muc=ban_do.THU_MUC_MAC_DINH):
+    """(BanDo, vân tay) của snapshot thật, hoặc (None, None) nếu chưa build snapshot."""
+    if not ban_do.co_snapshot(thu_muc):
+        return None, None
+    ban_do_nen = ban_do.tai(thu_muc, mmap=False)
+    return ban_do_nen, van_tay_ban_do(ban_do_nen)
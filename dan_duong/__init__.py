@@ -0,0 +1,3 @@
+# -----------------------------------------------------------------------------
+# LÕI DẪN ĐƯỜNG PLEIKU: các thành phần xử lý đồ thị dùng chung cho app.py
+# -----------------------------------------------------------------------------
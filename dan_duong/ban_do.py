@@ -0,0 +1,349 @@
+# -----------------------------------------------------------------------------
+# SNAPSHOT BẢN ĐỒ TRÊN ĐĨA
+# -----------------------------------------------------------------------------
+# Đồ thị đường bộ được "biên dịch" một lần thành các mảng NumPy gọn (.npy) trong
+# một thư mục, kèm manifest.json ghi phiên bản định dạng. Khi tải, các mảng được
+# ánh xạ bộ nhớ (mmap) nên chỉ mất vài mili-giây và không cần mạng.
+#
+# Tạo / làm mới snapshot:
+#     python -m dan_duong.ban_do build
+#     python -m dan_duong.ban_do build --graphml pleiku.graphml   (không cần mạng)
+# -----------------------------------------------------------------------------
+import argparse
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+PHIEN_BAN_DINH_DANG = 2   # 2: thêm canh_doi
+TEN_DINH_DANG = "pleiku-road-snapshot"
+
+TAM_PLEIKU = (13.9800, 108.0000)
+BAN_KINH_PLEIKU = 3200
+LOAI_MANG = "drive"
+
+THU_MUC_MAC_DINH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "du_lieu", "pleiku_drive")
+
+# Tên mảng -> kiểu dữ liệu lưu trên đĩa
+CAC_MANG = {
+    "nut_osmid": np.int64,
+    "nut_x": np.float64,
+    "nut_y": np.float64,
+    "canh_u": np.int32,
+    "canh_v": np.int32,
+    "canh_key": np.int32,
+    "canh_length": np.float64,
+    "canh_ten": np.int32,         # chỉ số trong bảng ten_duong, -1 nếu không có tên
+    "canh_loai": np.int32,        # chỉ số trong bảng loai_duong (highway), -1 nếu không có
+    "canh_toc_do": np.float32,    # maxspeed (km/h), NaN nếu không có
+    "canh_mot_chieu": np.bool_,
+    "canh_doi": np.int32,         # cạnh ngược chiều của cùng way OSM (đường hai chiều), -1 nếu không có
+    "hinh_hoc_chi_muc": np.int64,  # độ dài so_canh + 1, lát cắt toạ độ của từng cạnh
+    "hinh_hoc_toa_do": np.float64,  # (M, 2) theo thứ tự (x, y); cạnh không có geometry -> lát rỗng
+}
+
+
+@dataclass
+class BanDo:
+    nut_osmid: np.ndarray
+    nut_x: np.ndarray
+    nut_y: np.ndarray
+    canh_u: np.ndarray
+    canh_v: np.ndarray
+    canh_key: np.ndarray
+    canh_length: np.ndarray
+    canh_ten: np.ndarray
+    canh_loai: np.ndarray
+    canh_toc_do: np.ndarray
+    canh_mot_chieu: np.ndarray
+    canh_doi: np.ndarray
+    hinh_hoc_chi_muc: np.ndarray
+    hinh_hoc_toa_do: np.ndarray
+    ten_duong: list = field(default_factory=list)
+    loai_duong: list = field(default_factory=list)
+    thong_tin: dict = field(default_factory=dict)
+
+    @property
+    def so_nut(self):
+        return len(self.nut_osmid)
+
+    @property
+    def so_canh(self):
+        return len(self.canh_u)
+
+    def ten_canh(self, i):
+        k = int(self.canh_ten[i])
+        return self.ten_duong[k] if k >= 0 else None
+
+    def hinh_hoc(self, i):
+        # Toạ độ (x, y) của cạnh i; mảng rỗng nếu cạnh là đoạn thẳng giữa hai nút
+        return self.hinh_hoc_toa_do[self.hinh_hoc_chi_muc[i]:self.hinh_hoc_chi_muc[i + 1]]
+
+
+def _doc_toc_do(gia_tri):
+    # maxspeed của OSM có thể là "50", "50 mph", hoặc danh sách các giá trị
+    if gia_tri is None:
+        return np.nan
+    if isinstance(gia_tri, (list, tuple)):
+        cac_so = [_doc_toc_do(x) for x in gia_tri]
+        cac_so = [x for x in cac_so if not np.isnan(x)]
+        return float(np.mean(cac_so)) if cac_so else np.nan
+    phan = str(gia_tri).strip().split()
+    try:
+        so = float(phan[0])
+    except (ValueError, IndexError):
+        return np.nan
+    if len(phan) > 1 and phan[1].lower() == "mph":
+        so *= 1.609344
+    return so
+
+
+def _doc_mot_chieu(gia_tri):
+    if isinstance(gia_tri, (list, tuple)):
+        return any(_doc_mot_chieu(x) for x in gia_tri)
+    return gia_tri in (True, "True", "yes", "true", "1", "-1")
+
+
+def _khoa_way(osmid, dao_chieu):
+    # (các way OSM của cạnh, chiều so với chiều số hoá); None nếu thiếu osmid hoặc reversed không rõ
+    # (cạnh gộp khi rút gọn có thể mang cả True lẫn False)
+    if osmid is None:
+        return None
+    if isinstance(dao_chieu, (list, tuple)):
+        if len(set(dao_chieu)) != 1:
+            return None
+        dao_chieu = dao_chieu[0]
+    cac_way = tuple(sorted(osmid)) if isinstance(osmid, (list, tuple)) else (osmid,)
+    return cac_way, dao_chieu in (True, "True", "true")
+
+
+class _BangChuoi:
+    # Intern chuỗi (hoặc danh sách chuỗi) thành chỉ số nguyên
+    def __init__(self):
+        self.danh_sach = []
+        self._chi_so = {}
+
+    def them(self, gia_tri):
+        if gia_tri is None:
+            return -1
+        khoa = json.dumps(gia_tri, ensure_ascii=False)
+        if khoa not in self._chi_so:
+            self._chi_so[khoa] = len(self.danh_sach)
+            self.danh_sach.append(gia_tri)
+        return self._chi_so[khoa]
+
+
+def tu_do_thi(G, **thong_tin):
+    """Biên dịch MultiDiGraph của osmnx thành BanDo (các mảng gọn)."""
+    cac_nut = list(G.nodes())
+    chi_so_nut = {n: i for i, n in enumerate(cac_nut)}
+    nut_x = np.array([G.nodes[n]["x"] for n in cac_nut], dtype=np.float64)
+    nut_y = np.array([G.nodes[n]["y"] for n in cac_nut], dtype=np.float64)
+
+    bang_ten, bang_loai = _BangChuoi(), _BangChuoi()
+    so_canh = G.number_of_edges()
+    canh_u = np.empty(so_canh, dtype=np.int32)
+    canh_v = np.empty(so_canh, dtype=np.int32)
+    canh_key = np.empty(so_canh, dtype=np.int32)
+    canh_length = np.empty(so_canh, dtype=np.float64)
+    canh_ten = np.empty(so_canh, dtype=np.int32)
+    canh_loai = np.empty(so_canh, dtype=np.int32)
+    canh_toc_do = np.empty(so_canh, dtype=np.float32)
+    canh_mot_chieu = np.empty(so_canh, dtype=np.bool_)
+    canh_doi = np.full(so_canh, -1, dtype=np.int32)
+    cac_khoa_way = {}
+    hinh_hoc_chi_muc = np.zeros(so_canh + 1, dtype=np.int64)
+    cac_toa_do = []
+
+    # Thứ tự duyệt G.edges(keys=True) giữ nguyên thứ tự kề của networkx
+    for i, (u, v, k, du_lieu) in enumerate(G.edges(keys=True, data=True)):
+        canh_u[i] = chi_so_nut[u]
+        canh_v[i] = chi_so_nut[v]
+        canh_key[i] = k
+        canh_length[i] = du_lieu.get("length", 0.0)
+        canh_ten[i] = bang_ten.them(du_lieu.get("name"))
+        canh_loai[i] = bang_loai.them(du_lieu.get("highway"))
+        canh_toc_do[i] = _doc_toc_do(du_lieu.get("maxspeed"))
+        canh_mot_chieu[i] = _doc_mot_chieu(du_lieu.get("oneway", False))
+        # Cạnh đôi: v -> u của cùng way với cờ reversed ngược lại (osmnx thêm cả hai chiều của đường
+        # hai chiều). Chỉ so theo cặp nút thì nhầm sang một đường một chiều khác nối cùng hai nút.
+        khoa = _khoa_way(du_lieu.get("osmid"), du_lieu.get("reversed", False))
+        if khoa is not None:
+            doi = cac_khoa_way.pop((khoa[0], v, u, not khoa[1]), None)
+            if doi is not None:
+                canh_doi[i], canh_doi[doi] = doi, i
+            else:
+                cac_khoa_way.setdefault((khoa[0], u, v, khoa[1]), i)
+        so_diem = 0
+        if "geometry" in du_lieu:
+            toa_do = np.asarray(du_lieu["geometry"].coords, dtype=np.float64)[:, :2]
+            cac_toa_do.append(toa_do)
+            so_diem = len(toa_do)
+        hinh_hoc_chi_muc[i + 1] = hinh_hoc_chi_muc[i] + so_diem
+
+    hinh_hoc_toa_do = np.concatenate(cac_toa_do) if cac_toa_do else np.empty((0, 2), dtype=np.float64)
+
+    thong_tin.setdefault("crs", G.graph.get("crs", "epsg:4326"))
+    thong_tin.setdefault("simplified", bool(G.graph.get("simplified", True)))
+    return BanDo(
+        nut_osmid=np.array(cac_nut, dtype=np.int64), nut_x=nut_x, nut_y=nut_y,
+        canh_u=canh_u, canh_v=canh_v, canh_key=canh_key, canh_length=canh_length,
+        canh_ten=canh_ten, canh_loai=canh_loai, canh_toc_do=canh_toc_do, canh_mot_chieu=canh_mot_chieu,
+        canh_doi=canh_doi, hinh_hoc_chi_muc=hinh_hoc_chi_muc, hinh_hoc_toa_do=hinh_hoc_toa_do,
+        ten_duong=bang_ten.danh_sach, loai_duong=bang_loai.danh_sach, thong_tin=thong_tin,
+    )
+
+
+def luu(ban_do, thu_muc=THU_MUC_MAC_DINH):
+    """Ghi snapshot ra thư mục. Ghi vào thư mục tạm rồi đổi tên để không bao giờ để lại snapshot dở dang."""
+    thu_muc = os.path.abspath(thu_muc)
+    thu_muc_tam = thu_muc + ".tmp"
+    shutil.rmtree(thu_muc_tam, ignore_errors=True)
+    os.makedirs(thu_muc_tam)
+
+    for ten, kieu in CAC_MANG.items():
+        np.save(os.path.join(thu_muc_tam, ten + ".npy"), np.ascontiguousarray(getattr(ban_do, ten), dtype=kieu))
+
+    with open(os.path.join(thu_muc_tam, "chuoi.json"), "w", encoding="utf-8") as f:
+        json.dump({"ten_duong": ban_do.ten_duong, "loai_duong": ban_do.loai_duong}, f, ensure_ascii=False)
+
+    manifest = {
+        "dinh_dang": TEN_DINH_DANG,
+        "phien_ban": PHIEN_BAN_DINH_DANG,
+        "so_nut": ban_do.so_nut,
+        "so_canh": ban_do.so_canh,
+        "tao_luc": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "thong_tin": ban_do.thong_tin,
+    }
+    with open(os.path.join(thu_muc_tam, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    # Các tệp phụ (chỉ mục, phân cấp, ...) của snapshot cũ bị xoá theo vì không còn khớp dữ liệu
+    if os.path.isdir(thu_muc):
+        shutil.rmtree(thu_muc)
+    os.replace(thu_muc_tam, thu_muc)
+    return thu_muc
+
+
+def co_snapshot(thu_muc=THU_MUC_MAC_DINH):
+    return os.path.isfile(os.path.join(thu_muc, "manifest.json"))
+
+
+def doc_manifest(thu_muc=THU_MUC_MAC_DINH):
+    with open(os.path.join(thu_muc, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("dinh_dang") != TEN_DINH_DANG:
+        raise ValueError(f"{thu_muc} không phải snapshot bản đồ")
+    if manifest.get("phien_ban") != PHIEN_BAN_DINH_DANG:
+        raise ValueError(f"Snapshot phiên bản {manifest.get('phien_ban')} không tương thích "
+                         f"(cần {PHIEN_BAN_DINH_DANG}). Hãy chạy lại: python -m dan_duong.ban_do build")
+    return manifest
+
+
+def tai(thu_muc=THU_MUC_MAC_DINH, mmap=True):
+    """Tải snapshot; với mmap=True các mảng được ánh xạ bộ nhớ ở chế độ chỉ đọc."""
+    manifest = doc_manifest(thu_muc)
+    che_do = "r" if mmap else None
+    cac_mang = {ten: np.load(os.path.join(thu_muc, ten + ".npy"), mmap_mode=che_do) for ten in CAC_MANG}
+    with open(os.path.join(thu_muc, "chuoi.json"), encoding="utf-8") as f:
+        chuoi = json.load(f)
+    return BanDo(**cac_mang, ten_duong=chuoi["ten_duong"], loai_duong=chuoi["loai_duong"],
+                 thong_tin=manifest.get("thong_tin", {}))
+
+
+def thanh_do_thi(ban_do):
+    """Dựng lại MultiDiGraph tương thích osmnx (x, y, length, name, highway, geometry...)."""
+    import networkx as nx
+    import shapely
+
+    G = nx.MultiDiGraph(crs=ban_do.thong_tin.get("crs", "epsg:4326"),
+                        simplified=ban_do.thong_tin.get("simplified", True))
+    osmid = ban_do.nut_osmid.tolist()
+    G.add_nodes_from((n, {"y": y, "x": x}) for n, x, y in zip(osmid, ban_do.nut_x.tolist(), ban_do.nut_y.tolist()))
+
+    # Tạo toàn bộ LineString trong một lần gọi vector hoá
+    so_diem = np.diff(ban_do.hinh_hoc_chi_muc)
+    co_hinh_hoc = np.flatnonzero(so_diem >= 2)
+    hinh_hoc = [None] * ban_do.so_canh
+    if len(co_hinh_hoc):
+        chi_so_hinh = np.repeat(np.arange(len(co_hinh_hoc)), so_diem[co_hinh_hoc])
+        toa_do = np.concatenate([ban_do.hinh_hoc(i) for i in co_hinh_hoc])
+        for i, ls in zip(co_hinh_hoc.tolist(), shapely.linestrings(toa_do, indices=chi_so_hinh)):
+            hinh_hoc[i] = ls
+
+    canh_u = ban_do.canh_u.tolist()
+    canh_v = ban_do.canh_v.tolist()
+    canh_key = ban_do.canh_key.tolist()
+    canh_length = ban_do.canh_length.tolist()
+    canh_ten = ban_do.canh_ten.tolist()
+    canh_loai = ban_do.canh_loai.tolist()
+    canh_toc_do = ban_do.canh_toc_do.tolist()
+    canh_mot_chieu = ban_do.canh_mot_chieu.tolist()
+    canh_doi = ban_do.canh_doi.tolist()
+    for i in range(ban_do.so_canh):
+        # Snapshot không giữ mã way OSM: osmid / reversed dựng lại chỉ đủ để tu_do_thi ghép lại cạnh đôi
+        doi = canh_doi[i]
+        du_lieu = {"length": canh_length[i], "oneway": canh_mot_chieu[i],
+                   "osmid": i if doi < 0 else min(i, doi), "reversed": i > doi >= 0}
+        if canh_ten[i] >= 0:
+            du_lieu["name"] = ban_do.ten_duong[canh_ten[i]]
+        if canh_loai[i] >= 0:
+            du_lieu["highway"] = ban_do.loai_duong[canh_loai[i]]
+        if canh_toc_do[i] == canh_toc_do[i]:
+            du_lieu["maxspeed"] = f"{canh_toc_do[i]:g}"
+        if hinh_hoc[i] is not None:
+            du_lieu["geometry"] = hinh_hoc[i]
+        G.add_edge(osmid[canh_u[i]], osmid[canh_v[i]], key=canh_key[i], **du_lieu)
+    return G
+
+
+def tai_tu_mang(tam=TAM_PLEIKU, ban_kinh=BAN_KINH_PLEIKU, loai_mang=LOAI_MANG):
+    import osmnx as ox
+    return ox.graph_from_point(tam, dist=ban_kinh, network_type=loai_mang)
+
+
+def xay_snapshot(thu_muc=THU_MUC_MAC_DINH, tam=TAM_PLEIKU, ban_kinh=BAN_KINH_PLEIKU, loai_mang=LOAI_MANG,
+                 graphml=None):
+    """Bước build/refresh: tải đồ thị (từ Overpass hoặc tệp GraphML) và ghi snapshot."""
+    if graphml:
+        import osmnx as ox
+        G = ox.load_graphml(graphml)
+        nguon = {"graphml": os.path.abspath(graphml)}
+    else:
+        G = tai_tu_mang(tam, ban_kinh, loai_mang)
+        nguon = {"tam": list(tam), "ban_kinh": ban_kinh, "loai_mang": loai_mang}
+    return luu(tu_do_thi(G, nguon=nguon), thu_muc)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m dan_duong.ban_do",
+                                     description="Xây / kiểm tra snapshot bản đồ Pleiku trên đĩa")
+    lenh = parser.add_subparsers(dest="lenh", required=True)
+
+    p_build = lenh.add_parser("build", help="tải đồ thị và ghi (đè) snapshot")
+    p_build.add_argument("--out", default=THU_MUC_MAC_DINH)
+    p_build.add_argument("--tam", type=float, nargs=2, default=TAM_PLEIKU, metavar=("LAT", "LON"))
+    p_build.add_argument("--ban-kinh", type=float, default=BAN_KINH_PLEIKU)
+    p_build.add_argument("--loai-mang", default=LOAI_MANG)
+    p_build.add_argument("--graphml", help="dựng từ tệp GraphML có sẵn thay vì tải từ Overpass")
+
+    p_info = lenh.add_parser("info", help="in manifest của snapshot")
+    p_info.add_argument("--out", default=THU_MUC_MAC_DINH)
+
+    args = parser.parse_args(argv)
+    if args.lenh == "build":
+        t0 = time.perf_counter()
+        thu_muc = xay_snapshot(args.out, tuple(args.tam), args.ban_kinh, args.loai_mang, args.graphml)
+        manifest = doc_manifest(thu_muc)
+        print(f"Đã ghi {thu_muc}: {manifest['so_nut']} nút, {manifest['so_canh']} cạnh "
+              f"({time.perf_counter() - t0:.1f} s)")
+    else:
+        print(json.dumps(doc_manifest(args.out), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
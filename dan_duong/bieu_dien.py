@@ -0,0 +1,91 @@
+# -----------------------------------------------------------------------------
+# BIỂU DIỄN ĐỒ THỊ DẠNG THƯA CHO TAB 1
+# -----------------------------------------------------------------------------
+# Ma trận kề được giữ ở dạng CSR (scipy) - 20k đỉnh chỉ tốn vài trăm KB thay vì
+# ~3 GB cho bảng dày. Giao diện chỉ lấy ra một cửa sổ / một trang mỗi lần; xuất toàn
+# bộ ma trận thì ghi tuần tự từng khối hàng ra tệp Matrix Market hoặc NPZ.
+# -----------------------------------------------------------------------------
+import itertools
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+SO_HANG_MOI_KHOI = 4096  # số hàng CSR ghi ra tệp mỗi lần khi xuất Matrix Market
+
+
+def ma_tran_thua(G):
+    """(Ma trận kề CSR, danh sách đỉnh theo thứ tự hàng/cột) - cùng quy ước với nx.adjacency_matrix."""
+    cac_nut = list(G.nodes())
+    return nx.to_scipy_sparse_array(G, nodelist=cac_nut, weight="weight", format="csr"), cac_nut
+
+
+def cua_so_ma_tran(A, cac_nut, hang_dau, cot_dau, kich_thuoc):
+    """DataFrame dày của riêng khối [hang_dau:+kich_thuoc, cot_dau:+kich_thuoc]."""
+    hang_cuoi = min(hang_dau + kich_thuoc, A.shape[0])
+    cot_cuoi = min(cot_dau + kich_thuoc, A.shape[1])
+    return pd.DataFrame(A[hang_dau:hang_cuoi, cot_dau:cot_cuoi].toarray(),
+                        index=cac_nut[hang_dau:hang_cuoi], columns=cac_nut[cot_dau:cot_cuoi])
+
+
+def tom_tat_ma_tran(A):
+    """Số liệu tổng quan thay cho bảng dày khi đồ thị lớn."""
+    n = A.shape[0]
+    bac = np.diff(A.indptr)
+    return {
+        "so_dinh": n,
+        "so_phan_tu_khac_0": int(A.nnz),
+        "mat_do": A.nnz / (n * n) if n else 0.0,
+        "bo_nho_csr": A.data.nbytes + A.indices.nbytes + A.indptr.nbytes,
+        "bo_nho_day": n * n * A.dtype.itemsize,
+        "bac_nho_nhat": int(bac.min()) if n else 0,
+        "bac_trung_binh": float(bac.mean()) if n else 0.0,
+        "bac_lon_nhat": int(bac.max()) if n else 0,
+        # Phân bố bậc (theo hàng, tức bậc ra với đồ thị có hướng): bậc -> số đỉnh
+        "phan_bo_bac": pd.Series(bac).value_counts().sort_index(),
+    }
+
+
+def trang_danh_sach_ke(G, dau, kich_thuoc):
+    """Bảng danh sách kề cho các đỉnh thứ [dau, dau + kich_thuoc) - chỉ dựng chuỗi cho trang này."""
+    dong = []
+    for nut, ke in itertools.islice(G.adjacency(), dau, dau + kich_thuoc):
+        # Hiển thị trọng số nếu có, không thì để trống
+        dong.append({"Đỉnh nguồn": nut,
+                     "Các đỉnh kề & Trọng số": ", ".join(f"{n} (w={w.get('weight', 'N/A')})" for n, w in ke.items())})
+    return pd.DataFrame(dong)
+
+
+def trang_danh_sach_canh(G, dau, kich_thuoc):
+    dong = [{"Đỉnh đầu": u, "Đỉnh cuối": v, "Trọng số": w}
+            for u, v, w in itertools.islice(G.edges(data="weight", default="Không có"), dau, dau + kich_thuoc)]
+    return pd.DataFrame(dong)
+
+
+def ghi_matrix_market(A, cac_nut, tep):
+    """Ghi ma trận CSR ra tep (đường dẫn hoặc file nhị phân) theo định dạng Matrix Market toạ độ.
+
+    Ghi tuần tự từng khối SO_HANG_MOI_KHOI hàng nên bộ nhớ phụ chỉ tỉ lệ với một khối.
+    Nhãn đỉnh (theo thứ tự hàng/cột) được ghi trong phần chú thích %.
+    """
+    if isinstance(tep, (str, bytes)) or hasattr(tep, "__fspath__"):
+        with open(tep, "wb") as f:
+            return ghi_matrix_market(A, cac_nut, f)
+    so_thuc = A.dtype.kind == "f"
+    tep.write(f"%%MatrixMarket matrix coordinate {'real' if so_thuc else 'integer'} general\n".encode())
+    for i in range(0, len(cac_nut), 64):
+        tep.write(("% dinh " + " ".join(str(n) for n in cac_nut[i:i + 64]) + "\n").encode())
+    tep.write(f"{A.shape[0]} {A.shape[1]} {A.nnz}\n".encode())
+    dinh_dang = "%d %d %.17g" if so_thuc else "%d %d %d"
+    for dau in range(0, A.shape[0], SO_HANG_MOI_KHOI):
+        khoi = A[dau:dau + SO_HANG_MOI_KHOI].tocoo()
+        if khoi.nnz:
+            np.savetxt(tep, np.column_stack([khoi.row + dau + 1, khoi.col + 1, khoi.data]), fmt=dinh_dang)
+    return tep
+
+
+def ghi_npz(A, cac_nut, tep):
+    """Ghi CSR ra .npz đọc được bằng scipy.sparse.load_npz; nhãn đỉnh nằm ở khoá 'nut'."""
+    np.savez_compressed(tep, format=np.array(A.format), shape=np.array(A.shape), data=A.data,
+                        indices=A.indices, indptr=A.indptr, nut=np.array([str(n) for n in cac_nut]))
+    return tep
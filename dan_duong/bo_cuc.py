@@ -0,0 +1,102 @@
+# -----------------------------------------------------------------------------
+# BỐ CỤC (LAYOUT) ĐỒ THỊ CHO TAB 1
+# -----------------------------------------------------------------------------
+# - dau_van_tay_do_thi: khoá cache bố cục, đổi khi nút / cạnh / trọng số đổi.
+# - bo_cuc_pivot_mds: bố cục nhanh cho đồ thị lớn (Brandes & Pich, "Eigensolver
+#   methods for progressive multidimensional scaling of large data"): BFS từ k đỉnh
+#   chốt rồi MDS cổ điển trên ma trận n x k, O(k (V + E)). Mỗi thành phần liên thông
+#   được bố trí riêng rồi xếp thành hàng để không chồng lên nhau.
+# -----------------------------------------------------------------------------
+import hashlib
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, shortest_path
+
+SO_DINH_CHOT = 50
+SO_DINH_VONG_TRON = 8  # thành phần liên thông nhỏ hơn được đặt trên vòng tròn
+
+
+def dau_van_tay_do_thi(G):
+    """Băm hướng, danh sách nút và cạnh (kèm weight - spring_layout dùng trọng số)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(b"D" if G.is_directed() else b"U")
+    h.update(repr(list(G.nodes())).encode())
+    h.update(repr(list(iter(G.edges(data="weight")))).encode())
+    return h.hexdigest()
+
+
+def _ma_tran_ke_vo_huong(G):
+    chi_so = {n: i for i, n in enumerate(G.nodes())}
+    n = len(chi_so)
+    canh = np.array([(chi_so[u], chi_so[v]) for u, v in G.edges()], dtype=np.int64).reshape(-1, 2)
+    hang = np.concatenate([canh[:, 0], canh[:, 1]])
+    cot = np.concatenate([canh[:, 1], canh[:, 0]])
+    A = csr_matrix((np.ones(len(hang)), (hang, cot)), shape=(n, n))
+    A.data[:] = 1.0  # cạnh song song được cộng dồn khi dựng; BFS chỉ cần có/không
+    return A
+
+
+def _pivot_mds(A, rng):
+    """Toạ độ 2D cho một thành phần liên thông (ma trận kề con A)."""
+    n = A.shape[0]
+    k = min(SO_DINH_CHOT, n)
+    # Chọn chốt theo max-min: đỉnh xa nhất so với các chốt đã có
+    D = np.empty((n, k))
+    gan_nhat = np.full(n, np.inf)
+    chot = int(rng.integers(n))
+    for j in range(k):
+        D[:, j] = shortest_path(A, directed=False, unweighted=True, indices=chot)
+        np.minimum(gan_nhat, D[:, j], out=gan_nhat)
+        chot = int(np.argmax(gan_nhat))
+    # MDS cổ điển trên ma trận n x k: khử tâm kép rồi lấy hai vector kỳ dị lớn nhất
+    D2 = D ** 2
+    C = -0.5 * (D2 - D2.mean(axis=0) - D2.mean(axis=1, keepdims=True) + D2.mean())
+    U, s, _ = np.linalg.svd(C, full_matrices=False)
+    return U[:, :2] * s[:2]
+
+
+def bo_cuc_pivot_mds(G, seed=42):
+    """{nút: np.array([x, y])} trong hình vuông đơn vị, cho đồ thị hàng chục nghìn đỉnh."""
+    cac_nut = list(G.nodes())
+    if not cac_nut:
+        return {}
+    rng = np.random.default_rng(seed)
+    A = _ma_tran_ke_vo_huong(G)
+    so_tp, nhan = connected_components(A, directed=False)
+    toa_do = np.zeros((len(cac_nut), 2))
+
+    # Xếp kệ: thành phần lớn trước, mỗi thành phần chiếm ô vuông cạnh ~ sqrt(số đỉnh)
+    thu_tu = np.argsort(nhan, kind="stable")
+    thanh_phan = np.split(thu_tu, np.cumsum(np.bincount(nhan, minlength=so_tp))[:-1])
+    thanh_phan.sort(key=len, reverse=True)
+    be_rong = np.sqrt(len(cac_nut)) * 1.5
+    x, y, cao_hang = 0.0, 0.0, 0.0
+    for nut in thanh_phan:
+        if len(nut) > SO_DINH_VONG_TRON:
+            xy = _pivot_mds(A[nut][:, nut], rng)
+        else:
+            # Thành phần rất nhỏ (thường là hàng nghìn mảnh lẻ): đặt trên vòng tròn, không cần MDS
+            goc = 2 * np.pi * np.arange(len(nut)) / len(nut)
+            xy = np.column_stack([np.cos(goc), np.sin(goc)])
+        xy = xy - xy.min(axis=0)
+        co = max(float(xy.max()), 1e-9)
+        canh_o = max(np.sqrt(len(nut)), 1.0)
+        xy = xy / co * canh_o
+        if x > 0 and x + canh_o > be_rong:
+            x, y, cao_hang = 0.0, y + cao_hang + 1.0, 0.0
+        toa_do[nut] = xy + (x, y)
+        x += canh_o + 1.0
+        cao_hang = max(cao_hang, canh_o)
+
+    toa_do -= toa_do.min(axis=0)
+    toa_do /= max(float(toa_do.max()), 1e-9)
+    return dict(zip(cac_nut, toa_do))
+
+
+def bo_cuc(G, lon=False, seed=42):
+    # Đồ thị nhỏ giữ nguyên bố cục lò xo quen thuộc; đồ thị lớn dùng pivot MDS
+    if lon:
+        return bo_cuc_pivot_mds(G, seed=seed)
+    return nx.spring_layout(G, seed=seed)
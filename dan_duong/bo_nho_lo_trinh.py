@@ -0,0 +1,83 @@
+# -----------------------------------------------------------------------------
+# BỘ NHỚ ĐỆM LỘ TRÌNH DÙNG CHUNG GIỮA CÁC PHIÊN
+# -----------------------------------------------------------------------------
+# LRU có giới hạn trong tiến trình Streamlit, khoá theo (nút đầu, nút cuối đã gắn,
+# thuật toán, trọng số). Nhiều phiên hỏi cùng một chuyến cùng lúc thì chỉ một phiên
+# tính, các phiên còn lại chờ kết quả của phiên đó (gộp yêu cầu). Lỗi (vd. không có
+# đường đi) được chuyển cho mọi phiên đang chờ nhưng không được lưu lại; phiên đang tính
+# bị dừng giữa chừng (ngoại lệ không thuộc Exception, vd. Streamlit dừng lượt chạy) thì
+# một phiên đang chờ tự tính lại.
+# -----------------------------------------------------------------------------
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+SUC_CHUA_MAC_DINH = 1024
+
+
+class BoNhoLoTrinh:
+    def __init__(self, suc_chua=SUC_CHUA_MAC_DINH):
+        self.suc_chua = suc_chua
+        self._du_lieu = OrderedDict()  # khoá -> kết quả, cuối = mới dùng nhất
+        self._dang_tinh = {}           # khoá -> Future của phiên đang tính
+        self._khoa = threading.Lock()
+        self.so_trung = 0
+        self.so_truot = 0
+        self.so_gop = 0    # yêu cầu chờ phiên khác đang tính cùng khoá
+        self.so_loai = 0
+
+    def __len__(self):
+        return len(self._du_lieu)
+
+    def lay_hoac_tinh(self, khoa, ham_tinh):
+        """(kết quả, có_sẵn): chỉ gọi ham_tinh() khi chưa có và không phiên nào đang tính khoá này.
+
+        có_sẵn là True nếu kết quả lấy từ bộ nhớ hoặc từ phiên khác. Kết quả được dùng
+        chung giữa các phiên nên người gọi không được sửa nó.
+        """
+        while True:
+            with self._khoa:
+                if khoa in self._du_lieu:
+                    self._du_lieu.move_to_end(khoa)
+                    self.so_trung += 1
+                    return self._du_lieu[khoa], True
+                dang_tinh = self._dang_tinh.get(khoa)
+                if dang_tinh is None:
+                    dang_tinh = self._dang_tinh[khoa] = Future()
+                    self.so_truot += 1
+                    break
+                self.so_gop += 1
+            try:
+                return dang_tinh.result(), True
+            except Exception:
+                raise
+            except BaseException:
+                # Phiên đang tính bị dừng, không phải lỗi của phép tính: thử lại (có thể tự tính)
+                continue
+
+        try:
+            ket_qua = ham_tinh()
+        except BaseException as e:
+            with self._khoa:
+                del self._dang_tinh[khoa]
+            dang_tinh.set_exception(e)
+            raise
+        with self._khoa:
+            del self._dang_tinh[khoa]
+            self._du_lieu[khoa] = ket_qua
+            while len(self._du_lieu) > self.suc_chua:
+                self._du_lieu.popitem(last=False)
+                self.so_loai += 1
+        dang_tinh.set_result(ket_qua)
+        return ket_qua, False
+
+    def xoa(self):
+        with self._khoa:
+            self._du_lieu.clear()
+
+    def thong_ke(self):
+        with self._khoa:
+            tong = self.so_trung + self.so_truot + self.so_gop
+            return {"so_muc": len(self._du_lieu), "suc_chua": self.suc_chua, "trung": self.so_trung,
+                    "truot": self.so_truot, "gop": self.so_gop, "loai": self.so_loai,
+                    "ti_le_trung": (self.so_trung + self.so_gop) / tong if tong else 0.0}
@@ -0,0 +1,255 @@
+# -----------------------------------------------------------------------------
+# CHỈ MỤC KHÔNG GIAN: GẮN TOẠ ĐỘ VÀO NÚT / CẠNH CỦA ĐỒ THỊ
+# -----------------------------------------------------------------------------
+# KDTree (scikit-learn) trên vector đơn vị 3 chiều của (lat, lon): khoảng cách dây
+# cung đồng biến với khoảng cách trên mặt cầu nên láng giềng gần nhất là chính xác
+# ở mọi quy mô, và truy vấn N điểm chỉ là một lời gọi vector hoá.
+# Cây được xây một lần cùng snapshot:
+#     python -m dan_duong.chi_muc_khong_gian build [--snapshot DIR]
+# -----------------------------------------------------------------------------
+import argparse
+import math
+import os
+import pickle
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from dan_duong.dinh_tuyen import BAN_KINH_TRAI_DAT
+
+TEN_TEP = "chi_muc_khong_gian.pkl"
+PHIEN_BAN_CHI_MUC = 1
+
+DO_DAI_MANH_TOI_DA = 40.0  # m; đoạn dài hơn được chia nhỏ để trung điểm luôn gần mọi điểm trên đoạn
+SO_UNG_VIEN_CANH = 8
+
+
+def _vector_don_vi(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def _day_cung_thanh_met(day_cung):
+    return 2 * BAN_KINH_TRAI_DAT * np.arcsin(np.minimum(1.0, day_cung / 2))
+
+
+@dataclass
+class KetQuaBatCanh:
+    canh: np.ndarray         # chỉ số cạnh trong snapshot (u -> v)
+    vi_tri: np.ndarray       # quãng đường từ u tới điểm chiếu, dọc theo cạnh (m)
+    ti_le: np.ndarray        # vi_tri / length của cạnh, trong [0, 1]
+    khoang_cach: np.ndarray  # khoảng cách từ điểm truy vấn tới điểm chiếu (m)
+    lat: np.ndarray          # toạ độ điểm chiếu
+    lon: np.ndarray
+
+
+class ChiMucKhongGian:
+    def __init__(self, cay_nut, cay_manh, manh_canh, manh_x0, manh_y0, manh_x1, manh_y1, manh_truoc, manh_do_dai,
+                 canh_length):
+        self.cay_nut = cay_nut
+        self.cay_manh = cay_manh
+        # Mỗi "mảnh" là một đoạn thẳng thuộc hình học của một cạnh
+        self.manh_canh = manh_canh
+        self.manh_x0, self.manh_y0 = manh_x0, manh_y0
+        self.manh_x1, self.manh_y1 = manh_x1, manh_y1
+        self.manh_truoc = manh_truoc      # phần length của cạnh nằm trước mảnh (m)
+        self.manh_do_dai = manh_do_dai    # phần length ứng với chính mảnh (m)
+        self.canh_length = canh_length
+
+    # --- Xây dựng ------------------------------------------------------------
+    @classmethod
+    def tu_ban_do(cls, ban_do):
+        cay_nut = KDTree(_vector_don_vi(ban_do.nut_y, ban_do.nut_x))
+
+        # Toạ độ các đỉnh của đường gấp khúc mỗi cạnh: geometry nếu có, không thì nút u -> nút v
+        so_diem = np.diff(ban_do.hinh_hoc_chi_muc)
+        so_diem_canh = np.where(so_diem >= 2, so_diem, 2)
+        dau_canh = np.zeros(ban_do.so_canh + 1, dtype=np.int64)
+        np.cumsum(so_diem_canh, out=dau_canh[1:])
+        x = np.empty(dau_canh[-1])
+        y = np.empty(dau_canh[-1])
+        co_hinh = so_diem >= 2
+        canh_cua_toa_do = np.repeat(np.arange(ban_do.so_canh), so_diem)
+        chi_so_hinh = np.flatnonzero(co_hinh[canh_cua_toa_do])
+        dich_hinh = (dau_canh[:-1] - ban_do.hinh_hoc_chi_muc[:-1])[canh_cua_toa_do[chi_so_hinh]]
+        x[chi_so_hinh + dich_hinh] = ban_do.hinh_hoc_toa_do[chi_so_hinh, 0]
+        y[chi_so_hinh + dich_hinh] = ban_do.hinh_hoc_toa_do[chi_so_hinh, 1]
+        khong_hinh = np.flatnonzero(~co_hinh)
+        u, v = np.asarray(ban_do.canh_u), np.asarray(ban_do.canh_v)
+        x[dau_canh[khong_hinh]], y[dau_canh[khong_hinh]] = ban_do.nut_x[u[khong_hinh]], ban_do.nut_y[u[khong_hinh]]
+        x[dau_canh[khong_hinh] + 1], y[dau_canh[khong_hinh] + 1] = ban_do.nut_x[v[khong_hinh]], ban_do.nut_y[v[khong_hinh]]
+
+        # Đoạn thẳng = hai đỉnh liên tiếp cùng cạnh
+        canh_cua_diem = np.repeat(np.arange(ban_do.so_canh), so_diem_canh)
+        la_dau_doan = np.ones(len(x), dtype=bool)
+        la_dau_doan[dau_canh[1:] - 1] = False
+        dau = np.flatnonzero(la_dau_doan)
+        doan_canh = canh_cua_diem[dau]
+        x0, y0, x1, y1 = x[dau], y[dau], x[dau + 1], y[dau + 1]
+
+        # Phần length đứng trước mỗi đoạn, theo tỉ lệ độ dài hình học (khớp với length của osmnx)
+        do_dai_doan = _khoang_cach_met(y0, x0, y1, x1)
+        tong_hinh_hoc = np.bincount(doan_canh, weights=do_dai_doan, minlength=ban_do.so_canh)
+        tich_luy = np.cumsum(do_dai_doan) - do_dai_doan
+        truoc_trong_canh = tich_luy - (np.cumsum(tong_hinh_hoc) - tong_hinh_hoc)[doan_canh]
+        canh_length = np.asarray(ban_do.canh_length, dtype=np.float64)
+        he_so = np.divide(canh_length, tong_hinh_hoc, out=np.zeros_like(canh_length), where=tong_hinh_hoc > 0)
+
+        # Chia đoạn dài thành các mảnh <= DO_DAI_MANH_TOI_DA
+        so_manh = np.maximum(1, np.ceil(do_dai_doan / DO_DAI_MANH_TOI_DA).astype(np.int64))
+        doan = np.repeat(np.arange(len(dau)), so_manh)
+        thu_tu_trong_doan = np.arange(len(doan)) - np.repeat(np.cumsum(so_manh) - so_manh, so_manh)
+        t0 = thu_tu_trong_doan / so_manh[doan]
+        t1 = (thu_tu_trong_doan + 1) / so_manh[doan]
+        dx, dy = x1[doan] - x0[doan], y1[doan] - y0[doan]
+        manh_x0, manh_y0 = x0[doan] + t0 * dx, y0[doan] + t0 * dy
+        manh_x1, manh_y1 = x0[doan] + t1 * dx, y0[doan] + t1 * dy
+        manh_canh = doan_canh[doan]
+        manh_truoc = (truoc_trong_canh[doan] + t0 * do_dai_doan[doan]) * he_so[manh_canh]
+        manh_do_dai = do_dai_doan[doan] / so_manh[doan] * he_so[manh_canh]
+
+        cay_manh = KDTree(_vector_don_vi((manh_y0 + manh_y1) / 2, (manh_x0 + manh_x1) / 2))
+        return cls(cay_nut, cay_manh, manh_canh.astype(np.int32), manh_x0, manh_y0, manh_x1, manh_y1,
+                   manh_truoc, manh_do_dai, canh_length)
+
+    # --- Lưu / tải -----------------------------------------------------------
+    def luu(self, duong_dan):
+        with open(duong_dan, "wb") as f:
+            pickle.dump({"phien_ban": PHIEN_BAN_CHI_MUC, "chi_muc": self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return duong_dan
+
+    @classmethod
+    def tai(cls, duong_dan):
+        with open(duong_dan, "rb") as f:
+            du_lieu = pickle.load(f)
+        if du_lieu.get("phien_ban") != PHIEN_BAN_CHI_MUC:
+            raise ValueError(f"{duong_dan}: phiên bản chỉ mục không tương thích, hãy xây lại")
+        return du_lieu["chi_muc"]
+
+    # --- Truy vấn ------------------------------------------------------------
+    def bat_nut(self, lat, lon):
+        """Nút gần nhất cho N điểm trong một lời gọi. Trả về (chỉ số nút, khoảng cách m)."""
+        lat, lon = np.atleast_1d(lat).astype(np.float64), np.atleast_1d(lon).astype(np.float64)
+        day_cung, chi_so = self.cay_nut.query(_vector_don_vi(lat, lon), k=1)
+        return chi_so[:, 0], _day_cung_thanh_met(day_cung[:, 0])
+
+    def bat_canh(self, lat, lon):
+        """Cạnh gần nhất cho N điểm, kèm vị trí điểm chiếu dọc theo cạnh."""
+        lat, lon = np.atleast_1d(lat).astype(np.float64), np.atleast_1d(lon).astype(np.float64)
+        k = min(SO_UNG_VIEN_CANH, len(self.manh_canh))
+        _, ung_vien = self.cay_manh.query(_vector_don_vi(lat, lon), k=k)
+
+        # Chiếu lên từng mảnh trong hệ toạ độ phẳng cục bộ (m) quanh điểm truy vấn
+        he_x = np.radians(1.0) * BAN_KINH_TRAI_DAT * np.cos(np.radians(lat))[:, None]
+        he_y = np.radians(1.0) * BAN_KINH_TRAI_DAT
+        ax = (self.manh_x0[ung_vien] - lon[:, None]) * he_x
+        ay = (self.manh_y0[ung_vien] - lat[:, None]) * he_y
+        bx = (self.manh_x1[ung_vien] - lon[:, None]) * he_x
+        by = (self.manh_y1[ung_vien] - lat[:, None]) * he_y
+        dx, dy = bx - ax, by - ay
+        do_dai_2 = dx * dx + dy * dy
+        t = np.clip(np.divide(-(ax * dx + ay * dy), do_dai_2, out=np.zeros_like(do_dai_2), where=do_dai_2 > 0), 0, 1)
+        px, py = ax + t * dx, ay + t * dy
+        khoang_cach = np.hypot(px, py)
+
+        tot_nhat = np.argmin(khoang_cach, axis=1)
+        hang = np.arange(len(lat))
+        manh = ung_vien[hang, tot_nhat]
+        t = t[hang, tot_nhat]
+        canh = self.manh_canh[manh]
+        vi_tri = self.manh_truoc[manh] + t * self.manh_do_dai[manh]
+        vi_tri = np.clip(vi_tri, 0.0, self.canh_length[canh])
+        ti_le = np.divide(vi_tri, self.canh_length[canh], out=np.zeros_like(vi_tri), where=self.canh_length[canh] > 0)
+        return KetQuaBatCanh(canh=canh, vi_tri=vi_tri, ti_le=ti_le, khoang_cach=khoang_cach[hang, tot_nhat],
+                             lat=self.manh_y0[manh] + t * (self.manh_y1[manh] - self.manh_y0[manh]),
+                             lon=self.manh_x0[manh] + t * (self.manh_x1[manh] - self.manh_x0[manh]))
+
+
+def _khoang_cach_met(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * BAN_KINH_TRAI_DAT * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+# -----------------------------------------------------------------------------
+# CÁC ĐẦU MÚT (KÈM PHẦN CẠNH ĐI DỞ) CỦA MỘT ĐIỂM CHIẾU TRÊN CẠNH
+# -----------------------------------------------------------------------------
+def phan_tu_hai_chieu(csr, ban_do, canh):
+    """(xuôi, ngược): phần tử CSR của từng cạnh snapshot canh và của cạnh đôi ngược chiều (cùng way OSM).
+
+    Chọn theo đúng cạnh (csr.canh_goc), không theo cặp nút: đường một chiều khác hay cạnh song song
+    nối cùng hai nút có độ dài / hình học khác. -1 nếu CSR không chạy trên cạnh đó.
+    """
+    canh = np.asarray(canh, dtype=np.int64)
+    doi = np.asarray(ban_do.canh_doi, dtype=np.int64)[canh]
+    return csr.phan_tu_cua_canh(canh), np.where(doi >= 0, csr.phan_tu_cua_canh(doi), -1)
+
+
+def _chi_phi_nguoc(csr, ban_do, canh):
+    nguoc = int(phan_tu_hai_chieu(csr, ban_do, [canh])[1][0])
+    return float(csr.trong_so[nguoc]) if nguoc >= 0 else None
+
+
+def cac_nut_xuat_phat(csr, ban_do, canh, vi_tri):
+    """{nút: chi phí} để rời điểm chiếu: đi xuôi tới v, hoặc quay về u theo cạnh đôi nếu đường hai chiều."""
+    u, v = int(ban_do.canh_u[canh]), int(ban_do.canh_v[canh])
+    do_dai = float(ban_do.canh_length[canh])
+    hat_giong = {v: max(0.0, do_dai - vi_tri)}
+    nguoc = _chi_phi_nguoc(csr, ban_do, canh)
+    if nguoc is not None and do_dai > 0:
+        hat_giong[u] = min(hat_giong.get(u, math.inf), nguoc * vi_tri / do_dai)
+    return hat_giong
+
+
+def cac_nut_den(csr, ban_do, canh, vi_tri):
+    """{nút: chi phí} để tới điểm chiếu: từ u đi xuôi, hoặc từ v theo cạnh đôi nếu đường hai chiều."""
+    u, v = int(ban_do.canh_u[canh]), int(ban_do.canh_v[canh])
+    do_dai = float(ban_do.canh_length[canh])
+    hat_giong = {u: max(0.0, vi_tri)}
+    nguoc = _chi_phi_nguoc(csr, ban_do, canh)
+    if nguoc is not None and do_dai > 0:
+        hat_giong[v] = min(hat_giong.get(v, math.inf), nguoc * (do_dai - vi_tri) / do_dai)
+    return hat_giong
+
+
+def nut_gan_nhat_theo_canh(hat_giong):
+    # Đầu mút ít tốn đường nhất: thay cho "nút gần nhất theo đường chim bay" vốn có thể nằm ở con phố khác
+    return min(hat_giong, key=hat_giong.get)
+
+
+def duong_dan_mac_dinh(thu_muc_snapshot):
+    return os.path.join(thu_muc_snapshot, TEN_TEP)
+
+
+def tai_hoac_xay(thu_muc_snapshot, ban_do_nen=None):
+    """Chỉ mục đã lưu cạnh snapshot; nếu chưa có thì xây trong bộ nhớ."""
+    duong_dan = duong_dan_mac_dinh(thu_muc_snapshot)
+    if os.path.isfile(duong_dan):
+        return ChiMucKhongGian.tai(duong_dan)
+    if ban_do_nen is None:
+        from dan_duong import ban_do
+        ban_do_nen = ban_do.tai(thu_muc_snapshot)
+    return ChiMucKhongGian.tu_ban_do(ban_do_nen)
+
+
+def main(argv=None):
+    from dan_duong import ban_do
+
+    parser = argparse.ArgumentParser(prog="python -m dan_duong.chi_muc_khong_gian",
+                                     description="Xây chỉ mục không gian cạnh snapshot bản đồ")
+    lenh = parser.add_subparsers(dest="lenh", required=True)
+    p_build = lenh.add_parser("build")
+    p_build.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    chi_muc = ChiMucKhongGian.tu_ban_do(ban_do.tai(args.snapshot))
+    duong_dan = chi_muc.luu(duong_dan_mac_dinh(args.snapshot))
+    print(f"Đã ghi {duong_dan}: {len(chi_muc.manh_canh)} mảnh cạnh ({time.perf_counter() - t0:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
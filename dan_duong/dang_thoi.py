@@ -0,0 +1,229 @@
+# -----------------------------------------------------------------------------
+# VÙNG TỚI ĐƯỢC (ISOCHRONE) TỪ MỘT ĐIỂM
+# -----------------------------------------------------------------------------
+# "Đi N mét / N phút thì tới được đâu": một lượt Dijkstra của scipy có giới hạn
+# (limit = mốc lớn nhất) cho khoảng cách từ điểm xuất phát tới mọi nút trong tầm, rồi
+# MỌI mốc được suy ra từ đúng lượt đó. Thời gian đi qua mỗi cạnh là cột thoi_gian tính
+# sẵn của trong_so.BangTrongSo (maxspeed của OSM hoặc tốc độ theo loại đường, cộng lớp
+# ùn tắc nếu có).
+#
+# Cạnh u -> v có u trong tầm được cắt thành các đoạn theo vành (khoảng giữa hai mốc
+# liên tiếp), kể cả cạnh chỉ đi được một phần: đoạn của vành b là phần polyline có
+# phân số [(moc[b-1] - d_u) / w, (moc[b] - d_u) / w]. Việc cắt làm trên toàn bộ mảng
+# điểm của bảng cạnh bằng NumPy. Đa giác dựng trên lưới ô: mỗi ô nhận vành nhỏ nhất
+# của các đoạn đi qua nó, loang ra theo bán kính bằng một bộ lọc min của scipy (nên
+# các vành tự rời nhau), rồi biên từng vành được dò bằng marching squares của contourpy.
+# Buffer + union của shapely trên hàng chục nghìn đoạn thẳng chậm hơn cả chục lần.
+# -----------------------------------------------------------------------------
+import math
+from dataclasses import dataclass
+
+import networkx as nx
+import numpy as np
+from contourpy import FillType, contour_generator  # đi kèm matplotlib
+from scipy import ndimage
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from dan_duong import hieu_nang
+from dan_duong.dinh_tuyen import noi_cac_doan
+from dan_duong.lo_trinh import MET_MOI_DO
+from dan_duong.trong_so import nho_nhat_theo_phan_tu, thoi_gian_canh
+
+# Đơn vị mốc -> (nhãn, hệ số đổi sang đơn vị trọng số: mét hoặc giây)
+CAC_DON_VI = {"met": ("m", 1.0), "phut": ("phút", 60.0)}
+SO_VANH_TOI_DA = 10
+BAN_KINH_VUNG = 60.0   # mét: bề rộng dải quanh đoạn đường tới được
+KICH_THUOC_O = 25.0    # mét: cạnh ô lưới dùng để dựng đa giác
+SO_O_TOI_DA = 2000     # ô theo chiều dài nhất; vùng rộng hơn thì ô to ra
+
+
+@dataclass(frozen=True)
+class KetQuaDangThoi:
+    cac_moc: list        # mốc theo đơn vị người dùng, tăng dần
+    don_vi: str          # khoá của CAC_DON_VI
+    vung: list           # GeoJSON (dict) của từng vành, None nếu vành rỗng
+    doan: list           # từng vành: danh sách polyline [[lat, lon], ...] của các đoạn đường
+    so_nut: list         # số nút tới được trong từng mốc (luỹ kế)
+    khung: list          # [[lat_min, lon_min], [lat_max, lon_max]] của mọi đoạn tới được
+
+    @property
+    def nhan(self):
+        return [f"≤ {m:g} {CAC_DON_VI[self.don_vi][0]}" for m in self.cac_moc]
+
+
+class BoDangThoi:
+    def __init__(self, csr, bang_canh, thoi_gian):
+        self.csr = csr
+        self.bang_canh = bang_canh
+        self.thoi_gian = np.asarray(thoi_gian, dtype=np.float32)  # giây, theo phần tử CSR
+        self._ma_tran_thoi_gian = None
+        self._phan_so = None
+
+    @classmethod
+    def tu_ban_do(cls, ban_do, csr, bang_canh):
+        """Dùng chung cấu trúc CSR / bảng cạnh, chỉ thêm trọng số thời gian (nhanh nhất trong các cạnh song song)."""
+        return cls(csr, bang_canh, nho_nhat_theo_phan_tu(csr, ban_do, thoi_gian_canh(ban_do)))
+
+    def ma_tran(self, don_vi):
+        if don_vi == "met":
+            return self.csr.ma_tran()
+        if self._ma_tran_thoi_gian is None:
+            self._ma_tran_thoi_gian = csr_matrix((self.thoi_gian, self.csr.indices, self.csr.indptr),
+                                                 shape=(self.csr.so_nut, self.csr.so_nut))
+        return self._ma_tran_thoi_gian
+
+    def phan_so(self):
+        # (phân số dọc polyline của từng điểm trong bảng cạnh, khoá tăng dần = phần tử + phân số)
+        if self._phan_so is None:
+            chi_muc = self.bang_canh.hinh_chi_muc
+            toa_do = self.bang_canh.hinh_toa_do
+            so_diem = np.diff(chi_muc)
+            phan_tu = np.repeat(np.arange(len(so_diem)), so_diem)
+            he_so_lon = math.cos(math.radians(float(toa_do[:, 0].mean()))) if len(toa_do) else 1.0
+            buoc = np.r_[0.0, np.hypot(np.diff(toa_do[:, 0]), np.diff(toa_do[:, 1]) * he_so_lon)]
+            buoc[chi_muc[:-1]] = 0.0  # điểm đầu mỗi polyline không nối với polyline trước
+            luy_ke = np.cumsum(buoc)
+            luy_ke -= np.repeat(luy_ke[chi_muc[:-1]], so_diem)
+            tong = np.repeat(luy_ke[chi_muc[1:] - 1], so_diem)
+            # Polyline dài 0 (các điểm trùng nhau): chia đều theo thứ tự điểm
+            thu_tu = np.arange(len(toa_do)) - np.repeat(chi_muc[:-1], so_diem)
+            f = np.where(tong > 0, luy_ke / np.where(tong > 0, tong, 1.0),
+                         thu_tu / np.repeat(np.maximum(so_diem - 1, 1), so_diem))
+            self._phan_so = (f, phan_tu + f)
+        return self._phan_so
+
+    def _noi_suy(self, phan_tu, t):
+        """Điểm (lat, lon) tại phân số t dọc polyline của từng phần tử, vector hoá."""
+        f, khoa = self.phan_so()
+        dau = self.bang_canh.hinh_chi_muc[phan_tu]
+        cuoi = self.bang_canh.hinh_chi_muc[phan_tu + 1] - 1
+        j = np.clip(np.searchsorted(khoa, phan_tu + t, side="left"), dau + 1, cuoi)
+        i = j - 1
+        doan = f[j] - f[i]
+        ti_le = np.clip(np.divide(t - f[i], doan, out=np.zeros_like(t), where=doan > 0), 0.0, 1.0)
+        toa_do = self.bang_canh.hinh_toa_do
+        return toa_do[i] + ti_le[:, None] * (toa_do[j] - toa_do[i])
+
+    def cac_doan(self, khoang_cach, trong_so, cac_moc):
+        """(toạ độ (N, 2), chỉ số đoạn của từng điểm, vành của từng đoạn) cho mọi phần cạnh tới được."""
+        cac_moc = np.asarray(cac_moc, dtype=np.float64)
+        u = np.repeat(np.arange(self.csr.so_nut), np.diff(self.csr.indptr))
+        d_u = khoang_cach[u]
+        trong_tam = np.flatnonzero(d_u < cac_moc[-1])
+        d_u = d_u[trong_tam]
+        w = np.asarray(trong_so, dtype=np.float64)[trong_tam]
+
+        # Mỗi phần tử trải qua các vành từ vành chứa d_u tới vành chứa d_u + w (cắt ở vành cuối)
+        vanh_dau = np.searchsorted(cac_moc, d_u, side="right")
+        vanh_cuoi = np.minimum(np.searchsorted(cac_moc, d_u + w, side="left"), len(cac_moc) - 1)
+        so_vanh = vanh_cuoi - vanh_dau + 1
+        vanh = noi_cac_doan(vanh_dau, so_vanh)
+        chon = np.repeat(np.arange(len(trong_tam)), so_vanh)
+        phan_tu, d_u, w = trong_tam[chon], d_u[chon], w[chon]
+        moc_duoi = np.where(vanh > 0, cac_moc[np.maximum(vanh - 1, 0)], -np.inf)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t0 = np.where(w > 0, np.clip((moc_duoi - d_u) / w, 0.0, 1.0), 0.0)
+            t1 = np.where(w > 0, np.clip((cac_moc[vanh] - d_u) / w, 0.0, 1.0), 1.0)
+        giu = t1 > t0
+        phan_tu, vanh, t0, t1 = phan_tu[giu], vanh[giu], t0[giu], t1[giu]
+        so_doan = len(phan_tu)
+
+        # Điểm trong của polyline nằm giữa t0 và t1, cộng hai điểm nội suy ở hai đầu
+        f, _ = self.phan_so()
+        dau = self.bang_canh.hinh_chi_muc[phan_tu]
+        so_diem_trong = self.bang_canh.hinh_chi_muc[phan_tu + 1] - dau - 2
+        diem_trong = noi_cac_doan(dau + 1, so_diem_trong)
+        cua_doan = np.repeat(np.arange(so_doan), so_diem_trong)
+        giu = (f[diem_trong] > t0[cua_doan]) & (f[diem_trong] < t1[cua_doan])
+        diem_trong, cua_doan = diem_trong[giu], cua_doan[giu]
+        so_trong = np.bincount(cua_doan, minlength=so_doan)
+
+        so_diem = so_trong + 2
+        vi_tri_dau = np.cumsum(so_diem) - so_diem
+        toa_do = np.empty((int(so_diem.sum()), 2), dtype=np.float64)
+        toa_do[vi_tri_dau] = self._noi_suy(phan_tu, t0)
+        toa_do[vi_tri_dau + so_diem - 1] = self._noi_suy(phan_tu, t1)
+        hang = np.arange(len(diem_trong)) - (np.cumsum(so_trong) - so_trong)[cua_doan]
+        toa_do[vi_tri_dau[cua_doan] + 1 + hang] = self.bang_canh.hinh_toa_do[diem_trong]
+        return toa_do, np.repeat(np.arange(so_doan), so_diem), vanh
+
+    def tinh(self, nguon, cac_moc, don_vi="phut", lan_do=None, ban_kinh=BAN_KINH_VUNG):
+        """KetQuaDangThoi từ nút CSR nguon (hoặc danh sách nút) cho các mốc theo don_vi.
+
+        Chỉ một lượt Dijkstra có giới hạn cho mọi mốc; không nút nào trong tầm -> NetworkXNoPath.
+        """
+        if don_vi not in CAC_DON_VI:
+            raise ValueError(f"Đơn vị không hỗ trợ: {don_vi} (chọn một trong {', '.join(CAC_DON_VI)})")
+        cac_moc = sorted({float(m) for m in cac_moc if float(m) > 0})
+        if not cac_moc:
+            raise ValueError("Cần ít nhất một mốc lớn hơn 0")
+        if len(cac_moc) > SO_VANH_TOI_DA:
+            raise ValueError(f"Tối đa {SO_VANH_TOI_DA} mốc")
+        moc = np.array(cac_moc) * CAC_DON_VI[don_vi][1]
+
+        with hieu_nang.giai_doan(lan_do, "tim_kiem_gioi_han") as ban_ghi:
+            khoang_cach = dijkstra(self.ma_tran(don_vi), directed=True, indices=nguon, limit=moc[-1], min_only=True)
+            ban_ghi["so_nut_da_duyet"] = int(np.count_nonzero(np.isfinite(khoang_cach)))
+        so_nut = np.searchsorted(np.sort(khoang_cach), moc, side="right").tolist()
+
+        with hieu_nang.giai_doan(lan_do, "cat_canh") as ban_ghi:
+            trong_so = self.csr.trong_so if don_vi == "met" else self.thoi_gian
+            toa_do, cua_doan, vanh = self.cac_doan(khoang_cach, trong_so, moc)
+            ban_ghi["so_doan"] = len(vanh)
+        if len(vanh) == 0:
+            raise nx.NetworkXNoPath("Không có đoạn đường nào đi được từ điểm xuất phát")
+
+        with hieu_nang.giai_doan(lan_do, "dung_da_giac") as ban_ghi:
+            vung, doan = self._dung_vanh(toa_do, cua_doan, vanh, len(moc), ban_kinh)
+            ban_ghi["so_diem_ve"] = len(toa_do)
+        (lat_min, lon_min), (lat_max, lon_max) = toa_do.min(axis=0), toa_do.max(axis=0)
+        return KetQuaDangThoi(cac_moc=cac_moc, don_vi=don_vi, vung=vung, doan=doan, so_nut=so_nut,
+                              khung=[[float(lat_min), float(lon_min)], [float(lat_max), float(lon_max)]])
+
+    def _dung_vanh(self, toa_do, cua_doan, vanh, so_moc, ban_kinh):
+        # Hệ phẳng cục bộ (kinh độ nhân cos vĩ độ, đơn vị độ) để lưới ô vuông đều theo mọi hướng
+        he_so_lon = math.cos(math.radians(float(toa_do[:, 0].mean())))
+        phang = np.column_stack([toa_do[:, 1] * he_so_lon, toa_do[:, 0]])
+        o = max(KICH_THUOC_O / MET_MOI_DO, float((phang.max(axis=0) - phang.min(axis=0)).max()) / SO_O_TOI_DA)
+
+        # Lấy mẫu dọc từng đoạn thẳng với bước không quá một ô để dải ô của mỗi con đường liền mạch
+        noi = cua_doan[1:] == cua_doan[:-1]
+        vec = np.diff(phang, axis=0)
+        so_buoc = np.where(noi, np.ceil(np.hypot(vec[:, 0], vec[:, 1]) / o), 0).astype(np.int64)
+        doan_thang = np.repeat(np.arange(len(so_buoc)), so_buoc)
+        ti_le = noi_cac_doan(np.zeros(len(so_buoc)), so_buoc) / np.repeat(np.maximum(so_buoc, 1), so_buoc)
+        mau = np.vstack([phang, phang[doan_thang] + ti_le[:, None] * vec[doan_thang]])
+        vanh_mau = np.concatenate([vanh[cua_doan], vanh[cua_doan[doan_thang]]]).astype(np.int16)
+
+        # Mỗi ô nhận vành nhỏ nhất có mẫu rơi vào, rồi loang ra hình tròn bán kính ban_kinh
+        r = max(1, math.ceil(ban_kinh / MET_MOI_DO / o))
+        goc = mau.min(axis=0) - (r + 1) * o
+        ij = np.floor((mau - goc) / o).astype(np.int64)
+        luoi = np.full(ij.max(axis=0) + r + 2, so_moc, dtype=np.int16)
+        np.minimum.at(luoi, (ij[:, 0], ij[:, 1]), vanh_mau)
+        y, x = np.ogrid[-r:r + 1, -r:r + 1]
+        luoi = ndimage.minimum_filter(luoi, footprint=x * x + y * y <= r * r, mode="constant", cval=so_moc)
+
+        # Biên mỗi vành = đường mức 0.5 của lưới chỉ thị (ô thuộc vành = 1), dò bằng marching squares;
+        # hai vành kề nhau dùng chung đường biên giữa tâm các ô nên không chồng, không hở
+        x = (goc[0] + (np.arange(luoi.shape[0]) + 0.5) * o) / he_so_lon
+        y = goc[1] + (np.arange(luoi.shape[1]) + 0.5) * o
+        vung = []
+        for b in range(so_moc):
+            chi_thi = (luoi == b).T.astype(np.float32)
+            if not chi_thi.any():
+                vung.append(None)
+                continue
+            cac_diem, cac_vi_tri = contour_generator(x, y, chi_thi, fill_type=FillType.OuterOffset).filled(0.5, 1.5)
+            # Mỗi đa giác: vòng ngoài rồi các lỗ, toạ độ (lon, lat) như GeoJSON yêu cầu
+            da_giac = [[vong.tolist() for vong in np.split(diem, vi_tri[1:-1])]
+                       for diem, vi_tri in zip(cac_diem, cac_vi_tri)]
+            vung.append({"type": "MultiPolygon", "coordinates": da_giac})
+
+        # Đoạn đường của từng vành cho kiểu hiển thị tô màu
+        ranh_gioi = np.r_[0, np.cumsum(np.bincount(cua_doan, minlength=len(vanh)))].tolist()
+        toa_do = toa_do.tolist()
+        cac_polyline = [toa_do[a:b] for a, b in zip(ranh_gioi[:-1], ranh_gioi[1:])]
+        doan = [[cac_polyline[i] for i in np.flatnonzero(vanh == b).tolist()] for b in range(so_moc)]
+        return vung, doan
@@ -0,0 +1,202 @@
+# -----------------------------------------------------------------------------
+# NHẬP / XUẤT DANH SÁCH CẠNH HÀNG LOẠT (TAB 1)
+# -----------------------------------------------------------------------------
+# Đọc tệp cạnh "u v [w]" theo từng khối: mỗi khối được tách cột bằng bộ đọc C của
+# pandas (read_csv) rồi thêm vào đồ thị một lần, nên bộ nhớ chỉ giữ văn bản thô của
+# một khối chứ không giữ cả tệp lẫn bản đã phân tích.
+# Hỗ trợ CSV, TSV, cách bằng khoảng trắng và các bản nén .gz; trọng số là số thực.
+# Dòng lỗi được ghi lại kèm số dòng và bị bỏ qua, không làm hỏng cả lần nhập.
+# -----------------------------------------------------------------------------
+import csv
+import gzip
+import io
+import itertools
+import os
+import warnings
+from dataclasses import dataclass, field
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+SO_KY_TU_MOI_KHOI = 16 * 1024 * 1024  # văn bản thô giữ trong bộ nhớ mỗi lần (~0.8 triệu dòng "u v w")
+SO_CANH_MOI_KHOI = 500_000
+SO_COT_TOI_DA = 4  # số cột bộ đọc C dựng; nếu nó từ chối khối thì khối đó được tách bằng Python
+SO_LOI_TOI_DA = 1000  # chỉ giữ chi tiết của chừng này dòng lỗi đầu tiên
+
+# Định dạng -> ký tự phân cách (None = một hoặc nhiều khoảng trắng)
+CAC_DINH_DANG = {"txt": None, "csv": ",", "tsv": "\t"}
+TIEU_DE_COT = {("u", "v"), ("source", "target"), ("nguon", "dich")}
+
+
+@dataclass
+class KetQuaNhapCanh:
+    do_thi: nx.Graph
+    so_dong: int = 0
+    so_canh_doc: int = 0
+    so_loi: int = 0
+    cac_loi: list = field(default_factory=list)  # [(số dòng, nội dung, lý do)]
+
+
+def doan_dinh_dang(ten_tep):
+    """(định dạng, có nén gzip) đoán từ phần mở rộng, vd. 'canh.tsv.gz' -> ('tsv', True)."""
+    ten = (ten_tep or "").lower()
+    nen = ten.endswith(".gz")
+    if nen:
+        ten = ten[:-3]
+    for dinh_dang in ("csv", "tsv"):
+        if ten.endswith("." + dinh_dang):
+            return dinh_dang, nen
+    return "txt", nen
+
+
+def _mo_van_ban(nguon, nen):
+    """Luồng văn bản đọc từng dòng từ đường dẫn hoặc file (nhị phân / văn bản)."""
+    if isinstance(nguon, (str, os.PathLike)):
+        nguon = open(nguon, "rb")
+    if isinstance(nguon, io.TextIOBase):
+        return nguon
+    if nen:
+        nguon = gzip.GzipFile(fileobj=nguon, mode="rb")
+    return io.TextIOWrapper(nguon, encoding="utf-8", errors="replace")
+
+
+def _dong_van_ban(f, nguon):
+    # Tự mở thì đóng hết; file của người gọi (vd. UploadedFile) thì chỉ tháo lớp bọc, không đóng
+    if isinstance(nguon, (str, os.PathLike)):
+        f.close()
+    elif f is not nguon:
+        goc = f.detach()
+        if isinstance(goc, gzip.GzipFile):
+            goc.close()
+
+
+def _doc_khoi(van_ban, phan_cach):
+    """DataFrame chuỗi cột 0..2, hàng thứ i ứng đúng dòng thứ i của khối (dòng trống -> NaN)."""
+    try:
+        with warnings.catch_warnings():
+            # Dòng thừa cột bị cắt bớt (chỉ dùng 3 cột đầu) - đúng ý muốn, không cần cảnh báo
+            warnings.simplefilter("ignore", pd.errors.ParserWarning)
+            bang = pd.read_csv(io.StringIO(van_ban), sep=phan_cach or r"\s+", header=None,
+                               names=range(SO_COT_TOI_DA), index_col=False, dtype=str, skip_blank_lines=False,
+                               quoting=csv.QUOTE_NONE, skipinitialspace=True, engine="c")
+        return bang.iloc[:, :3]
+    except pd.errors.ParserError:
+        # Có dòng nhiều cột hơn SO_COT_TOI_DA: tách từng dòng bằng Python, riêng cho khối này
+        dong = [[c.strip() or None for c in d.split(phan_cach, 3)[:3]] for d in van_ban.splitlines()]
+        return pd.DataFrame(dong, columns=range(3), dtype=object)
+
+
+def _tach_khoi(bang, dong_dau, co_trong_so, la_khoi_dau):
+    """(u, v, w, cac_loi) từ một khối đã tách cột; w là None nếu không lấy trọng số."""
+    so_dong = np.arange(dong_dau, dong_dau + len(bang))
+    u, v, w_chuoi = bang[0], bang[1], bang[2]
+    trong = (u.isna() & v.isna() & w_chuoi.isna()).to_numpy()
+    chu_thich = u.str.startswith("#", na=False).to_numpy()
+    giu = ~(trong | chu_thich)
+    u, v, w_chuoi, so_dong = u[giu], v[giu], w_chuoi[giu], so_dong[giu]
+    if u.empty:
+        return [], [], None if not co_trong_so else [], []
+
+    thieu = (u.isna() | v.isna()).to_numpy()
+    co_w = w_chuoi.notna().to_numpy()
+    w = pd.to_numeric(w_chuoi, errors="coerce").to_numpy(dtype=np.float64)
+    sai_w = co_w & np.isnan(w)
+
+    # Dòng có nội dung đầu tiên của tệp có thể là tiêu đề: "u,v,weight", "source target", ...
+    tieu_de = np.zeros(len(u), dtype=bool)
+    if la_khoi_dau and not thieu[0]:
+        tieu_de[0] = sai_w[0] or (u.iloc[0].lower(), v.iloc[0].lower()) in TIEU_DE_COT
+
+    loi = (thieu | (sai_w & co_trong_so)) & ~tieu_de
+    cac_loi = []
+    for i in np.flatnonzero(loi):
+        noi_dung = " ".join(str(x) for x in (u.iloc[i], v.iloc[i], w_chuoi.iloc[i]) if isinstance(x, str))
+        cac_loi.append((int(so_dong[i]), noi_dung,
+                        "thiếu đỉnh (cần ít nhất 2 cột)" if thieu[i] else "trọng số không phải là số"))
+
+    hop_le = ~(loi | tieu_de)
+    u, v = u[hop_le].tolist(), v[hop_le].tolist()
+    if not co_trong_so:
+        return u, v, None, cac_loi
+    # Thiếu trọng số thì mặc định 1 (như khi nhập tay); khối toàn số nguyên giữ kiểu int như trước
+    w = np.where(np.isnan(w[hop_le]), 1, w[hop_le])
+    if np.all(np.isfinite(w)) and np.all(w == np.round(w)):
+        w = w.astype(np.int64)
+    return u, v, w.tolist(), cac_loi
+
+
+def doc_danh_sach_canh(nguon, co_huong=False, co_trong_so=True, dinh_dang=None, nen=None,
+                       so_ky_tu_moi_khoi=SO_KY_TU_MOI_KHOI):
+    """Dựng đồ thị từ danh sách cạnh.
+
+    nguon: đường dẫn, file nhị phân (vd. UploadedFile của Streamlit) hoặc io.StringIO.
+    dinh_dang/nen mặc định đoán theo tên tệp.
+    """
+    ten = os.fspath(nguon) if isinstance(nguon, (str, os.PathLike)) else getattr(nguon, "name", "")
+    dinh_dang_doan, nen_doan = doan_dinh_dang(ten)
+    dinh_dang = dinh_dang or dinh_dang_doan
+    nen = nen_doan if nen is None else nen
+    phan_cach = CAC_DINH_DANG[dinh_dang]
+
+    G = nx.DiGraph() if co_huong else nx.Graph()
+    ket_qua = KetQuaNhapCanh(G)
+    f = _mo_van_ban(nguon, nen)
+    try:
+        dong_dau = 1
+        while True:
+            # Đọc một khối ký tự rồi đọc nốt tới hết dòng để không cắt đôi dòng nào
+            van_ban = f.read(so_ky_tu_moi_khoi)
+            if not van_ban:
+                break
+            if not van_ban.endswith("\n"):
+                van_ban += f.readline()
+            bang = _doc_khoi(van_ban, phan_cach)
+            del van_ban
+            u, v, w, cac_loi = _tach_khoi(bang, dong_dau, co_trong_so, dong_dau == 1)
+            dong_dau += len(bang)
+            del bang
+            if w is None:
+                G.add_edges_from(zip(u, v))
+            else:
+                G.add_weighted_edges_from(zip(u, v, w))
+            ket_qua.so_canh_doc += len(u)
+            ket_qua.so_loi += len(cac_loi)
+            ket_qua.cac_loi.extend(cac_loi[:SO_LOI_TOI_DA - len(ket_qua.cac_loi)])
+        ket_qua.so_dong = dong_dau - 1
+    finally:
+        _dong_van_ban(f, nguon)
+    return ket_qua
+
+
+def _dinh_dang_so(w):
+    # Trọng số nguyên giữ dạng nguyên (4 thay vì 4.0) để tệp xuất giống tệp nhập tay
+    if isinstance(w, float) and w.is_integer():
+        return str(int(w))
+    return str(w)
+
+
+def ghi_danh_sach_canh(G, tep, dinh_dang="txt", nen=False, so_canh_moi_khoi=SO_CANH_MOI_KHOI):
+    """Ghi G ra tep (đường dẫn hoặc file nhị phân) theo từng khối cạnh. Trả về tep."""
+    if isinstance(tep, (str, os.PathLike)):
+        with open(tep, "wb") as f:
+            ghi_danh_sach_canh(G, f, dinh_dang, nen, so_canh_moi_khoi)
+        return tep
+    dich = gzip.GzipFile(fileobj=tep, mode="wb") if nen else tep
+    phan_cach = CAC_DINH_DANG[dinh_dang] or " "
+    co_trong_so = any(w is not None for _, _, w in G.edges(data="weight"))
+    if dinh_dang != "txt":
+        dich.write(phan_cach.join(["u", "v", "weight"] if co_trong_so else ["u", "v"]).encode() + b"\n")
+    cac_canh = iter(G.edges(data="weight", default=1))
+    while True:
+        khoi = list(itertools.islice(cac_canh, so_canh_moi_khoi))
+        if not khoi:
+            break
+        if co_trong_so:
+            dong = (f"{u}{phan_cach}{v}{phan_cach}{_dinh_dang_so(w)}" for u, v, w in khoi)
+        else:
+            dong = (f"{u}{phan_cach}{v}" for u, v, _ in khoi)
+        dich.write(("\n".join(dong) + "\n").encode())
+    if nen:
+        dich.close()
+    return tep
@@ -0,0 +1,314 @@
+# -----------------------------------------------------------------------------
+# DANH BẠ ĐỊA DANH NGOẠI TUYẾN + BỘ NHỚ ĐỆM GEOCODE
+# -----------------------------------------------------------------------------
+# Chỉ mục tên địa điểm cục bộ (POI của OSM + tên đường trên các cạnh đồ thị), tra
+# cứu không dấu / theo tiền tố / gần đúng mà không cần mạng. Geocoder trực tuyến
+# (Nominatim qua ox.geocode) chỉ còn là phương án dự phòng, được bọc bởi bộ nhớ
+# đệm LRU bền vững (SQLite) có thời hạn (TTL).
+#
+#     python -m dan_duong.dia_danh build [--snapshot DIR]     (cần mạng để lấy POI)
+# -----------------------------------------------------------------------------
+import argparse
+import bisect
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+
+import numpy as np
+
+TEN_TEP = "dia_danh.json"
+PHIEN_BAN_DIA_DANH = 1
+
+# Nhóm thẻ OSM được coi là "địa điểm" khi xây danh bạ
+THE_POI = {"amenity": True, "tourism": True, "leisure": True, "shop": True, "historic": True,
+           "aeroway": ["aerodrome", "terminal"], "office": True, "building": ["public", "government", "school",
+                                                                            "university", "hospital", "hotel"]}
+
+NGUONG_GAN_DUNG = 0.75  # điểm tối thiểu để một tên gần đúng được đưa vào danh sách ứng viên
+
+THU_MUC_DU_LIEU = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "du_lieu")
+TEP_BO_NHO_GEOCODE = os.path.join(THU_MUC_DU_LIEU, "geocode_cache.sqlite")
+
+
+def chuan_hoa(ten):
+    """Bỏ dấu tiếng Việt, chữ thường, gộp ký tự không phải chữ/số thành một dấu cách."""
+    ten = unicodedata.normalize("NFD", str(ten).replace("đ", "d").replace("Đ", "D"))
+    ten = "".join(c for c in ten if unicodedata.category(c) != "Mn").lower()
+    return re.sub(r"[^0-9a-z]+", " ", ten).strip()
+
+
+class NhieuUngVien(ValueError):
+    """Danh bạ chỉ có kết quả gần đúng / nhiều tên cùng khớp: để người dùng chọn thay vì đoán."""
+
+    def __init__(self, truy_van, cac_muc):
+        self.truy_van = truy_van
+        self.cac_muc = cac_muc
+        super().__init__(f"Chưa rõ '{truy_van}', có thể là: {', '.join(m['ten'] for m in cac_muc)}")
+
+
+def _bo_ba(ten):
+    ten = f"  {ten} "
+    return {ten[i:i + 3] for i in range(len(ten) - 2)}
+
+
+class DanhBa:
+    def __init__(self, cac_muc):
+        # Mỗi mục: {"ten": tên gốc, "lat": ..., "lon": ..., "loai": "poi" | "duong"}
+        self.cac_muc = cac_muc
+        self._ten_chuan = [chuan_hoa(m["ten"]) for m in cac_muc]
+
+        self._chinh_xac = {}
+        for i, ten in enumerate(self._ten_chuan):
+            self._chinh_xac.setdefault(ten, i)
+
+        # Tiền tố được tra bằng bisect trên danh sách đã sắp; mỗi vị trí đầu từ là một khoá
+        # để "dai doan ket" khớp với "quang truong dai doan ket"
+        khoa_tien_to = []
+        for i, ten in enumerate(self._ten_chuan):
+            tu = ten.split()
+            for j in range(len(tu)):
+                khoa_tien_to.append((" ".join(tu[j:]), j, i))
+        khoa_tien_to.sort()
+        self._tien_to = [k for k, _, _ in khoa_tien_to]
+        self._tien_to_muc = [(j, i) for _, j, i in khoa_tien_to]
+
+        self._chi_muc_bo_ba = {}
+        for i, ten in enumerate(self._ten_chuan):
+            for b in _bo_ba(ten):
+                self._chi_muc_bo_ba.setdefault(b, []).append(i)
+
+    def __len__(self):
+        return len(self.cac_muc)
+
+    # --- Xây dựng ------------------------------------------------------------
+    @classmethod
+    def tu_ban_do(cls, ban_do, cac_poi=()):
+        """Tên đường lấy từ snapshot (mỗi tên một điểm đại diện) cộng thêm các POI nếu có."""
+        cac_muc = list(cac_poi)
+        da_co = {chuan_hoa(m["ten"]) for m in cac_muc}
+        canh_ten = np.asarray(ban_do.canh_ten)
+        co_ten = np.flatnonzero(canh_ten >= 0)
+        if len(co_ten):
+            u, v = np.asarray(ban_do.canh_u)[co_ten], np.asarray(ban_do.canh_v)[co_ten]
+            x = (np.asarray(ban_do.nut_x)[u] + np.asarray(ban_do.nut_x)[v]) / 2
+            y = (np.asarray(ban_do.nut_y)[u] + np.asarray(ban_do.nut_y)[v]) / 2
+            thu_tu = np.argsort(canh_ten[co_ten], kind="stable")
+            ma_ten, dau_nhom = np.unique(canh_ten[co_ten][thu_tu], return_index=True)
+            for ma, cac_chi_so in zip(ma_ten.tolist(), np.split(thu_tu, dau_nhom[1:])):
+                # Điểm đại diện: trung điểm cạnh gần trọng tâm nhất (luôn nằm trên chính con đường)
+                gx, gy = x[cac_chi_so].mean(), y[cac_chi_so].mean()
+                gan_nhat = cac_chi_so[np.argmin((x[cac_chi_so] - gx) ** 2 + (y[cac_chi_so] - gy) ** 2)]
+                ten = ban_do.ten_duong[ma]
+                for mot_ten in (ten if isinstance(ten, list) else [ten]):
+                    khoa = chuan_hoa(mot_ten)
+                    if khoa and khoa not in da_co:
+                        da_co.add(khoa)
+                        cac_muc.append({"ten": mot_ten, "lat": float(y[gan_nhat]), "lon": float(x[gan_nhat]),
+                                        "loai": "duong"})
+        return cls(cac_muc)
+
+    def luu(self, duong_dan):
+        with open(duong_dan, "w", encoding="utf-8") as f:
+            json.dump({"phien_ban": PHIEN_BAN_DIA_DANH, "cac_muc": self.cac_muc}, f, ensure_ascii=False)
+        return duong_dan
+
+    @classmethod
+    def tai(cls, duong_dan):
+        with open(duong_dan, encoding="utf-8") as f:
+            du_lieu = json.load(f)
+        if du_lieu.get("phien_ban") != PHIEN_BAN_DIA_DANH:
+            raise ValueError(f"{duong_dan}: phiên bản danh bạ không tương thích, hãy xây lại")
+        return cls(du_lieu["cac_muc"])
+
+    # --- Tra cứu -------------------------------------------------------------
+    def tim(self, truy_van, gioi_han=5):
+        """Trả về tối đa gioi_han cặp (mục, điểm 0..1): khớp chính xác > tiền tố > gần đúng."""
+        khoa = chuan_hoa(truy_van)
+        if not khoa:
+            return []
+        ket_qua, da_chon = [], set()
+
+        def them(i, diem):
+            if i not in da_chon and len(ket_qua) < gioi_han:
+                da_chon.add(i)
+                ket_qua.append((self.cac_muc[i], diem))
+
+        if khoa in self._chinh_xac:
+            them(self._chinh_xac[khoa], 1.0)
+
+        # Tiền tố: ưu tiên tên bắt đầu đúng bằng truy vấn, rồi đến tên ngắn hơn
+        dau = bisect.bisect_left(self._tien_to, khoa)
+        cuoi = bisect.bisect_left(self._tien_to, khoa + "\uffff", dau)
+        ung_vien = sorted(self._tien_to_muc[dau:cuoi], key=lambda ji: (ji[0], len(self._ten_chuan[ji[1]])))
+        for vi_tri_tu, i in ung_vien:
+            them(i, 0.95 if vi_tri_tu == 0 else 0.9)
+        if len(ket_qua) >= gioi_han:
+            return ket_qua
+
+        # Gần đúng: lọc ứng viên theo số bộ ba ký tự chung rồi chấm điểm chi tiết
+        dem = Counter()
+        for b in _bo_ba(khoa):
+            dem.update(self._chi_muc_bo_ba.get(b, ()))
+        cham_diem = []
+        for i, _ in dem.most_common(30):
+            if i in da_chon:
+                continue
+            # real_quick_ratio / quick_ratio là cận trên rẻ tiền của ratio: loại sớm ứng viên chắc chắn trượt
+            so_khop = SequenceMatcher(None, khoa, self._ten_chuan[i])
+            if so_khop.real_quick_ratio() < NGUONG_GAN_DUNG or so_khop.quick_ratio() < NGUONG_GAN_DUNG:
+                continue
+            diem = so_khop.ratio()
+            if diem >= NGUONG_GAN_DUNG:
+                cham_diem.append((diem, i))
+        for diem, i in sorted(cham_diem, reverse=True):
+            them(i, round(diem * 0.9, 3))
+        return ket_qua
+
+    def tim_mot(self, truy_van):
+        ket_qua = self.tim(truy_van, gioi_han=1)
+        return ket_qua[0] if ket_qua else None
+
+    def tim_chac_chan(self, truy_van):
+        """Mục đủ chắc để trả lời mà không hỏi geocoder: tên trùng khớp, hoặc tên DUY NHẤT bắt đầu
+        bằng truy vấn (trọn từ); None nếu không có.
+
+        Kết quả gần đúng ("benh vien tinh" ~ "benh vien nhi" = 0.89) và tiền tố giữa tên chỉ là ứng viên.
+        """
+        khoa = chuan_hoa(truy_van)
+        if not khoa:
+            return None
+        if khoa in self._chinh_xac:
+            return self.cac_muc[self._chinh_xac[khoa]]
+        dau = bisect.bisect_left(self._tien_to, khoa + " ")
+        cuoi = bisect.bisect_left(self._tien_to, khoa + " \uffff", dau)
+        dau_ten = {i for vi_tri_tu, i in self._tien_to_muc[dau:cuoi] if vi_tri_tu == 0}
+        return self.cac_muc[dau_ten.pop()] if len(dau_ten) == 1 else None
+
+
+# -----------------------------------------------------------------------------
+# BỘ NHỚ ĐỆM GEOCODE BỀN VỮNG (LRU + TTL TRÊN SQLITE)
+# -----------------------------------------------------------------------------
+class BoNhoGeocode:
+    def __init__(self, duong_dan=TEP_BO_NHO_GEOCODE, toi_da=5000, ttl=30 * 24 * 3600, ttl_khong_thay=24 * 3600):
+        self.duong_dan = duong_dan
+        self.toi_da = toi_da
+        self.ttl = ttl
+        self.ttl_khong_thay = ttl_khong_thay  # kết quả "không tìm thấy" cũng được nhớ, nhưng ngắn hơn
+        os.makedirs(os.path.dirname(os.path.abspath(duong_dan)), exist_ok=True)
+        with self._ket_noi() as kn:
+            kn.execute("CREATE TABLE IF NOT EXISTS geocode (khoa TEXT PRIMARY KEY, lat REAL, lon REAL, "
+                       "luc_luu REAL NOT NULL, luc_dung REAL NOT NULL)")
+            kn.execute("CREATE INDEX IF NOT EXISTS geocode_luc_dung ON geocode (luc_dung)")
+
+    def _ket_noi(self):
+        # Mỗi thao tác một kết nối: an toàn khi nhiều phiên Streamlit chạy trên các luồng khác nhau
+        return sqlite3.connect(self.duong_dan, timeout=10)
+
+    def lay(self, truy_van):
+        """(lat, lon), None nếu đã biết là không tìm thấy; raise KeyError nếu chưa có / đã hết hạn."""
+        khoa, bay_gio = chuan_hoa(truy_van), time.time()
+        with self._ket_noi() as kn:
+            dong = kn.execute("SELECT lat, lon, luc_luu FROM geocode WHERE khoa = ?", (khoa,)).fetchone()
+            if dong is None:
+                raise KeyError(truy_van)
+            lat, lon, luc_luu = dong
+            if bay_gio - luc_luu > (self.ttl if lat is not None else self.ttl_khong_thay):
+                kn.execute("DELETE FROM geocode WHERE khoa = ?", (khoa,))
+                raise KeyError(truy_van)
+            kn.execute("UPDATE geocode SET luc_dung = ? WHERE khoa = ?", (bay_gio, khoa))
+        return None if lat is None else (lat, lon)
+
+    def dat(self, truy_van, toa_do):
+        khoa, bay_gio = chuan_hoa(truy_van), time.time()
+        lat, lon = toa_do if toa_do is not None else (None, None)
+        with self._ket_noi() as kn:
+            kn.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?)", (khoa, lat, lon, bay_gio, bay_gio))
+            # Loại các mục lâu không dùng nhất khi vượt sức chứa
+            kn.execute("DELETE FROM geocode WHERE khoa IN (SELECT khoa FROM geocode ORDER BY luc_dung DESC "
+                       "LIMIT -1 OFFSET ?)", (self.toi_da,))
+
+    def geocode(self, truy_van, ham_geocode, loi_khong_thay=ValueError):
+        """Tra bộ nhớ đệm trước, chỉ gọi ham_geocode (mạng) khi chưa có; không tìm thấy -> ValueError.
+
+        Chỉ loại lỗi loi_khong_thay mới được nhớ là "không tìm thấy"; lỗi mạng được ném ra nguyên vẹn.
+        """
+        try:
+            toa_do = self.lay(truy_van)
+        except KeyError:
+            try:
+                toa_do = tuple(ham_geocode(truy_van))
+            except loi_khong_thay:
+                toa_do = None
+            self.dat(truy_van, toa_do)
+        if toa_do is None:
+            raise ValueError(f"Không tìm thấy địa điểm: {truy_van}")
+        return toa_do
+
+
+def tai_poi(tam, ban_kinh):
+    import osmnx as ox
+
+    cac_muc = []
+    dac_trung = ox.features_from_point(tam, tags=THE_POI, dist=ban_kinh)
+    if "name" not in dac_trung.columns:
+        return cac_muc
+    dac_trung = dac_trung[dac_trung["name"].notna()]
+    diem = dac_trung.geometry.representative_point()
+    for (_, dong), p in zip(dac_trung.iterrows(), diem):
+        cac_muc.append({"ten": str(dong["name"]), "lat": float(p.y), "lon": float(p.x), "loai": "poi"})
+    return cac_muc
+
+
+def duong_dan_mac_dinh(thu_muc_snapshot):
+    return os.path.join(thu_muc_snapshot, TEN_TEP)
+
+
+def tai_hoac_xay(thu_muc_snapshot, ban_do_nen=None):
+    """Danh bạ đã xây cạnh snapshot; nếu chưa có thì dựng ngay từ tên đường (không cần mạng)."""
+    duong_dan = duong_dan_mac_dinh(thu_muc_snapshot)
+    if os.path.isfile(duong_dan):
+        return DanhBa.tai(duong_dan)
+    if ban_do_nen is None:
+        from dan_duong import ban_do
+        ban_do_nen = ban_do.tai(thu_muc_snapshot)
+    return DanhBa.tu_ban_do(ban_do_nen)
+
+
+def main(argv=None):
+    from dan_duong import ban_do
+
+    parser = argparse.ArgumentParser(prog="python -m dan_duong.dia_danh",
+                                     description="Xây / tra cứu danh bạ địa danh ngoại tuyến")
+    lenh = parser.add_subparsers(dest="lenh", required=True)
+    p_build = lenh.add_parser("build", help="xây danh bạ cạnh snapshot (POI cần mạng)")
+    p_build.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    p_build.add_argument("--khong-poi", action="store_true", help="chỉ dùng tên đường trong snapshot")
+    p_tim = lenh.add_parser("tim", help="tra thử một tên")
+    p_tim.add_argument("truy_van")
+    p_tim.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    args = parser.parse_args(argv)
+
+    if args.lenh == "build":
+        ban_do_nen = ban_do.tai(args.snapshot)
+        nguon = ban_do_nen.thong_tin.get("nguon", {})
+        cac_poi = [] if args.khong_poi else tai_poi(tuple(nguon.get("tam", ban_do.TAM_PLEIKU)),
+                                                     nguon.get("ban_kinh", ban_do.BAN_KINH_PLEIKU))
+        danh_ba = DanhBa.tu_ban_do(ban_do_nen, cac_poi)
+        print(f"Đã ghi {danh_ba.luu(duong_dan_mac_dinh(args.snapshot))}: {len(danh_ba)} địa danh "
+              f"({len(cac_poi)} POI)")
+    else:
+        danh_ba = tai_hoac_xay(args.snapshot)
+        t0 = time.perf_counter()
+        ket_qua = danh_ba.tim(args.truy_van)
+        for muc, diem in ket_qua:
+            print(f"{diem:.2f}  {muc['ten']}  ({muc['lat']:.5f}, {muc['lon']:.5f})  [{muc['loai']}]")
+        print(f"({(time.perf_counter() - t0) * 1e6:.0f} µs)")
+
+
+if __name__ == "__main__":
+    main()
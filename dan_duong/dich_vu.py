@@ -0,0 +1,305 @@
+# -----------------------------------------------------------------------------
+# DỊCH VỤ DẪN ĐƯỜNG (KHÔNG PHỤ THUỘC STREAMLIT)
+# -----------------------------------------------------------------------------
+# Gom các mảnh mà Tab 2 dùng - snapshot, CSR, bảng cạnh, chỉ mục không gian, danh bạ,
+# phân cấp co (tuỳ chọn), bộ ô bản đồ cả tỉnh (tuỳ chọn), bộ nhớ đệm geocode và bộ nhớ
+# đệm lộ trình - vào một đối tượng nạp một lần. app.py giữ một BoDanDuong cho mỗi tiến trình; lệnh hàng loạt
+# (python -m dan_duong.hang_loat) dùng đúng bộ máy đó mà không cần mở trang web.
+#
+#     from dan_duong.dich_vu import BoDanDuong
+#     bo = BoDanDuong.tai(offline=True)
+#     ket_qua, _ = bo.tim_duong("Quảng trường Đại Đoàn Kết", "Sân bay Pleiku", "A*", muc_tieu="thoi_gian")
+# -----------------------------------------------------------------------------
+import os
+
+import numpy as np
+
+from dan_duong import (ban_do, bo_nho_lo_trinh, chi_muc_khong_gian, dia_danh, do_thi_gon, hieu_nang, lo_trinh,
+                       o_ban_do)
+from dan_duong.dang_thoi import BoDangThoi
+from dan_duong.phan_cap import PhanCap, duong_dan_mac_dinh
+from dan_duong.trong_so import BangTrongSo
+
+USER_AGENT = "ung_dung_tim_duong_pleiku_v1"  # Nominatim yêu cầu định danh ứng dụng
+
+# Tên thuật toán hiển thị -> phương thức của DoThiCSR (Contraction Hierarchy chạy trên PhanCap)
+CAC_THUAT_TOAN = {
+    "Dijkstra": "dijkstra",
+    "Contraction Hierarchy": None,
+    "A*": "a_sao",
+    "Dijkstra hai chiều": "dijkstra_hai_chieu",
+    "A* hai chiều": "a_sao_hai_chieu",
+    "BFS": "bfs",
+    "DFS": "dfs",
+}
+
+
+class BoDanDuong:
+    def __init__(self, ban_do_nen, csr, bang_canh, chi_muc, danh_ba=None, phan_cap=None, bo_nho_geocode=None,
+                 bo_nho=None, offline=False, trong_so=None, do_thi_o=None):
+        self.ban_do = ban_do_nen
+        self.csr = csr
+        self.bang_canh = bang_canh
+        self.chi_muc = chi_muc
+        self.danh_ba = danh_ba
+        self.phan_cap = phan_cap
+        self.bo_nho_geocode = bo_nho_geocode
+        self.bo_nho = bo_nho if bo_nho is not None else bo_nho_lo_trinh.BoNhoLoTrinh()
+        self.offline = offline
+        # Cột trọng số theo mục tiêu (quãng đường / thời gian / ưu tiên), tính một lần khi nạp
+        self.trong_so = trong_so if trong_so is not None else BangTrongSo.tu_ban_do(ban_do_nen, csr)
+        self._dang_thoi = (None, None)  # (phiên bản trọng số, BoDangThoi)
+        # Bản đồ cả tỉnh theo ô cho chuyến có đầu mút ngoài vùng bản đồ thành phố
+        self.do_thi_o = do_thi_o
+        self._khung = None
+
+    @classmethod
+    def tai(cls, thu_muc=ban_do.THU_MUC_MAC_DINH, offline=False, tep_geocode=dia_danh.TEP_BO_NHO_GEOCODE,
+            suc_chua_lo_trinh=bo_nho_lo_trinh.SUC_CHUA_MAC_DINH, thu_muc_o=o_ban_do.THU_MUC_MAC_DINH,
+            so_o_toi_da=o_ban_do.SO_O_TOI_DA):
+        """Nạp từ snapshot (ưu tiên) hoặc tải từ Overpass; offline=True cấm mọi truy cập mạng.
+
+        Bộ ô cả tỉnh (python -m dan_duong.o_ban_do build) chỉ được đọc manifest ở đây.
+        """
+        co_snapshot = ban_do.co_snapshot(thu_muc)
+        if co_snapshot:
+            ban_do_nen = ban_do.tai(thu_muc)
+        elif offline:
+            raise FileNotFoundError(f"Chưa có snapshot bản đồ tại {thu_muc}")
+        else:
+            ban_do_nen = ban_do.tu_do_thi(ban_do.tai_tu_mang())
+
+        if co_snapshot:
+            # CSR và bảng cạnh mmap từ thư mục snapshot: mọi tiến trình dùng chung một bản trong page cache
+            csr, bang_canh = do_thi_gon.tai_hoac_xay(thu_muc, ban_do_nen)
+            chi_muc = chi_muc_khong_gian.tai_hoac_xay(thu_muc, ban_do_nen)
+            danh_ba = dia_danh.tai_hoac_xay(thu_muc, ban_do_nen)
+        else:
+            csr, bang_canh = do_thi_gon.xay(ban_do_nen)
+            chi_muc = chi_muc_khong_gian.ChiMucKhongGian.tu_ban_do(ban_do_nen)
+            danh_ba = dia_danh.DanhBa.tu_ban_do(ban_do_nen)
+
+        # Phân cấp co là tuỳ chọn: chỉ có khi đã chạy python -m dan_duong.phan_cap build
+        phan_cap = None
+        duong_dan = duong_dan_mac_dinh(thu_muc)
+        if os.path.isfile(duong_dan):
+            try:
+                phan_cap = PhanCap.tai(duong_dan, csr)
+            except ValueError:
+                phan_cap = None
+
+        do_thi_o = None
+        if thu_muc_o and o_ban_do.co_bo_o(thu_muc_o):
+            try:
+                do_thi_o = o_ban_do.DoThiTheoO.tai(thu_muc_o, so_o_toi_da)
+            except ValueError:
+                do_thi_o = None
+
+        return cls(ban_do_nen, csr, bang_canh, chi_muc, danh_ba=danh_ba,
+                   phan_cap=phan_cap, bo_nho_geocode=dia_danh.BoNhoGeocode(tep_geocode),
+                   bo_nho=bo_nho_lo_trinh.BoNhoLoTrinh(suc_chua_lo_trinh), offline=offline, do_thi_o=do_thi_o)
+
+    # --- Địa điểm ------------------------------------------------------------
+    def cac_thuat_toan(self):
+        return [ten for ten in CAC_THUAT_TOAN if ten != "Contraction Hierarchy" or self.phan_cap is not None]
+
+    def tim_toa_do(self, truy_van):
+        """(lat, lon) của một tên địa điểm; ValueError nếu không tìm thấy.
+
+        Danh bạ chỉ có ứng viên gần đúng mà Nominatim không hỏi được / không thấy -> dia_danh.NhieuUngVien
+        (một ValueError) kèm danh sách ứng viên, thay vì lặng lẽ chọn một địa điểm khác.
+        """
+        # 1. Danh bạ ngoại tuyến - vài micro-giây, không cần mạng; chỉ tên trùng khớp hoặc tiền tố
+        #    duy nhất được coi là câu trả lời
+        if self.danh_ba is not None:
+            muc = self.danh_ba.tim_chac_chan(truy_van)
+            if muc is not None:
+                return (muc['lat'], muc['lon'])
+        ung_vien = [m for m, _ in self.danh_ba.tim(truy_van)] if self.danh_ba is not None else []
+        try:
+            if self.offline or self.bo_nho_geocode is None:
+                raise ValueError(f"Không có '{truy_van}' trong danh bạ ngoại tuyến")
+            # 2. Nominatim, qua bộ nhớ đệm bền vững (LRU + TTL)
+            import osmnx as ox
+            from osmnx._errors import InsufficientResponseError
+
+            ox.settings.user_agent = USER_AGENT
+            q = truy_van if "Gia Lai" in truy_van else f"{truy_van}, Gia Lai, Viet Nam"
+            return self.bo_nho_geocode.geocode(q, ox.geocode, InsufficientResponseError)
+        except ValueError:
+            if ung_vien:
+                raise dia_danh.NhieuUngVien(truy_van, ung_vien) from None
+            raise
+
+    def gan_diem(self, cac_diem, vai_tro="nguon"):
+        """Chỉ số nút CSR cho từng điểm: mã nút OSM, (lat, lon) hoặc tên địa điểm.
+
+        Toạ độ được gắn vào cạnh gần nhất (một lời gọi KDTree cho cả danh sách) rồi chọn
+        đầu mút ít tốn đường theo chiều xe chạy.
+        """
+        from dan_duong.ma_tran_od import chuan_bi_diem
+
+        cac_diem = [self.tim_toa_do(d) if isinstance(d, str) else d for d in cac_diem]
+        return chuan_bi_diem(self.csr, cac_diem, self.ban_do, self.chi_muc, vai_tro)
+
+    def gan_diem_tren_canh(self, cac_diem, vai_tro="nguon"):
+        """Với mỗi điểm: [(nút CSR, lo_trinh.DoanCanh)] - các cách rời / tới điểm chiếu trên cạnh gần nhất.
+
+        Khác gan_diem, điểm không bị ép về một nút: phần cạnh từ điểm chiếu tới đầu mút đi kèm để
+        lộ trình tính cả quãng đó (xem lo_trinh.tinh_lo_trinh_diem). Mã nút OSM -> [(nút, None)].
+        """
+        cac_diem = [self.tim_toa_do(d) if isinstance(d, str) else d for d in cac_diem]
+        ket_qua = [None] * len(cac_diem)
+        vi_tri_toa_do = []
+        for i, diem in enumerate(cac_diem):
+            if isinstance(diem, (tuple, list, np.ndarray)) and len(diem) == 2:
+                vi_tri_toa_do.append(i)
+            else:
+                ket_qua[i] = [(int(self.csr.chi_so(int(diem))), None)]
+        if vi_tri_toa_do:
+            toa_do = np.asarray([cac_diem[i] for i in vi_tri_toa_do], dtype=np.float64)
+            bat = self.chi_muc.bat_canh(toa_do[:, 0], toa_do[:, 1])
+            # Cùng điểm chiếu nhìn từ phần tử của chính cạnh đó và (đường hai chiều) của cạnh đôi
+            xuoi, nguoc = chi_muc_khong_gian.phan_tu_hai_chieu(self.csr, self.ban_do, bat.canh)
+            for k, i in enumerate(vi_tri_toa_do):
+                ket_qua[i] = lo_trinh.cac_dau_mut(
+                    self.csr, [(xuoi[k], bat.ti_le[k]), (nguoc[k], 1.0 - bat.ti_le[k])], vai_tro)
+                if not ket_qua[i]:
+                    # CSR không chạy trên cạnh này (khuyên, cạnh song song dài hơn): quay về gắn vào một nút
+                    ket_qua[i] = [(int(self.gan_diem([cac_diem[i]], vai_tro)[0]), None)]
+        return ket_qua
+
+    # --- Tìm đường -----------------------------------------------------------
+    def ham_tim(self, thuat_toan, muc_tieu="do_dai"):
+        if thuat_toan not in CAC_THUAT_TOAN:
+            raise ValueError(f"Thuật toán không hỗ trợ: {thuat_toan} (chọn một trong {', '.join(CAC_THUAT_TOAN)})")
+        csr = self.trong_so.do_thi(muc_tieu)
+        if CAC_THUAT_TOAN[thuat_toan] is None:
+            if self.phan_cap is None:
+                raise ValueError("Chưa có phân cấp co (python -m dan_duong.phan_cap build)")
+            if muc_tieu != "do_dai":
+                raise ValueError("Phân cấp co chỉ được xây cho quãng đường; hãy chọn thuật toán khác")
+            return lambda s, t: self.phan_cap.tim_duong(s, t, csr)
+        return getattr(csr, CAC_THUAT_TOAN[thuat_toan])
+
+    def _khoa_trong_so(self, muc_tieu):
+        # Quãng đường không đổi theo lớp ùn tắc; hai mục tiêu còn lại gắn phiên bản trọng số vào khoá
+        return (muc_tieu, 0 if muc_tieu == "do_dai" else self.trong_so.phien_ban)
+
+    def tim_duong_nut(self, i_goc, i_dich, thuat_toan="Dijkstra", lan_do=None, muc_tieu="do_dai"):
+        """(lo_trinh.KetQuaLoTrinh, có_sẵn) giữa hai nút CSR, qua bộ nhớ đệm lộ trình dùng chung.
+
+        Không có đường đi -> networkx.NetworkXNoPath.
+        """
+        ham_tim = self.ham_tim(thuat_toan, muc_tieu)
+        i_goc, i_dich = int(i_goc), int(i_dich)
+        csr, thoi_gian = self.trong_so.do_thi(muc_tieu), self.trong_so.cot("thoi_gian")
+        return self.bo_nho.lay_hoac_tinh(
+            (i_goc, i_dich, thuat_toan, *self._khoa_trong_so(muc_tieu)),
+            lambda: lo_trinh.tinh_lo_trinh(csr, self.bang_canh, ham_tim, i_goc, i_dich, lan_do, thoi_gian))
+
+    def tim_cac_lo_trinh_nut(self, i_goc, i_dich, thuat_toan="Dijkstra", k=1, lan_do=None, muc_tieu="do_dai"):
+        """([KetQuaLoTrinh], có_sẵn): lộ trình chính của thuat_toan và tối đa k - 1 lộ trình thay thế."""
+        if k <= 1:
+            ket_qua, co_san = self.tim_duong_nut(i_goc, i_dich, thuat_toan, lan_do, muc_tieu)
+            return [ket_qua], co_san
+        ham_tim = self.ham_tim(thuat_toan, muc_tieu)
+        i_goc, i_dich = int(i_goc), int(i_dich)
+        csr, thoi_gian = self.trong_so.do_thi(muc_tieu), self.trong_so.cot("thoi_gian")
+        return self.bo_nho.lay_hoac_tinh(
+            (i_goc, i_dich, thuat_toan, *self._khoa_trong_so(muc_tieu), k),
+            lambda: lo_trinh.tinh_cac_lo_trinh(csr, self.bang_canh, ham_tim, i_goc, i_dich, k, lan_do, thoi_gian))
+
+    def tim_cac_lo_trinh_dau_mut(self, cac_nguon, cac_dich, thuat_toan="Dijkstra", k=1, lan_do=None,
+                                 muc_tieu="do_dai"):
+        """([KetQuaLoTrinh], có_sẵn) giữa hai điểm đã gắn bằng gan_diem_tren_canh.
+
+        Quãng đường, thời gian và polyline gồm cả phần cạnh đi dở ở hai đầu.
+        """
+        ham_tim = self.ham_tim(thuat_toan, muc_tieu)
+        csr, thoi_gian = self.trong_so.do_thi(muc_tieu), self.trong_so.cot("thoi_gian")
+        return self.bo_nho.lay_hoac_tinh(
+            (tuple(cac_nguon), tuple(cac_dich), thuat_toan, *self._khoa_trong_so(muc_tieu), k),
+            lambda: lo_trinh.tinh_lo_trinh_diem(csr, self.bang_canh, ham_tim, cac_nguon, cac_dich, k, lan_do,
+                                                thoi_gian))
+
+    def tim_duong(self, diem_dau, diem_cuoi, thuat_toan="Dijkstra", lan_do=None, muc_tieu="do_dai"):
+        """(KetQuaLoTrinh, có_sẵn) giữa hai điểm (tên, (lat, lon) hoặc mã nút OSM).
+
+        Toạ độ được chiếu lên cạnh gần nhất, không ép về nút (xem gan_diem_tren_canh).
+        """
+        with hieu_nang.giai_doan(lan_do, "gan_vao_do_thi"):
+            cac_nguon = self.gan_diem_tren_canh([diem_dau], "nguon")[0]
+            cac_dich = self.gan_diem_tren_canh([diem_cuoi], "dich")[0]
+        cac_lo_trinh, co_san = self.tim_cac_lo_trinh_dau_mut(cac_nguon, cac_dich, thuat_toan, 1, lan_do, muc_tieu)
+        return cac_lo_trinh[0], co_san
+
+    # --- Bản đồ cả tỉnh theo ô -----------------------------------------------
+    def trong_vung(self, diem):
+        """(lat, lon) có nằm trong khung bao của bản đồ thành phố không."""
+        if self._khung is None:
+            self._khung = (float(self.ban_do.nut_y.min()), float(self.ban_do.nut_x.min()),
+                           float(self.ban_do.nut_y.max()), float(self.ban_do.nut_x.max()))
+        lat_min, lon_min, lat_max, lon_max = self._khung
+        return lat_min <= diem[0] <= lat_max and lon_min <= diem[1] <= lon_max
+
+    def can_ban_do_tinh(self, *cac_diem):
+        """Có bộ ô và ít nhất một điểm (lat, lon) nằm ngoài bản đồ thành phố."""
+        return self.do_thi_o is not None and not all(self.trong_vung(d) for d in cac_diem)
+
+    def tim_duong_tinh(self, diem_dau, diem_cuoi, muc_tieu="do_dai", lan_do=None):
+        """(KetQuaLoTrinh, có_sẵn) trên bộ ô cả tỉnh (A*, chỉ nạp các ô tìm kiếm chạm tới).
+
+        Điểm là tên hoặc (lat, lon); lớp ùn tắc của bản đồ thành phố không áp dụng ở đây.
+        """
+        if self.do_thi_o is None:
+            raise ValueError("Chưa có bộ ô bản đồ cả tỉnh (python -m dan_duong.o_ban_do build)")
+        if isinstance(diem_dau, str):
+            diem_dau = self.tim_toa_do(diem_dau)
+        if isinstance(diem_cuoi, str):
+            diem_cuoi = self.tim_toa_do(diem_cuoi)
+        with hieu_nang.giai_doan(lan_do, "gan_vao_do_thi"):
+            nguon = self.do_thi_o.nut_gan_nhat(*diem_dau)
+            dich = self.do_thi_o.nut_gan_nhat(*diem_cuoi)
+
+        def tinh():
+            nap_truoc = self.do_thi_o.so_lan_nap
+            with hieu_nang.giai_doan(lan_do, "tim_duong") as ban_ghi:
+                ket_qua = self.do_thi_o.a_sao(nguon, dich, muc_tieu)
+                ban_ghi["so_nut_da_duyet"] = ket_qua.so_nut_da_duyet
+                ban_ghi["so_o_nap"] = self.do_thi_o.so_lan_nap - nap_truoc
+            with hieu_nang.giai_doan(lan_do, "dung_lo_trinh"):
+                return self.do_thi_o.dung_lo_trinh(ket_qua)
+
+        return self.bo_nho.lay_hoac_tinh(("o", nguon, dich, muc_tieu), tinh)
+
+    # --- Lớp ùn tắc ----------------------------------------------------------
+    def ap_dung_lop_un_tac(self, nguon):
+        """Áp dụng CSV tốc độ theo cạnh (xem BangTrongSo.ap_dung_lop_un_tac) cho mọi phiên."""
+        return self.trong_so.ap_dung_lop_un_tac(nguon, self.ban_do)
+
+    def dat_lai_toc_do(self):
+        return self.trong_so.dat_lai()
+
+    # --- Vùng tới được -------------------------------------------------------
+    def bo_dang_thoi(self):
+        # Dựng lại (rẻ) khi lớp ùn tắc đổi cột thời gian
+        phien_ban, bo = self._dang_thoi
+        if bo is None or phien_ban != self.trong_so.phien_ban:
+            phien_ban = self.trong_so.phien_ban
+            bo = BoDangThoi(self.csr, self.bang_canh, self.trong_so.cot("thoi_gian"))
+            self._dang_thoi = (phien_ban, bo)
+        return bo
+
+    def tinh_dang_thoi(self, diem, cac_moc, don_vi="phut", lan_do=None):
+        """dang_thoi.KetQuaDangThoi: vùng tới được từ diem (tên, (lat, lon) hoặc mã nút OSM) theo các mốc."""
+        with hieu_nang.giai_doan(lan_do, "gan_vao_do_thi"):
+            nguon = self.gan_diem([diem], "nguon")[0]
+        return self.bo_dang_thoi().tinh(int(nguon), cac_moc, don_vi, lan_do)
+
+    def thong_ke(self):
+        return {"so_nut": self.csr.so_nut, "so_canh": self.csr.so_canh,
+                "co_phan_cap": self.phan_cap is not None, "bo_nho_lo_trinh": self.bo_nho.thong_ke(),
+                "phien_ban_trong_so": self.trong_so.phien_ban, "so_canh_un_tac": self.trong_so.so_canh_un_tac,
+                "bo_o": self.do_thi_o.thong_ke() if self.do_thi_o is not None else None}
+
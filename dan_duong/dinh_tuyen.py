@@ -0,0 +1,387 @@
+# -----------------------------------------------------------------------------
+# LÕI ĐỊNH TUYẾN CSR (COMPRESSED SPARSE ROW)
+# -----------------------------------------------------------------------------
+# Đồ thị được biên dịch một lần thành 3 mảng: indptr / indices (int32) và trong_so
+# (float32). Với mỗi cặp (u, v) chỉ giữ cạnh song song có length nhỏ nhất - đúng
+# như hàm trọng số mà nx.shortest_path dùng trên MultiDiGraph. Các nút được đánh
+# số 0..N-1; nut_osmid ánh xạ ngược về id OSM cho lộ trình / folium. Các vòng tìm
+# kiếm viết bằng Python gọi thuc_thi.bao_tien_do mỗi CHU_KY_KIEM_TRA nút để app đặt
+# được hạn chót (thuc_thi.han_chot_tai_cho); phần scipy chạy một mạch.
+# -----------------------------------------------------------------------------
+import heapq
+import math
+from dataclasses import dataclass
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import breadth_first_order, dijkstra
+
+from dan_duong.thuc_thi import bao_tien_do
+
+BAN_KINH_TRAI_DAT = 6371009.0  # cùng bán kính osmnx dùng để tính length
+CHU_KY_KIEM_TRA = 0x3FF        # mặt nạ: gọi bao_tien_do mỗi 1024 nút đã chốt
+
+
+@dataclass
+class KetQuaTimDuong:
+    duong_di: list          # chỉ số nút 0..N-1
+    do_dai: float           # tổng trọng số (với BFS/DFS vẫn là tổng length dọc đường đi)
+    so_nut_da_duyet: int = 0
+
+
+def khoang_cach_haversine(lat1, lon1, lat2, lon2):
+    # Đầu vào là radian; đúng trên toàn cầu, không giả định vùng nhỏ
+    sin_dlat = math.sin((lat2 - lat1) / 2)
+    sin_dlon = math.sin((lon2 - lon1) / 2)
+    a = sin_dlat * sin_dlat + math.cos(lat1) * math.cos(lat2) * sin_dlon * sin_dlon
+    return 2 * BAN_KINH_TRAI_DAT * math.asin(min(1.0, math.sqrt(a)))
+
+
+def noi_cac_doan(dau, do_dai):
+    """np.concatenate([arange(d, d + n) for d, n in zip(dau, do_dai)]) không qua vòng lặp Python."""
+    dau = np.asarray(dau, dtype=np.int64)
+    do_dai = np.asarray(do_dai, dtype=np.int64)
+    tong = int(do_dai.sum())
+    if tong == 0:
+        return np.empty(0, dtype=np.int64)
+    # Vị trí trong đoạn = chỉ số toàn cục - vị trí bắt đầu đoạn trong mảng kết quả
+    vi_tri_dau = np.cumsum(do_dai) - do_dai
+    return np.repeat(dau - vi_tri_dau, do_dai) + np.arange(tong)
+
+
+class DoThiCSR:
+    def __init__(self, indptr, indices, trong_so, canh_goc, nut_osmid, nut_x, nut_y, ma_tran_nguoc=None):
+        self.indptr = indptr
+        self.indices = indices
+        self.trong_so = trong_so
+        self.canh_goc = canh_goc      # chỉ số cạnh (trong snapshot) được chọn cho mỗi phần tử CSR
+        self.nut_osmid = nut_osmid
+        self.nut_x = nut_x
+        self.nut_y = nut_y
+        self._chi_so_osmid = None
+        self._phan_tu_cua_canh = None
+        self._ma_tran = None
+        self._ma_tran_nguoc = ma_tran_nguoc  # có thể nạp sẵn (do_thi_gon), không thì chuyển vị khi cần
+        self._ke_python = None
+        self._ke_nguoc_python = None
+        self._toa_do_python = None
+        self._he_so_heuristic = None
+
+    def __getstate__(self):
+        # Gửi sang tiến trình con (thuc_thi) chỉ các mảng; ma trận scipy / danh sách Python dựng lại khi cần
+        trang_thai = dict(self.__dict__)
+        for ten in trang_thai:
+            if ten.startswith("_"):
+                trang_thai[ten] = None
+        return trang_thai
+
+    # --- Biên dịch -----------------------------------------------------------
+    @classmethod
+    def tu_ban_do(cls, ban_do, trong_so=None):
+        """Biên dịch từ snapshot (dan_duong.ban_do.BanDo), hoàn toàn vector hoá."""
+        so_nut = ban_do.so_nut
+        u = np.asarray(ban_do.canh_u, dtype=np.int64)
+        v = np.asarray(ban_do.canh_v, dtype=np.int64)
+        w = np.asarray(ban_do.canh_length if trong_so is None else trong_so, dtype=np.float64)
+
+        # Bỏ khuyên (u == v): không bao giờ nằm trên đường đi ngắn nhất
+        con_lai = np.flatnonzero(u != v)
+        khoa = u[con_lai] * so_nut + v[con_lai]
+        # Sắp theo (cặp, trọng số, vị trí gốc) -> phần tử đầu mỗi nhóm là cạnh song song tốt nhất
+        thu_tu = np.lexsort((con_lai, w[con_lai], khoa))
+        khoa_da_sap = khoa[thu_tu]
+        dau_nhom = np.flatnonzero(np.r_[True, khoa_da_sap[1:] != khoa_da_sap[:-1]])
+        canh_tot_nhat = con_lai[thu_tu[dau_nhom]]
+        lan_dau = np.minimum.reduceat(con_lai[thu_tu], dau_nhom)
+
+        # Giữ thứ tự kề gốc của networkx (theo lần xuất hiện đầu tiên của cặp) để DFS cho cùng kết quả
+        sap_xep = np.lexsort((lan_dau, u[canh_tot_nhat]))
+        canh_tot_nhat = canh_tot_nhat[sap_xep]
+
+        indptr = np.zeros(so_nut + 1, dtype=np.int32)
+        np.cumsum(np.bincount(u[canh_tot_nhat], minlength=so_nut), out=indptr[1:])
+        return cls(indptr=indptr,
+                   indices=v[canh_tot_nhat].astype(np.int32),
+                   trong_so=w[canh_tot_nhat].astype(np.float32),
+                   canh_goc=canh_tot_nhat.astype(np.int32),
+                   nut_osmid=np.asarray(ban_do.nut_osmid),
+                   nut_x=np.asarray(ban_do.nut_x),
+                   nut_y=np.asarray(ban_do.nut_y))
+
+    @classmethod
+    def tu_do_thi(cls, G):
+        """Biên dịch trực tiếp từ MultiDiGraph của osmnx."""
+        from dan_duong import ban_do
+        return cls.tu_ban_do(ban_do.tu_do_thi(G))
+
+    def voi_trong_so(self, trong_so):
+        """DoThiCSR cùng cấu trúc (indptr / indices / canh_goc dùng chung) với trọng số khác theo phần tử.
+
+        Cạnh song song vẫn là cạnh được chọn theo length khi biên dịch.
+        """
+        do_thi = DoThiCSR(self.indptr, self.indices, np.asarray(trong_so, dtype=np.float32), self.canh_goc,
+                          self.nut_osmid, self.nut_x, self.nut_y)
+        do_thi._chi_so_osmid = self._chi_so_osmid
+        do_thi._phan_tu_cua_canh = self._phan_tu_cua_canh
+        return do_thi
+
+    # --- Ánh xạ id -----------------------------------------------------------
+    @property
+    def so_nut(self):
+        return len(self.indptr) - 1
+
+    @property
+    def so_canh(self):
+        return len(self.indices)
+
+    def chi_so(self, osmid):
+        if self._chi_so_osmid is None:
+            self._chi_so_osmid = {n: i for i, n in enumerate(self.nut_osmid.tolist())}
+        try:
+            return self._chi_so_osmid[osmid]
+        except KeyError:
+            raise nx.NodeNotFound(f"Nút {osmid} không có trong đồ thị")
+
+    def thanh_osmid(self, duong_di):
+        return self.nut_osmid[np.asarray(duong_di, dtype=np.int64)].tolist()
+
+    def phan_tu_cua_canh(self, canh):
+        """Phần tử CSR chạy trên đúng cạnh snapshot canh (vector hoá); -1 nếu cạnh không được chọn
+        (khuyên, hoặc có cạnh song song ngắn hơn giữa cùng hai nút)."""
+        if self._phan_tu_cua_canh is None:
+            phan_tu = np.full(int(self.canh_goc.max()) + 1 if len(self.canh_goc) else 0, -1, dtype=np.int64)
+            phan_tu[np.asarray(self.canh_goc, dtype=np.int64)] = np.arange(len(self.canh_goc))
+            self._phan_tu_cua_canh = phan_tu
+        canh = np.asarray(canh, dtype=np.int64)
+        trong = (canh >= 0) & (canh < len(self._phan_tu_cua_canh))
+        if not trong.any():
+            return np.full(canh.shape, -1, dtype=np.int64)
+        return np.where(trong, self._phan_tu_cua_canh[np.where(trong, canh, 0)], -1)
+
+    def ma_tran(self):
+        # Ma trận scipy dùng chung bộ nhớ với indptr/indices/trong_so (không sao chép)
+        if self._ma_tran is None:
+            self._ma_tran = csr_matrix((self.trong_so, self.indices, self.indptr), shape=(self.so_nut, self.so_nut))
+        return self._ma_tran
+
+    def ke_python(self):
+        # Danh sách Python của các mảng CSR cho những vòng lặp thuần Python (DFS, ...)
+        if self._ke_python is None:
+            self._ke_python = (self.indptr.tolist(), self.indices.tolist(), self.trong_so.tolist())
+        return self._ke_python
+
+    def ma_tran_nguoc(self):
+        # CSR của đồ thị đảo chiều (cây đường đi ngắn nhất tới một đích, tìm kiếm ngược)
+        if self._ma_tran_nguoc is None:
+            self._ma_tran_nguoc = self.ma_tran().T.tocsr()
+        return self._ma_tran_nguoc
+
+    def ke_nguoc_python(self):
+        # Danh sách Python của CSR đảo chiều cho nửa tìm kiếm ngược trong các thuật toán hai chiều
+        if self._ke_nguoc_python is None:
+            nguoc = self.ma_tran_nguoc()
+            self._ke_nguoc_python = (nguoc.indptr.tolist(), nguoc.indices.tolist(), nguoc.data.tolist())
+        return self._ke_nguoc_python
+
+    def toa_do_python(self):
+        # (lat, lon) theo radian của mọi nút, dùng cho heuristic haversine
+        if self._toa_do_python is None:
+            self._toa_do_python = (np.radians(self.nut_y).tolist(), np.radians(self.nut_x).tolist())
+        return self._toa_do_python
+
+    def he_so_heuristic(self):
+        # Hệ số f <= 1 sao cho f * haversine(u, v) <= trọng số(u, v) trên MỌI cạnh: heuristic
+        # f * haversine(v, đích) khi đó nhất quán (consistent), nên A* luôn cho đúng khoảng cách
+        # Dijkstra kể cả khi length bị làm tròn float32 hoặc dữ liệu OSM có cạnh "ngắn hơn đường chim bay".
+        if self._he_so_heuristic is None:
+            u = np.repeat(np.arange(self.so_nut), np.diff(self.indptr))
+            lat, lon = np.radians(self.nut_y), np.radians(self.nut_x)
+            lat1, lat2 = lat[u], lat[self.indices]
+            a = (np.sin((lat2 - lat1) / 2) ** 2
+                 + np.cos(lat1) * np.cos(lat2) * np.sin((lon[self.indices] - lon[u]) / 2) ** 2)
+            chim_bay = 2 * BAN_KINH_TRAI_DAT * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+            co_do_dai = chim_bay > 0
+            ti_le = self.trong_so[co_do_dai].astype(np.float64) / chim_bay[co_do_dai]
+            he_so = min(1.0, float(ti_le.min())) if len(ti_le) else 1.0
+            self._he_so_heuristic = max(0.0, he_so * (1 - 1e-9))
+        return self._he_so_heuristic
+
+    def _heuristic_den(self, dich):
+        lat, lon = self.toa_do_python()
+        lat_dich, lon_dich = lat[dich], lon[dich]
+        he_so = self.he_so_heuristic()
+        return lambda v: he_so * khoang_cach_haversine(lat[v], lon[v], lat_dich, lon_dich)
+
+    def do_dai_duong_di(self, duong_di):
+        indptr, indices, trong_so = self.ke_python()
+        tong = 0.0
+        for u, v in zip(duong_di[:-1], duong_di[1:]):
+            for k in range(indptr[u], indptr[u + 1]):
+                if indices[k] == v:
+                    tong += trong_so[k]
+                    break
+        return tong
+
+    def phan_tu_canh(self, duong_di):
+        """Chỉ số phần tử CSR (cạnh tốt nhất u -> v) của từng bước trên đường đi, vector hoá."""
+        duong_di = np.asarray(duong_di, dtype=np.int64)
+        if len(duong_di) < 2:
+            return np.empty(0, dtype=np.int64)
+        u, v = duong_di[:-1], duong_di[1:]
+        # Duyệt cùng lúc mọi hàng u: nối các đoạn indptr[u]..indptr[u+1] rồi so với v lặp lại
+        dau, bac = self.indptr[u].astype(np.int64), np.diff(self.indptr)[u].astype(np.int64)
+        ung_vien = noi_cac_doan(dau, bac)
+        khop = self.indices[ung_vien] == np.repeat(v, bac)
+        buoc = np.repeat(np.arange(len(u)), bac)
+        if not np.array_equal(np.unique(buoc[khop]), np.arange(len(u))):
+            raise nx.NetworkXNoPath("Đường đi chứa cặp nút không có cạnh nối")
+        # Mỗi cặp (u, v) chỉ có một phần tử CSR nên mỗi bước khớp đúng một lần
+        return ung_vien[khop]
+
+    # --- Thuật toán ----------------------------------------------------------
+    def _truy_vet(self, truoc, nguon, dich):
+        if nguon != dich and truoc[dich] < 0:
+            raise nx.NetworkXNoPath(f"Không có đường đi từ {nguon} đến {dich}")
+        duong_di = [dich]
+        while duong_di[-1] != nguon:
+            duong_di.append(int(truoc[duong_di[-1]]))
+        duong_di.reverse()
+        return duong_di
+
+    def dijkstra(self, nguon, dich):
+        khoang_cach, truoc = dijkstra(self.ma_tran(), directed=True, indices=nguon, return_predecessors=True)
+        duong_di = self._truy_vet(truoc, nguon, dich)
+        # scipy giải trọn một nguồn; Dijkstra dừng sớm tại đích sẽ chốt mọi nút có khoảng cách <= d(đích)
+        return KetQuaTimDuong(duong_di, float(khoang_cach[dich]),
+                              int(np.count_nonzero(khoang_cach <= khoang_cach[dich])))
+
+    def bfs(self, nguon, dich):
+        # Cây BFS cho đường đi qua ít cạnh nhất (tương đương nx.shortest_path với weight=None)
+        thu_tu, truoc = breadth_first_order(self.ma_tran(), nguon, directed=True, return_predecessors=True)
+        duong_di = self._truy_vet(truoc, nguon, dich)
+        return KetQuaTimDuong(duong_di, self.do_dai_duong_di(duong_di), len(thu_tu))
+
+    def dfs(self, nguon, dich):
+        # Cùng thứ tự với nx.dfs_tree: khi gặp đích, ngăn xếp chính là đường đi trên cây DFS
+        indptr, indices, _ = self.ke_python()
+        da_tham = bytearray(self.so_nut)
+        da_tham[nguon] = 1
+        ngan_xep = [nguon]
+        vi_tri = [indptr[nguon]]
+        so_buoc = 0
+        while ngan_xep and ngan_xep[-1] != dich:
+            so_buoc += 1
+            if not so_buoc & CHU_KY_KIEM_TRA:
+                bao_tien_do(None, f"DFS: {so_buoc} bước")
+            u = ngan_xep[-1]
+            k = vi_tri[-1]
+            ket_thuc = indptr[u + 1]
+            while k < ket_thuc and da_tham[indices[k]]:
+                k += 1
+            if k == ket_thuc:
+                ngan_xep.pop()
+                vi_tri.pop()
+            else:
+                v = indices[k]
+                vi_tri[-1] = k + 1
+                da_tham[v] = 1
+                ngan_xep.append(v)
+                vi_tri.append(indptr[v])
+        if not ngan_xep:
+            raise nx.NetworkXNoPath(f"Không có đường đi từ {nguon} đến {dich}")
+        return KetQuaTimDuong(ngan_xep, self.do_dai_duong_di(ngan_xep), sum(da_tham))
+
+    def a_sao(self, nguon, dich):
+        """A* với heuristic haversine tới đích."""
+        indptr, indices, trong_so = self.ke_python()
+        h = self._heuristic_den(dich)
+        g = {nguon: 0.0}
+        truoc = {nguon: -1}
+        da_chot = set()
+        hang_doi = [(h(nguon), nguon)]
+        while hang_doi:
+            _, u = heapq.heappop(hang_doi)
+            if u in da_chot:
+                continue
+            da_chot.add(u)
+            if u == dich:
+                break
+            if not len(da_chot) & CHU_KY_KIEM_TRA:
+                bao_tien_do(None, f"A*: đã chốt {len(da_chot)} nút")
+            g_u = g[u]
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                g_moi = g_u + trong_so[k]
+                if g_moi < g.get(v, math.inf):
+                    g[v] = g_moi
+                    truoc[v] = u
+                    heapq.heappush(hang_doi, (g_moi + h(v), v))
+        if dich not in da_chot:
+            raise nx.NetworkXNoPath(f"Không có đường đi từ {nguon} đến {dich}")
+        duong_di = [dich]
+        while truoc[duong_di[-1]] >= 0:
+            duong_di.append(truoc[duong_di[-1]])
+        duong_di.reverse()
+        return KetQuaTimDuong(duong_di, self.do_dai_duong_di(duong_di), len(da_chot))
+
+    def dijkstra_hai_chieu(self, nguon, dich):
+        return self._hai_chieu(nguon, dich, None)
+
+    def a_sao_hai_chieu(self, nguon, dich):
+        # Tiềm năng trung bình p(v) = (h_dich(v) - h_nguon(v)) / 2 nhất quán cho cả hai chiều
+        h_dich = self._heuristic_den(dich)
+        h_nguon = self._heuristic_den(nguon)
+        return self._hai_chieu(nguon, dich, lambda v: (h_dich(v) - h_nguon(v)) / 2)
+
+    def _hai_chieu(self, nguon, dich, tiem_nang):
+        if nguon == dich:
+            return KetQuaTimDuong([nguon], 0.0, 1)
+        p = tiem_nang or (lambda v: 0.0)
+        ke = (self.ke_python(), self.ke_nguoc_python())
+        dau = (1.0, -1.0)  # khoá chiều xuôi = g + p(v), chiều ngược = g - p(v)
+        g = ({nguon: 0.0}, {dich: 0.0})
+        truoc = ({nguon: -1}, {dich: -1})
+        da_chot = (set(), set())
+        hang_doi = ([(p(nguon), nguon)], [(-p(dich), dich)])
+        tot_nhat, nut_gap = math.inf, -1
+
+        while hang_doi[0] and hang_doi[1]:
+            # Điều kiện dừng: tổng hai khoá nhỏ nhất >= độ dài tốt nhất đã thấy
+            if hang_doi[0][0][0] + hang_doi[1][0][0] >= tot_nhat:
+                break
+            chieu = 0 if len(hang_doi[0]) <= len(hang_doi[1]) else 1
+            _, u = heapq.heappop(hang_doi[chieu])
+            if u in da_chot[chieu]:
+                continue
+            da_chot[chieu].add(u)
+            if not len(da_chot[chieu]) & CHU_KY_KIEM_TRA:
+                bao_tien_do(None, f"Đã chốt {len(da_chot[0]) + len(da_chot[1])} nút")
+            indptr, indices, trong_so = ke[chieu]
+            g_day, g_kia = g[chieu], g[1 - chieu]
+            g_u = g_day[u]
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                g_moi = g_u + trong_so[k]
+                if g_moi < g_day.get(v, math.inf):
+                    g_day[v] = g_moi
+                    truoc[chieu][v] = u
+                    heapq.heappush(hang_doi[chieu], (g_moi + dau[chieu] * p(v), v))
+                    if v in g_kia and g_moi + g_kia[v] < tot_nhat:
+                        tot_nhat, nut_gap = g_moi + g_kia[v], v
+
+        if nut_gap < 0:
+            raise nx.NetworkXNoPath(f"Không có đường đi từ {nguon} đến {dich}")
+        duong_di = self._noi_hai_chieu(truoc, nut_gap)
+        return KetQuaTimDuong(duong_di, self.do_dai_duong_di(duong_di), len(da_chot[0]) + len(da_chot[1]))
+
+    def _noi_hai_chieu(self, truoc, nut_gap):
+        nua_dau = [nut_gap]
+        while truoc[0][nua_dau[-1]] >= 0:
+            nua_dau.append(truoc[0][nua_dau[-1]])
+        nua_dau.reverse()
+        v = nut_gap
+        while truoc[1][v] >= 0:
+            v = truoc[1][v]
+            nua_dau.append(v)
+        return nua_dau
@@ -0,0 +1,138 @@
+# -----------------------------------------------------------------------------
+# ĐỒ THỊ GỌN DÙNG CHUNG GIỮA CÁC TIẾN TRÌNH
+# -----------------------------------------------------------------------------
+# Snapshot đã là các mảng .npy ánh xạ bộ nhớ, nhưng CSR (DoThiCSR) và bảng cạnh
+# (lo_trinh.BangCanh) vẫn được dẫn xuất lại vào bộ nhớ riêng của từng tiến trình -
+# phần lớn dung lượng của một worker. Ở đây các mảng dẫn xuất đó (id int32, toạ độ
+# phẳng, mã tên đường đã intern, cả CSR đảo chiều) được ghi một lần vào thư mục con
+# của snapshot rồi mọi tiến trình mmap chỉ đọc: hệ điều hành giữ MỘT bản trong page
+# cache cho mọi worker / replica trên cùng máy, và tải lại chỉ tốn vài mili-giây.
+#
+# Tiến trình đầu tiên tự ghi nếu chưa có; cũng có thể dựng trước:
+#     python -m dan_duong.do_thi_gon build [--snapshot DIR]
+# -----------------------------------------------------------------------------
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from dan_duong import lo_trinh
+from dan_duong.dinh_tuyen import DoThiCSR
+
+TEN_THU_MUC = "do_thi_gon"
+PHIEN_BAN_DO_THI_GON = 1
+
+# Tên tệp -> (đối tượng, thuộc tính, kiểu lưu)
+CAC_MANG = {
+    "csr_indptr": ("csr", "indptr", np.int32),
+    "csr_indices": ("csr", "indices", np.int32),
+    "csr_trong_so": ("csr", "trong_so", np.float32),
+    "csr_canh_goc": ("csr", "canh_goc", np.int32),
+    "nguoc_indptr": ("nguoc", "indptr", np.int32),
+    "nguoc_indices": ("nguoc", "indices", np.int32),
+    "nguoc_trong_so": ("nguoc", "data", np.float32),
+    "canh_do_dai": ("bang_canh", "do_dai", np.float64),
+    "canh_ma_ten": ("bang_canh", "ma_ten", np.int32),
+    "canh_hinh_chi_muc": ("bang_canh", "hinh_chi_muc", np.int64),
+    "canh_hinh_toa_do": ("bang_canh", "hinh_toa_do", np.float64),
+}
+
+
+def duong_dan_mac_dinh(thu_muc_snapshot):
+    return os.path.join(thu_muc_snapshot, TEN_THU_MUC)
+
+
+def xay(ban_do_nen):
+    """(DoThiCSR, BangCanh) dựng trong bộ nhớ từ snapshot."""
+    csr = DoThiCSR.tu_ban_do(ban_do_nen)
+    return csr, lo_trinh.BangCanh.tu_ban_do(ban_do_nen, csr)
+
+
+def luu(thu_muc, ban_do_nen, csr, bang_canh):
+    """Ghi các mảng vào thu_muc (qua thư mục tạm rồi đổi tên, nên tiến trình khác không thấy bản dở dang)."""
+    thu_muc = os.path.abspath(thu_muc)
+    thu_muc_tam = f"{thu_muc}.tmp{os.getpid()}"
+    shutil.rmtree(thu_muc_tam, ignore_errors=True)
+    os.makedirs(thu_muc_tam)
+    nguon = {"csr": csr, "nguoc": csr.ma_tran_nguoc(), "bang_canh": bang_canh}
+    for ten, (doi_tuong, thuoc_tinh, kieu) in CAC_MANG.items():
+        mang = np.ascontiguousarray(getattr(nguon[doi_tuong], thuoc_tinh), dtype=kieu)
+        np.save(os.path.join(thu_muc_tam, ten + ".npy"), mang)
+    with open(os.path.join(thu_muc_tam, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"phien_ban": PHIEN_BAN_DO_THI_GON, "so_nut": ban_do_nen.so_nut, "so_canh": ban_do_nen.so_canh,
+                   "so_phan_tu": csr.so_canh}, f)
+    try:
+        os.replace(thu_muc_tam, thu_muc)
+    except OSError:
+        # Tiến trình khác vừa ghi xong trước: giữ bản của nó
+        shutil.rmtree(thu_muc_tam, ignore_errors=True)
+    return thu_muc
+
+
+def tai(thu_muc, ban_do_nen):
+    """(DoThiCSR, BangCanh) trên các mảng mmap chỉ đọc; ValueError nếu không khớp snapshot."""
+    with open(os.path.join(thu_muc, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("phien_ban") != PHIEN_BAN_DO_THI_GON:
+        raise ValueError(f"{thu_muc}: phiên bản đồ thị gọn không tương thích, hãy xây lại")
+    if (manifest.get("so_nut"), manifest.get("so_canh")) != (ban_do_nen.so_nut, ban_do_nen.so_canh):
+        raise ValueError(f"{thu_muc}: không khớp snapshot, hãy xây lại")
+    m = {ten: np.load(os.path.join(thu_muc, ten + ".npy"), mmap_mode="r") for ten in CAC_MANG}
+
+    csr = DoThiCSR(indptr=m["csr_indptr"], indices=m["csr_indices"], trong_so=m["csr_trong_so"],
+                   canh_goc=m["csr_canh_goc"], nut_osmid=np.asarray(ban_do_nen.nut_osmid),
+                   nut_x=np.asarray(ban_do_nen.nut_x), nut_y=np.asarray(ban_do_nen.nut_y),
+                   # CSR đảo chiều đã lưu sẵn: không phải chuyển vị lại trong từng tiến trình
+                   ma_tran_nguoc=csr_matrix((m["nguoc_trong_so"], m["nguoc_indices"], m["nguoc_indptr"]),
+                                            shape=(ban_do_nen.so_nut, ban_do_nen.so_nut)))
+    ten = [" / ".join(t) if isinstance(t, list) else str(t) for t in ban_do_nen.ten_duong]
+    bang_canh = lo_trinh.BangCanh(do_dai=m["canh_do_dai"], ma_ten=m["canh_ma_ten"], ten=ten,
+                                  hinh_chi_muc=m["canh_hinh_chi_muc"], hinh_toa_do=m["canh_hinh_toa_do"])
+    return csr, bang_canh
+
+
+def tai_hoac_xay(thu_muc_snapshot, ban_do_nen, ghi=True):
+    """Đồ thị gọn đã lưu cạnh snapshot; chưa có (hoặc cũ) thì dựng, ghi lại rồi mmap bản vừa ghi.
+
+    Thư mục snapshot chỉ đọc thì dùng luôn bản trong bộ nhớ.
+    """
+    thu_muc = duong_dan_mac_dinh(thu_muc_snapshot)
+    if os.path.isfile(os.path.join(thu_muc, "manifest.json")):
+        try:
+            return tai(thu_muc, ban_do_nen)
+        except ValueError:
+            shutil.rmtree(thu_muc, ignore_errors=True)
+    csr, bang_canh = xay(ban_do_nen)
+    if not ghi:
+        return csr, bang_canh
+    try:
+        return tai(luu(thu_muc, ban_do_nen, csr, bang_canh), ban_do_nen)
+    except OSError:
+        return csr, bang_canh
+
+
+def main(argv=None):
+    from dan_duong import ban_do
+
+    parser = argparse.ArgumentParser(prog="python -m dan_duong.do_thi_gon",
+                                     description="Ghi CSR và bảng cạnh cạnh snapshot để các tiến trình dùng chung")
+    lenh = parser.add_subparsers(dest="lenh", required=True)
+    p_build = lenh.add_parser("build")
+    p_build.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    ban_do_nen = ban_do.tai(args.snapshot)
+    thu_muc = duong_dan_mac_dinh(args.snapshot)
+    shutil.rmtree(thu_muc, ignore_errors=True)
+    luu(thu_muc, ban_do_nen, *xay(ban_do_nen))
+    dung_luong = sum(os.path.getsize(os.path.join(thu_muc, t)) for t in os.listdir(thu_muc))
+    print(f"Đã ghi {thu_muc}: {dung_luong / 1e6:.1f} MB ({time.perf_counter() - t0:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
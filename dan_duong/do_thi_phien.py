@@ -0,0 +1,490 @@
+# -----------------------------------------------------------------------------
+# ĐỒ THỊ PHIÊN CỦA TAB 1: PHIÊN BẢN, DẤU VÂN TAY VÀ CÁC TÍNH CHẤT GHI NHỚ
+# -----------------------------------------------------------------------------
+# Trước đây mỗi nút ở Tab 1 tính lại từ đầu trên cả đồ thị (nx.is_connected trước
+# Prim / Kruskal, nx.is_eulerian, nx.is_bipartite, quét bậc lẻ) và mỗi lần sửa ô
+# nhập là dựng lại toàn bộ. DoThiPhien bọc đồ thị networkx của phiên và giữ sẵn:
+# - phien_ban, tăng sau mỗi thay đổi, và dau_van_tay: tổng (mod 2^128) giá trị băm
+#   của từng nút / cạnh kèm trọng số, nên cập nhật O(1) và không phụ thuộc thứ tự;
+# - rừng khung nhỏ nhất (Kruskal một lần khi dựng) dạng con trỏ cha, cùng nhãn thành
+#   phần liên thông (liên thông yếu với đồ thị có hướng):
+#   + thêm cạnh nối hai cây: đổi gốc cây nhỏ rồi treo vào cây kia, gộp thành phần
+#     nhỏ vào thành phần lớn;
+#   + thêm cạnh trong một cây: leo cha xen kẽ từ hai đầu tới tổ tiên chung, thay cạnh
+#     nặng nhất trên chu trình nếu nó nặng hơn cạnh mới (tính chất chu trình);
+#   + xoá cạnh ngoài rừng: rừng và thành phần giữ nguyên; xoá cạnh của rừng: BFS xen
+#     kẽ hai nửa cây tới khi nửa nhỏ duyệt xong, lấy cạnh nhẹ nhất vắt qua lát cắt
+#     trong các cạnh kề nửa nhỏ, không có thì tách nửa nhỏ thành thành phần mới;
+# - tập đỉnh bậc lẻ (độ lệch bậc ra - vào với đồ thị có hướng), cập nhật O(1);
+# - một cách 2-tô màu: thêm cạnh giữa hai màu khác nhau (hoặc nối hai thành phần,
+#   lật màu thành phần nhỏ) vẫn hai phía, xoá cạnh không làm mất tính hai phía. Đồ
+#   thị không hai phía giữ một chu trình lẻ làm bằng chứng: xoá cạnh ngoài chu trình
+#   đó thì vẫn không hai phía, chỉ xoá cạnh của nó mới phải tô lại (lười, khi được hỏi);
+# - cây BFS / DFS theo đỉnh nguồn, rừng khung, liên thông mạnh: ghi nhớ theo phien_ban.
+# Mỗi thao tác tốn cỡ phần thay đổi (đường trên cây, nửa cây nhỏ) thay vì O(V + E).
+# Mọi sửa đổi đồ thị phải đi qua DoThiPhien (them_canh, xoa_canh, dong_bo, ...).
+# -----------------------------------------------------------------------------
+import hashlib
+from collections import deque
+
+import networkx as nx
+
+from dan_duong.euler import LOI_BAC_CO_HUONG, LOI_BAC_VO_HUONG
+
+MAT_NA_BAM = (1 << 128) - 1
+TY_LE_DUNG_LAI = 0.5  # dong_bo: thay đổi nhiều hơn tỉ lệ này của số cạnh thì dựng lại từ đầu
+
+
+def _bam(*phan):
+    return int.from_bytes(hashlib.blake2b(repr(phan).encode(), digest_size=16).digest(), "little")
+
+
+class DoThiPhien:
+    def __init__(self, G=None, co_huong=False):
+        self.do_thi = G if G is not None else (nx.DiGraph() if co_huong else nx.Graph())
+        self.phien_ban = 0
+        self.so_lan_dung_lai = 0
+        self.so_lan_trung = 0   # tính chất lấy từ bộ nhớ
+        self.so_lan_tinh = 0    # tính chất phải tính (lần đầu ở phiên bản này)
+        self._dung_lai()
+
+    # --- Dựng từ đầu ---------------------------------------------------------
+    def _dung_lai(self):
+        G = self.do_thi
+        self.co_huong = G.is_directed()
+        self.so_lan_dung_lai += 1
+        self._bo_nho = {}
+
+        tong = sum(self._bam_nut(n) for n in G)
+        tong += sum(self._bam_canh(u, v, w) for u, v, w in G.edges(data="weight"))
+        self._tong_bam = tong & MAT_NA_BAM
+
+        if self.co_huong:
+            self._lech = {n: d for n in G if (d := G.out_degree(n) - G.in_degree(n))}
+        else:
+            self._bac_le = {n for n, d in G.degree() if d % 2}
+
+        # Rừng khung nhỏ nhất bằng Kruskal; cạnh song song hai chiều của đồ thị có hướng xét như hai cạnh
+        self._ke_rung = {n: {} for n in G}   # đỉnh -> {đỉnh kề trên rừng: (cạnh gốc (u, v), trọng số)}
+        tap = nx.utils.UnionFind(G)
+        for w, u, v in sorted(((self._trong_so(d), u, v) for u, v, d in G.edges(data=True) if u != v),
+                              key=lambda x: x[0]):
+            if tap[u] != tap[v]:
+                tap.union(u, v)
+                self._ke_rung[u][v] = self._ke_rung[v][u] = ((u, v), w)
+
+        # Con trỏ cha và nhãn thành phần: BFS trên rừng từ đỉnh đầu tiên của mỗi cây
+        self._cha = {}
+        self._thanh_phan, self._cac_thanh_phan, self._ma_tiep = {}, {}, 0
+        for goc in G:
+            if goc in self._cha:
+                continue
+            self._cha[goc] = None
+            cac_dinh = self._thanh_phan_moi()
+            hang = deque([goc])
+            while hang:
+                x = hang.popleft()
+                cac_dinh.add(x)
+                self._thanh_phan[x] = self._ma_tiep - 1
+                for y in self._ke_rung[x]:
+                    if y not in self._cha:
+                        self._cha[y] = x
+                        hang.append(y)
+
+        self._hai_phia, self._mau, self._chu_trinh_le = None, None, None
+
+    def _thanh_phan_moi(self):
+        cac_dinh = set()
+        self._cac_thanh_phan[self._ma_tiep] = cac_dinh
+        self._ma_tiep += 1
+        return cac_dinh
+
+    def thay_the(self, G):
+        """Thay hẳn đồ thị phiên bằng G và dựng lại mọi cấu trúc."""
+        self.do_thi = G
+        self._dung_lai()
+        self.phien_ban += 1
+
+    # --- Tiện ích ------------------------------------------------------------
+    @staticmethod
+    def _trong_so(du_lieu):
+        w = du_lieu.get("weight")
+        return 1 if w is None else w
+
+    def _bam_nut(self, n):
+        return _bam("N", repr(n))
+
+    def _bam_canh(self, u, v, w):
+        dau_cuoi = (repr(u), repr(v)) if self.co_huong else tuple(sorted((repr(u), repr(v))))
+        return _bam("E", *dau_cuoi, repr(w))
+
+    def _khoa_canh(self, u, v):
+        return (u, v) if self.co_huong else frozenset((u, v))
+
+    def _khong_hai_phia(self, cac_canh):
+        # cac_canh: các cạnh gốc (u, v) tạo thành một chu trình lẻ
+        self._hai_phia, self._mau = False, None
+        self._chu_trinh_le = {self._khoa_canh(u, v) for u, v in cac_canh}
+
+    def _cac_canh_ke(self, x):
+        """(đỉnh kề, cạnh gốc, trọng số) theo cả hai chiều với đồ thị có hướng."""
+        G = self.do_thi
+        if self.co_huong:
+            for y, d in G.succ[x].items():
+                yield y, (x, y), self._trong_so(d)
+            for y, d in G.pred[x].items():
+                yield y, (y, x), self._trong_so(d)
+        else:
+            for y, d in G.adj[x].items():
+                yield y, (x, y), self._trong_so(d)
+
+    def _doi_phien(self):
+        self.phien_ban += 1
+        self._bo_nho = {}
+
+    def _nho(self, khoa, ham):
+        if khoa in self._bo_nho:
+            self.so_lan_trung += 1
+        else:
+            self.so_lan_tinh += 1
+            self._bo_nho[khoa] = ham()
+        return self._bo_nho[khoa]
+
+    # --- Rừng khung ----------------------------------------------------------
+    def _doi_goc(self, x):
+        # Đảo con trỏ cha trên đường x -> gốc: x thành gốc của cây
+        truoc, hien = None, x
+        while hien is not None:
+            cha = self._cha[hien]
+            self._cha[hien] = truoc
+            truoc, hien = hien, cha
+
+    def _noi_rung(self, x, y, canh, w):
+        """Treo cây chứa x vào y bằng cạnh x - y (x, y thuộc hai cây khác nhau)."""
+        self._doi_goc(x)
+        self._cha[x] = y
+        self._ke_rung[x][y] = self._ke_rung[y][x] = (canh, w)
+
+    def _cat_rung(self, x, y):
+        del self._ke_rung[x][y], self._ke_rung[y][x]
+        # Đỉnh con thành gốc của cây con tách ra
+        if self._cha[x] == y:
+            self._cha[x] = None
+        else:
+            self._cha[y] = None
+
+    def _duong_rung(self, u, v):
+        """Đường u - v trên cùng một cây: (các đỉnh con phía u, phía v); mỗi đỉnh x đại diện cạnh x - cha[x]."""
+        duong = ([u], [v])
+        da_qua = ({u}, {v})
+        chung = None
+        while chung is None:
+            for i in (0, 1):
+                cha = self._cha[duong[i][-1]]
+                if cha is None:
+                    continue
+                duong[i].append(cha)
+                da_qua[i].add(cha)
+                if cha in da_qua[1 - i]:
+                    chung = cha
+                    break
+        return tuple(d[:d.index(chung)] for d in duong)
+
+    def _canh_nang_nhat(self, cac_dinh_con):
+        """(đỉnh con x, trọng số cạnh x - cha[x], x nằm phía u?) nặng nhất trên đường trả về từ _duong_rung."""
+        nang_nhat = None
+        for i in (0, 1):
+            for x in cac_dinh_con[i]:
+                w = self._ke_rung[x][self._cha[x]][1]
+                if nang_nhat is None or w > nang_nhat[1]:
+                    nang_nhat = (x, w, i == 0)
+        return nang_nhat
+
+    def _nua_nho(self, a, b):
+        """Tập đỉnh của nửa cây nhỏ hơn sau khi cắt a - b: BFS xen kẽ, dừng khi một bên duyệt xong."""
+        hang = (deque([a]), deque([b]))
+        da_tham = ({a}, {b})
+        while True:
+            for i in (0, 1):
+                if not hang[i]:
+                    return da_tham[i]
+                for y in self._ke_rung[hang[i].popleft()]:
+                    if y not in da_tham[i]:
+                        da_tham[i].add(y)
+                        hang[i].append(y)
+
+    def _gop_thanh_phan(self, u, v):
+        """Gộp thành phần nhỏ hơn (trong hai thành phần chứa u, v) vào thành phần kia; lật màu nếu cần."""
+        tp_u, tp_v = self._thanh_phan[u], self._thanh_phan[v]
+        if len(self._cac_thanh_phan[tp_u]) > len(self._cac_thanh_phan[tp_v]):
+            u, v, tp_u, tp_v = v, u, tp_v, tp_u
+        lat = self._mau is not None and self._mau[u] == self._mau[v]
+        nho = self._cac_thanh_phan.pop(tp_u)
+        for x in nho:
+            self._thanh_phan[x] = tp_v
+            if lat:
+                self._mau[x] ^= 1
+        self._cac_thanh_phan[tp_v] |= nho
+        return u, v   # u thuộc cây nhỏ hơn
+
+    # --- Sửa đổi gia tăng ----------------------------------------------------
+    def _them_nut(self, n):
+        if n in self.do_thi:
+            return False
+        self.do_thi.add_node(n)
+        self._tong_bam = (self._tong_bam + self._bam_nut(n)) & MAT_NA_BAM
+        self._cha[n] = None
+        self._ke_rung[n] = {}
+        self._thanh_phan_moi().add(n)
+        self._thanh_phan[n] = self._ma_tiep - 1
+        if self._mau is not None:
+            self._mau[n] = 0
+        return True
+
+    def _doi_bac(self, u, v, dau):
+        if self.co_huong:
+            for n, d in ((u, dau), (v, -dau)):
+                lech = self._lech.get(n, 0) + d
+                if lech:
+                    self._lech[n] = lech
+                else:
+                    self._lech.pop(n, None)
+        elif u != v:
+            self._bac_le ^= {u, v}
+
+    def _them_canh(self, u, v, w):
+        G = self.do_thi
+        if G.has_edge(u, v):
+            if G[u][v].get("weight") == w:
+                return False
+            self._xoa_canh(u, v)
+        self._them_nut(u)
+        self._them_nut(v)
+        if w is None:
+            G.add_edge(u, v)
+        else:
+            G.add_edge(u, v, weight=w)
+        self._tong_bam = (self._tong_bam + self._bam_canh(u, v, w)) & MAT_NA_BAM
+        self._doi_bac(u, v, 1)
+        if u == v:
+            self._khong_hai_phia([(u, v)])
+            return True
+
+        w_rung = 1 if w is None else w
+        if self._thanh_phan[u] != self._thanh_phan[v]:
+            x, y = self._gop_thanh_phan(u, v)
+            self._noi_rung(x, y, (u, v), w_rung)
+            return True
+
+        if v in self._ke_rung[u]:
+            # Đồ thị có hướng, đã có chiều ngược lại trên rừng: chu trình chỉ gồm hai cạnh này
+            canh_cu, w_cu = self._ke_rung[u][v]
+            if w_cu > w_rung:
+                self._ke_rung[u][v] = self._ke_rung[v][u] = ((u, v), w_rung)
+            return True
+        duong = self._duong_rung(u, v)
+        if self._mau is not None and self._mau[u] == self._mau[v]:
+            # Cùng màu trong một thành phần hai phía: đường trên cây chẵn cạnh, thêm u - v thành chu trình lẻ
+            self._khong_hai_phia([(u, v)] + [self._ke_rung[x][self._cha[x]][0] for x in duong[0] + duong[1]])
+        x, w_max, phia_u = self._canh_nang_nhat(duong)
+        if w_max > w_rung:
+            self._cat_rung(x, self._cha[x])
+            # Đầu mút nằm trong cây con vừa tách được treo sang đầu kia
+            dau, cuoi = (u, v) if phia_u else (v, u)
+            self._noi_rung(dau, cuoi, (u, v), w_rung)
+        return True
+
+    def _xoa_canh(self, u, v):
+        G = self.do_thi
+        if not G.has_edge(u, v):
+            return False
+        w = G[u][v].get("weight")
+        G.remove_edge(u, v)
+        self._tong_bam = (self._tong_bam - self._bam_canh(u, v, w)) & MAT_NA_BAM
+        self._doi_bac(u, v, -1)
+        if self._hai_phia is False and self._khoa_canh(u, v) in self._chu_trinh_le:
+            self._hai_phia = self._chu_trinh_le = None   # có thể vừa phá chu trình lẻ cuối cùng: tô lại khi được hỏi
+
+        tren_rung = self._ke_rung[u].get(v)
+        if u == v or tren_rung is None or (self.co_huong and tren_rung[0] != (u, v)):
+            return True
+        self._cat_rung(u, v)
+        nho = self._nua_nho(u, v)
+        thay_the = None
+        for x in nho:
+            for y, canh, w_canh in self._cac_canh_ke(x):
+                if y not in nho and (thay_the is None or w_canh < thay_the[3]):
+                    thay_the = (x, y, canh, w_canh)
+        if thay_the is not None:
+            self._noi_rung(*thay_the)
+        else:
+            tp = self._thanh_phan[u]
+            self._cac_thanh_phan[tp] -= nho
+            self._thanh_phan_moi().update(nho)
+            for x in nho:
+                self._thanh_phan[x] = self._ma_tiep - 1
+        return True
+
+    def _xoa_nut(self, n):
+        G = self.do_thi
+        if n not in G:
+            return False
+        canh = list(G.in_edges(n)) + list(G.out_edges(n)) if self.co_huong else list(G.edges(n))
+        for u, v in canh:
+            self._xoa_canh(u, v)
+        G.remove_node(n)
+        self._tong_bam = (self._tong_bam - self._bam_nut(n)) & MAT_NA_BAM
+        del self._cha[n], self._ke_rung[n]
+        del self._cac_thanh_phan[self._thanh_phan.pop(n)]
+        if self._mau is not None:
+            del self._mau[n]
+        return True
+
+    def them_canh(self, u, v, w=None):
+        """Thêm cạnh (hoặc đổi trọng số cạnh đã có); trả về True nếu đồ thị đổi."""
+        doi = self._them_canh(u, v, w)
+        if doi:
+            self._doi_phien()
+        return doi
+
+    def xoa_canh(self, u, v):
+        doi = self._xoa_canh(u, v)
+        if doi:
+            self._doi_phien()
+        return doi
+
+    def them_nut(self, n):
+        doi = self._them_nut(n)
+        if doi:
+            self._doi_phien()
+        return doi
+
+    def xoa_nut(self, n):
+        doi = self._xoa_nut(n)
+        if doi:
+            self._doi_phien()
+        return doi
+
+    def dong_bo(self, G_moi):
+        """Đưa đồ thị phiên về đúng G_moi; trả về (số cạnh thêm, số cạnh xoá, số cạnh đổi trọng số, dựng lại?).
+
+        So khớp G_moi với đồ thị hiện tại rồi áp dụng từng thay đổi như them_canh / xoa_canh; khác hướng
+        hoặc thay đổi quá TY_LE_DUNG_LAI số cạnh thì thay hẳn bằng G_moi (rẻ hơn sửa từng cạnh).
+        """
+        G = self.do_thi
+        if G_moi.is_directed() != self.co_huong:
+            self.thay_the(G_moi)
+            return G_moi.number_of_edges(), 0, 0, True
+        them, doi = [], []
+        for u, v, w in G_moi.edges(data="weight"):
+            if not G.has_edge(u, v):
+                them.append((u, v, w))
+            elif G[u][v].get("weight") != w:
+                doi.append((u, v, w))
+        xoa = [(u, v) for u, v in G.edges() if not G_moi.has_edge(u, v)]
+        nut_xoa = [n for n in G if n not in G_moi]
+        so_thay_doi = len(them) + len(doi) + len(xoa) + len(nut_xoa)
+        if so_thay_doi > TY_LE_DUNG_LAI * max(G.number_of_edges(), G_moi.number_of_edges()):
+            self.thay_the(G_moi)
+            return len(them), len(xoa), len(doi), True
+
+        co_doi = False
+        for n in G_moi:
+            co_doi |= self._them_nut(n)
+        for u, v in xoa:
+            co_doi |= self._xoa_canh(u, v)
+        for u, v, w in doi + them:
+            co_doi |= self._them_canh(u, v, w)
+        for n in nut_xoa:
+            co_doi |= self._xoa_nut(n)
+        if co_doi:
+            self._doi_phien()
+        return len(them), len(xoa), len(doi), False
+
+    # --- Tính chất -----------------------------------------------------------
+    @property
+    def dau_van_tay(self):
+        """Khoá cache theo nội dung đồ thị (thay cho bo_cuc.dau_van_tay_do_thi, không phải duyệt lại)."""
+        return f"{'D' if self.co_huong else 'U'}{self._tong_bam:032x}"
+
+    def so_thanh_phan(self):
+        """Số thành phần liên thông (yếu, nếu có hướng)."""
+        return len(self._cac_thanh_phan)
+
+    def lien_thong(self):
+        return len(self.do_thi) > 0 and len(self._cac_thanh_phan) == 1
+
+    def thanh_phan_cua(self, n):
+        return frozenset(self._cac_thanh_phan[self._thanh_phan[n]])
+
+    def cac_dinh_bac_le(self):
+        """Đỉnh bậc lẻ (vô hướng) hoặc đỉnh lệch bậc ra - vào (có hướng)."""
+        return list(self._lech) if self.co_huong else list(self._bac_le)
+
+    def loi_bac_euler(self):
+        """Thông báo lỗi nếu điều kiện bậc của đường đi / chu trình Euler không thoả, None nếu thoả; O(1)."""
+        if self.co_huong:
+            lech = list(self._lech.values())
+            if len(lech) > 2 or any(abs(d) > 1 for d in lech) or sum(lech) != 0:
+                return LOI_BAC_CO_HUONG
+            return None
+        return LOI_BAC_VO_HUONG if len(self._bac_le) not in (0, 2) else None
+
+    def la_euler(self):
+        """Như nx.is_eulerian: mọi đỉnh bậc chẵn (cân bằng) và liên thông (liên thông mạnh nếu có hướng)."""
+        if self.co_huong:
+            return not self._lech and self._nho("lien_thong_manh", lambda: nx.is_strongly_connected(self.do_thi))
+        return not self._bac_le and self.lien_thong()
+
+    def la_hai_phia(self):
+        if self._hai_phia is None:
+            self.so_lan_tinh += 1
+            self._to_mau()
+        else:
+            self.so_lan_trung += 1
+        return self._hai_phia
+
+    def _to_mau(self):
+        mau, cha = {}, {}   # cha: đỉnh -> (đỉnh cha trên cây BFS, cạnh gốc)
+        for goc in self.do_thi:
+            if goc in mau:
+                continue
+            mau[goc] = 0
+            cha[goc] = None
+            hang = deque([goc])
+            while hang:
+                x = hang.popleft()
+                for y, canh, _ in self._cac_canh_ke(x):
+                    if y not in mau:
+                        mau[y] = mau[x] ^ 1
+                        cha[y] = (x, canh)
+                        hang.append(y)
+                    elif mau[y] == mau[x]:
+                        # Cùng màu thì cùng độ sâu BFS: leo song song tới tổ tiên chung được chu trình lẻ
+                        cac_canh = [canh]
+                        while x != y:
+                            (x, canh_x), (y, canh_y) = cha[x], cha[y]
+                            cac_canh += [canh_x, canh_y]
+                        self._khong_hai_phia(cac_canh)
+                        return
+        self._hai_phia, self._mau, self._chu_trinh_le = True, mau, None
+
+    def cay_khung(self):
+        """(các cạnh, tổng trọng số) của rừng khung nhỏ nhất đang được duy trì."""
+        def liet_ke():
+            # Mỗi cạnh của rừng có ở cả hai đầu: lấy ở đầu là đỉnh đầu của cạnh gốc
+            cac_canh = [(canh, w) for x, ke in self._ke_rung.items() for canh, w in ke.values() if canh[0] == x]
+            return [canh for canh, _ in cac_canh], sum(w for _, w in cac_canh)
+        return self._nho("cay_khung", liet_ke)
+
+    def cay_bfs(self, nguon):
+        return self._nho(("bfs", nguon), lambda: list(nx.bfs_tree(self.do_thi, nguon).edges()))
+
+    def cay_dfs(self, nguon):
+        return self._nho(("dfs", nguon), lambda: list(nx.dfs_tree(self.do_thi, nguon).edges()))
+
+    def thong_ke(self):
+        return {"phien_ban": self.phien_ban, "so_thanh_phan": self.so_thanh_phan(),
+                "so_dinh_bac_le": len(self._lech if self.co_huong else self._bac_le),
+                "hai_phia": self._hai_phia, "so_lan_trung": self.so_lan_trung, "so_lan_tinh": self.so_lan_tinh,
+                "so_lan_dung_lai": self.so_lan_dung_lai}
@@ -0,0 +1,139 @@
+# -----------------------------------------------------------------------------
+# ĐƯỜNG ĐI / CHU TRÌNH EULER TRONG THỜI GIAN TUYẾN TÍNH
+# -----------------------------------------------------------------------------
+# Fleury cổ điển thử xoá từng cạnh rồi gọi nx.has_path để tránh cầu: O(E^2). Ở đây
+# dùng Hierholzer lặp (không đệ quy) trên mảng kề kiểu CSR: mỗi cạnh được duyệt
+# đúng một lần, O(V + E), chạy được 10^5 - 10^6 cạnh trong vài giây.
+# Hỗ trợ Graph, DiGraph, MultiGraph, MultiDiGraph; không sửa đồ thị đầu vào.
+# -----------------------------------------------------------------------------
+import networkx as nx
+import numpy as np
+
+from dan_duong.thuc_thi import bao_tien_do
+
+LOI_BAC_VO_HUONG = "Đồ thị không có Đường đi/Chu trình Euler (Số đỉnh bậc lẻ phải là 0 hoặc 2)."
+LOI_BAC_CO_HUONG = ("Đồ thị không có Đường đi/Chu trình Euler "
+                    "(mọi đỉnh phải cân bằng bậc vào/ra, trừ tối đa một cặp đầu - cuối).")
+
+
+def _dinh_xuat_phat(G, bac_ra, bac_vao):
+    """Đỉnh bắt đầu, hoặc (None, thông báo lỗi).
+
+    Có đỉnh bậc lẻ (có hướng: ra - vào = 1) thì như Fleury cũ: đỉnh đầu tiên trong số đó. Chu trình
+    thì khác Fleury cũ (đỉnh đầu tiên của đồ thị): lấy đỉnh đầu tiên CÓ cạnh - Fleury cũ báo "ngắt
+    quãng" khi đỉnh đầu tiên cô lập dù chu trình vẫn tồn tại; khi đỉnh đầu tiên có cạnh hai cách trùng nhau.
+    """
+    cac_nut = list(G.nodes())
+    if G.is_directed():
+        chenh = bac_ra - bac_vao
+        dau = np.flatnonzero(chenh == 1)
+        cuoi = np.flatnonzero(chenh == -1)
+        if np.any(np.abs(chenh) > 1) or len(dau) > 1 or len(cuoi) > 1 or len(dau) != len(cuoi):
+            return None, LOI_BAC_CO_HUONG
+        if len(dau):
+            return cac_nut[dau[0]], None
+    else:
+        bac_le = np.flatnonzero(bac_ra % 2 == 1)
+        if len(bac_le) not in [0, 2]:
+            return None, LOI_BAC_VO_HUONG
+        if len(bac_le):
+            return cac_nut[bac_le[0]], None
+    # Đỉnh cô lập không ảnh hưởng đến tính Euler
+    co_canh = np.flatnonzero(bac_ra > 0)
+    return (cac_nut[co_canh[0]] if len(co_canh) else None), None
+
+
+def duong_di_euler(G, du_lieu=False):
+    """Đường đi (hoặc chu trình) Euler của G theo kiểu Hierholzer.
+
+    Trả về (danh sách cạnh, thông báo) giống thuat_toan_fleury: danh sách là None nếu
+    không tồn tại. Mỗi cạnh là (u, v), hoặc (u, v, dữ liệu) nếu du_lieu=True - dữ liệu
+    là dict thuộc tính gốc của đúng cạnh đó (trọng số được giữ nguyên).
+    """
+    co_huong = G.is_directed()
+    chi_so = {n: i for i, n in enumerate(G.nodes())}
+    so_nut = len(chi_so)
+
+    # iter(): list() trên EdgeView gọi __len__ trước, tức duyệt toàn bộ cạnh hai lần.
+    # Đa đồ thị liệt kê từng cạnh song song nên không cần khoá.
+    cac_canh = list(iter(G.edges(data=du_lieu)))
+    so_canh = len(cac_canh)
+    if so_canh == 0:
+        return None, "Đồ thị chưa có cạnh nào."
+
+    dau_canh = np.fromiter((chi_so[c[0]] for c in cac_canh), dtype=np.int64, count=so_canh)
+    cuoi_canh = np.fromiter((chi_so[c[1]] for c in cac_canh), dtype=np.int64, count=so_canh)
+
+    # Danh sách kề dạng CSR, mỗi phần tử là một "nửa cạnh" (đỉnh kề, mã cạnh).
+    # Vô hướng: mỗi cạnh sinh hai nửa cạnh; khuyên (u, u) chỉ giữ một để không bị duyệt hai lần.
+    ma_canh = np.arange(so_canh)
+    if co_huong:
+        tu, toi, ma = dau_canh, cuoi_canh, ma_canh
+        bac_ra = np.bincount(dau_canh, minlength=so_nut)
+        bac_vao = np.bincount(cuoi_canh, minlength=so_nut)
+    else:
+        khong_khuyen = dau_canh != cuoi_canh
+        tu = np.concatenate([dau_canh, cuoi_canh[khong_khuyen]])
+        toi = np.concatenate([cuoi_canh, dau_canh[khong_khuyen]])
+        ma = np.concatenate([ma_canh, ma_canh[khong_khuyen]])
+        # Bậc vô hướng: khuyên tính 2 (cùng quy ước với G.degree())
+        bac_ra = np.bincount(dau_canh, minlength=so_nut) + np.bincount(cuoi_canh, minlength=so_nut)
+        bac_vao = bac_ra
+
+    nut_dau, loi = _dinh_xuat_phat(G, bac_ra, bac_vao)
+    if loi:
+        return None, loi
+
+    # Sắp xếp ổn định theo đỉnh nguồn: giữ thứ tự láng giềng của networkx
+    thu_tu = np.argsort(tu, kind="stable")
+    indptr = np.zeros(so_nut + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tu, minlength=so_nut), out=indptr[1:])
+    ke = toi[thu_tu].tolist()
+    ke_ma = ma[thu_tu].tolist()
+    con_tro = indptr[:-1].tolist()
+    ket_thuc = indptr[1:].tolist()
+    da_dung = bytearray(so_canh)
+
+    # Hierholzer lặp: đi tiếp bằng cạnh chưa dùng, khi kẹt thì lùi và ghi cạnh vào lộ trình
+    ngan_xep_nut = [chi_so[nut_dau]]
+    ngan_xep_canh = [-1]
+    lo_trinh = []
+    so_buoc, tong_so_buoc = 0, 2 * so_canh + 1   # mỗi cạnh một lần đi tới, một lần lùi
+    while ngan_xep_nut:
+        so_buoc += 1
+        if not so_buoc & 0x3FFF:
+            bao_tien_do(so_buoc / tong_so_buoc, "Đang dựng đường đi Euler")
+        v = ngan_xep_nut[-1]
+        p, het = con_tro[v], ket_thuc[v]
+        while p < het and da_dung[ke_ma[p]]:
+            p += 1
+        if p == het:
+            con_tro[v] = p
+            ngan_xep_nut.pop()
+            lo_trinh.append((v, ngan_xep_canh.pop()))
+        else:
+            con_tro[v] = p + 1
+            da_dung[ke_ma[p]] = 1
+            ngan_xep_nut.append(ke[p])
+            ngan_xep_canh.append(ke_ma[p])
+
+    if len(lo_trinh) - 1 != so_canh:
+        return None, "Lỗi: Đồ thị bị ngắt quãng (các cạnh không cùng một thành phần liên thông)."
+
+    lo_trinh.reverse()
+    cac_nut = list(chi_so)
+    ket_qua = []
+    for (u, _), (v, e) in zip(lo_trinh, lo_trinh[1:]):
+        if du_lieu:
+            ket_qua.append((cac_nut[u], cac_nut[v], cac_canh[e][-1]))
+        else:
+            ket_qua.append((cac_nut[u], cac_nut[v]))
+    return ket_qua, "Thành công"
+
+
+def chu_trinh_hierholzer(G):
+    """Chu trình Euler của nx.eulerian_circuit dưới dạng danh sách cạnh (u, v).
+
+    Hàm cấp module để BoThucThi pickle được (nút Hierholzer ở Tab 1).
+    """
+    return [(u, v) for u, v in nx.eulerian_circuit(G)]
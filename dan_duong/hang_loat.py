@@ -0,0 +1,221 @@
+# -----------------------------------------------------------------------------
+# TÌM ĐƯỜNG HÀNG LOẠT TỪ DÒNG LỆNH
+# -----------------------------------------------------------------------------
+# Đọc các cặp điểm đi / điểm đến từ stdin (CSV có dòng tiêu đề hoặc JSONL, tự nhận
+# theo ký tự đầu) và ghi từng kết quả ra stdout theo cùng định dạng. Bản ghi được xử
+# lý theo từng lô cố định nên bộ nhớ không tăng theo độ dài đầu vào; mỗi lô gắn mọi
+# toạ độ vào đồ thị bằng một lời gọi KDTree rồi tìm đường qua BoDanDuong (cùng bộ máy
+# với Tab 2, kể cả bộ nhớ đệm lộ trình).
+#
+# Mỗi điểm là tên địa điểm (tu / den), toạ độ (lat_di, lon_di / lat_den, lon_den) hoặc
+# mã nút OSM (osmid_di / osmid_den); id, thuat_toan và muc_tieu (do_dai / thoi_gian /
+# uu_tien) là tuỳ chọn. --lop-un-tac áp dụng một CSV tốc độ theo cạnh trước khi chạy.
+# Chuyến có đầu mút ngoài bản đồ thành phố được tìm trên bộ ô cả tỉnh nếu đã dựng
+# (python -m dan_duong.o_ban_do build), luôn bằng A*.
+#
+#     python -m dan_duong.hang_loat --offline < cac_chuyen.csv > ket_qua.csv
+#     printf '{"id": 1, "tu": "Sân bay Pleiku", "den": "Chợ Pleiku"}\n' | python -m dan_duong.hang_loat
+# -----------------------------------------------------------------------------
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+
+import networkx as nx
+
+from dan_duong import ban_do, bo_nho_lo_trinh, dia_danh, o_ban_do
+from dan_duong.dich_vu import CAC_THUAT_TOAN, BoDanDuong
+from dan_duong.trong_so import CAC_MUC_TIEU
+
+KICH_THUOC_LO = 256
+COT_KET_QUA = ["id", "thuat_toan", "muc_tieu", "do_dai_m", "thoi_gian_s", "so_nut", "so_nut_da_duyet",
+               "tu_bo_nho_dem", "loi"]
+
+
+def _doc_ban_ghi(dau_vao):
+    """(định dạng, iterator các dict) - 'jsonl' nếu dòng có nội dung đầu tiên bắt đầu bằng '{'."""
+    dong_dau = ""
+    for dong_dau in dau_vao:
+        if dong_dau.strip():
+            break
+    cac_dong = itertools.chain([dong_dau], dau_vao)
+    if dong_dau.lstrip().startswith("{"):
+        return "jsonl", _doc_jsonl(cac_dong)
+    return "csv", csv.DictReader(cac_dong)
+
+
+def _doc_jsonl(cac_dong):
+    for dong in cac_dong:
+        if not dong.strip():
+            continue
+        try:
+            ban_ghi = json.loads(dong)
+        except json.JSONDecodeError as e:
+            ban_ghi = {"_loi": f"JSON không hợp lệ: {e.msg}"}
+        yield ban_ghi if isinstance(ban_ghi, dict) else {"_loi": "Mỗi dòng JSONL phải là một object"}
+
+
+def _co_gia_tri(ban_ghi, khoa):
+    return ban_ghi.get(khoa) not in (None, "")
+
+
+def _lay_diem(ban_ghi, ten, hau_to):
+    """Điểm theo thứ tự ưu tiên: mã nút OSM, toạ độ, tên địa điểm."""
+    if _co_gia_tri(ban_ghi, f"osmid_{hau_to}"):
+        return int(ban_ghi[f"osmid_{hau_to}"])
+    if _co_gia_tri(ban_ghi, f"lat_{hau_to}") and _co_gia_tri(ban_ghi, f"lon_{hau_to}"):
+        return (float(ban_ghi[f"lat_{hau_to}"]), float(ban_ghi[f"lon_{hau_to}"]))
+    if _co_gia_tri(ban_ghi, ten):
+        return str(ban_ghi[ten])
+    raise ValueError(f"Thiếu điểm {ten}: cần {ten}, lat_{hau_to}/lon_{hau_to} hoặc osmid_{hau_to}")
+
+
+def _gan_lo(bo, cac_diem, vai_tro):
+    """Điểm chiếu trên cạnh cho cả lô trong một lời gọi; lô có điểm lỗi thì gắn lại từng điểm để giữ lỗi riêng."""
+    try:
+        return list(bo.gan_diem_tren_canh(cac_diem, vai_tro))
+    except Exception:
+        ket_qua = []
+        for diem in cac_diem:
+            try:
+                ket_qua.append(bo.gan_diem_tren_canh([diem], vai_tro)[0])
+            except Exception as e:
+                ket_qua.append(e)
+        return ket_qua
+
+
+def xu_ly_lo(bo, lo, thuat_toan_mac_dinh="Dijkstra", kem_duong_di=False, muc_tieu_mac_dinh="do_dai"):
+    """Danh sách kết quả (dict theo COT_KET_QUA) cho một lô bản ghi, giữ nguyên thứ tự."""
+    ket_qua = []
+    hop_le = []  # (vị trí trong ket_qua, điểm đi, điểm đến)
+    for ban_ghi in lo:
+        dong = {"id": ban_ghi.get("id", ""), "thuat_toan": ban_ghi.get("thuat_toan") or thuat_toan_mac_dinh,
+                "muc_tieu": ban_ghi.get("muc_tieu") or muc_tieu_mac_dinh}
+        ket_qua.append(dong)
+        try:
+            if "_loi" in ban_ghi:
+                raise ValueError(ban_ghi["_loi"])
+            diem_di = _lay_diem(ban_ghi, "tu", "di")
+            diem_den = _lay_diem(ban_ghi, "den", "den")
+            # Tên địa điểm đổi sang toạ độ trước để cả lô gắn vào đồ thị một lần
+            if isinstance(diem_di, str):
+                diem_di = bo.tim_toa_do(diem_di)
+            if isinstance(diem_den, str):
+                diem_den = bo.tim_toa_do(diem_den)
+        except Exception as e:
+            dong["loi"] = str(e)
+            continue
+        if not (isinstance(diem_di, tuple) and isinstance(diem_den, tuple) and bo.can_ban_do_tinh(diem_di, diem_den)):
+            hop_le.append((len(ket_qua) - 1, diem_di, diem_den))
+            continue
+        dong["thuat_toan"] = "A* (bản đồ cả tỉnh)"
+        try:
+            _ghi_lo_trinh(dong, *bo.tim_duong_tinh(diem_di, diem_den, dong["muc_tieu"]), kem_duong_di)
+        except nx.NetworkXNoPath:
+            dong["loi"] = "Không có đường đi"
+        except Exception as e:
+            dong["loi"] = str(e)
+
+    cac_nguon = _gan_lo(bo, [d for _, d, _ in hop_le], "nguon")
+    cac_dich = _gan_lo(bo, [d for _, _, d in hop_le], "dich")
+    for (vi_tri, _, _), nguon, dich in zip(hop_le, cac_nguon, cac_dich):
+        dong = ket_qua[vi_tri]
+        try:
+            if isinstance(nguon, Exception):
+                raise nguon
+            if isinstance(dich, Exception):
+                raise dich
+            cac_lo_trinh, co_san = bo.tim_cac_lo_trinh_dau_mut(nguon, dich, dong["thuat_toan"],
+                                                               muc_tieu=dong["muc_tieu"])
+            lo_trinh = cac_lo_trinh[0]
+        except nx.NetworkXNoPath:
+            dong["loi"] = "Không có đường đi"
+            continue
+        except Exception as e:
+            dong["loi"] = str(e)
+            continue
+        _ghi_lo_trinh(dong, lo_trinh, co_san, kem_duong_di)
+    return ket_qua
+
+
+def _ghi_lo_trinh(dong, lo_trinh, co_san, kem_duong_di):
+    dong.update(do_dai_m=round(sum(d["do_dai"] for d in lo_trinh.chi_tiet), 1),
+                thoi_gian_s=round(lo_trinh.thoi_gian, 1), so_nut=len(lo_trinh.duong_di),
+                so_nut_da_duyet=lo_trinh.so_nut_da_duyet, tu_bo_nho_dem=co_san)
+    if kem_duong_di:
+        dong["duong_di"] = lo_trinh.duong_di
+
+
+def chay(bo, dau_vao, dau_ra, thuat_toan="Dijkstra", kem_duong_di=False, kich_thuoc_lo=KICH_THUOC_LO,
+         dinh_dang_ra=None, muc_tieu="do_dai"):
+    """Đọc dau_vao, ghi dau_ra theo từng lô; trả về (số bản ghi, số bản ghi lỗi)."""
+    dinh_dang, cac_ban_ghi = _doc_ban_ghi(dau_vao)
+    dinh_dang_ra = dinh_dang_ra or dinh_dang
+    cot = COT_KET_QUA + (["duong_di"] if kem_duong_di else [])
+    if dinh_dang_ra == "csv":
+        viet = csv.DictWriter(dau_ra, fieldnames=cot, lineterminator="\n")
+        viet.writeheader()
+
+    so_ban_ghi = so_loi = 0
+    while True:
+        lo = list(itertools.islice(cac_ban_ghi, kich_thuoc_lo))
+        if not lo:
+            break
+        for dong in xu_ly_lo(bo, lo, thuat_toan, kem_duong_di, muc_tieu):
+            so_ban_ghi += 1
+            so_loi += "loi" in dong
+            if dinh_dang_ra == "csv":
+                if "duong_di" in dong:
+                    dong["duong_di"] = " ".join(map(str, dong["duong_di"]))
+                viet.writerow(dong)
+            else:
+                dau_ra.write(json.dumps({k: dong.get(k) for k in cot}, ensure_ascii=False) + "\n")
+        dau_ra.flush()
+    return so_ban_ghi, so_loi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m dan_duong.hang_loat",
+                                     description="Tìm đường hàng loạt: cặp điểm từ stdin (CSV/JSONL), kết quả ra stdout")
+    parser.add_argument("dau_vao", nargs="?", default="-", help="tệp đầu vào (mặc định: stdin)")
+    parser.add_argument("--thuat-toan", default="Dijkstra", choices=list(CAC_THUAT_TOAN),
+                        help="thuật toán khi bản ghi không có cột thuat_toan")
+    parser.add_argument("--muc-tieu", default="do_dai", choices=list(CAC_MUC_TIEU),
+                        help="mục tiêu tối ưu khi bản ghi không có cột muc_tieu")
+    parser.add_argument("--lop-un-tac", help="CSV tốc độ theo cạnh (toc_do + canh hoặc u, v) áp dụng trước khi chạy")
+    parser.add_argument("--dinh-dang-ra", choices=["csv", "jsonl"], help="mặc định: giống đầu vào")
+    parser.add_argument("--kem-duong-di", action="store_true", help="ghi thêm danh sách mã nút OSM của lộ trình")
+    parser.add_argument("--kich-thuoc-lo", type=int, default=KICH_THUOC_LO)
+    parser.add_argument("--snapshot", default=os.environ.get("PLEIKU_SNAPSHOT", ban_do.THU_MUC_MAC_DINH))
+    parser.add_argument("--offline", action="store_true", default=os.environ.get("PLEIKU_OFFLINE", "0") == "1",
+                        help="không gọi Overpass / Nominatim, chỉ dùng snapshot và danh bạ")
+    parser.add_argument("--bo-o", default=os.environ.get("PLEIKU_TILES", o_ban_do.THU_MUC_MAC_DINH),
+                        help="bộ ô bản đồ cả tỉnh cho chuyến ra ngoài thành phố (bỏ qua nếu chưa dựng)")
+    parser.add_argument("--suc-chua-bo-nho", type=int,
+                        default=int(os.environ.get("PLEIKU_ROUTE_CACHE_SIZE", bo_nho_lo_trinh.SUC_CHUA_MAC_DINH)))
+    args = parser.parse_args(argv)
+
+    bat_dau = time.perf_counter()
+    bo = BoDanDuong.tai(args.snapshot, offline=args.offline,
+                        tep_geocode=os.environ.get("PLEIKU_GEOCODE_CACHE", dia_danh.TEP_BO_NHO_GEOCODE),
+                        suc_chua_lo_trinh=args.suc_chua_bo_nho, thu_muc_o=args.bo_o)
+    if args.lop_un_tac:
+        so_dong, so_canh, so_loi_un_tac = bo.ap_dung_lop_un_tac(args.lop_un_tac)
+        print(f"Lớp ùn tắc: {so_canh} cạnh từ {so_dong} dòng, {so_loi_un_tac} dòng bỏ qua", file=sys.stderr)
+    dau_vao = sys.stdin if args.dau_vao == "-" else open(args.dau_vao, encoding="utf-8", newline="")
+    try:
+        so_ban_ghi, so_loi = chay(bo, dau_vao, sys.stdout, args.thuat_toan, args.kem_duong_di, args.kich_thuoc_lo,
+                                  args.dinh_dang_ra, args.muc_tieu)
+    finally:
+        if dau_vao is not sys.stdin:
+            dau_vao.close()
+    tk = bo.bo_nho.thong_ke()
+    print(f"{so_ban_ghi} bản ghi, {so_loi} lỗi, {tk['trung'] + tk['gop']} lấy từ bộ nhớ đệm, "
+          f"{time.perf_counter() - bat_dau:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# -----------------------------------------------------------------------------
+# ĐO HIỆU NĂNG THEO TỪNG GIAI ĐOẠN
+# -----------------------------------------------------------------------------
+# Một LanDo ứng với một yêu cầu (một lần tìm đường ở Tab 2, một nút thuật toán ở
+# Tab 1) gồm nhiều giai đoạn; mỗi giai đoạn ghi thời gian thực, RSS hiện tại của tiến
+# trình khi giai đoạn kết thúc cùng phần tăng so với lúc bắt đầu (/proc/self/statm, chỉ
+# có trên Linux), đỉnh RSS của tiến trình (VmHWM / ru_maxrss) và phần đỉnh bị đẩy lên
+# trong giai đoạn, cùng các số liệu do người gọi thêm vào (vd. so_nut_da_duyet).
+# Việc chạy trong tiến trình con của thuc_thi.BoThucThi được đo ngay trong con
+# (do_trong_tien_trinh_con: thời gian, CPU, đỉnh RSS từ đầu việc, cProfile / tracemalloc
+# nếu chi_tiet) và số liệu gửi về được gộp vào giai đoạn với tiền tố "con_".
+# Mỗi giai đoạn vừa xong được phát ra một dòng JSON: qua logger "dan_duong.hieu_nang"
+# và, nếu đặt PLEIKU_PERF_LOG=<tệp>, nối thêm vào tệp đó.
+#
+# chi_tiet=True bật thêm cProfile (chỉ luồng hiện tại) và tracemalloc (đỉnh bộ nhớ
+# Python cấp phát trong từng giai đoạn). Hai công cụ này làm chậm 1.5 - 3 lần nên chỉ
+# dùng cho một yêu cầu khi cần; tracemalloc là toàn tiến trình nên số liệu có thể lẫn
+# cấp phát của phiên khác chạy song song.
+# -----------------------------------------------------------------------------
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_khoa_tep = threading.Lock()
+_khoa_tracemalloc = threading.Lock()
+_so_lan_tracemalloc = 0  # số LanDo chi tiết đang mở: chỉ tắt tracemalloc khi về 0
+
+
+_KICH_THUOC_TRANG = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_mb():
+    # RSS hiện tại (không phải đỉnh cả đời tiến trình như ru_maxrss); None nếu không có /proc
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _KICH_THUOC_TRANG / 2 ** 20
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def dinh_rss_mb():
+    """Đỉnh RSS (MB) của tiến trình từ lúc khởi động hoặc lần dat_lai_dinh_rss() gần nhất; None nếu không rõ."""
+    try:
+        with open("/proc/self/status", "rb") as f:
+            for dong in f:
+                if dong.startswith(b"VmHWM:"):
+                    return int(dong.split()[1]) / 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    if resource is None:
+        return None
+    dinh = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return dinh / 2 ** 20 if sys.platform == "darwin" else dinh / 1024   # macOS: byte, Linux: KB
+
+
+def dat_lai_dinh_rss():
+    # Đưa đỉnh RSS về RSS hiện tại (Linux >= 4.0). Toàn tiến trình nên chỉ dùng ở tiến trình con
+    # chạy một việc một lúc, không dùng ở máy chủ Streamlit nhiều phiên.
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _van_ban_profile(profile, so_dong, sap_xep):
+    dau_ra = io.StringIO()
+    pstats.Stats(profile, stream=dau_ra).strip_dirs().sort_stats(sap_xep).print_stats(so_dong)
+    return dau_ra.getvalue()
+
+
+@contextmanager
+def do_trong_tien_trinh_con(chi_tiet=False, so_dong=30):
+    """Đo một việc ngay trong tiến trình con; yield dict số liệu (việc có thể thêm vào), điền khi xong.
+
+    Đỉnh RSS tính từ đầu việc nếu đặt lại được (dat_lai_dinh_rss), không thì từ lúc con khởi động.
+    """
+    so_lieu = {}
+    so_lieu["con_dinh_tu_dau_viec"] = dat_lai_dinh_rss()
+    profile = None
+    if chi_tiet:
+        tracemalloc.start()
+        profile = cProfile.Profile()
+        profile.enable()
+    bat_dau, cpu_bat_dau = time.perf_counter(), time.process_time()
+    try:
+        yield so_lieu
+    finally:
+        so_lieu["con_thoi_gian_ms"] = round((time.perf_counter() - bat_dau) * 1000, 3)
+        so_lieu["con_cpu_ms"] = round((time.process_time() - cpu_bat_dau) * 1000, 3)
+        dinh = dinh_rss_mb()
+        if dinh is not None:
+            so_lieu["con_rss_dinh_mb"] = round(dinh, 1)
+        if chi_tiet:
+            profile.disable()
+            so_lieu["con_tracemalloc_dinh_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+            tracemalloc.stop()
+            so_lieu["profile_con"] = _van_ban_profile(profile, so_dong, "cumulative")
+
+
+def _bat_tracemalloc():
+    global _so_lan_tracemalloc
+    with _khoa_tracemalloc:
+        if _so_lan_tracemalloc == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _so_lan_tracemalloc += 1
+
+
+def _tat_tracemalloc():
+    global _so_lan_tracemalloc
+    with _khoa_tracemalloc:
+        _so_lan_tracemalloc -= 1
+        if _so_lan_tracemalloc == 0:
+            tracemalloc.stop()
+
+
+def ghi_dong_json(ban_ghi, tep=None):
+    dong = json.dumps(ban_ghi, ensure_ascii=False, default=str)
+    logger.info(dong)
+    tep = tep or os.environ.get("PLEIKU_PERF_LOG")
+    if tep:
+        with _khoa_tep, open(tep, "a", encoding="utf-8") as f:
+            f.write(dong + "\n")
+
+
+class LanDo:
+    def __init__(self, ten, chi_tiet=False, **thong_tin):
+        self.ten = ten
+        self.chi_tiet = chi_tiet
+        self.thong_tin = thong_tin  # gắn vào mọi dòng JSON (vd. tab, thuật toán)
+        self.ma = uuid.uuid4().hex[:12]
+        self.cac_giai_doan = []
+        self.tong_ms = 0.0
+        self._profile = None
+        self._profile_con = []   # [(giai đoạn, văn bản pstats)] gửi về từ tiến trình con
+        self._bat_dau = None
+        self._dang_mo = False
+
+    def __enter__(self):
+        if self.chi_tiet:
+            _bat_tracemalloc()
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._bat_dau = time.perf_counter()
+        self._dang_mo = True
+        return self
+
+    def __exit__(self, *exc):
+        self.tong_ms = (time.perf_counter() - self._bat_dau) * 1000
+        self._dang_mo = False
+        if self.chi_tiet:
+            self._profile.disable()
+            _tat_tracemalloc()
+        return False
+
+    @contextmanager
+    def giai_doan(self, ten, **thong_tin):
+        """Đo một giai đoạn; dict được yield để người gọi bổ sung số liệu (vd. so_nut_da_duyet).
+
+        Dùng được cả sau khi lần đo đã đóng (vd. giai đoạn vẽ bản đồ), chỉ là không còn cProfile / tracemalloc.
+        """
+        ban_ghi = {"giai_doan": ten, **thong_tin}
+        co_tracemalloc = self.chi_tiet and self._dang_mo and tracemalloc.is_tracing()
+        if co_tracemalloc:
+            tracemalloc.reset_peak()
+        rss_truoc, dinh_truoc = _rss_mb(), dinh_rss_mb()
+        bat_dau = time.perf_counter()
+        try:
+            yield ban_ghi
+        except BaseException as e:
+            ban_ghi["loi"] = type(e).__name__
+            raise
+        finally:
+            ban_ghi["thoi_gian_ms"] = round((time.perf_counter() - bat_dau) * 1000, 3)
+            rss_sau = _rss_mb()
+            if rss_sau is not None:
+                ban_ghi["rss_sau_mb"] = round(rss_sau, 1)
+                ban_ghi["rss_tang_mb"] = round(rss_sau - rss_truoc, 1)
+            dinh_sau = dinh_rss_mb()
+            if dinh_sau is not None:
+                # Đỉnh chỉ tăng khi giai đoạn vượt mọi đỉnh trước đó của tiến trình (kể cả phiên khác)
+                ban_ghi["rss_dinh_mb"] = round(dinh_sau, 1)
+                ban_ghi["rss_dinh_tang_mb"] = round(dinh_sau - dinh_truoc, 1)
+            profile_con = ban_ghi.pop("profile_con", None)
+            if profile_con:
+                self._profile_con.append((ten, profile_con))
+            if co_tracemalloc:
+                ban_ghi["tracemalloc_dinh_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+            self.cac_giai_doan.append(ban_ghi)
+            ghi_dong_json({"ma_lan_do": self.ma, "lan_do": self.ten, "luc": time.time(), **self.thong_tin,
+                          **ban_ghi})
+
+    def bang(self):
+        """DataFrame các giai đoạn theo thứ tự chạy."""
+        import pandas as pd
+
+        return pd.DataFrame(self.cac_giai_doan)
+
+    def bao_cao_profile(self, so_dong=30, sap_xep="cumulative"):
+        """Văn bản pstats của lần đo chi tiết ('' nếu không bật cProfile), kèm profile của tiến trình con."""
+        if self._profile is None:
+            return ""
+        cac_phan = [_van_ban_profile(self._profile, so_dong, sap_xep)]
+        for ten, van_ban in self._profile_con:
+            cac_phan.append(f"--- Tiến trình con, giai đoạn {ten} ---\n{van_ban}")
+        return "\n".join(cac_phan)
+
+
+def giai_doan(lan_do, ten, **thong_tin):
+    """lan_do.giai_doan(...) hoặc ngữ cảnh rỗng khi không đo (lan_do là None)."""
+    if lan_do is None:
+        return nullcontext({})
+    return lan_do.giai_doan(ten, **thong_tin)
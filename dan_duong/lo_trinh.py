@@ -0,0 +1,294 @@
+# -----------------------------------------------------------------------------
+# BẢNG THUỘC TÍNH CẠNH VÀ HÌNH HỌC LỘ TRÌNH (TAB 2)
+# -----------------------------------------------------------------------------
+# Mỗi phần tử CSR (cặp u -> v, cạnh song song ngắn nhất) được gán sẵn một lần khi
+# tải bản đồ: độ dài, mã tên đường (đã intern) và polyline (lat, lon) phẳng. Chi tiết
+# lộ trình và đường vẽ trên bản đồ khi đó chỉ là phép cắt mảng theo chỉ số phần tử,
+# không còn gọi G.get_edge_data / geometry.xy cho từng cạnh.
+# Polyline được rút gọn bằng Douglas-Peucker với dung sai theo mức zoom hiển thị.
+# Điểm đi / điểm đến nằm giữa cạnh được nối vào lộ trình bằng phần cạnh đi dở (DoanCanh),
+# cắt tại điểm chiếu và tính cả vào quãng đường lẫn thời gian.
+# -----------------------------------------------------------------------------
+import math
+from dataclasses import dataclass
+
+import networkx as nx
+import numpy as np
+import shapely
+
+from dan_duong import hieu_nang
+from dan_duong.dinh_tuyen import KetQuaTimDuong, noi_cac_doan
+from dan_duong.lo_trinh_thay_the import tim_lo_trinh_thay_the
+
+TEN_KHONG_CO = "Đường nội bộ"
+MET_MOI_DO = 111_320.0
+MET_MOI_PIXEL_ZOOM_0 = 156_543.03392  # Web Mercator, ô 256 px, tại xích đạo
+ZOOM_TOI_DA = 19
+ZOOM_DU_PHONG = 2  # giữ chi tiết đủ cho người dùng phóng to thêm chừng này mức
+
+
+class BangCanh:
+    def __init__(self, do_dai, ma_ten, ten, hinh_chi_muc, hinh_toa_do):
+        self.do_dai = do_dai              # mét, theo phần tử CSR
+        self.ma_ten = ma_ten              # chỉ số trong ten, -1 nếu không có tên
+        self.ten = ten                    # tên đường dạng chuỗi (danh sách tên đã nối " / ")
+        self.hinh_chi_muc = hinh_chi_muc  # (số phần tử + 1) vị trí bắt đầu polyline
+        self.hinh_toa_do = hinh_toa_do    # (M, 2) toạ độ (lat, lon), mỗi polyline gồm cả hai đầu mút
+
+    @classmethod
+    def tu_ban_do(cls, ban_do, csr):
+        """Dựng từ snapshot và CSR đã biên dịch từ chính snapshot đó, hoàn toàn vector hoá."""
+        canh = np.asarray(csr.canh_goc, dtype=np.int64)
+        ten = [" / ".join(t) if isinstance(t, list) else str(t) for t in ban_do.ten_duong]
+
+        # Cạnh có geometry dùng nguyên polyline; cạnh thẳng dùng toạ độ hai nút. Gộp cả hai
+        # nguồn vào một mảng (x, y) rồi lấy theo chỉ số, tránh vòng lặp Python theo cạnh.
+        chi_muc = np.asarray(ban_do.hinh_hoc_chi_muc, dtype=np.int64)
+        toa_do_hinh = np.asarray(ban_do.hinh_hoc_toa_do, dtype=np.float64).reshape(-1, 2)
+        toa_do_nut = np.column_stack([ban_do.nut_x, ban_do.nut_y]).astype(np.float64)
+        nguon = np.vstack([toa_do_hinh, toa_do_nut])
+
+        so_diem = chi_muc[canh + 1] - chi_muc[canh]
+        co_hinh = so_diem >= 2
+        dau = np.where(co_hinh, chi_muc[canh], 0)
+        so_diem = np.where(co_hinh, so_diem, 2)
+        lay = noi_cac_doan(dau, so_diem)
+        # Cạnh thẳng: thay hai vị trí vừa sinh bằng chỉ số của nút u, v trong phần toa_do_nut
+        vi_tri = np.cumsum(so_diem) - so_diem
+        thang = np.flatnonzero(~co_hinh)
+        lay[vi_tri[thang]] = len(toa_do_hinh) + np.asarray(ban_do.canh_u, dtype=np.int64)[canh[thang]]
+        lay[vi_tri[thang] + 1] = len(toa_do_hinh) + np.asarray(ban_do.canh_v, dtype=np.int64)[canh[thang]]
+
+        hinh_chi_muc = np.zeros(len(canh) + 1, dtype=np.int64)
+        np.cumsum(so_diem, out=hinh_chi_muc[1:])
+        return cls(do_dai=np.asarray(ban_do.canh_length, dtype=np.float64)[canh],
+                   ma_ten=np.asarray(ban_do.canh_ten, dtype=np.int32)[canh],
+                   ten=ten,
+                   hinh_chi_muc=hinh_chi_muc,
+                   hinh_toa_do=np.ascontiguousarray(nguon[lay][:, ::-1]))
+
+    def chi_tiet(self, phan_tu, do_dai=None):
+        """[{"ten", "do_dai"}]: các bước liên tiếp cùng tên đường được gộp làm một.
+
+        do_dai (tuỳ chọn) thay độ dài từng bước, vd. cạnh chỉ đi một phần ở hai đầu lộ trình.
+        """
+        phan_tu = np.asarray(phan_tu, dtype=np.int64)
+        if len(phan_tu) == 0:
+            return []
+        ma = self.ma_ten[phan_tu]
+        dau_nhom = np.flatnonzero(np.r_[True, ma[1:] != ma[:-1]])
+        tong = np.add.reduceat(self.do_dai[phan_tu] if do_dai is None else np.asarray(do_dai), dau_nhom)
+        return [{"ten": self.ten[m] if m >= 0 else TEN_KHONG_CO, "do_dai": float(d)}
+                for m, d in zip(ma[dau_nhom].tolist(), tong.tolist())]
+
+    def toa_do(self, phan_tu):
+        """Polyline (K, 2) theo (lat, lon) của cả lộ trình; điểm nối giữa hai cạnh chỉ giữ một lần."""
+        phan_tu = np.asarray(phan_tu, dtype=np.int64)
+        if len(phan_tu) == 0:
+            return np.empty((0, 2))
+        dau = self.hinh_chi_muc[phan_tu]
+        so_diem = self.hinh_chi_muc[phan_tu + 1] - dau
+        # Bỏ điểm đầu của mọi cạnh trừ cạnh đầu tiên (trùng điểm cuối của cạnh trước)
+        dau = dau + np.r_[0, np.ones(len(phan_tu) - 1, dtype=np.int64)]
+        so_diem = so_diem - np.r_[0, np.ones(len(phan_tu) - 1, dtype=np.int64)]
+        return self.hinh_toa_do[noi_cac_doan(dau, so_diem)]
+
+    def cat_hinh(self, doan):
+        """Polyline (lat, lon) của DoanCanh: cắt theo tỉ lệ chiều dài hình học, gồm cả hai điểm cắt."""
+        hinh = self.hinh_toa_do[self.hinh_chi_muc[doan.phan_tu]:self.hinh_chi_muc[doan.phan_tu + 1]]
+        he_so_lon = math.cos(math.radians(float(hinh[0, 0])))
+        tich_luy = np.r_[0.0, np.cumsum(np.hypot(np.diff(hinh[:, 0]), np.diff(hinh[:, 1]) * he_so_lon))]
+        moc = np.array([doan.tu, doan.den]) * tich_luy[-1]
+        diem_cat = np.column_stack([np.interp(moc, tich_luy, hinh[:, 0]), np.interp(moc, tich_luy, hinh[:, 1])])
+        return np.vstack([diem_cat[:1], hinh[(tich_luy > moc[0]) & (tich_luy < moc[1])], diem_cat[1:]])
+
+
+def muc_zoom_vua_khung(lat_min, lon_min, lat_max, lon_max, rong_px=900, cao_px=600):
+    """Mức zoom (nguyên) mà Leaflet chọn khi fit_bounds khung này vào bản đồ rong_px x cao_px."""
+    def y_mercator(lat):
+        lat = math.radians(max(min(lat, 85.0), -85.0))
+        return math.log(math.tan(math.pi / 4 + lat / 2)) / (2 * math.pi)
+
+    rong = max((lon_max - lon_min) / 360.0, 1e-12)
+    cao = max(y_mercator(lat_max) - y_mercator(lat_min), 1e-12)
+    zoom = math.floor(math.log2(min(rong_px / (256 * rong), cao_px / (256 * cao))))
+    return max(0, min(ZOOM_TOI_DA, zoom))
+
+
+def dung_sai_theo_zoom(zoom, vi_do, so_pixel=1.0):
+    """Dung sai (mét) ứng với so_pixel pixel màn hình tại mức zoom và vĩ độ đã cho."""
+    return so_pixel * MET_MOI_PIXEL_ZOOM_0 * math.cos(math.radians(vi_do)) / 2 ** zoom
+
+
+def don_gian_hoa(toa_do, dung_sai_met):
+    """Douglas-Peucker trên polyline (lat, lon): bỏ các điểm lệch khỏi đường gọn dưới dung_sai_met.
+
+    Tính trong hệ phẳng cục bộ (kinh độ nhân cos vĩ độ) để dung sai đồng đều theo mọi hướng;
+    hai đầu mút luôn được giữ.
+    """
+    toa_do = np.asarray(toa_do, dtype=np.float64)
+    if len(toa_do) <= 2 or dung_sai_met <= 0:
+        return toa_do
+    he_so_lon = math.cos(math.radians(float(toa_do[:, 0].mean())))
+    phang = np.column_stack([toa_do[:, 1] * he_so_lon, toa_do[:, 0]])
+    gon = shapely.get_coordinates(
+        shapely.simplify(shapely.linestrings(phang), dung_sai_met / MET_MOI_DO, preserve_topology=False))
+    return np.column_stack([gon[:, 1], gon[:, 0] / he_so_lon])
+
+
+def toa_do_hien_thi(bang_canh, phan_tu, rong_px=900, cao_px=600, doan_dau=None, doan_cuoi=None):
+    """(polyline đã rút gọn, khung [[lat_min, lon_min], [lat_max, lon_max]]) để vẽ lộ trình.
+
+    doan_dau / doan_cuoi (DoanCanh, tuỳ chọn): phần cạnh đi dở nối thêm vào hai đầu, cắt tại điểm chiếu.
+    """
+    toa_do = bang_canh.toa_do(phan_tu)
+    if doan_dau is not None or doan_cuoi is not None:
+        cac_khuc = [bang_canh.cat_hinh(doan_dau)] if doan_dau is not None else []
+        cac_khuc += [toa_do, bang_canh.cat_hinh(doan_cuoi)] if doan_cuoi is not None else [toa_do]
+        cac_khuc = [k for k in cac_khuc if len(k)]
+        # Điểm nối giữa hai khúc liên tiếp (một nút đồ thị) chỉ giữ một lần
+        toa_do = np.vstack(cac_khuc[:1] + [k[1:] for k in cac_khuc[1:]])
+    if len(toa_do) == 0:
+        return toa_do, None
+    (lat_min, lon_min), (lat_max, lon_max) = toa_do.min(axis=0), toa_do.max(axis=0)
+    zoom = muc_zoom_vua_khung(lat_min, lon_min, lat_max, lon_max, rong_px, cao_px)
+    dung_sai = dung_sai_theo_zoom(min(ZOOM_TOI_DA, zoom + ZOOM_DU_PHONG), (lat_min + lat_max) / 2)
+    return don_gian_hoa(toa_do, dung_sai), [[float(lat_min), float(lon_min)], [float(lat_max), float(lon_max)]]
+
+
+@dataclass(frozen=True)
+class DoanCanh:
+    """Phần [tu, den] (tỉ lệ theo chiều dài, tính từ đầu u) của một phần tử CSR u -> v."""
+    phan_tu: int
+    tu: float
+    den: float
+
+    def chi_phi(self, trong_so):
+        return float(trong_so[self.phan_tu]) * (self.den - self.tu)
+
+
+def cac_dau_mut(csr, cac_vi_tri, vai_tro="nguon"):
+    """[(nút CSR, DoanCanh)]: các cách rời (nguon) / tới (dich) một điểm nằm giữa cạnh.
+
+    cac_vi_tri là [(phần tử CSR, tỉ lệ từ đầu phần tử)] của cùng một điểm chiếu - một phần tử
+    với đường một chiều, hai (u -> v và v -> u) với đường hai chiều; phần tử -1 bị bỏ qua.
+    Điểm đi rời theo chiều phần tử tới đầu cuối; điểm đến được tới từ đầu đầu của phần tử.
+    """
+    ket_qua = []
+    for phan_tu, ti_le in cac_vi_tri:
+        phan_tu, ti_le = int(phan_tu), float(ti_le)
+        if phan_tu < 0:
+            continue
+        if vai_tro == "nguon":
+            ket_qua.append((int(csr.indices[phan_tu]), DoanCanh(phan_tu, ti_le, 1.0)))
+        else:
+            dau = int(np.searchsorted(csr.indptr, phan_tu, side="right")) - 1
+            ket_qua.append((dau, DoanCanh(phan_tu, 0.0, ti_le)))
+    return ket_qua
+
+
+@dataclass(frozen=True)
+class KetQuaLoTrinh:
+    duong_di: list          # id OSM các nút trên đường đi
+    so_nut_da_duyet: int
+    chi_tiet: list          # [{"ten", "do_dai"}]
+    toa_do: list            # polyline [[lat, lon]] đã rút gọn
+    khung: list             # [[lat_min, lon_min], [lat_max, lon_max]]
+    thoi_gian: float = None  # giây ước tính (cột thoi_gian của trong_so.BangTrongSo), None nếu không có
+
+
+def _dung_lo_trinh(csr, bang_canh, ket_qua, lan_do=None, thoi_gian=None, doan_dau=None, doan_cuoi=None):
+    """KetQuaLoTrinh (polyline rút gọn, khung, chi tiết) từ một KetQuaTimDuong trên CSR.
+
+    thoi_gian (giây theo phần tử CSR, tuỳ chọn) cho thời gian ước tính của lộ trình; doan_dau /
+    doan_cuoi (DoanCanh) là phần cạnh đi dở trước nút đầu và sau nút cuối, được tính vào quãng
+    đường, thời gian và polyline.
+    """
+    with hieu_nang.giai_doan(lan_do, "dung_lo_trinh") as ban_ghi:
+        phan_tu = csr.phan_tu_canh(ket_qua.duong_di)
+        toa_do, khung = toa_do_hien_thi(bang_canh, phan_tu, doan_dau=doan_dau, doan_cuoi=doan_cuoi)
+        ban_ghi["so_diem_ve"] = len(toa_do)
+    if len(toa_do) == 0:
+        # Điểm đầu trùng điểm cuối: lộ trình chỉ có một nút
+        nut = ket_qua.duong_di[0]
+        toa_do = np.array([[csr.nut_y[nut], csr.nut_x[nut]]])
+        khung = [toa_do[0].tolist(), toa_do[0].tolist()]
+    # Các bước kể cả hai đoạn cạnh đi dở (bỏ đoạn dài 0), kèm phần cạnh thực sự đi qua
+    buoc, he_so = [phan_tu], [np.ones(len(phan_tu))]
+    if doan_dau is not None and doan_dau.den > doan_dau.tu:
+        buoc.insert(0, [doan_dau.phan_tu])
+        he_so.insert(0, [doan_dau.den - doan_dau.tu])
+    if doan_cuoi is not None and doan_cuoi.den > doan_cuoi.tu:
+        buoc.append([doan_cuoi.phan_tu])
+        he_so.append([doan_cuoi.den - doan_cuoi.tu])
+    buoc, he_so = np.concatenate(buoc).astype(np.int64), np.concatenate(he_so)
+    with hieu_nang.giai_doan(lan_do, "chi_tiet_lo_trinh"):
+        chi_tiet = bang_canh.chi_tiet(buoc, bang_canh.do_dai[buoc] * he_so)
+    return KetQuaLoTrinh(duong_di=csr.thanh_osmid(ket_qua.duong_di), so_nut_da_duyet=ket_qua.so_nut_da_duyet,
+                         chi_tiet=chi_tiet, toa_do=toa_do.tolist(), khung=khung,
+                         thoi_gian=None if thoi_gian is None else float(np.sum(thoi_gian[buoc] * he_so)))
+
+
+def tinh_lo_trinh(csr, bang_canh, ham_tim, nguon, dich, lan_do=None, thoi_gian=None):
+    """Chạy ham_tim(nguon, dich) trên CSR rồi dựng sẵn mọi thứ Tab 2 cần để hiển thị.
+
+    lan_do (hieu_nang.LanDo, tuỳ chọn) nhận các giai đoạn tìm đường, dựng polyline và chi tiết.
+    """
+    with hieu_nang.giai_doan(lan_do, "tim_duong") as ban_ghi:
+        ket_qua = ham_tim(nguon, dich)
+        ban_ghi["so_nut_da_duyet"] = ket_qua.so_nut_da_duyet
+    return _dung_lo_trinh(csr, bang_canh, ket_qua, lan_do, thoi_gian)
+
+
+def tinh_cac_lo_trinh(csr, bang_canh, ham_tim, nguon, dich, k, lan_do=None, thoi_gian=None):
+    """Lộ trình chính của ham_tim cùng tối đa k - 1 lộ trình thay thế (danh sách KetQuaLoTrinh)."""
+    with hieu_nang.giai_doan(lan_do, "tim_duong") as ban_ghi:
+        ket_qua = ham_tim(nguon, dich)
+        ban_ghi["so_nut_da_duyet"] = ket_qua.so_nut_da_duyet
+    with hieu_nang.giai_doan(lan_do, "tim_lo_trinh_thay_the") as ban_ghi:
+        cac_ket_qua = tim_lo_trinh_thay_the(csr, nguon, dich, k, duong_chinh=ket_qua.duong_di)
+        cac_ket_qua[0] = ket_qua
+        ban_ghi["so_lo_trinh"] = len(cac_ket_qua)
+    return [_dung_lo_trinh(csr, bang_canh, kq, lan_do, thoi_gian) for kq in cac_ket_qua]
+
+
+def tinh_lo_trinh_diem(csr, bang_canh, ham_tim, cac_nguon, cac_dich, k=1, lan_do=None, thoi_gian=None):
+    """Như tinh_cac_lo_trinh nhưng giữa hai điểm nằm giữa cạnh (không ép về một nút).
+
+    cac_nguon / cac_dich là [(nút CSR, DoanCanh hoặc None)] (xem cac_dau_mut). Mọi cặp đầu mút
+    (tối đa 2 x 2) được thử; chọn cặp có đoạn đầu + lộ trình + đoạn cuối nhỏ nhất theo trọng số
+    của csr. Điểm đến nằm phía trước điểm đi trên cùng phần tử thì đi thẳng dọc cạnh.
+    """
+    tot_nhat = None  # (tổng chi phí, KetQuaTimDuong, nút đầu, nút cuối, đoạn đầu, đoạn cuối)
+    so_nut_da_duyet = 0
+    with hieu_nang.giai_doan(lan_do, "tim_duong") as ban_ghi:
+        for _, a in cac_nguon:
+            for _, b in cac_dich:
+                if a is None or b is None or a.phan_tu != b.phan_tu or b.den < a.tu:
+                    continue
+                thang = DoanCanh(a.phan_tu, a.tu, b.den)
+                if tot_nhat is None or thang.chi_phi(csr.trong_so) < tot_nhat[0]:
+                    tot_nhat = (thang.chi_phi(csr.trong_so), KetQuaTimDuong([], 0.0), None, None, thang, None)
+        for nguon, a in cac_nguon:
+            for dich, b in cac_dich:
+                try:
+                    ket_qua = ham_tim(nguon, dich) if nguon != dich else KetQuaTimDuong([nguon], 0.0)
+                except nx.NetworkXNoPath:
+                    continue
+                so_nut_da_duyet += ket_qua.so_nut_da_duyet
+                tong = ket_qua.do_dai + sum(d.chi_phi(csr.trong_so) for d in (a, b) if d is not None)
+                if tot_nhat is None or tong < tot_nhat[0]:
+                    tot_nhat = (tong, ket_qua, nguon, dich, a, b)
+        if tot_nhat is None:
+            raise nx.NetworkXNoPath("Không có đường đi giữa hai điểm")
+        tong, ket_qua, nguon, dich, doan_dau, doan_cuoi = tot_nhat
+        ket_qua = KetQuaTimDuong(ket_qua.duong_di, tong, so_nut_da_duyet)
+        ban_ghi["so_nut_da_duyet"] = so_nut_da_duyet
+    cac_ket_qua = [ket_qua]
+    if k > 1 and nguon is not None and nguon != dich:
+        # Lộ trình thay thế giữa cùng cặp đầu mút, giữ nguyên hai đoạn cạnh đi dở
+        with hieu_nang.giai_doan(lan_do, "tim_lo_trinh_thay_the") as ban_ghi:
+            cac_ket_qua = tim_lo_trinh_thay_the(csr, nguon, dich, k, duong_chinh=ket_qua.duong_di)
+            cac_ket_qua[0] = ket_qua
+            ban_ghi["so_lo_trinh"] = len(cac_ket_qua)
+    return [_dung_lo_trinh(csr, bang_canh, kq, lan_do, thoi_gian, doan_dau, doan_cuoi) for kq in cac_ket_qua]
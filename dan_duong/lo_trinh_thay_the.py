@@ -0,0 +1,94 @@
+# -----------------------------------------------------------------------------
+# LỘ TRÌNH THAY THẾ (NÚT TRUNG GIAN / CAO NGUYÊN)
+# -----------------------------------------------------------------------------
+# Yen (nx.shortest_simple_paths) chạy lại một lượt tìm đường cho mỗi ứng viên và các
+# đường đầu tiên nó trả về chỉ khác nhau vài cạnh. Ở đây chỉ cần HAI cây đường đi ngắn
+# nhất dùng chung cho mọi ứng viên: cây xuôi từ nguồn và cây ngược từ đích (mỗi cây là
+# một lượt Dijkstra của scipy). Mỗi nút v cho ứng viên nguồn -> v -> đích dài
+# d_nguon(v) + d_dich(v).
+#
+# Cạnh mà cả hai cây cùng đi qua tạo thành "cao nguyên": trên đó mọi nút cho cùng một
+# ứng viên, và đoạn cao nguyên là đường ngắn nhất thật sự (lộ trình hợp lý cục bộ,
+# không vòng vèo). Mỗi cao nguyên chỉ lấy một nút đại diện; ứng viên xếp theo độ dài
+# trừ độ dài cao nguyên rồi được nhận nếu không lặp nút, không dài quá (1 + gian_toi_da)
+# lần đường ngắn nhất và đoạn trùng với mỗi lộ trình đã chọn không quá chong_lan_toi_da
+# độ dài của nó.
+# -----------------------------------------------------------------------------
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+
+from dan_duong.dinh_tuyen import KetQuaTimDuong
+
+SO_LO_TRINH_MAC_DINH = 3
+GIAN_TOI_DA = 0.4          # dài hơn đường ngắn nhất tối đa 40%
+CHONG_LAN_TOI_DA = 0.6     # trùng tối đa 60% độ dài với mỗi lộ trình đã chọn
+SO_UNG_VIEN_TOI_DA = 200   # số nút đại diện được thử trước khi dừng
+
+
+def _truy_vet(truoc, sau, v):
+    """Nguồn -> v theo cây xuôi rồi v -> đích theo cây ngược."""
+    nua_dau = [v]
+    while truoc[nua_dau[-1]] >= 0:
+        nua_dau.append(truoc[nua_dau[-1]])
+    nua_dau.reverse()
+    while sau[nua_dau[-1]] >= 0:
+        nua_dau.append(sau[nua_dau[-1]])
+    return nua_dau
+
+
+def tim_lo_trinh_thay_the(csr, nguon, dich, k=SO_LO_TRINH_MAC_DINH, duong_chinh=None, gian_toi_da=GIAN_TOI_DA,
+                          chong_lan_toi_da=CHONG_LAN_TOI_DA):
+    """Tối đa k lộ trình (KetQuaTimDuong) khác nhau từ nguon tới dich, lộ trình đầu là đường chính.
+
+    duong_chinh (danh sách chỉ số nút) là lộ trình đã có - vd. của thuật toán người dùng chọn;
+    mặc định là đường ngắn nhất. Ít hơn k lộ trình nếu không đủ ứng viên đạt điều kiện.
+    """
+    if nguon == dich:
+        return [KetQuaTimDuong([nguon], 0.0, 1)]
+    d_nguon, truoc = dijkstra(csr.ma_tran(), directed=True, indices=nguon, return_predecessors=True)
+    if not np.isfinite(d_nguon[dich]):
+        raise nx.NetworkXNoPath(f"Không có đường đi từ {nguon} đến {dich}")
+    # Trên đồ thị đảo chiều, "nút trước" của v chính là nút kế tiếp của v trên đường ngắn nhất tới đích
+    d_dich, sau = dijkstra(csr.ma_tran_nguoc(), directed=True, indices=dich, return_predecessors=True)
+    so_nut_da_duyet = int(np.count_nonzero(np.isfinite(d_nguon)) + np.count_nonzero(np.isfinite(d_dich)))
+    toi_uu = float(d_nguon[dich])
+    tong = d_nguon + d_dich
+
+    # Cạnh cao nguyên: truoc[v] -> v nằm trên cả hai cây (sau[truoc[v]] == v)
+    cac_nut = np.arange(csr.so_nut)
+    co_truoc = truoc >= 0
+    tren_cao_nguyen = co_truoc & (sau[np.where(co_truoc, truoc, 0)] == cac_nut)
+    v_cn = cac_nut[tren_cao_nguyen]
+    u_cn = truoc[tren_cao_nguyen]
+    do_thi_cn = csr_matrix((np.ones(len(v_cn), dtype=np.int8), (u_cn, v_cn)), shape=(csr.so_nut, csr.so_nut))
+    _, nhan = connected_components(do_thi_cn, directed=False)
+    do_dai_cn = np.bincount(nhan[v_cn], weights=d_nguon[v_cn] - d_nguon[u_cn], minlength=nhan.max() + 1)
+
+    # Mỗi cao nguyên một nút đại diện, ứng viên tốt = ngắn và có đoạn cao nguyên dài
+    ung_vien = np.flatnonzero(np.isfinite(tong) & (tong <= (1 + gian_toi_da) * toi_uu))
+    _, dau_tien = np.unique(nhan[ung_vien], return_index=True)
+    ung_vien = ung_vien[dau_tien]
+    diem = tong[ung_vien] - do_dai_cn[nhan[ung_vien]]
+    ung_vien = ung_vien[np.argsort(diem, kind="stable")][:SO_UNG_VIEN_TOI_DA]
+
+    truoc, sau = truoc.tolist(), sau.tolist()
+    if duong_chinh is None:
+        duong_chinh = _truy_vet(truoc, sau, dich)
+    da_chon = [KetQuaTimDuong(list(duong_chinh), csr.do_dai_duong_di(duong_chinh), so_nut_da_duyet)]
+    cac_phan_tu = [csr.phan_tu_canh(duong_chinh)]
+    for v in ung_vien.tolist():
+        if len(da_chon) >= k:
+            break
+        duong_di = _truy_vet(truoc, sau, v)
+        if len(set(duong_di)) != len(duong_di):
+            continue  # nhánh xuôi và nhánh ngược cắt nhau: có vòng
+        phan_tu = csr.phan_tu_canh(duong_di)
+        do_dai = float(tong[v])
+        if any(float(csr.trong_so[np.intersect1d(phan_tu, pt, assume_unique=True)].sum()) > chong_lan_toi_da * do_dai
+               for pt in cac_phan_tu):
+            continue
+        da_chon.append(KetQuaTimDuong(duong_di, do_dai, so_nut_da_duyet))
+        cac_phan_tu.append(phan_tu)
+    return da_chon
@@ -0,0 +1,506 @@
+# -----------------------------------------------------------------------------
+# LUỒNG CỰC ĐẠI / LÁT CẮT NHỎ NHẤT TRÊN ĐỒ THỊ THẶNG DƯ DẠNG MẢNG
+# -----------------------------------------------------------------------------
+# nx.maximum_flow dựng lại một đồ thị thặng dư bằng dict-of-dict và trả về flow_dict
+# đầy đủ. Ở đây cạnh thứ k của đồ thị gốc thành hai cung 2k (xuôi) và 2k + 1 (ngược,
+# sức chứa 0 - hoặc bằng cạnh xuôi nếu đồ thị vô hướng), nên cung ngược của a là a ^ 1.
+# Các thuật toán chỉ sửa một mảng sức chứa thặng dư; đồ thị gốc không bị sao chép.
+#
+# - Edmonds-Karp: đường tăng luồng ngắn nhất bằng BFS, O(V E^2).
+# - Dinic: đồ thị phân tầng + luồng chặn với con trỏ cung hiện tại, O(V^2 E).
+#   Hai thuật toán này chạy bằng scipy.sparse.csgraph.maximum_flow (C) khi sức chứa là
+#   số nguyên vừa int32; sức chứa thực thì dùng bản Python bên dưới.
+# - Preflow-push: đẩy-nâng FIFO, nhãn khởi tạo bằng BFS ngược từ đích, heuristic khe hở.
+# - Boykov-Kolmogorov: hai cây tìm kiếm từ nguồn và đích, dùng lại cây sau mỗi lần tăng
+#   luồng - nhanh trên lưới / đồ thị đường phố có nhiều đường tăng luồng ngắn.
+#
+# Kết quả gồm giá trị luồng, lát cắt nhỏ nhất (các cạnh từ phía nguồn sang phía đích)
+# và tóm tắt gọn thay cho việc in toàn bộ flow_dict.
+# -----------------------------------------------------------------------------
+from collections import deque
+from dataclasses import dataclass
+
+import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import breadth_first_order, maximum_flow
+
+from dan_duong.thuc_thi import bao_tien_do
+
+MAC_DINH = "Dinic"
+
+
+class MangDu:
+    def __init__(self, cac_nut, canh_u, canh_v, suc_chua, co_huong):
+        self.cac_nut = cac_nut
+        self.chi_so = {n: i for i, n in enumerate(cac_nut)}
+        self.canh_u = canh_u      # chỉ số nút của từng cạnh gốc
+        self.canh_v = canh_v
+        self.co_huong = co_huong
+        so_canh = len(canh_u)
+        self.la_so_nguyen = bool(np.all(np.mod(suc_chua, 1) == 0)) and bool(np.all(np.isfinite(suc_chua)))
+        kieu = np.int64 if self.la_so_nguyen else np.float64
+        # Cung 2k: u -> v, cung 2k + 1: v -> u
+        self.dau = np.empty(2 * so_canh, dtype=np.int64)
+        self.cuoi = np.empty(2 * so_canh, dtype=np.int64)
+        self.dau[0::2], self.dau[1::2] = canh_u, canh_v
+        self.cuoi[0::2], self.cuoi[1::2] = canh_v, canh_u
+        self.suc_chua = np.zeros(2 * so_canh, dtype=kieu)
+        self.suc_chua[0::2] = suc_chua
+        if not co_huong:
+            self.suc_chua[1::2] = suc_chua
+        thu_tu = np.argsort(self.dau, kind="stable")
+        self.indptr = np.zeros(len(cac_nut) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.dau, minlength=len(cac_nut)), out=self.indptr[1:])
+        self.cung = thu_tu
+        # scipy chỉ nhận sức chứa int32; tổng < 2^31 nên cộng dồn cạnh song song cũng không tràn
+        self.vua_int32 = self.la_so_nguyen and float(np.sum(suc_chua)) * (1 if co_huong else 2) < 2 ** 31
+        # Sai số khi so sánh thặng dư với 0 (sức chứa thực)
+        self.eps = 0 if self.la_so_nguyen else 1e-12 * max(1.0, float(np.max(suc_chua, initial=0.0)))
+
+    @classmethod
+    def tu_do_thi(cls, G, capacity="weight", mac_dinh=1):
+        """Dựng từ Graph / DiGraph / MultiGraph / MultiDiGraph; cạnh thiếu thuộc tính capacity có sức chứa mac_dinh."""
+        cac_nut = list(G.nodes())
+        chi_so = {n: i for i, n in enumerate(cac_nut)}
+        # capacity=None: mọi cạnh có sức chứa mac_dinh (đồ thị không trọng số)
+        cac_canh = list(iter(G.edges(data=capacity, default=mac_dinh) if capacity else G.edges()))
+        so_canh = len(cac_canh)
+        canh_u = np.fromiter((chi_so[c[0]] for c in cac_canh), dtype=np.int64, count=so_canh)
+        canh_v = np.fromiter((chi_so[c[1]] for c in cac_canh), dtype=np.int64, count=so_canh)
+        if capacity:
+            suc_chua = np.fromiter((c[2] for c in cac_canh), dtype=np.float64, count=so_canh)
+        else:
+            suc_chua = np.full(so_canh, mac_dinh, dtype=np.float64)
+        if np.any(np.isnan(suc_chua)) or np.any(suc_chua < 0):
+            raise ValueError(f"Sức chứa '{capacity}' phải là số không âm")
+        return cls(cac_nut, canh_u, canh_v, suc_chua, G.is_directed())
+
+    @property
+    def so_nut(self):
+        return len(self.cac_nut)
+
+    @property
+    def so_canh(self):
+        return len(self.canh_u)
+
+    def danh_sach_ke(self):
+        """Danh sách kề Python (list các mã cung) - truy cập từng phần tử nhanh hơn mảng numpy."""
+        cung, indptr = self.cung.tolist(), self.indptr.tolist()
+        return [cung[indptr[i]:indptr[i + 1]] for i in range(self.so_nut)]
+
+
+# -----------------------------------------------------------------------------
+# CÁC THUẬT TOÁN: sửa r (thặng dư của từng cung) tại chỗ, trả về giá trị luồng
+# -----------------------------------------------------------------------------
+def _edmonds_karp(ke, dau, cuoi, r, so_nut, s, t, eps):
+    tong = 0
+    while True:
+        bao_tien_do(None, f"Luồng hiện tại: {tong}")
+        truoc = [-1] * so_nut  # cung đi vào nút trên cây BFS
+        truoc[s] = -2
+        hang_doi = deque([s])
+        while hang_doi and truoc[t] == -1:
+            u = hang_doi.popleft()
+            for a in ke[u]:
+                v = cuoi[a]
+                if truoc[v] == -1 and r[a] > eps:
+                    truoc[v] = a
+                    hang_doi.append(v)
+        if truoc[t] == -1:
+            return tong
+        d, v = None, t
+        while v != s:
+            a = truoc[v]
+            d = r[a] if d is None or r[a] < d else d
+            v = dau[a]
+        v = t
+        while v != s:
+            a = truoc[v]
+            r[a] -= d
+            r[a ^ 1] += d
+            v = dau[a]
+        tong += d
+
+
+def _dinic(ke, dau, cuoi, r, so_nut, s, t, eps):
+    tong = 0
+    while True:
+        bao_tien_do(None, f"Luồng hiện tại: {tong}")
+        muc = [-1] * so_nut
+        muc[s] = 0
+        hang_doi = deque([s])
+        while hang_doi:
+            u = hang_doi.popleft()
+            for a in ke[u]:
+                v = cuoi[a]
+                if muc[v] < 0 and r[a] > eps:
+                    muc[v] = muc[u] + 1
+                    hang_doi.append(v)
+        if muc[t] < 0:
+            return tong
+
+        # Luồng chặn: DFS lặp theo con trỏ cung hiện tại, nút ngõ cụt bị loại khỏi tầng
+        con_tro = [0] * so_nut
+        duong = []
+        u = s
+        while True:
+            if u == t:
+                d = min(r[a] for a in duong)
+                for a in duong:
+                    r[a] -= d
+                    r[a ^ 1] += d
+                tong += d
+                k = next(i for i, a in enumerate(duong) if r[a] <= eps)
+                u = dau[duong[k]]
+                del duong[k:]
+                continue
+            ds, i = ke[u], con_tro[u]
+            while i < len(ds):
+                a = ds[i]
+                if r[a] > eps and muc[cuoi[a]] == muc[u] + 1:
+                    break
+                i += 1
+            con_tro[u] = i
+            if i < len(ds):
+                duong.append(ds[i])
+                u = cuoi[ds[i]]
+            elif u == s:
+                break
+            else:
+                muc[u] = -1
+                u = dau[duong.pop()]
+                con_tro[u] += 1
+
+
+def _preflow_push(ke, dau, cuoi, r, so_nut, s, t, eps):
+    n = so_nut
+    # Nhãn ban đầu = khoảng cách tới đích trong đồ thị thặng dư (BFS ngược); không tới được -> n
+    cao = [n] * n
+    cao[t] = 0
+    hang_doi = deque([t])
+    while hang_doi:
+        v = hang_doi.popleft()
+        for a in ke[v]:
+            u = cuoi[a]
+            if cao[u] == n and u != s and r[a ^ 1] > eps:
+                cao[u] = cao[v] + 1
+                hang_doi.append(u)
+    cao[s] = n
+    dem = [0] * (2 * n + 1)
+    for h in cao:
+        dem[h] += 1
+
+    du = [0] * n
+    trong_hang = [False] * n
+    hoat_dong = deque()
+    for a in ke[s]:
+        d = r[a]
+        if d > eps:
+            v = cuoi[a]
+            r[a] -= d
+            r[a ^ 1] += d
+            du[v] += d
+            du[s] -= d
+            if v != t and not trong_hang[v]:
+                trong_hang[v] = True
+                hoat_dong.append(v)
+
+    con_tro = [0] * n
+    so_lan = 0
+    while hoat_dong:
+        so_lan += 1
+        if not so_lan & 0x3FF:
+            bao_tien_do(None, f"Đã tới đích: {du[t]}")
+        u = hoat_dong.popleft()
+        trong_hang[u] = False
+        ds = ke[u]
+        while du[u] > eps:
+            i = con_tro[u]
+            if i == len(ds):
+                # Nâng nhãn; nếu độ cao cũ không còn nút nào (khe hở) thì mọi nút cao hơn dưới n
+                # không thể tới đích nữa -> nâng thẳng lên n + 1 để trả luồng về nguồn
+                cu = cao[u]
+                moi = min((cao[cuoi[a]] + 1 for a in ds if r[a] > eps), default=2 * n)
+                dem[cu] -= 1
+                cao[u] = moi
+                dem[moi] += 1
+                con_tro[u] = 0
+                if dem[cu] == 0 and cu < n:
+                    for v in range(n):
+                        if cu < cao[v] < n:
+                            dem[cao[v]] -= 1
+                            cao[v] = n + 1
+                            dem[n + 1] += 1
+                            con_tro[v] = 0
+                continue
+            a = ds[i]
+            v = cuoi[a]
+            if r[a] > eps and cao[u] == cao[v] + 1:
+                d = du[u] if du[u] < r[a] else r[a]
+                r[a] -= d
+                r[a ^ 1] += d
+                du[u] -= d
+                du[v] += d
+                if v != s and v != t and not trong_hang[v]:
+                    trong_hang[v] = True
+                    hoat_dong.append(v)
+            else:
+                con_tro[u] = i + 1
+    return du[t]
+
+
+def _boykov_kolmogorov(ke, dau, cuoi, r, so_nut, s, t, eps):
+    TU_DO, NGUON, DICH = 0, 1, 2
+    cay = [TU_DO] * so_nut
+    # Cây nguồn: cha[v] là cung cha -> v; cây đích: cha[v] là cung v -> cha
+    cha = [-1] * so_nut
+    cay[s], cay[t] = NGUON, DICH
+    hoat_dong = deque([s, t])
+    mo_coi = deque()
+
+    def nut_cha(v, phia):
+        return dau[cha[v]] if phia == NGUON else cuoi[cha[v]]
+
+    def co_goc(v):
+        while v != s and v != t:
+            if cha[v] < 0:
+                return False
+            v = nut_cha(v, cay[v])
+        return True
+
+    tong = 0
+    while True:
+        bao_tien_do(None, f"Luồng hiện tại: {tong}")
+        # 1. Mở rộng hai cây cho tới khi chạm nhau
+        noi = -1
+        while hoat_dong and noi < 0:
+            p = hoat_dong[0]
+            phia = cay[p]
+            if phia == TU_DO:
+                hoat_dong.popleft()
+                continue
+            for a in ke[p]:
+                b = a if phia == NGUON else a ^ 1  # cung theo chiều từ nguồn về đích
+                if r[b] <= eps:
+                    continue
+                q = cuoi[a]
+                if cay[q] == TU_DO:
+                    cay[q] = phia
+                    cha[q] = b
+                    hoat_dong.append(q)
+                elif cay[q] != phia:
+                    noi = b
+                    break
+            if noi < 0:
+                hoat_dong.popleft()
+        if noi < 0:
+            return tong
+
+        # 2. Tăng luồng dọc s -> x -> y -> t; cung bão hoà làm nút con thành mồ côi
+        x, y = dau[noi], cuoi[noi]
+        d = r[noi]
+        v = x
+        while v != s:
+            d = r[cha[v]] if r[cha[v]] < d else d
+            v = dau[cha[v]]
+        v = y
+        while v != t:
+            d = r[cha[v]] if r[cha[v]] < d else d
+            v = cuoi[cha[v]]
+        r[noi] -= d
+        r[noi ^ 1] += d
+        v = x
+        while v != s:
+            a = cha[v]
+            r[a] -= d
+            r[a ^ 1] += d
+            if r[a] <= eps:
+                cha[v] = -1
+                mo_coi.append(v)
+            v = dau[a]
+        v = y
+        while v != t:
+            a = cha[v]
+            r[a] -= d
+            r[a ^ 1] += d
+            if r[a] <= eps:
+                cha[v] = -1
+                mo_coi.append(v)
+            v = cuoi[a]
+        tong += d
+
+        # 3. Nhận nuôi: tìm cha mới cùng cây còn nối về gốc, không có thì trả nút về tự do
+        while mo_coi:
+            p = mo_coi.popleft()
+            phia = cay[p]
+            cha_moi = -1
+            for a in ke[p]:
+                q = cuoi[a]
+                b = a ^ 1 if phia == NGUON else a
+                if cay[q] == phia and r[b] > eps and co_goc(q):
+                    cha_moi = b
+                    break
+            if cha_moi >= 0:
+                cha[p] = cha_moi
+                continue
+            for a in ke[p]:
+                q = cuoi[a]
+                if cay[q] != phia:
+                    continue
+                if r[a ^ 1 if phia == NGUON else a] > eps:
+                    hoat_dong.append(q)
+                if cha[q] >= 0 and nut_cha(q, phia) == p:
+                    cha[q] = -1
+                    mo_coi.append(q)
+            cay[p] = TU_DO
+
+
+def _giai_scipy(mang, s, t, phuong_phap):
+    """(giá trị, luồng trên từng cạnh gốc) bằng scipy; luồng giữa một cặp nút được chia lại cho các cạnh song song."""
+    u, v, c = mang.canh_u, mang.canh_v, mang.suc_chua[0::2]
+    if mang.co_huong:
+        hang, cot, gia_tri = u, v, c
+    else:
+        hang, cot, gia_tri = np.concatenate([u, v]), np.concatenate([v, u]), np.concatenate([c, c])
+    # csr_matrix cộng dồn các cạnh song song
+    ma_tran = csr_matrix((gia_tri.astype(np.int32), (hang, cot)), shape=(mang.so_nut, mang.so_nut))
+    ket_qua = maximum_flow(ma_tran, s, t, method=phuong_phap)
+
+    # Luồng ròng của từng nhóm cạnh song song, chia lần lượt theo sức chứa (cạnh đầu nhóm đầy trước)
+    if mang.co_huong:
+        a, b = u, v
+    else:
+        a, b = np.minimum(u, v), np.maximum(u, v)
+    luong_cap = np.asarray(ket_qua.flow[a, b]).ravel().astype(np.int64)
+    if mang.co_huong:
+        can_chia = np.maximum(luong_cap, 0)
+    else:
+        can_chia = np.abs(luong_cap)
+    khoa = a * mang.so_nut + b
+    thu_tu = np.argsort(khoa, kind="stable")
+    c_sx = c[thu_tu]
+    tich_luy = np.cumsum(c_sx) - c_sx
+    dau_nhom = np.r_[True, khoa[thu_tu][1:] != khoa[thu_tu][:-1]]
+    tich_luy -= np.maximum.accumulate(np.where(dau_nhom, tich_luy, 0))
+    luong = np.empty_like(c)
+    luong[thu_tu] = np.clip(can_chia[thu_tu] - tich_luy, 0, c_sx)
+    if not mang.co_huong:
+        # Đổi về chiều của từng cạnh: dương nghĩa là chạy canh_u -> canh_v
+        luong *= np.where((luong_cap >= 0) == (u <= v), 1, -1)
+    return int(ket_qua.flow_value), luong
+
+
+def _phia_nguon(mang, luong, s):
+    """Các nút tới được từ nguồn qua cung còn thặng dư (phía nguồn của lát cắt nhỏ nhất)."""
+    c = mang.suc_chua[0::2]
+    thang_du = np.empty(2 * mang.so_canh, dtype=mang.suc_chua.dtype)
+    thang_du[0::2] = c - luong
+    thang_du[1::2] = luong if mang.co_huong else c + luong
+    con = thang_du > mang.eps
+    ma_tran = csr_matrix((np.ones(int(con.sum()), dtype=np.int8), (mang.dau[con], mang.cuoi[con])),
+                         shape=(mang.so_nut, mang.so_nut))
+    phia = np.zeros(mang.so_nut, dtype=bool)
+    phia[breadth_first_order(ma_tran, s, directed=True, return_predecessors=False)] = True
+    return phia
+
+
+_THUAT_TOAN_SCIPY = {"Edmonds-Karp": "edmonds_karp", "Dinic": "dinic"}
+
+CAC_THUAT_TOAN = {
+    "Edmonds-Karp": _edmonds_karp,
+    "Dinic": _dinic,
+    "Preflow-push": _preflow_push,
+    "Boykov-Kolmogorov": _boykov_kolmogorov,
+}
+
+
+# -----------------------------------------------------------------------------
+# KẾT QUẢ
+# -----------------------------------------------------------------------------
+@dataclass
+class KetQuaLuong:
+    thuat_toan: str
+    gia_tri: float
+    mang: MangDu
+    luong: np.ndarray        # luồng trên từng cạnh gốc; vô hướng: âm nghĩa là chạy v -> u
+    phia_nguon: np.ndarray   # bool theo nút: còn tới được từ nguồn trong đồ thị thặng dư
+
+    def _cap(self, chon):
+        cac_nut, u, v = self.mang.cac_nut, self.mang.canh_u[chon], self.mang.canh_v[chon]
+        nguoc = self.luong[chon] < 0
+        return [(cac_nut[b], cac_nut[a]) if ng else (cac_nut[a], cac_nut[b])
+                for a, b, ng in zip(u.tolist(), v.tolist(), nguoc.tolist())]
+
+    def chi_so_cat(self):
+        """Chỉ số các cạnh gốc thuộc lát cắt nhỏ nhất."""
+        pu, pv = self.phia_nguon[self.mang.canh_u], self.phia_nguon[self.mang.canh_v]
+        cat = pu & ~pv
+        if not self.mang.co_huong:
+            cat |= pv & ~pu
+        return np.flatnonzero(cat)
+
+    def cat_nho_nhat(self):
+        """Các cạnh (u, v) của lát cắt nhỏ nhất, u ở phía nguồn."""
+        chon = self.chi_so_cat()
+        cac_nut, u, v = self.mang.cac_nut, self.mang.canh_u[chon], self.mang.canh_v[chon]
+        return [(cac_nut[a], cac_nut[b]) if self.phia_nguon[a] else (cac_nut[b], cac_nut[a])
+                for a, b in zip(u.tolist(), v.tolist())]
+
+    def cac_canh_co_luong(self):
+        """Các cạnh (u, v) có luồng dương, theo chiều luồng chạy."""
+        return self._cap(np.flatnonzero(self.luong != 0))
+
+    def tom_tat(self, so_dong=10):
+        """Vài dòng thay cho flow_dict: giá trị, lát cắt, số cạnh có luồng / bão hoà, các cạnh luồng lớn nhất."""
+        suc_chua = self.mang.suc_chua[0::2]
+        co_luong = np.flatnonzero(self.luong != 0)
+        bao_hoa = int(np.count_nonzero((np.abs(self.luong) >= suc_chua) & (suc_chua > 0)))
+        cat = self.chi_so_cat()
+
+        def liet_ke(chon):
+            cap = self._cap(chon[:so_dong])
+            dong = ", ".join(f"({u}->{v}: {_so(abs(f))})" for (u, v), f in zip(cap, self.luong[chon[:so_dong]]))
+            return dong + (f", ... (+{len(chon) - so_dong} cạnh)" if len(chon) > so_dong else "")
+
+        lon_nhat = co_luong[np.argsort(-np.abs(self.luong[co_luong]), kind="stable")]
+        return (f"Thuật toán: {self.thuat_toan}\n"
+                f"Luồng cực đại: {_so(self.gia_tri)}\n"
+                f"Lát cắt nhỏ nhất ({len(cat)} cạnh, tổng sức chứa {_so(suc_chua[cat].sum())}): {liet_ke(cat)}\n"
+                f"Cạnh có luồng: {len(co_luong)}/{self.mang.so_canh} (bão hoà: {bao_hoa})\n"
+                f"Luồng lớn nhất: {liet_ke(lon_nhat)}\n")
+
+
+def _so(x):
+    x = float(x)
+    return str(int(x)) if x.is_integer() else f"{x:.4g}"
+
+
+def luong_cuc_dai(G, nguon, dich, thuat_toan=MAC_DINH, capacity="weight", mac_dinh=1, mang=None, chi_python=False):
+    """Luồng cực đại từ nguon tới dich; capacity=None coi mọi cạnh có sức chứa mac_dinh.
+
+    Truyền mang (MangDu dựng sẵn từ G) để chạy nhiều thuật toán trên cùng một đồ thị.
+    chi_python=True bỏ qua scipy (để so sánh các bản cài đặt trong benchmark).
+    """
+    if thuat_toan not in CAC_THUAT_TOAN:
+        raise ValueError(f"Thuật toán không hỗ trợ: {thuat_toan} (chọn một trong {', '.join(CAC_THUAT_TOAN)})")
+    if mang is None:
+        mang = MangDu.tu_do_thi(G, capacity, mac_dinh)
+    if nguon not in mang.chi_so or dich not in mang.chi_so:
+        raise nx.NetworkXError(f"Nút {nguon if nguon not in mang.chi_so else dich} không có trong đồ thị")
+    if nguon == dich:
+        raise nx.NetworkXError("Nguồn và đích trùng nhau")
+    s, t = mang.chi_so[nguon], mang.chi_so[dich]
+
+    if thuat_toan in _THUAT_TOAN_SCIPY and mang.vua_int32 and mang.so_canh and not chi_python:
+        gia_tri, luong = _giai_scipy(mang, s, t, _THUAT_TOAN_SCIPY[thuat_toan])
+    else:
+        r = mang.suc_chua.tolist()
+        gia_tri = CAC_THUAT_TOAN[thuat_toan](mang.danh_sach_ke(), mang.dau.tolist(), mang.cuoi.tolist(), r,
+                                            mang.so_nut, s, t, mang.eps)
+        if gia_tri == float("inf"):
+            raise nx.NetworkXUnbounded("Có đường đi sức chứa vô hạn từ nguồn tới đích")
+        # Vô hướng: r[2k] + r[2k + 1] luôn bằng 2c nên luồng ròng u -> v vẫn là c - r[2k]
+        luong = mang.suc_chua[0::2] - np.asarray(r[0::2], dtype=mang.suc_chua.dtype)
+    phia_nguon = _phia_nguon(mang, luong, s)
+    return KetQuaLuong(thuat_toan, gia_tri, mang, luong, phia_nguon)
@@ -0,0 +1,262 @@
+# -----------------------------------------------------------------------------
+# MA TRẬN KHOẢNG CÁCH ĐIỂM ĐI - ĐIỂM ĐẾN (OD)
+# -----------------------------------------------------------------------------
+# Mỗi điểm đi chỉ chạy MỘT lượt Dijkstra một nguồn (scipy) trên đồ thị CSR rồi đọc
+# khoảng cách tới mọi điểm đến, thay vì N x M lượt tìm đường riêng lẻ. Các điểm đi
+# được chia thành từng lô; nhiều lô thì chạy song song trên các tiến trình con của một
+# thuc_thi.BoThucThi (forkserver / spawn, không fork tiến trình hiện tại); các mảng CSR
+# là đối tượng chung của BoThucThi, chỉ gửi một lần cho mỗi tiến trình con. Chạy tuần tự
+# thì mỗi lô báo tiến độ qua thuc_thi.bao_tien_do, nên app chạy cả ma trận như một việc
+# nền có hạn chót.
+#
+#     python -m dan_duong.ma_tran_od diem_di.csv diem_den.csv [-o ket_qua.csv]
+# CSV có cột lat, lon (toạ độ) hoặc osmid (mã nút); cột ten là tuỳ chọn. Toạ độ được
+# chiếu lên cạnh gần nhất và phần cạnh đi dở ở hai đầu được cộng vào khoảng cách.
+# -----------------------------------------------------------------------------
+import argparse
+import functools
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from dan_duong import thuc_thi
+
+SO_NGUON_MOI_LO = 32
+SO_NGUON_TOI_THIEU_DA_TIEN_TRINH = 64  # ít điểm đi hơn thì chạy ngay trong tiến trình hiện tại
+
+
+@dataclass
+class MaTranOD:
+    khoang_cach: np.ndarray   # (số điểm đi, số điểm đến), mét; inf nếu không có đường
+    nguon: np.ndarray         # chỉ số nút CSR của từng điểm đi
+    dich: np.ndarray          # chỉ số nút CSR của từng điểm đến
+    duong_di: dict = None     # {(i, j): [chỉ số nút CSR]} nếu yêu cầu tra_duong_di
+
+    def thanh_bang(self, ten_nguon=None, ten_dich=None):
+        """DataFrame khoảng cách (km), hàng là điểm đi, cột là điểm đến."""
+        ten_nguon = list(ten_nguon) if ten_nguon is not None else [str(i) for i in range(len(self.nguon))]
+        ten_dich = list(ten_dich) if ten_dich is not None else [str(j) for j in range(len(self.dich))]
+        return pd.DataFrame(self.khoang_cach / 1000, index=ten_nguon, columns=ten_dich)
+
+
+# -----------------------------------------------------------------------------
+# TIẾN TRÌNH CON
+# -----------------------------------------------------------------------------
+def _truy_vet(truoc, nguon, dich):
+    if nguon != dich and truoc[dich] < 0:
+        return None
+    duong_di = [dich]
+    while duong_di[-1] != nguon:
+        duong_di.append(int(truoc[duong_di[-1]]))
+    duong_di.reverse()
+    return duong_di
+
+
+def _giai_lo(ma_tran, nguon, dich, tra_duong_di):
+    # Một lượt Dijkstra cho mỗi nguồn trong lô (scipy lặp nội bộ, không qua Python)
+    if not tra_duong_di:
+        return dijkstra(ma_tran, directed=True, indices=nguon)[:, dich], None
+    khoang_cach, truoc = dijkstra(ma_tran, directed=True, indices=nguon, return_predecessors=True)
+    duong_di = {}
+    for i, s in enumerate(nguon):
+        for j, t in enumerate(dich):
+            duong_di[i, j] = _truy_vet(truoc[i], int(s), int(t))
+    return khoang_cach[:, dich], duong_di
+
+
+def _giai_lo_mang(mang, nguon, dich, tra_duong_di):
+    indptr, indices, trong_so = mang
+    n = len(indptr) - 1
+    return _giai_lo(csr_matrix((trong_so, indices, indptr), shape=(n, n)), nguon, dich, tra_duong_di)
+
+
+# -----------------------------------------------------------------------------
+# API
+# -----------------------------------------------------------------------------
+def cac_hat_giong(csr, cac_diem, ban_do=None, chi_muc=None, vai_tro="nguon"):
+    """Với mỗi điểm: ({nút CSR: chi phí m}, (cạnh, vị trí m) hoặc None).
+
+    Mỗi điểm là mã nút OSM (số nguyên) hoặc cặp (lat, lon). Toạ độ được gắn vào cạnh gần nhất
+    qua chi_muc; chi phí là phần cạnh từ điểm chiếu tới đầu mút theo chiều xe chạy (điểm đi) hoặc
+    từ đầu mút tới điểm chiếu (điểm đến). Mã nút -> ({nút: 0}, None).
+    """
+    from dan_duong import chi_muc_khong_gian
+
+    ket_qua = [None] * len(cac_diem)
+    vi_tri_toa_do, toa_do = [], []
+    for i, diem in enumerate(cac_diem):
+        if isinstance(diem, (tuple, list, np.ndarray)) and len(diem) == 2:
+            vi_tri_toa_do.append(i)
+            toa_do.append(diem)
+        else:
+            ket_qua[i] = ({csr.chi_so(int(diem)): 0.0}, None)
+
+    if toa_do:
+        if ban_do is None or chi_muc is None:
+            raise ValueError("Cần ban_do và chi_muc để gắn toạ độ vào đồ thị")
+        toa_do = np.asarray(toa_do, dtype=np.float64)
+        bat = chi_muc.bat_canh(toa_do[:, 0], toa_do[:, 1])
+        chon = chi_muc_khong_gian.cac_nut_xuat_phat if vai_tro == "nguon" else chi_muc_khong_gian.cac_nut_den
+        for k, i in enumerate(vi_tri_toa_do):
+            canh, vi_tri = int(bat.canh[k]), float(bat.vi_tri[k])
+            ket_qua[i] = (chon(csr, ban_do, canh, vi_tri), (canh, vi_tri))
+    return ket_qua
+
+
+def chuan_bi_diem(csr, cac_diem, ban_do=None, chi_muc=None, vai_tro="nguon"):
+    """Đổi danh sách điểm thành chỉ số nút CSR.
+
+    Mỗi điểm là mã nút OSM (số nguyên) hoặc cặp (lat, lon). Toạ độ được gắn vào cạnh
+    gần nhất qua chi_muc rồi chọn đầu mút ít tốn đường theo chiều xe chạy.
+    """
+    from dan_duong.chi_muc_khong_gian import nut_gan_nhat_theo_canh
+
+    return np.array([nut_gan_nhat_theo_canh(hat_giong)
+                     for hat_giong, _ in cac_hat_giong(csr, cac_diem, ban_do, chi_muc, vai_tro)], dtype=np.int64)
+
+
+def ma_tran_khoang_cach(csr, nguon, dich, tra_duong_di=False, so_tien_trinh=None, so_nguon_moi_lo=SO_NGUON_MOI_LO):
+    """Ma trận khoảng cách dày (mét) từ mọi nút nguồn tới mọi nút đích (chỉ số CSR).
+
+    so_tien_trinh=None dùng mọi lõi CPU; 1 (hoặc quá ít nguồn) chạy trong tiến trình hiện tại,
+    báo tiến độ sau mỗi lô.
+    """
+    nguon = np.asarray(nguon, dtype=np.int64)
+    dich = np.asarray(dich, dtype=np.int64)
+    for ten, mang in (("nguồn", nguon), ("đích", dich)):
+        if len(mang) and (mang.min() < 0 or mang.max() >= csr.so_nut):
+            raise nx.NodeNotFound(f"Chỉ số nút {ten} nằm ngoài đồ thị")
+
+    khoang_cach = np.full((len(nguon), len(dich)), np.inf)
+    duong_di = {} if tra_duong_di else None
+    if len(nguon) == 0 or len(dich) == 0:
+        return MaTranOD(khoang_cach, nguon, dich, duong_di)
+
+    # Nguồn trùng nhau chỉ cần giải một lần
+    nguon_rieng, vi_tri_goc = np.unique(nguon, return_inverse=True)
+    cac_lo = [nguon_rieng[i:i + so_nguon_moi_lo] for i in range(0, len(nguon_rieng), so_nguon_moi_lo)]
+    so_tien_trinh = so_tien_trinh or os.cpu_count() or 1
+    so_tien_trinh = min(so_tien_trinh, len(cac_lo))
+
+    if so_tien_trinh <= 1 or len(nguon_rieng) < SO_NGUON_TOI_THIEU_DA_TIEN_TRINH:
+        ket_qua_lo = []
+        for k, lo in enumerate(cac_lo):
+            thuc_thi.bao_tien_do(k / len(cac_lo), f"lô {k + 1}/{len(cac_lo)}")
+            ket_qua_lo.append(_giai_lo(csr.ma_tran(), lo, dich, tra_duong_di))
+    else:
+        bo_thuc_thi = thuc_thi.BoThucThi(so_tien_trinh)
+        mang = (csr.indptr, csr.indices, csr.trong_so)
+        try:
+            with ThreadPoolExecutor(max_workers=so_tien_trinh) as luong:
+                ket_qua_lo = list(luong.map(
+                    lambda k: bo_thuc_thi.chay(("od", k), functools.partial(
+                        _giai_lo_mang, nguon=cac_lo[k], dich=dich, tra_duong_di=tra_duong_di),
+                        han_chot=float("inf"), chung=("csr", mang)),
+                    range(len(cac_lo))))
+        finally:
+            bo_thuc_thi.dong()
+
+    hang_rieng = np.vstack([kc for kc, _ in ket_qua_lo])
+    khoang_cach[:] = hang_rieng[vi_tri_goc]
+    if tra_duong_di:
+        duong_di_rieng = {}
+        dau = 0
+        for lo, (_, dd) in zip(cac_lo, ket_qua_lo):
+            for (i, j), p in dd.items():
+                duong_di_rieng[dau + i, j] = p
+            dau += len(lo)
+        for i, r in enumerate(vi_tri_goc):
+            for j in range(len(dich)):
+                duong_di[i, j] = duong_di_rieng[r, j]
+    return MaTranOD(khoang_cach, nguon, dich, duong_di)
+
+
+def ma_tran_khoang_cach_diem(csr, hat_nguon, hat_dich, so_tien_trinh=None):
+    """Ma trận khoảng cách (mét) giữa các điểm nằm giữa cạnh (kết quả của cac_hat_giong).
+
+    Mỗi ô là min trên mọi cặp đầu mút của phần cạnh đi dở + khoảng cách nút - nút + phần cạnh
+    đi dở; điểm đến nằm phía trước điểm đi trên cùng cạnh thì đi thẳng dọc cạnh.
+    """
+    so_nguon = np.array([len(h) for h, _ in hat_nguon], dtype=np.int64)
+    so_dich = np.array([len(h) for h, _ in hat_dich], dtype=np.int64)
+    nut_nguon = np.array([n for h, _ in hat_nguon for n in h], dtype=np.int64)
+    nut_dich = np.array([n for h, _ in hat_dich for n in h], dtype=np.int64)
+    phi_nguon = np.array([c for h, _ in hat_nguon for c in h.values()], dtype=np.float64)
+    phi_dich = np.array([c for h, _ in hat_dich for c in h.values()], dtype=np.float64)
+    ket_qua = ma_tran_khoang_cach(csr, nut_nguon, nut_dich, so_tien_trinh=so_tien_trinh)
+
+    khoang_cach = np.full((len(hat_nguon), len(hat_dich)), np.inf)
+    if len(nut_nguon) and len(nut_dich):
+        # Các đầu mút của cùng một điểm nằm liền nhau: lấy min theo từng nhóm hàng rồi từng nhóm cột
+        tong = phi_nguon[:, None] + ket_qua.khoang_cach + phi_dich[None, :]
+        tong = np.minimum.reduceat(tong, np.cumsum(so_nguon) - so_nguon, axis=0)
+        khoang_cach = np.minimum.reduceat(tong, np.cumsum(so_dich) - so_dich, axis=1)
+
+        canh_a = np.array([vt[0] if vt else -1 for _, vt in hat_nguon])
+        vi_tri_a = np.array([vt[1] if vt else 0.0 for _, vt in hat_nguon])
+        canh_b = np.array([vt[0] if vt else -2 for _, vt in hat_dich])
+        vi_tri_b = np.array([vt[1] if vt else 0.0 for _, vt in hat_dich])
+        di_thang = vi_tri_b[None, :] - vi_tri_a[:, None]
+        cung_canh = (canh_a[:, None] == canh_b[None, :]) & (di_thang >= 0)
+        khoang_cach = np.where(cung_canh, np.minimum(khoang_cach, di_thang), khoang_cach)
+
+    nguon = np.array([min(h, key=h.get) for h, _ in hat_nguon], dtype=np.int64)
+    dich = np.array([min(h, key=h.get) for h, _ in hat_dich], dtype=np.int64)
+    return MaTranOD(khoang_cach, nguon, dich)
+
+
+def doc_diem_csv(nguon_csv):
+    """Đọc CSV điểm (cột lat, lon hoặc osmid; ten tuỳ chọn). Trả về (danh sách tên, danh sách điểm)."""
+    bang = pd.read_csv(nguon_csv)
+    bang.columns = [str(c).strip().lower() for c in bang.columns]
+    if {"lat", "lon"} <= set(bang.columns):
+        cac_diem = list(zip(bang["lat"].astype(float), bang["lon"].astype(float)))
+    elif "osmid" in bang.columns:
+        cac_diem = bang["osmid"].astype("int64").tolist()
+    else:
+        raise ValueError("CSV cần cột lat, lon hoặc cột osmid")
+    if "ten" in bang.columns:
+        cac_ten = bang["ten"].astype(str).tolist()
+    else:
+        cac_ten = [str(i + 1) for i in range(len(bang))]
+    return cac_ten, cac_diem
+
+
+def tinh_tu_csv(csr, ban_do, chi_muc, csv_nguon, csv_dich, so_tien_trinh=None):
+    """CSV điểm đi + CSV điểm đến -> DataFrame khoảng cách (km)."""
+    ten_nguon, diem_nguon = doc_diem_csv(csv_nguon)
+    ten_dich, diem_dich = doc_diem_csv(csv_dich)
+    hat_nguon = cac_hat_giong(csr, diem_nguon, ban_do, chi_muc, "nguon")
+    hat_dich = cac_hat_giong(csr, diem_dich, ban_do, chi_muc, "dich")
+    return ma_tran_khoang_cach_diem(csr, hat_nguon, hat_dich, so_tien_trinh).thanh_bang(ten_nguon, ten_dich)
+
+
+def main(argv=None):
+    from dan_duong import ban_do, chi_muc_khong_gian
+    from dan_duong.dinh_tuyen import DoThiCSR
+
+    parser = argparse.ArgumentParser(prog="python -m dan_duong.ma_tran_od",
+                                     description="Ma trận khoảng cách OD (km) trên snapshot bản đồ")
+    parser.add_argument("diem_di")
+    parser.add_argument("diem_den")
+    parser.add_argument("-o", "--out", help="tệp CSV kết quả (mặc định: stdout)")
+    parser.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    parser.add_argument("--so-tien-trinh", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    ban_do_nen = ban_do.tai(args.snapshot)
+    csr = DoThiCSR.tu_ban_do(ban_do_nen)
+    chi_muc = chi_muc_khong_gian.tai_hoac_xay(args.snapshot, ban_do_nen)
+    bang = tinh_tu_csv(csr, ban_do_nen, chi_muc, args.diem_di, args.diem_den, args.so_tien_trinh)
+    bang.to_csv(args.out or sys.stdout, float_format="%.3f")
+
+
+if __name__ == "__main__":
+    main()
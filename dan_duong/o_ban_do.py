@@ -0,0 +1,393 @@
+# -----------------------------------------------------------------------------
+# BẢN ĐỒ CẢ TỈNH THEO Ô, NẠP DẦN KHI TÌM ĐƯỜNG
+# -----------------------------------------------------------------------------
+# Mạng đường cả Gia Lai quá lớn để mỗi worker nạp một đồ thị nguyên khối. Ở đây đồ thị
+# được biên dịch một lần (như DoThiCSR) rồi cắt thành các ô vuông theo lat / lon, mỗi
+# ô một tệp .npz trên đĩa. Nút thuộc ô chứa toạ độ của nó và được đánh số lại để mỗi ô
+# giữ một dải chỉ số liên tục; cạnh đi ra từ nút của ô được lưu trong ô đó, đích của
+# cạnh là chỉ số toàn cục - cạnh vắt qua biên ô chính là mối nối giữa hai ô. Ô nguồn giữ
+# sẵn toạ độ nút biên bên kia cho heuristic, nên ô bên kia chỉ được nạp khi A* thật sự
+# mở rộng một nút của nó.
+#
+# Các ô đã nạp nằm trong một LRU có giới hạn (so_o_toi_da); ô bị loại sẽ được đọc lại
+# từ đĩa nếu cần. Heuristic dùng hệ số nhất quán tính sẵn trên toàn đồ thị lúc dựng
+# (xem DoThiCSR.he_so_heuristic) nên A* vẫn cho đúng đường ngắn nhất.
+#
+# Dựng bộ ô (một lần, có thể ngoại tuyến từ GraphML / snapshot có sẵn):
+#     python -m dan_duong.o_ban_do build --graphml gia_lai.graphml
+#     python -m dan_duong.o_ban_do build --snapshot du_lieu/gia_lai_drive
+#     python -m dan_duong.o_ban_do build --vung "Gia Lai, Việt Nam"      (tải từ Overpass)
+# -----------------------------------------------------------------------------
+import argparse
+import bisect
+import heapq
+import json
+import math
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import networkx as nx
+import numpy as np
+
+from dan_duong import ban_do, lo_trinh, trong_so
+from dan_duong.dinh_tuyen import CHU_KY_KIEM_TRA, DoThiCSR, KetQuaTimDuong, khoang_cach_haversine, noi_cac_doan
+from dan_duong.thuc_thi import bao_tien_do
+
+TEN_DINH_DANG = "pleiku-road-tiles"
+PHIEN_BAN_O = 1
+KICH_THUOC_O_MAC_DINH = 0.05  # độ (~5.5 km mỗi cạnh ô quanh vĩ độ 14)
+SO_O_TOI_DA = 128
+SO_VONG_TIM_NUT = 3           # nut_gan_nhat: số vòng ô quanh điểm được xét
+VUNG_MAC_DINH = "Gia Lai, Việt Nam"
+
+THU_MUC_MAC_DINH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "du_lieu", "gia_lai_o")
+
+
+def _ten_tep_o(hang, cot):
+    return f"o_{hang}_{cot}.npz"
+
+
+# --- Dựng bộ ô -----------------------------------------------------------------
+def xay(ban_do_nen, thu_muc=THU_MUC_MAC_DINH, kich_thuoc_o=KICH_THUOC_O_MAC_DINH):
+    """Cắt snapshot thành các ô và ghi ra thu_muc (qua thư mục tạm rồi đổi tên)."""
+    csr = DoThiCSR.tu_ban_do(ban_do_nen)
+    bang_canh = lo_trinh.BangCanh.tu_ban_do(ban_do_nen, csr)
+    thoi_gian = trong_so.nho_nhat_theo_phan_tu(csr, ban_do_nen, trong_so.thoi_gian_canh(ban_do_nen))
+
+    # Nút sắp theo ô (hàng, cột) -> mỗi ô là một dải chỉ số toàn cục liên tục
+    hang = np.floor(np.asarray(ban_do_nen.nut_y) / kich_thuoc_o).astype(np.int64)
+    cot = np.floor(np.asarray(ban_do_nen.nut_x) / kich_thuoc_o).astype(np.int64)
+    thu_tu = np.lexsort((cot, hang))
+    cac_o, nut_dau = np.unique(np.column_stack([hang, cot])[thu_tu], axis=0, return_index=True)
+    nut_dau = np.r_[nut_dau, csr.so_nut].astype(np.int64)
+    moi = np.empty(csr.so_nut, dtype=np.int64)
+    moi[thu_tu] = np.arange(csr.so_nut)
+
+    # CSR theo thứ tự nút mới: lay[k] là phần tử CSR gốc ở vị trí k
+    bac = np.diff(csr.indptr).astype(np.int64)[thu_tu]
+    lay = noi_cac_doan(np.asarray(csr.indptr, dtype=np.int64)[thu_tu], bac)
+    indptr = np.zeros(csr.so_nut + 1, dtype=np.int64)
+    np.cumsum(bac, out=indptr[1:])
+    indices = moi[np.asarray(csr.indices, dtype=np.int64)[lay]]
+    so_diem = bang_canh.hinh_chi_muc[lay + 1] - bang_canh.hinh_chi_muc[lay]
+    hinh_lay = noi_cac_doan(bang_canh.hinh_chi_muc[lay], so_diem)
+    hinh_chi_muc = np.zeros(len(lay) + 1, dtype=np.int64)
+    np.cumsum(so_diem, out=hinh_chi_muc[1:])
+
+    o_cua_dich = np.searchsorted(nut_dau, indices, side="right") - 1
+    o_cua_nguon = np.repeat(np.searchsorted(nut_dau, np.arange(csr.so_nut), side="right") - 1, np.diff(indptr))
+    vat_bien = o_cua_dich != o_cua_nguon
+    so_canh_bien = int(np.count_nonzero(vat_bien))
+
+    thu_muc = os.path.abspath(thu_muc)
+    thu_muc_tam = f"{thu_muc}.tmp{os.getpid()}"
+    shutil.rmtree(thu_muc_tam, ignore_errors=True)
+    os.makedirs(thu_muc_tam)
+    nut_osmid = np.asarray(ban_do_nen.nut_osmid, dtype=np.int64)[thu_tu]
+    nut_lat = np.asarray(ban_do_nen.nut_y, dtype=np.float64)[thu_tu]
+    nut_lon = np.asarray(ban_do_nen.nut_x, dtype=np.float64)[thu_tu]
+    for t, (h, c) in enumerate(cac_o.tolist()):
+        a, b = nut_dau[t], nut_dau[t + 1]
+        e0, e1 = indptr[a], indptr[b]
+        p0, p1 = hinh_chi_muc[e0], hinh_chi_muc[e1]
+        bien = np.flatnonzero(vat_bien[e0:e1])
+        np.savez(os.path.join(thu_muc_tam, _ten_tep_o(h, c)),
+                 nut_osmid=nut_osmid[a:b], nut_lat=nut_lat[a:b], nut_lon=nut_lon[a:b],
+                 indptr=(indptr[a:b + 1] - e0).astype(np.int32),
+                 indices=indices[e0:e1].astype(np.int32),
+                 do_dai=np.asarray(csr.trong_so, dtype=np.float32)[lay[e0:e1]],
+                 thoi_gian=thoi_gian[lay[e0:e1]].astype(np.float32),
+                 ma_ten=bang_canh.ma_ten[lay[e0:e1]],
+                 hinh_chi_muc=hinh_chi_muc[e0:e1 + 1] - p0,
+                 hinh_toa_do=bang_canh.hinh_toa_do[hinh_lay[p0:p1]],
+                 # Mối nối: vị trí phần tử vắt biên trong ô và toạ độ nút đích (thuộc ô khác) của nó
+                 bien_phan_tu=bien.astype(np.int32),
+                 bien_lat=nut_lat[indices[e0:e1][bien]], bien_lon=nut_lon[indices[e0:e1][bien]])
+    np.savez(os.path.join(thu_muc_tam, "chi_muc_o.npz"), hang=cac_o[:, 0], cot=cac_o[:, 1], nut_dau=nut_dau)
+    with open(os.path.join(thu_muc_tam, "chuoi.json"), "w", encoding="utf-8") as f:
+        json.dump({"ten_duong": bang_canh.ten}, f, ensure_ascii=False)
+
+    manifest = {
+        "dinh_dang": TEN_DINH_DANG,
+        "phien_ban": PHIEN_BAN_O,
+        "kich_thuoc_o": kich_thuoc_o,
+        "so_o": len(cac_o),
+        "so_nut": csr.so_nut,
+        "so_phan_tu": csr.so_canh,
+        "so_canh_bien": so_canh_bien,
+        # Hệ số heuristic nhất quán trên MỌI cạnh của cả tỉnh (không ô nào tự tính được)
+        "he_so_heuristic": {"do_dai": csr.he_so_heuristic(),
+                            "thoi_gian": csr.voi_trong_so(thoi_gian).he_so_heuristic()},
+        "tao_luc": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "thong_tin": ban_do_nen.thong_tin,
+    }
+    with open(os.path.join(thu_muc_tam, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    if os.path.isdir(thu_muc):
+        shutil.rmtree(thu_muc)
+    os.replace(thu_muc_tam, thu_muc)
+    return thu_muc
+
+
+def co_bo_o(thu_muc=THU_MUC_MAC_DINH):
+    return os.path.isfile(os.path.join(thu_muc, "manifest.json"))
+
+
+# --- Ô đã nạp --------------------------------------------------------------------
+class _O:
+    def __init__(self, dau, du_lieu):
+        self.dau = dau                                  # chỉ số toàn cục của nút đầu tiên trong ô
+        self.cuoi = dau + len(du_lieu["nut_osmid"])
+        self.mang = du_lieu
+        self.so_byte = sum(m.nbytes for m in du_lieu.values())
+        # Danh sách Python cho vòng lặp A* (như DoThiCSR.ke_python)
+        self.indptr = du_lieu["indptr"].tolist()
+        self.indices = du_lieu["indices"].tolist()
+        self.lat = np.radians(du_lieu["nut_lat"]).tolist()
+        self.lon = np.radians(du_lieu["nut_lon"]).tolist()
+        self.bien = dict(zip(du_lieu["bien_phan_tu"].tolist(),
+                             zip(np.radians(du_lieu["bien_lat"]).tolist(), np.radians(du_lieu["bien_lon"]).tolist())))
+        self._trong_so = {}
+
+    def trong_so(self, muc_tieu):
+        if muc_tieu not in self._trong_so:
+            if muc_tieu == "do_dai":
+                cot = self.mang["do_dai"]
+            elif muc_tieu == "thoi_gian":
+                cot = self.mang["thoi_gian"]
+            else:
+                # Cùng công thức uu_tien của trong_so.BangTrongSo (không có lớp ùn tắc)
+                cot = (self.mang["thoi_gian"].astype(np.float64)
+                       * np.where(self.mang["ma_ten"] < 0, trong_so.HE_SO_DUONG_NOI_BO, 1.0)
+                       + trong_so.PHAT_MOI_NUT_GIAO)
+            self._trong_so[muc_tieu] = cot.tolist()
+        return self._trong_so[muc_tieu]
+
+    def phan_tu(self, u, v):
+        """Vị trí (trong ô) của phần tử u -> v, u là chỉ số toàn cục thuộc ô."""
+        i = u - self.dau
+        for k in range(self.indptr[i], self.indptr[i + 1]):
+            if self.indices[k] == v:
+                return k
+        raise nx.NetworkXNoPath("Đường đi chứa cặp nút không có cạnh nối")
+
+
+class DoThiTheoO:
+    def __init__(self, thu_muc, manifest, hang, cot, nut_dau, ten, so_o_toi_da=SO_O_TOI_DA):
+        self.thu_muc = thu_muc
+        self.manifest = manifest
+        self.kich_thuoc_o = manifest["kich_thuoc_o"]
+        self.hang = hang.tolist()
+        self.cot = cot.tolist()
+        self.nut_dau = nut_dau.tolist()
+        self.ten = ten
+        self.so_o_toi_da = so_o_toi_da
+        self._o_theo_vi_tri = {(h, c): t for t, (h, c) in enumerate(zip(self.hang, self.cot))}
+        self._thuong_tru = OrderedDict()  # chỉ số ô -> _O, cuối = mới dùng nhất
+        self._khoa = threading.Lock()
+        self.so_lan_nap = 0
+        self.so_lan_loai = 0
+
+    @classmethod
+    def tai(cls, thu_muc=THU_MUC_MAC_DINH, so_o_toi_da=SO_O_TOI_DA):
+        """Chỉ đọc manifest và bảng ô; các ô được nạp khi tìm đường chạm tới."""
+        with open(os.path.join(thu_muc, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("dinh_dang") != TEN_DINH_DANG:
+            raise ValueError(f"{thu_muc} không phải bộ ô bản đồ")
+        if manifest.get("phien_ban") != PHIEN_BAN_O:
+            raise ValueError(f"Bộ ô phiên bản {manifest.get('phien_ban')} không tương thích "
+                             f"(cần {PHIEN_BAN_O}). Hãy chạy lại: python -m dan_duong.o_ban_do build")
+        with np.load(os.path.join(thu_muc, "chi_muc_o.npz")) as chi_muc:
+            hang, cot, nut_dau = chi_muc["hang"], chi_muc["cot"], chi_muc["nut_dau"]
+        with open(os.path.join(thu_muc, "chuoi.json"), encoding="utf-8") as f:
+            ten = json.load(f)["ten_duong"]
+        return cls(thu_muc, manifest, hang, cot, nut_dau, ten, so_o_toi_da)
+
+    @property
+    def so_nut(self):
+        return self.nut_dau[-1]
+
+    # --- LRU các ô -----------------------------------------------------------
+    def o(self, t):
+        with self._khoa:
+            o = self._thuong_tru.get(t)
+            if o is not None:
+                self._thuong_tru.move_to_end(t)
+                return o
+        # Đọc đĩa ngoài khoá; hai luồng cùng nạp một ô thì bản nạp sau thắng, không sai
+        with np.load(os.path.join(self.thu_muc, _ten_tep_o(self.hang[t], self.cot[t]))) as f:
+            o = _O(self.nut_dau[t], {ten: f[ten] for ten in f.files})
+        with self._khoa:
+            self.so_lan_nap += 1
+            self._thuong_tru[t] = o
+            while len(self._thuong_tru) > self.so_o_toi_da:
+                self._thuong_tru.popitem(last=False)
+                self.so_lan_loai += 1
+        return o
+
+    def o_cua_nut(self, nut):
+        return self.o(bisect.bisect_right(self.nut_dau, nut) - 1)
+
+    def thong_ke(self):
+        with self._khoa:
+            return {"so_o": len(self.hang), "so_o_thuong_tru": len(self._thuong_tru), "so_o_toi_da": self.so_o_toi_da,
+                    "so_byte_thuong_tru": sum(o.so_byte for o in self._thuong_tru.values()),
+                    "so_lan_nap": self.so_lan_nap, "so_lan_loai": self.so_lan_loai}
+
+    # --- Gắn điểm ------------------------------------------------------------
+    def nut_gan_nhat(self, lat, lon):
+        """Chỉ số toàn cục của nút gần (lat, lon) nhất, xét các ô trong SO_VONG_TIM_NUT vòng quanh điểm."""
+        h0, c0 = math.floor(lat / self.kich_thuoc_o), math.floor(lon / self.kich_thuoc_o)
+        tot_nhat, khoang_cach_tot_nhat = None, math.inf
+        for vong in range(SO_VONG_TIM_NUT + 1):
+            for h in range(h0 - vong, h0 + vong + 1):
+                for c in range(c0 - vong, c0 + vong + 1):
+                    if max(abs(h - h0), abs(c - c0)) != vong or (h, c) not in self._o_theo_vi_tri:
+                        continue
+                    o = self.o(self._o_theo_vi_tri[(h, c)])
+                    # Khoảng cách phẳng cục bộ đủ để so sánh trong vài ô
+                    d = (o.mang["nut_lat"] - lat) ** 2 + ((o.mang["nut_lon"] - lon) * math.cos(math.radians(lat))) ** 2
+                    i = int(np.argmin(d)) if len(d) else -1
+                    if i >= 0 and d[i] < khoang_cach_tot_nhat:
+                        tot_nhat, khoang_cach_tot_nhat = o.dau + i, float(d[i])
+            # Nút tìm thấy gần hơn mép vòng đang xét thì các vòng ngoài không thể gần hơn
+            if tot_nhat is not None and (math.sqrt(khoang_cach_tot_nhat)
+                                         <= vong * self.kich_thuoc_o * math.cos(math.radians(lat))):
+                break
+        if tot_nhat is None:
+            raise ValueError(f"({lat:.5f}, {lon:.5f}) nằm ngoài vùng phủ của bộ ô")
+        return tot_nhat
+
+    def thanh_osmid(self, duong_di):
+        ket_qua = []
+        for nut in duong_di:
+            o = self.o_cua_nut(nut)
+            ket_qua.append(int(o.mang["nut_osmid"][nut - o.dau]))
+        return ket_qua
+
+    # --- Tìm đường -----------------------------------------------------------
+    def a_sao(self, nguon, dich, muc_tieu="do_dai"):
+        """A* trên chỉ số toàn cục; ô của một nút chỉ được nạp khi nút đó được mở rộng."""
+        if muc_tieu not in trong_so.CAC_MUC_TIEU:
+            raise ValueError(f"Mục tiêu không hỗ trợ: {muc_tieu}")
+        # uu_tien >= thoi_gian trên mọi cạnh nên hệ số của thoi_gian vẫn nhất quán cho uu_tien
+        he_so = self.manifest["he_so_heuristic"]["do_dai" if muc_tieu == "do_dai" else "thoi_gian"]
+        o_dich = self.o_cua_nut(dich)
+        lat_dich, lon_dich = o_dich.lat[dich - o_dich.dau], o_dich.lon[dich - o_dich.dau]
+
+        def h(lat, lon):
+            return he_so * khoang_cach_haversine(lat, lon, lat_dich, lon_dich)
+
+        o = self.o_cua_nut(nguon)
+        g = {nguon: 0.0}
+        truoc = {nguon: -1}
+        uoc_luong = {nguon: h(o.lat[nguon - o.dau], o.lon[nguon - o.dau])}
+        da_chot = set()
+        hang_doi = [(uoc_luong[nguon], nguon)]
+        while hang_doi:
+            _, u = heapq.heappop(hang_doi)
+            if u in da_chot:
+                continue
+            da_chot.add(u)
+            if u == dich:
+                break
+            if not len(da_chot) & CHU_KY_KIEM_TRA:
+                # Điểm kiểm tra hạn chót của app (thuc_thi.han_chot_tai_cho)
+                bao_tien_do(None, f"A* cả tỉnh: đã chốt {len(da_chot)} nút, nạp {self.so_lan_nap} lần ô")
+            if not o.dau <= u < o.cuoi:
+                o = self.o_cua_nut(u)
+            indptr, indices, w, lat, lon, bien = o.indptr, o.indices, o.trong_so(muc_tieu), o.lat, o.lon, o.bien
+            dau, g_u = o.dau, g[u]
+            i = u - dau
+            for k in range(indptr[i], indptr[i + 1]):
+                v = indices[k]
+                g_moi = g_u + w[k]
+                if g_moi < g.get(v, math.inf):
+                    g[v] = g_moi
+                    truoc[v] = u
+                    h_v = uoc_luong.get(v)
+                    if h_v is None:
+                        # Nút biên: toạ độ lấy từ mối nối, không phải nạp ô bên kia
+                        h_v = uoc_luong[v] = h(*bien[k]) if k in bien else h(lat[v - dau], lon[v - dau])
+                    heapq.heappush(hang_doi, (g_moi + h_v, v))
+        if dich not in da_chot:
+            raise nx.NetworkXNoPath(f"Không có đường đi từ {nguon} đến {dich}")
+        duong_di = [dich]
+        while truoc[duong_di[-1]] >= 0:
+            duong_di.append(truoc[duong_di[-1]])
+        duong_di.reverse()
+        return KetQuaTimDuong(duong_di, g[dich], len(da_chot))
+
+    def dung_lo_trinh(self, ket_qua):
+        """lo_trinh.KetQuaLoTrinh từ một KetQuaTimDuong trên bộ ô.
+
+        Thuộc tính các cạnh trên đường đi được gom vào một BangCanh nhỏ rồi dùng lại
+        đúng các hàm chi tiết / polyline của Tab 2.
+        """
+        duong_di = ket_qua.duong_di
+        do_dai, ma_ten, thoi_gian, cac_hinh = [], [], [], []
+        for u, v in zip(duong_di[:-1], duong_di[1:]):
+            o = self.o_cua_nut(u)
+            k = o.phan_tu(u, v)
+            do_dai.append(float(o.mang["do_dai"][k]))
+            ma_ten.append(int(o.mang["ma_ten"][k]))
+            thoi_gian.append(float(o.mang["thoi_gian"][k]))
+            cac_hinh.append(o.mang["hinh_toa_do"][o.mang["hinh_chi_muc"][k]:o.mang["hinh_chi_muc"][k + 1]])
+        if not cac_hinh:
+            o = self.o_cua_nut(duong_di[0])
+            diem = [float(o.mang["nut_lat"][duong_di[0] - o.dau]), float(o.mang["nut_lon"][duong_di[0] - o.dau])]
+            return lo_trinh.KetQuaLoTrinh(duong_di=self.thanh_osmid(duong_di), so_nut_da_duyet=ket_qua.so_nut_da_duyet,
+                                          chi_tiet=[], toa_do=[diem], khung=[diem, diem], thoi_gian=0.0)
+        hinh_chi_muc = np.zeros(len(cac_hinh) + 1, dtype=np.int64)
+        np.cumsum([len(x) for x in cac_hinh], out=hinh_chi_muc[1:])
+        bang = lo_trinh.BangCanh(do_dai=np.array(do_dai), ma_ten=np.array(ma_ten, dtype=np.int32), ten=self.ten,
+                                 hinh_chi_muc=hinh_chi_muc, hinh_toa_do=np.concatenate(cac_hinh))
+        phan_tu = np.arange(len(do_dai))
+        toa_do, khung = lo_trinh.toa_do_hien_thi(bang, phan_tu)
+        return lo_trinh.KetQuaLoTrinh(duong_di=self.thanh_osmid(duong_di), so_nut_da_duyet=ket_qua.so_nut_da_duyet,
+                                      chi_tiet=bang.chi_tiet(phan_tu), toa_do=toa_do.tolist(), khung=khung,
+                                      thoi_gian=float(sum(thoi_gian)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m dan_duong.o_ban_do",
+                                     description="Cắt mạng đường cả tỉnh thành các ô trên đĩa")
+    lenh = parser.add_subparsers(dest="lenh", required=True)
+    p_build = lenh.add_parser("build")
+    p_build.add_argument("--out", default=THU_MUC_MAC_DINH)
+    nguon = p_build.add_mutually_exclusive_group()
+    nguon.add_argument("--snapshot", help="thư mục snapshot (python -m dan_duong.ban_do build) của cả vùng")
+    nguon.add_argument("--graphml", help="tệp GraphML có sẵn (không cần mạng)")
+    nguon.add_argument("--vung", default=VUNG_MAC_DINH, help="tên vùng tải từ Overpass (mặc định: %(default)s)")
+    p_build.add_argument("--kich-thuoc-o", type=float, default=KICH_THUOC_O_MAC_DINH, help="độ")
+    p_info = lenh.add_parser("info")
+    p_info.add_argument("--out", default=THU_MUC_MAC_DINH)
+    args = parser.parse_args(argv)
+
+    if args.lenh == "info":
+        print(json.dumps(DoThiTheoO.tai(args.out).manifest, ensure_ascii=False, indent=2))
+        return
+    t0 = time.perf_counter()
+    if args.snapshot:
+        ban_do_nen = ban_do.tai(args.snapshot)
+    elif args.graphml:
+        import osmnx as ox
+        ban_do_nen = ban_do.tu_do_thi(ox.load_graphml(args.graphml), nguon={"graphml": os.path.abspath(args.graphml)})
+    else:
+        import osmnx as ox
+        ban_do_nen = ban_do.tu_do_thi(ox.graph_from_place(args.vung, network_type=ban_do.LOAI_MANG),
+                                      nguon={"vung": args.vung, "loai_mang": ban_do.LOAI_MANG})
+    thu_muc = xay(ban_do_nen, args.out, args.kich_thuoc_o)
+    manifest = DoThiTheoO.tai(thu_muc).manifest
+    dung_luong = sum(os.path.getsize(os.path.join(thu_muc, t)) for t in os.listdir(thu_muc))
+    print(f"Đã ghi {thu_muc}: {manifest['so_o']} ô, {manifest['so_nut']} nút, {manifest['so_canh_bien']} cạnh "
+          f"vắt biên ô, {dung_luong / 1e6:.1f} MB ({time.perf_counter() - t0:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+# -----------------------------------------------------------------------------
+# CONTRACTION HIERARCHY (PHÂN CẤP CO) CHO TRỌNG SỐ length
+# -----------------------------------------------------------------------------
+# Tiền xử lý (chạy một lần, tuỳ chọn):
+#     python -m dan_duong.phan_cap build [--snapshot DIR]
+# ghi tệp phan_cap.npz ngay cạnh snapshot bản đồ. Khi truy vấn, Dijkstra hai chiều
+# chỉ đi "lên" theo thứ hạng nút nên chỉ chạm vài trăm nút; đường đi tắt (shortcut)
+# được bung lại thành dãy nút gốc để dan_duong.lo_trinh / AntPath dùng như cũ.
+# -----------------------------------------------------------------------------
+import argparse
+import heapq
+import math
+import os
+import time
+
+import networkx as nx
+import numpy as np
+
+from dan_duong.dinh_tuyen import KetQuaTimDuong
+
+PHIEN_BAN_PHAN_CAP = 1
+TEN_TEP = "phan_cap.npz"
+
+GIOI_HAN_NHAN_CHUNG = 500  # số nút tối đa được chốt trong một lần tìm đường chứng (witness)
+
+
+def dau_van_tay(csr):
+    # Gắn phân cấp với đúng đồ thị CSR đã dùng để xây, tránh dùng nhầm sau khi snapshot được làm mới
+    return np.array([csr.so_nut, csr.so_canh,
+                     int(np.asarray(csr.indices, dtype=np.int64).sum()),
+                     float(np.asarray(csr.trong_so, dtype=np.float64).sum())], dtype=np.float64)
+
+
+def _tim_nhan_chung(ra, nguon, bo_qua, gioi_han):
+    # Dijkstra cục bộ từ nguon trên đồ thị còn lại (không đi qua bo_qua), dừng khi vượt gioi_han
+    khoang_cach = {nguon: 0.0}
+    hang_doi = [(0.0, nguon)]
+    so_chot = 0
+    while hang_doi:
+        d, u = heapq.heappop(hang_doi)
+        if d > khoang_cach[u]:
+            continue
+        if d > gioi_han or so_chot >= GIOI_HAN_NHAN_CHUNG:
+            break
+        so_chot += 1
+        for v, (w, _) in ra[u].items():
+            if v == bo_qua:
+                continue
+            d_moi = d + w
+            if d_moi < khoang_cach.get(v, math.inf):
+                khoang_cach[v] = d_moi
+                heapq.heappush(hang_doi, (d_moi, v))
+    return khoang_cach
+
+
+def _cac_duong_tat(ra, vao, v):
+    # Các đường tắt u -> w cần thêm khi co nút v
+    duong_tat = []
+    if not vao[v] or not ra[v]:
+        return duong_tat
+    w_ra_max = max(w for w, _ in ra[v].values())
+    for u, w_uv in vao[v].items():
+        khoang_cach = _tim_nhan_chung(ra, u, v, w_uv + w_ra_max)
+        for w, (w_vw, _) in ra[v].items():
+            if w == u:
+                continue
+            qua_v = w_uv + w_vw
+            if khoang_cach.get(w, math.inf) > qua_v:
+                duong_tat.append((u, w, qua_v))
+    return duong_tat
+
+
+def _uu_tien(ra, vao, v, so_lan_can_bi_co):
+    # Hiệu số cạnh (đường tắt tính gấp đôi) + số láng giềng đã bị co: nút "ít ảnh hưởng" được co trước,
+    # và các nút bị co rải đều trên bản đồ thay vì dồn vào một khu vực
+    return 2 * len(_cac_duong_tat(ra, vao, v)) - len(ra[v]) - len(vao[v]) + so_lan_can_bi_co[v]
+
+
+class PhanCap:
+    def __init__(self, hang, len_indptr, len_indices, len_trong_so, len_giua,
+                 xuong_indptr, xuong_indices, xuong_trong_so, xuong_giua, van_tay):
+        self.hang = hang
+        # Đồ thị "lên": cạnh u -> v với hang[v] > hang[u], lưu tại u
+        self.len_indptr, self.len_indices = len_indptr, len_indices
+        self.len_trong_so, self.len_giua = len_trong_so, len_giua
+        # Đồ thị "xuống" đảo chiều: cạnh x -> u với hang[x] > hang[u], lưu tại u (phần tử là x)
+        self.xuong_indptr, self.xuong_indices = xuong_indptr, xuong_indices
+        self.xuong_trong_so, self.xuong_giua = xuong_trong_so, xuong_giua
+        self.van_tay = van_tay
+        self._python = None
+        self._nut_giua = None
+
+    @property
+    def so_nut(self):
+        return len(self.hang)
+
+    @property
+    def so_canh(self):
+        return len(self.len_indices) + len(self.xuong_indices)
+
+    @property
+    def so_duong_tat(self):
+        return int(np.count_nonzero(self.len_giua >= 0) + np.count_nonzero(self.xuong_giua >= 0))
+
+    # --- Xây dựng ------------------------------------------------------------
+    @classmethod
+    def xay(cls, csr):
+        n = csr.so_nut
+        indptr, indices, trong_so = csr.ke_python()
+        ra = [dict() for _ in range(n)]   # ra[u][v] = (trọng số, nút giữa hoặc -1)
+        vao = [dict() for _ in range(n)]  # vao[v][u] = trọng số
+        for u in range(n):
+            for k in range(indptr[u], indptr[u + 1]):
+                ra[u][indices[k]] = (trong_so[k], -1)
+                vao[indices[k]][u] = trong_so[k]
+
+        so_lan_can_bi_co = [0] * n
+        hang_doi = [(_uu_tien(ra, vao, v, so_lan_can_bi_co), v) for v in range(n)]
+        heapq.heapify(hang_doi)
+        hang = np.full(n, -1, dtype=np.int32)
+        cac_canh = []  # (u, v, trọng số, nút giữa) của đồ thị cuối cùng
+        thu_hang = 0
+
+        while hang_doi:
+            _, v = heapq.heappop(hang_doi)
+            if hang[v] >= 0:
+                continue
+            # Cập nhật lười: tính lại độ ưu tiên, nếu không còn nhỏ nhất thì đẩy lại
+            uu_tien = _uu_tien(ra, vao, v, so_lan_can_bi_co)
+            if hang_doi and uu_tien > hang_doi[0][0]:
+                heapq.heappush(hang_doi, (uu_tien, v))
+                continue
+
+            for u, w, qua_v in _cac_duong_tat(ra, vao, v):
+                if qua_v < ra[u].get(w, (math.inf, -1))[0]:
+                    ra[u][w] = (qua_v, v)
+                    vao[w][u] = qua_v
+
+            hang[v] = thu_hang
+            thu_hang += 1
+            for w, (trong_so_vw, giua) in ra[v].items():
+                cac_canh.append((v, w, trong_so_vw, giua))
+                del vao[w][v]
+                so_lan_can_bi_co[w] += 1
+            for u, trong_so_uv in vao[v].items():
+                cac_canh.append((u, v, trong_so_uv, ra[u][v][1]))
+                del ra[u][v]
+                so_lan_can_bi_co[u] += 1
+            ra[v], vao[v] = {}, {}
+
+        return cls._tu_danh_sach_canh(hang, cac_canh, dau_van_tay(csr))
+
+    @classmethod
+    def _tu_danh_sach_canh(cls, hang, cac_canh, van_tay):
+        n = len(hang)
+        mang = np.array([(u, v) for u, v, _, _ in cac_canh], dtype=np.int64).reshape(-1, 2)
+        trong_so = np.array([w for _, _, w, _ in cac_canh], dtype=np.float64)
+        giua = np.array([m for _, _, _, m in cac_canh], dtype=np.int32)
+        u, v = mang[:, 0], mang[:, 1]
+        len_mask = hang[v] > hang[u]
+
+        def dong_goi(goc, dich, chon):
+            thu_tu = np.argsort(goc[chon], kind="stable")
+            indptr = np.zeros(n + 1, dtype=np.int32)
+            np.cumsum(np.bincount(goc[chon], minlength=n), out=indptr[1:])
+            return (indptr, dich[chon][thu_tu].astype(np.int32),
+                    trong_so[chon][thu_tu], giua[chon][thu_tu])
+
+        len_ = dong_goi(u, v, len_mask)
+        xuong = dong_goi(v, u, ~len_mask)
+        return cls(hang, *len_, *xuong, van_tay)
+
+    # --- Lưu / tải -----------------------------------------------------------
+    def luu(self, duong_dan):
+        np.savez(duong_dan, phien_ban=np.array([PHIEN_BAN_PHAN_CAP]), hang=self.hang,
+                 len_indptr=self.len_indptr, len_indices=self.len_indices,
+                 len_trong_so=self.len_trong_so, len_giua=self.len_giua,
+                 xuong_indptr=self.xuong_indptr, xuong_indices=self.xuong_indices,
+                 xuong_trong_so=self.xuong_trong_so, xuong_giua=self.xuong_giua, van_tay=self.van_tay)
+        return duong_dan
+
+    @classmethod
+    def tai(cls, duong_dan, csr=None):
+        """Tải phân cấp; nếu truyền csr thì kiểm tra phân cấp được xây từ đúng đồ thị đó."""
+        with np.load(duong_dan) as du_lieu:
+            if int(du_lieu["phien_ban"][0]) != PHIEN_BAN_PHAN_CAP:
+                raise ValueError(f"{duong_dan}: phiên bản phân cấp không tương thích, hãy xây lại")
+            phan_cap = cls(**{k: du_lieu[k] for k in du_lieu.files if k != "phien_ban"})
+        if csr is not None and not np.array_equal(phan_cap.van_tay, dau_van_tay(csr)):
+            raise ValueError(f"{duong_dan} không khớp với đồ thị hiện tại, hãy xây lại phân cấp")
+        return phan_cap
+
+    # --- Truy vấn ------------------------------------------------------------
+    def _ke_python(self):
+        if self._python is None:
+            self._python = (
+                (self.len_indptr.tolist(), self.len_indices.tolist(), self.len_trong_so.tolist(),
+                 self.len_giua.tolist()),
+                (self.xuong_indptr.tolist(), self.xuong_indices.tolist(), self.xuong_trong_so.tolist(),
+                 self.xuong_giua.tolist()),
+            )
+        return self._python
+
+    def tim_duong(self, nguon, dich, csr=None):
+        """Đường đi ngắn nhất nguon -> dich (chỉ số nút CSR), đã bung hết đường tắt."""
+        if nguon == dich:
+            return KetQuaTimDuong([nguon], 0.0, 1)
+        ke = self._ke_python()
+        khoang_cach = ({nguon: 0.0}, {dich: 0.0})
+        truoc = ({nguon: -1}, {dich: -1})
+        hang_doi = ([(0.0, nguon)], [(0.0, dich)])
+        da_chot = 0
+        tot_nhat, nut_gap = math.inf, -1
+
+        while hang_doi[0] or hang_doi[1]:
+            chieu = 0 if (hang_doi[0] and (not hang_doi[1] or hang_doi[0][0][0] <= hang_doi[1][0][0])) else 1
+            d, u = heapq.heappop(hang_doi[chieu])
+            if d >= tot_nhat:
+                # Mọi khoá còn lại của chiều này đều không cải thiện được kết quả
+                hang_doi[chieu].clear()
+                continue
+            if d > khoang_cach[chieu][u]:
+                continue
+            da_chot += 1
+
+            # Stall-on-demand: có đường ngắn hơn tới u đi xuống từ nút hạng cao hơn -> không mở rộng u
+            kc_day, kc_kia = khoang_cach[chieu], khoang_cach[1 - chieu]
+            indptr, indices, trong_so, _ = ke[1 - chieu]
+            bi_chan = False
+            for k in range(indptr[u], indptr[u + 1]):
+                x = indices[k]
+                if x in kc_day and kc_day[x] + trong_so[k] < d:
+                    bi_chan = True
+                    break
+            if bi_chan:
+                continue
+
+            if u in kc_kia and d + kc_kia[u] < tot_nhat:
+                tot_nhat, nut_gap = d + kc_kia[u], u
+
+            indptr, indices, trong_so, _ = ke[chieu]
+            truoc_day, hang_doi_day = truoc[chieu], hang_doi[chieu]
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                d_moi = d + trong_so[k]
+                if v not in kc_day or d_moi < kc_day[v]:
+                    kc_day[v] = d_moi
+                    truoc_day[v] = u
+                    heapq.heappush(hang_doi_day, (d_moi, v))
+
+        if nut_gap < 0:
+            raise nx.NetworkXNoPath(f"Không có đường đi từ {nguon} đến {dich}")
+
+        cac_nut = [nut_gap]
+        while truoc[0][cac_nut[-1]] >= 0:
+            cac_nut.append(truoc[0][cac_nut[-1]])
+        cac_nut.reverse()
+        v = nut_gap
+        while truoc[1][v] >= 0:
+            v = truoc[1][v]
+            cac_nut.append(v)
+
+        duong_di = self.bung(cac_nut)
+        do_dai = csr.do_dai_duong_di(duong_di) if csr is not None else tot_nhat
+        return KetQuaTimDuong(duong_di, do_dai, da_chot)
+
+    def _bang_nut_giua(self):
+        # {u * N + v: nút giữa} chỉ cho các đường tắt; cạnh gốc không có mặt trong bảng
+        if self._nut_giua is None:
+            n = self.so_nut
+            len_goc = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.len_indptr))
+            xuong_dich = np.repeat(np.arange(n, dtype=np.int64), np.diff(self.xuong_indptr))
+            khoa = np.concatenate([len_goc * n + self.len_indices, self.xuong_indices.astype(np.int64) * n + xuong_dich])
+            giua = np.concatenate([self.len_giua, self.xuong_giua])
+            la_duong_tat = giua >= 0
+            self._nut_giua = dict(zip(khoa[la_duong_tat].tolist(), giua[la_duong_tat].tolist()))
+        return self._nut_giua
+
+    def bung(self, cac_nut):
+        """Bung các đường tắt: mỗi cạnh (u, w) có nút giữa m được thay bằng (u, m), (m, w)."""
+        nut_giua, n = self._bang_nut_giua(), self.so_nut
+        duong_di = [cac_nut[0]]
+        ngan_xep = [(u, v) for u, v in zip(cac_nut[-2::-1], cac_nut[:0:-1])]
+        while ngan_xep:
+            u, v = ngan_xep.pop()
+            giua = nut_giua.get(u * n + v)
+            if giua is None:
+                duong_di.append(v)
+            else:
+                ngan_xep.append((giua, v))
+                ngan_xep.append((u, giua))
+        return duong_di
+
+
+def duong_dan_mac_dinh(thu_muc_snapshot):
+    return os.path.join(thu_muc_snapshot, TEN_TEP)
+
+
+def main(argv=None):
+    from dan_duong import ban_do
+    from dan_duong.dinh_tuyen import DoThiCSR
+
+    parser = argparse.ArgumentParser(prog="python -m dan_duong.phan_cap",
+                                     description="Xây contraction hierarchy cạnh snapshot bản đồ")
+    lenh = parser.add_subparsers(dest="lenh", required=True)
+    p_build = lenh.add_parser("build")
+    p_build.add_argument("--snapshot", default=ban_do.THU_MUC_MAC_DINH)
+    args = parser.parse_args(argv)
+
+    csr = DoThiCSR.tu_ban_do(ban_do.tai(args.snapshot))
+    t0 = time.perf_counter()
+    phan_cap = PhanCap.xay(csr)
+    duong_dan = phan_cap.luu(duong_dan_mac_dinh(args.snapshot))
+    print(f"Đã ghi {duong_dan}: {phan_cap.so_canh} cạnh ({phan_cap.so_duong_tat} đường tắt), "
+          f"{time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
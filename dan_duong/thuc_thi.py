@@ -0,0 +1,486 @@
+# -----------------------------------------------------------------------------
+# CHẠY THUẬT TOÁN NGOÀI LUỒNG SCRIPT: HẠN CHÓT, HUỶ VÀ BÁO TIẾN ĐỘ
+# -----------------------------------------------------------------------------
+# Streamlit chạy script của mỗi phiên trên một luồng; thuật toán chạy thẳng trên luồng
+# đó thì một đầu vào xấu giữ phiên tới khi xong, và không lần chạy lại nào dừng được nó.
+# BoThucThi dùng chung cho cả tiến trình Streamlit:
+# - chay(khoa, ham, han_chot): ham() (việc nặng về CPU) chạy trên một trong so_tien_trinh
+#   tiến trình con sống lâu. Con được tạo bằng forkserver (spawn nếu không có) chứ không fork
+#   thẳng từ máy chủ Streamlit đa luồng, và được dùng lại cho các việc sau. Vì vậy ham phải
+#   pickle được: hàm cấp module của một module import được (không phải của script chính),
+#   hoặc functools.partial của hàm đó cùng đầu vào. Kết quả và tiến độ đi về qua Pipe.
+#   Đầu vào lớn dùng lại nhiều lần (đồ thị phiên, CSR) đi qua chung=(khoá, đối tượng): mỗi con
+#   giữ SO_DOI_TUONG_CHUNG đối tượng gần nhất theo khoá, phía chờ giữ bản sao danh sách khoá
+#   của từng con (cùng thứ tự LRU) nên đối tượng chỉ được pickle gửi đi khi con đó chưa có;
+#   khoá phải đổi khi nội dung đổi (dấu vân tay, phiên bản), và ham không được sửa đối tượng.
+#   Con không nạp module chính: Streamlit đặt script của app làm sys.modules["__main__"],
+#   multiprocessing sẽ chạy lại cả app trong từng con.
+#   Luồng script chờ theo từng nhịp CHU_KY_CHO và gọi khi_tien_do, nên Streamlit dừng được
+#   lượt chạy cũ ở đó; việc gửi lại cùng khoá (cùng phiên, cùng ô) cũng huỷ việc cũ.
+#   Huỷ là hợp tác trước: thuật toán gọi bao_tien_do() định kỳ và dừng bằng DaHuy, tiến trình
+#   con trở lại hàng chờ. Quá THOI_GIAN_AN_HAN mà chưa dừng (vd. đang trong scipy) thì con
+#   bị terminate() và một con mới được tạo khi cần.
+# - han_chot_tai_cho(han_chot, khi_tien_do): cho việc phải chạy ngay trên luồng script vì cần
+#   dữ liệu chỉ tiến trình Streamlit có (bộ nhớ đệm lộ trình, lớp ùn tắc, các ô đã nạp). Trong
+#   khối, bao_tien_do() là điểm kiểm tra: quá hạn thì ném HetHan, và khi_tien_do (thanh tiến
+#   độ) là chỗ Streamlit dừng được lượt chạy cũ. Đoạn không gọi bao_tien_do (scipy, đọc một
+#   ô từ đĩa) vẫn chạy trọn.
+# - chay_io(*cac_ham, han_chot): các hàm I/O chặn (geocode) chạy đồng thời trên một vòng
+#   lặp asyncio riêng của BoThucThi và chờ chung một hạn chót.
+# -----------------------------------------------------------------------------
+import asyncio
+import multiprocessing
+import os
+import pickle
+import signal
+import sys
+import threading
+import types
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from dan_duong import hieu_nang
+
+HAN_CHOT_MAC_DINH = 30.0   # giây
+THOI_GIAN_AN_HAN = 0.5     # giây chờ việc tự dừng sau khi báo huỷ, trước khi terminate()
+CHU_KY_CHO = 0.1           # giây giữa hai lần kiểm tra (phía chờ) / hai lần gửi tiến độ (phía việc)
+SO_LUONG_IO = 4
+SO_DOI_TUONG_CHUNG = 4     # số đối tượng chung (đồ thị, CSR) mỗi tiến trình con giữ lại
+
+
+class HetHan(TimeoutError):
+    """Việc chạy quá hạn chót."""
+
+
+class DaHuy(Exception):
+    """Việc bị huỷ (gửi lại cùng khoá hoặc lượt chạy script bị dừng)."""
+
+
+# --- Phía việc (tiến trình con) -------------------------------------------------
+# Tin trên Pipe: phía chờ gửi ("viec", ma, ham đã pickle, chi_tiet, khoá chung, đối tượng chung đã
+# pickle hoặc None nếu con đã giữ) và ("huy", ma); con gửi
+# ("tien_do", ma, ti_le, thong_diep) rồi đúng một tin cuối ("xong" / "loi" / "huy", ma, giá trị,
+# số liệu) - số liệu đo trong con (hieu_nang.do_trong_tien_trinh_con) và do việc ghi thêm.
+_ngu_canh = threading.local()   # ket_noi tới phía chờ, ma việc đang chạy, lan_gui_cuoi, so_lieu, tai_cho
+_bo_nho_chung = OrderedDict()   # khoá -> đối tượng chung, LRU; chỉ có nghĩa trong tiến trình con
+
+
+def bao_tien_do(ti_le=None, thong_diep=""):
+    """Báo tiến độ (0..1, None = không rõ) về trang; đồng thời là điểm huỷ (raise DaHuy / HetHan).
+
+    Gọi được ở bất kỳ đâu: ngoài BoThucThi và han_chot_tai_cho không làm gì. Gửi tối đa một lần mỗi
+    CHU_KY_CHO.
+    """
+    ket_noi = getattr(_ngu_canh, "ket_noi", None)
+    tai_cho = getattr(_ngu_canh, "tai_cho", None)
+    if ket_noi is None and tai_cho is None:
+        return
+    bay_gio = time.monotonic()
+    if bay_gio - _ngu_canh.lan_gui_cuoi < CHU_KY_CHO:
+        return
+    _ngu_canh.lan_gui_cuoi = bay_gio
+    if ket_noi is None:
+        tai_cho(ti_le, thong_diep, bay_gio)
+        return
+    while ket_noi.poll():   # trong lúc việc chạy phía chờ chỉ gửi tin "huy"
+        _, ma = ket_noi.recv()
+        if ma == _ngu_canh.ma:
+            raise DaHuy()
+    ket_noi.send(("tien_do", _ngu_canh.ma, ti_le, thong_diep))
+
+
+def ghi_so_lieu(**so_lieu):
+    """Gắn số liệu (vd. so_nut_da_duyet) vào tin cuối của việc đang chạy; ngoài BoThucThi không làm gì."""
+    so_lieu_viec = getattr(_ngu_canh, "so_lieu", None)
+    if so_lieu_viec is not None:
+        so_lieu_viec.update(so_lieu)
+
+
+@contextmanager
+def han_chot_tai_cho(han_chot=HAN_CHOT_MAC_DINH, khi_tien_do=None):
+    """Hạn chót cho việc chạy ngay trên luồng hiện tại, kiểm tra ở các lần gọi bao_tien_do() trong khối.
+
+    Quá han_chot -> HetHan; khi_tien_do(ti_le, thong_diep, so_giay) được gọi mỗi CHU_KY_CHO, ngoại lệ
+    của nó (vd. dừng script của Streamlit) nổi lên từ chỗ gọi bao_tien_do.
+    """
+    bat_dau = time.monotonic()
+
+    def kiem_tra(ti_le, thong_diep, bay_gio):
+        so_giay = bay_gio - bat_dau
+        if so_giay > han_chot:
+            raise HetHan(f"Quá hạn {han_chot:g} giây")
+        if khi_tien_do is not None:
+            khi_tien_do(ti_le, thong_diep, so_giay)
+
+    cu = getattr(_ngu_canh, "tai_cho", None), getattr(_ngu_canh, "lan_gui_cuoi", 0.0)
+    _ngu_canh.tai_cho, _ngu_canh.lan_gui_cuoi = kiem_tra, 0.0
+    try:
+        yield
+    finally:
+        _ngu_canh.tai_cho, _ngu_canh.lan_gui_cuoi = cu
+
+
+def _lay_chung(khoa, du_lieu):
+    # Cùng thao tác LRU với TienTrinhCon.goi_chung phía chờ; chỗ được giữ (và đối tượng cũ bị đẩy ra)
+    # trước khi nạp, nên nạp lỗi thì hai bên vẫn chỉ lệch đúng khoá này - bỏ nó khi báo "loi"
+    if du_lieu is not None:
+        _bo_nho_chung.pop(khoa, None)
+        _bo_nho_chung[khoa] = None
+        while len(_bo_nho_chung) > SO_DOI_TUONG_CHUNG:
+            _bo_nho_chung.popitem(last=False)
+        _bo_nho_chung[khoa] = pickle.loads(du_lieu)
+    else:
+        _bo_nho_chung.move_to_end(khoa)
+    return _bo_nho_chung[khoa]
+
+
+def _chay_viec(ket_noi, ma, ham_pickle, chi_tiet, khoa_chung, chung_pickle):
+    _ngu_canh.ket_noi, _ngu_canh.ma, _ngu_canh.lan_gui_cuoi = ket_noi, ma, 0.0
+    so_lieu = {}
+    try:
+        with hieu_nang.do_trong_tien_trinh_con(chi_tiet) as so_lieu:
+            _ngu_canh.so_lieu = so_lieu
+            doi_so = () if khoa_chung is None else (_lay_chung(khoa_chung, chung_pickle),)
+            ket_qua = ("xong", ma, pickle.loads(ham_pickle)(*doi_so))
+    except DaHuy:
+        ket_qua = ("huy", ma, None)
+    except BaseException as e:
+        ket_qua = ("loi", ma, e)
+    finally:
+        _ngu_canh.ket_noi = _ngu_canh.so_lieu = None
+    try:
+        ket_noi.send((*ket_qua, so_lieu))
+    except OSError:          # phía chờ đã đóng Pipe: _vong_lap_con thoát
+        raise
+    except Exception as e:   # kết quả / lỗi không pickle được
+        ket_qua = ("loi", ma, RuntimeError(f"Không gửi được kết quả về: {e}"))
+        ket_noi.send((*ket_qua, so_lieu))
+    if ket_qua[0] == "loi" and khoa_chung is not None:
+        # Phía chờ cũng bỏ khoá khi nhận "loi" (kể cả lỗi nạp đối tượng): hai bên giữ cùng danh sách
+        _bo_nho_chung.pop(khoa_chung, None)
+
+
+def _vong_lap_con(ket_noi):
+    # Ctrl+C gửi tới cả nhóm tiến trình: chỉ máy chủ dừng, con thoát khi Pipe đóng (EOF)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        try:
+            loai, ma, *noi_dung = ket_noi.recv()
+            if loai == "viec":   # "huy" tới sau khi việc đã xong: bỏ qua
+                _chay_viec(ket_noi, ma, *noi_dung)
+        except (EOFError, OSError):
+            return
+
+
+# --- Phía chờ -----------------------------------------------------------------
+_khoa_tao_con = threading.Lock()
+_MODULE_CHINH_RONG = types.ModuleType("__main__")   # không __file__: multiprocessing không nạp lại gì
+
+
+def _khoi_dong_khong_module_chinh(tien_trinh):
+    # multiprocessing đọc sys.modules["__main__"] lúc start() để con nạp lại module chính;
+    # tạm thay bằng module rỗng. Chỉ trả lại nếu chưa có ai (Streamlit) đặt __main__ mới.
+    with _khoa_tao_con:
+        module_chinh = sys.modules["__main__"]
+        sys.modules["__main__"] = _MODULE_CHINH_RONG
+        try:
+            tien_trinh.start()
+        finally:
+            if sys.modules["__main__"] is _MODULE_CHINH_RONG:
+                sys.modules["__main__"] = module_chinh
+
+
+class TienTrinhCon:
+    """Một tiến trình con sống lâu và đầu Pipe phía chờ của nó."""
+
+    def __init__(self, ngu_canh_mp):
+        self.ket_noi, dau_con = ngu_canh_mp.Pipe()
+        self.tien_trinh = ngu_canh_mp.Process(target=_vong_lap_con, args=(dau_con,), name="thuc_thi", daemon=True)
+        _khoi_dong_khong_module_chinh(self.tien_trinh)
+        dau_con.close()   # con chết thì recv() phía chờ gặp EOF
+        self.chung = OrderedDict()   # khoá các đối tượng chung con đang giữ, cùng thứ tự với _bo_nho_chung
+
+    def goi_chung(self, khoa, doi_tuong):
+        """Đối tượng chung đã pickle để gửi kèm việc, None nếu con đã giữ nó."""
+        if khoa in self.chung:
+            self.chung.move_to_end(khoa)
+            return None
+        du_lieu = pickle.dumps(doi_tuong, protocol=pickle.HIGHEST_PROTOCOL)
+        self.chung[khoa] = True
+        while len(self.chung) > SO_DOI_TUONG_CHUNG:
+            self.chung.popitem(last=False)
+        return du_lieu
+
+    def dung(self):
+        # SIGTERM, rồi SIGKILL nếu vẫn chưa thoát
+        self.tien_trinh.terminate()
+        self.tien_trinh.join(THOI_GIAN_AN_HAN)
+        if self.tien_trinh.is_alive():
+            self.tien_trinh.kill()
+            self.tien_trinh.join()
+        self.ket_noi.close()
+
+
+class ViecNen:
+    def __init__(self, khoa, han_chot, so_lieu=None, chi_tiet=False, chung=None):
+        self.khoa = khoa
+        self.han_chot = han_chot
+        self.so_lieu = so_lieu            # dict nhận số liệu con gửi về, None nếu không cần
+        self.chi_tiet = chi_tiet
+        self.chung = chung                # (khoá, đối tượng) truyền vào ham, hoặc None
+        self.bat_dau = time.monotonic()
+        self.trang_thai = "cho"           # cho -> dang_chay -> xong / loi / huy / het_han
+        self.ti_le, self.thong_diep = None, ""
+        self.ma = None
+        self._con = None                  # TienTrinhCon đang chạy việc, chỉ luồng chờ dùng
+
+    @property
+    def da_chay(self):
+        return time.monotonic() - self.bat_dau
+
+    @property
+    def xong(self):
+        return self.trang_thai not in ("cho", "dang_chay")
+
+
+class BoThucThi:
+    def __init__(self, so_tien_trinh=None, so_luong_io=SO_LUONG_IO, nap_truoc=()):
+        """nap_truoc: module nạp sẵn vào forkserver để tạo tiến trình con (lần đầu / sau terminate) nhanh."""
+        self.so_tien_trinh = so_tien_trinh or os.cpu_count() or 1
+        self.phuong_thuc = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ngu_canh_mp = multiprocessing.get_context(self.phuong_thuc)
+        if self.phuong_thuc == "forkserver":
+            # Không có "__main__" (xem đầu module): forkserver cũng không nạp script của app
+            self._ngu_canh_mp.set_forkserver_preload([__name__, *nap_truoc])
+        self._cho_trong = threading.BoundedSemaphore(self.so_tien_trinh)
+        self._ranh = []                   # TienTrinhCon đang rảnh
+        self._dang_chay = {}              # khoa -> ViecNen (việc nặng)
+        self._khoa = threading.Lock()
+        self._so_viec = 0
+        self.so_lan_tao_con = 0
+        self.so_luong_io = so_luong_io
+        self._vong_lap = None
+        self.thong_ke_viec = {"xong": 0, "loi": 0, "huy": 0, "het_han": 0}
+
+    # --- Việc nặng --------------------------------------------------------------
+    def chay(self, khoa, ham, han_chot=HAN_CHOT_MAC_DINH, khi_tien_do=None, so_lieu=None, chi_tiet=False,
+             chung=None):
+        """Chạy ham() trong tiến trình con và trả về kết quả; lỗi của ham được ném lại nguyên vẹn.
+
+        ham phải pickle được (hàm cấp module / functools.partial), không thì TypeError ngay.
+        khi_tien_do(ti_le, thong_diep, so_giay) được gọi mỗi CHU_KY_CHO (kể cả lúc chờ tới lượt).
+        Quá han_chot (tính cả thời gian chờ) -> HetHan; bị huỷ -> DaHuy.
+        so_lieu: dict (vd. bản ghi giai đoạn của hieu_nang) nhận số liệu con gửi về khi việc kết thúc;
+        chi_tiet=True thì con chạy thêm cProfile / tracemalloc.
+        chung=(khoá, đối tượng): con gọi ham(đối tượng), chỉ nhận đối tượng qua Pipe khi chưa giữ khoá đó.
+        """
+        try:
+            ham_pickle = pickle.dumps(ham, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            raise TypeError(f"Việc nền phải pickle được (hàm cấp module / functools.partial): {e}") from e
+        viec = ViecNen(khoa, han_chot, so_lieu, chi_tiet, chung)
+        self._dang_ky(viec)
+        try:
+            while not self._cho_trong.acquire(timeout=CHU_KY_CHO):
+                self._kiem_tra(viec, khi_tien_do, "Đang chờ tới lượt ...")
+            try:
+                self._bat_dau(viec, ham_pickle)
+            except BaseException:
+                self._cho_trong.release()
+                raise
+            return self._cho(viec, khi_tien_do)
+        except BaseException:
+            # Gồm cả ngoại lệ dừng script của Streamlit nổi lên từ khi_tien_do
+            self._danh_dau(viec, "huy")
+            self._bo_viec(viec)
+            raise
+        finally:
+            with self._khoa:
+                if self._dang_chay.get(khoa) is viec:
+                    del self._dang_chay[khoa]
+
+    def huy(self, khoa):
+        """Huỷ việc đang chạy với khoá này (nếu có)."""
+        with self._khoa:
+            viec = self._dang_chay.pop(khoa, None)
+        if viec is not None:
+            self._danh_dau(viec, "huy")
+
+    def _dang_ky(self, viec):
+        with self._khoa:
+            cu = self._dang_chay.get(viec.khoa)
+            self._dang_chay[viec.khoa] = viec
+        if cu is not None:
+            self._danh_dau(cu, "huy")
+
+    def _danh_dau(self, viec, trang_thai):
+        # Chỉ đổi trạng thái; luồng đang chờ việc thấy ở lần kiểm tra kế tiếp và tự dọn tiến trình con
+        with self._khoa:
+            if viec.xong:
+                return False
+            viec.trang_thai = trang_thai
+            self.thong_ke_viec[trang_thai] += 1
+            return True
+
+    def _bat_dau(self, viec, ham_pickle):
+        with self._khoa:
+            if viec.xong:   # bị huỷ trong lúc chờ tới lượt
+                raise DaHuy()
+            con = self._ranh.pop() if self._ranh else None
+            self._so_viec += 1
+            viec.ma = self._so_viec
+        if con is None or not con.tien_trinh.is_alive():
+            con = TienTrinhCon(self._ngu_canh_mp)
+            self.so_lan_tao_con += 1
+        viec._con = con
+        khoa_chung, chung_pickle = None, None
+        if viec.chung is not None:
+            khoa_chung = viec.chung[0]
+            try:
+                chung_pickle = con.goi_chung(*viec.chung)
+            except Exception as e:
+                viec._con = None
+                with self._khoa:
+                    self._ranh.append(con)   # chỗ được trả ở chay()
+                raise TypeError(f"Đối tượng chung của việc nền phải pickle được: {e}") from e
+        try:
+            con.ket_noi.send(("viec", viec.ma, ham_pickle, viec.chi_tiet, khoa_chung, chung_pickle))
+        except OSError:
+            viec._con = None
+            con.dung()
+            raise
+        with self._khoa:
+            if viec.trang_thai == "cho":
+                viec.trang_thai = "dang_chay"
+
+    def _kiem_tra(self, viec, khi_tien_do, thong_diep=None):
+        if viec.trang_thai == "huy":
+            raise DaHuy()
+        if viec.da_chay > viec.han_chot:
+            self._danh_dau(viec, "het_han")
+            raise HetHan(f"Quá hạn {viec.han_chot:g} giây")
+        if khi_tien_do is not None:
+            khi_tien_do(viec.ti_le, viec.thong_diep if thong_diep is None else thong_diep, viec.da_chay)
+
+    def _cho(self, viec, khi_tien_do):
+        ket_noi = viec._con.ket_noi
+        while True:
+            self._kiem_tra(viec, khi_tien_do)
+            try:
+                if not ket_noi.poll(CHU_KY_CHO):
+                    continue
+                loai, ma, *noi_dung = ket_noi.recv()
+            except (EOFError, OSError):
+                con, viec._con = viec._con, None
+                con.tien_trinh.join(THOI_GIAN_AN_HAN)
+                self._danh_dau(viec, "loi")
+                self._tra_cho(None)
+                raise RuntimeError(f"Tiến trình chạy thuật toán dừng bất thường (mã thoát {con.tien_trinh.exitcode})")
+            if ma != viec.ma:
+                continue
+            if loai == "tien_do":
+                viec.ti_le, viec.thong_diep = noi_dung
+                continue
+            self._danh_dau(viec, loai)
+            if loai == "loi" and viec.chung is not None:
+                viec._con.chung.pop(viec.chung[0], None)
+            if viec.so_lieu is not None:
+                viec.so_lieu.update(noi_dung[1])
+            con, viec._con = viec._con, None
+            self._tra_cho(con)
+            if loai == "loi":
+                raise noi_dung[0]
+            if loai == "huy":
+                raise DaHuy()
+            return noi_dung[0]
+
+    def _tra_cho(self, con):
+        # Con (nếu còn dùng được) về hàng rảnh, trả chỗ cho việc đang chờ tới lượt
+        if con is not None:
+            with self._khoa:
+                self._ranh.append(con)
+        self._cho_trong.release()
+
+    def _bo_viec(self, viec):
+        # Phía chờ bỏ việc giữa chừng (huỷ / quá hạn): báo huỷ cho con, phần chờ / terminate chạy nền
+        # để luồng script không bị giữ lại
+        con, viec._con = viec._con, None
+        if con is None:
+            return
+        try:
+            con.ket_noi.send(("huy", viec.ma))
+        except OSError:
+            pass
+        khoa_chung = viec.chung[0] if viec.chung is not None else None
+        threading.Thread(target=self._don_dep, args=(con, viec.ma, khoa_chung), daemon=True).start()
+
+    def _don_dep(self, con, ma, khoa_chung=None):
+        # Đọc bỏ tiến độ tới tin cuối của việc; quá THOI_GIAN_AN_HAN mà chưa có thì buộc dừng con
+        han = time.monotonic() + THOI_GIAN_AN_HAN
+        try:
+            while con.ket_noi.poll(max(0.0, han - time.monotonic())):
+                loai, ma_tin, *_ = con.ket_noi.recv()
+                if ma_tin == ma and loai != "tien_do":
+                    if loai == "loi":
+                        con.chung.pop(khoa_chung, None)
+                    self._tra_cho(con)
+                    return
+        except Exception:   # EOF, hoặc kết quả không đọc lại được
+            pass
+        con.dung()
+        self._tra_cho(None)
+
+    def dong(self):
+        """Dừng mọi tiến trình con đang rảnh (việc đang chạy vẫn chạy nốt)."""
+        with self._khoa:
+            cac_con, self._ranh = self._ranh, []
+        for con in cac_con:
+            con.ket_noi.close()
+            con.tien_trinh.join(THOI_GIAN_AN_HAN)
+            if con.tien_trinh.is_alive():
+                con.dung()
+
+    # --- Việc I/O -----------------------------------------------------------------
+    def _lay_vong_lap(self):
+        with self._khoa:
+            if self._vong_lap is None:
+                self._vong_lap = asyncio.new_event_loop()
+                self._vong_lap.set_default_executor(ThreadPoolExecutor(self.so_luong_io, thread_name_prefix="io"))
+                threading.Thread(target=self._vong_lap.run_forever, name="thuc_thi_io", daemon=True).start()
+            return self._vong_lap
+
+    def chay_io(self, *cac_ham, han_chot=HAN_CHOT_MAC_DINH):
+        """Chạy đồng thời các hàm I/O chặn, trả về danh sách kết quả theo thứ tự.
+
+        Lỗi đầu tiên được ném lại; quá han_chot -> HetHan. Lời gọi mạng đang dở không dừng được:
+        nó chạy nốt trên luồng I/O nhưng kết quả bị bỏ. Luồng gọi chờ liền một mạch (không có điểm
+        để Streamlit dừng), nên han_chot cũng là thời gian tối đa một lượt chạy bị giữ ở đây.
+        """
+        async def tat_ca():
+            vong_lap = asyncio.get_running_loop()
+            cac_viec = asyncio.gather(*(vong_lap.run_in_executor(None, ham) for ham in cac_ham))
+            return await asyncio.wait_for(cac_viec, han_chot)
+
+        tuong_lai = asyncio.run_coroutine_threadsafe(tat_ca(), self._lay_vong_lap())
+        viec = ViecNen(None, han_chot)
+        viec.trang_thai = "dang_chay"
+        try:
+            ket_qua = tuong_lai.result()
+        except TimeoutError as e:
+            self._danh_dau(viec, "het_han")
+            raise HetHan(f"Quá hạn {han_chot:g} giây") from e
+        except BaseException:
+            self._danh_dau(viec, "loi")
+            raise
+        finally:
+            tuong_lai.cancel()
+        self._danh_dau(viec, "xong")
+        return list(ket_qua)
+
+    def thong_ke(self):
+        with self._khoa:
+            return {"so_tien_trinh": self.so_tien_trinh, "dang_chay": len(self._dang_chay),
+                    "phuong_thuc": self.phuong_thuc, "so_con_ranh": len(self._ranh),
+                    "so_lan_tao_con": self.so_lan_tao_con, **self.thong_ke_viec}
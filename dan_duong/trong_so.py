@@ -0,0 +1,228 @@
+# -----------------------------------------------------------------------------
+# BẢNG TRỌNG SỐ NHIỀU MỤC TIÊU (QUÃNG ĐƯỜNG / THỜI GIAN / ƯU TIÊN ĐƯỜNG LỚN)
+# -----------------------------------------------------------------------------
+# Khi tải bản đồ, mỗi phần tử CSR được gán sẵn vài cột trọng số thẳng hàng với nhau:
+# - do_dai: length (m), chính là trọng số gốc của CSR;
+# - thoi_gian: giây, theo maxspeed của OSM, thiếu thì theo tốc độ của loại đường;
+# - uu_tien: thoi_gian, gấp đôi trên "Đường nội bộ" (không tên), cộng một khoản phạt
+#   cố định mỗi lần qua nút giao - đồ thị không có cạnh rẽ nên mỗi nút giao được xem
+#   như một lần có thể rẽ.
+# Mỗi mục tiêu có một DoThiCSR riêng dùng chung indptr / indices / canh_goc với CSR
+# gốc, nên đổi mục tiêu không phải tính lại gì theo truy vấn. Các cạnh song song (cùng
+# u -> v) gộp vào một phần tử CSR: mỗi cột lấy nhỏ nhất trên các cạnh song song một cách
+# độc lập, giống do_dai - cạnh ngắn nhất (canh_goc) chưa chắc là cạnh nhanh nhất.
+#
+# Lớp ùn tắc (vd. CSV "u, v, toc_do") ghi đè tốc độ của các cạnh trong MỘT lượt
+# vector hoá (áp cho mọi cạnh song song của phần tử) rồi tính lại các cột phụ thuộc
+# thời gian; cấu trúc đồ thị, bảng cạnh và
+# chỉ mục không gian giữ nguyên. Mỗi lần cập nhật tăng phien_ban để bộ nhớ đệm lộ
+# trình không trả lại đường tính theo tốc độ cũ.
+# -----------------------------------------------------------------------------
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Tốc độ (km/h) khi cạnh không có maxspeed, theo highway của OSM
+TOC_DO_MAC_DINH = {
+    "motorway": 80, "trunk": 60, "primary": 50, "secondary": 45, "tertiary": 40,
+    "unclassified": 30, "residential": 30, "living_street": 15, "service": 20, "road": 30,
+}
+TOC_DO_DU_PHONG = 30.0
+
+# Mục tiêu -> tên hiển thị
+CAC_MUC_TIEU = {
+    "do_dai": "Quãng đường ngắn nhất",
+    "thoi_gian": "Thời gian nhanh nhất",
+    "uu_tien": "Ưu tiên đường lớn, ít rẽ",
+}
+HE_SO_DUONG_NOI_BO = 2.0   # uu_tien: đường không tên tốn gấp đôi thời gian
+PHAT_MOI_NUT_GIAO = 5.0    # uu_tien: giây phạt mỗi cạnh đi qua (mỗi nút giao)
+
+
+def _loai_chinh(loai):
+    # highway có thể là danh sách (cạnh gộp khi rút gọn đồ thị): lấy loại đầu tiên, bỏ hậu tố _link
+    if isinstance(loai, (list, tuple)):
+        loai = loai[0] if loai else None
+    return str(loai).removesuffix("_link") if loai is not None else None
+
+
+def toc_do_canh(ban_do):
+    """Tốc độ (km/h) của từng cạnh snapshot: maxspeed nếu có, không thì theo loại đường."""
+    theo_loai = np.array([TOC_DO_MAC_DINH.get(_loai_chinh(l), TOC_DO_DU_PHONG) for l in ban_do.loai_duong] +
+                         [TOC_DO_DU_PHONG], dtype=np.float64)
+    toc_do = theo_loai[np.asarray(ban_do.canh_loai, dtype=np.int64)]  # -1 -> phần tử dự phòng cuối
+    maxspeed = np.asarray(ban_do.canh_toc_do, dtype=np.float64)
+    co_maxspeed = np.isfinite(maxspeed) & (maxspeed > 0)
+    toc_do[co_maxspeed] = maxspeed[co_maxspeed]
+    return toc_do
+
+
+def thoi_gian_canh(ban_do):
+    """Thời gian (giây) đi hết từng cạnh snapshot."""
+    return np.asarray(ban_do.canh_length, dtype=np.float64) / (toc_do_canh(ban_do) / 3.6)
+
+
+def _bang_tra_cap(csr):
+    # (khoá u * so_nut + v đã sắp, phần tử CSR tương ứng) để tìm phần tử của cặp nút bằng tìm kiếm nhị phân
+    khoa = np.repeat(np.arange(csr.so_nut, dtype=np.int64), np.diff(csr.indptr)) * csr.so_nut + csr.indices
+    thu_tu = np.argsort(khoa, kind="stable")
+    return khoa[thu_tu], thu_tu
+
+
+def _phan_tu_cua_cap(bang_tra, so_nut, u, v):
+    khoa_da_sap, thu_tu = bang_tra
+    can_tim = np.asarray(u, dtype=np.int64) * so_nut + np.asarray(v, dtype=np.int64)
+    vi_tri = np.minimum(np.searchsorted(khoa_da_sap, can_tim), len(khoa_da_sap) - 1)
+    return np.where(khoa_da_sap[vi_tri] == can_tim, thu_tu[vi_tri], -1)
+
+
+def nho_nhat_theo_phan_tu(csr, ban_do, gia_tri):
+    """Giá trị theo cạnh snapshot -> theo phần tử CSR: nhỏ nhất trên các cạnh song song (cùng u -> v).
+
+    Khuyên không có phần tử CSR nên bị bỏ qua.
+    """
+    phan_tu = _phan_tu_cua_cap(_bang_tra_cap(csr), csr.so_nut, ban_do.canh_u, ban_do.canh_v)
+    co = phan_tu >= 0
+    ket_qua = np.full(len(csr.indices), np.inf)
+    np.minimum.at(ket_qua, phan_tu[co], np.asarray(gia_tri, dtype=np.float64)[co])
+    return ket_qua
+
+
+class BangTrongSo:
+    def __init__(self, csr, toc_do_tu_do, thoi_gian_tu_do, uu_tien_tu_do, do_dai_uu_tien):
+        """Mọi cột theo phần tử CSR, đã gộp cạnh song song (xem nho_nhat_theo_phan_tu).
+
+        toc_do_tu_do: km/h của canh_goc, mốc so sánh cho lớp ùn tắc; thoi_gian_tu_do / uu_tien_tu_do:
+        giây khi chưa ùn tắc (uu_tien chưa cộng PHAT_MOI_NUT_GIAO); do_dai_uu_tien: min(length x hệ số
+        đường nội bộ), cho uu_tien khi phần tử bị ghi đè tốc độ.
+        """
+        self.csr = csr                                                  # CSR gốc, trọng số = length
+        self.do_dai = np.asarray(csr.trong_so, dtype=np.float64)
+        self.toc_do_tu_do = np.asarray(toc_do_tu_do, dtype=np.float64)
+        self.thoi_gian_tu_do = np.asarray(thoi_gian_tu_do, dtype=np.float64)
+        self.uu_tien_tu_do = np.asarray(uu_tien_tu_do, dtype=np.float64)
+        self.do_dai_uu_tien = np.asarray(do_dai_uu_tien, dtype=np.float64)
+        self.phien_ban = 0
+        self.so_canh_un_tac = 0
+        self._khoa = threading.Lock()
+        self._khoa_phan_tu = None
+        self._trang_thai = self._dung(self.toc_do_tu_do)
+
+    @classmethod
+    def tu_ban_do(cls, ban_do, csr):
+        toc_do = toc_do_canh(ban_do)
+        do_dai = np.asarray(ban_do.canh_length, dtype=np.float64)
+        thoi_gian = do_dai / (toc_do / 3.6)
+        he_so = np.where(np.asarray(ban_do.canh_ten) < 0, HE_SO_DUONG_NOI_BO, 1.0)
+        return cls(csr, toc_do[np.asarray(csr.canh_goc, dtype=np.int64)],
+                   nho_nhat_theo_phan_tu(csr, ban_do, thoi_gian),
+                   nho_nhat_theo_phan_tu(csr, ban_do, thoi_gian * he_so),
+                   nho_nhat_theo_phan_tu(csr, ban_do, do_dai * he_so))
+
+    def _dung(self, toc_do):
+        # (toc_do, {mục tiêu: cột}, {mục tiêu: DoThiCSR}); tốc độ <= 0 nghĩa là cấm đường.
+        # Phần tử giữ tốc độ tự do dùng cột đã gộp sẵn; phần tử bị ghi đè thì mọi cạnh song song
+        # cùng tốc độ, nên nhỏ nhất vẫn là (length nhỏ nhất) / tốc độ
+        bi_ghi_de = toc_do != self.toc_do_tu_do
+        with np.errstate(divide="ignore", invalid="ignore"):
+            van_toc = np.maximum(toc_do, 0) / 3.6
+            thoi_gian = np.where(bi_ghi_de, np.where(toc_do > 0, self.do_dai / van_toc, np.inf), self.thoi_gian_tu_do)
+            uu_tien = np.where(bi_ghi_de, np.where(toc_do > 0, self.do_dai_uu_tien / van_toc, np.inf),
+                               self.uu_tien_tu_do)
+        cac_cot = {
+            "do_dai": self.do_dai,
+            "thoi_gian": thoi_gian,
+            "uu_tien": uu_tien + PHAT_MOI_NUT_GIAO,
+        }
+        cac_do_thi = {ten: self.csr if ten == "do_dai" else self.csr.voi_trong_so(cot)
+                      for ten, cot in cac_cot.items()}
+        return toc_do, cac_cot, cac_do_thi
+
+    # --- Đọc -----------------------------------------------------------------
+    def cot(self, muc_tieu):
+        """Trọng số của mục tiêu theo phần tử CSR."""
+        return self._trang_thai[1][self._kiem_tra(muc_tieu)]
+
+    def do_thi(self, muc_tieu):
+        """DoThiCSR có trọng số của mục tiêu (dùng chung cấu trúc với CSR gốc)."""
+        return self._trang_thai[2][self._kiem_tra(muc_tieu)]
+
+    def toc_do(self):
+        return self._trang_thai[0]
+
+    @staticmethod
+    def _kiem_tra(muc_tieu):
+        if muc_tieu not in CAC_MUC_TIEU:
+            raise ValueError(f"Mục tiêu không hỗ trợ: {muc_tieu} (chọn một trong {', '.join(CAC_MUC_TIEU)})")
+        return muc_tieu
+
+    # --- Cập nhật ------------------------------------------------------------
+    def phan_tu_cua_cap(self, u, v):
+        """Phần tử CSR của từng cặp chỉ số nút (u, v), -1 nếu không có cạnh u -> v; vector hoá."""
+        if self._khoa_phan_tu is None:
+            self._khoa_phan_tu = _bang_tra_cap(self.csr)
+        return _phan_tu_cua_cap(self._khoa_phan_tu, self.csr.so_nut, u, v)
+
+    def cap_nhat_toc_do(self, phan_tu, toc_do):
+        """Ghi đè tốc độ (km/h) của các phần tử CSR lên tốc độ hiện tại; trả về phiên bản mới.
+
+        Các lớp ùn tắc cộng dồn; dat_lai() quay về tốc độ tự do.
+        """
+        phan_tu = np.asarray(phan_tu, dtype=np.int64)
+        with self._khoa:
+            toc_do_moi = self._trang_thai[0].copy()
+            toc_do_moi[phan_tu] = toc_do
+            # Đổi cả bộ trạng thái một lần: truy vấn đang chạy vẫn thấy bộ cũ trọn vẹn
+            self._trang_thai = self._dung(toc_do_moi)
+            self.so_canh_un_tac = int(np.count_nonzero(toc_do_moi != self.toc_do_tu_do))
+            self.phien_ban += 1
+            return self.phien_ban
+
+    def dat_lai(self):
+        with self._khoa:
+            self._trang_thai = self._dung(self.toc_do_tu_do)
+            self.so_canh_un_tac = 0
+            self.phien_ban += 1
+            return self.phien_ban
+
+    def ap_dung_lop_un_tac(self, nguon, ban_do):
+        """Đọc CSV lớp ùn tắc và áp dụng trong một lượt; trả về (số dòng, số cạnh đã cập nhật, số dòng lỗi).
+
+        Mỗi dòng có toc_do (km/h, 0 = cấm đường) và cạnh: chỉ số cạnh snapshot (canh) hoặc mã nút OSM
+        hai đầu (u, v). Cạnh song song cùng cặp (u, v) dùng chung một phần tử CSR.
+        """
+        bang = pd.read_csv(nguon)
+        bang.columns = [str(c).strip().lower() for c in bang.columns]
+        if "toc_do" not in bang.columns:
+            raise ValueError("Thiếu cột toc_do")
+        toc_do = pd.to_numeric(bang["toc_do"], errors="coerce").to_numpy(dtype=np.float64)
+        if "canh" in bang.columns:
+            canh = pd.to_numeric(bang["canh"], errors="coerce").to_numpy(dtype=np.float64)
+            hop_le = np.isfinite(canh) & (canh >= 0) & (canh < ban_do.so_canh)
+            canh = np.where(hop_le, canh, 0).astype(np.int64)
+            u = np.asarray(ban_do.canh_u, dtype=np.int64)[canh]
+            v = np.asarray(ban_do.canh_v, dtype=np.int64)[canh]
+        elif {"u", "v"} <= set(bang.columns):
+            u, hop_le_u = _chi_so_nut(ban_do.nut_osmid, bang["u"])
+            v, hop_le_v = _chi_so_nut(ban_do.nut_osmid, bang["v"])
+            hop_le = hop_le_u & hop_le_v
+        else:
+            raise ValueError("Cần cột canh (chỉ số cạnh) hoặc hai cột u, v (mã nút OSM)")
+
+        phan_tu = self.phan_tu_cua_cap(u, v)
+        hop_le &= (phan_tu >= 0) & np.isfinite(toc_do) & (toc_do >= 0)
+        self.cap_nhat_toc_do(phan_tu[hop_le], toc_do[hop_le])
+        return len(bang), int(len(np.unique(phan_tu[hop_le]))), int(np.count_nonzero(~hop_le))
+
+
+def _chi_so_nut(nut_osmid, cot):
+    """(chỉ số nút, hợp lệ) cho một cột mã nút OSM, vector hoá bằng tìm kiếm nhị phân."""
+    osmid = pd.to_numeric(cot, errors="coerce")
+    hop_le = osmid.notna().to_numpy()
+    osmid = osmid.fillna(-1).to_numpy(dtype=np.int64)
+    nut_osmid = np.asarray(nut_osmid, dtype=np.int64)
+    thu_tu = np.argsort(nut_osmid)
+    vi_tri = np.minimum(np.searchsorted(nut_osmid[thu_tu], osmid), len(thu_tu) - 1)
+    chi_so = thu_tu[vi_tri]
+    return chi_so, hop_le & (nut_osmid[chi_so] == osmid)
@@ -0,0 +1,190 @@
+# -----------------------------------------------------------------------------
+# VẾT DUYỆT TỪNG BƯỚC CỦA CÁC THUẬT TOÁN TAB 1
+# -----------------------------------------------------------------------------
+# Trước đây BFS, DFS, Dijkstra, luồng cực đại, Fleury và Hierholzer định dạng toàn
+# bộ kết quả thành một chuỗi trong st.session_state['log_text'] rồi chèn nguyên khối
+# vào khung log: vài MB bộ nhớ phiên với đồ thị lớn, trình duyệt bị treo. Ở đây:
+# - mỗi thuật toán có một generator sinh từng bước (loai, u, v, gia_tri) một cách lười;
+# - VetDuyet rút dần các bước vào một vòng đệm (deque maxlen) có sức chứa cấu hình
+#   được; giao diện lật trang trong vòng đệm và đọc thêm khi người dùng bấm;
+# - xuat_tsv_gz tạo lại generator từ đầu và nén gzip từng khối dòng TSV, nên vết đầy
+#   đủ không bao giờ nằm trọn trong bộ nhớ dưới dạng chuỗi.
+# Generator đọc thẳng đồ thị phiên: đồ thị đổi (phien_ban khác) thì vết cũ hết hiệu lực.
+# -----------------------------------------------------------------------------
+import gzip
+import heapq
+import io
+import itertools
+from collections import deque
+
+import networkx as nx
+import numpy as np
+
+from dan_duong import thuc_thi
+
+SUC_CHUA_MAC_DINH = 2000   # số bước gần nhất giữ trong vòng đệm
+SO_BUOC_MOI_LAN = 200      # số bước đọc thêm mỗi lần
+SO_DONG_MOI_KHOI = 5000    # xuat_tsv_gz: số dòng nén mỗi lần
+SO_PHAN_TU_RUT_GON = 20    # rut_gon: số phần tử hiện ra của một danh sách dài
+
+MO_TA = {
+    "bat_dau": "Bắt đầu tại {u}",
+    "canh_cay": "{u} → {v}",
+    "canh_khong_cay": "{u} - {v} (đã thăm)",
+    "quay_lui": "Quay lui {v} → {u}",
+    "chot": "Chốt {u} (từ {v}), khoảng cách {w}",
+    "noi": "Nới {v} qua {u}: {w}",
+    "luong": "{u} → {v}: luồng {w}",
+    "cat": "Lát cắt {u} → {v}: sức chứa {w}",
+    "canh_euler": "Bước {w}: {u} → {v}",
+}
+
+
+def _so(x):
+    if isinstance(x, (float, np.floating)) and float(x).is_integer():
+        return str(int(x))
+    return "" if x is None else str(x)
+
+
+def mo_ta(buoc):
+    loai, u, v, w = buoc
+    return MO_TA[loai].format(u=u, v=v, w=_so(w))
+
+
+def rut_gon(danh_sach, toi_da=SO_PHAN_TU_RUT_GON):
+    """Chuỗi cho log / thông báo: tối đa toi_da phần tử đầu, phần còn lại chỉ ghi số lượng."""
+    dau = ", ".join(str(x) for x in itertools.islice(danh_sach, toi_da))
+    return f"[{dau}, ... (+{len(danh_sach) - toi_da})]" if len(danh_sach) > toi_da else f"[{dau}]"
+
+
+# --- Generator theo thuật toán ----------------------------------------------
+def buoc_bfs(G, nguon):
+    """Cùng thứ tự cạnh với nx.bfs_tree."""
+    yield "bat_dau", nguon, None, None
+    for u, v in nx.bfs_edges(G, nguon):
+        yield "canh_cay", u, v, None
+
+
+def buoc_dfs(G, nguon):
+    """Cạnh cây, cạnh tới đỉnh đã thăm và bước quay lui theo nx.dfs_labeled_edges."""
+    for u, v, nhan in nx.dfs_labeled_edges(G, nguon):
+        if u == v:
+            if nhan == "forward":
+                yield "bat_dau", u, None, None
+        elif nhan == "forward":
+            yield "canh_cay", u, v, None
+        elif nhan == "nontree":
+            yield "canh_khong_cay", u, v, None
+        elif nhan == "reverse":
+            yield "quay_lui", u, v, None
+
+
+def buoc_dijkstra(G, nguon, dich=None, weight="weight"):
+    """Các lần chốt / nới của Dijkstra (hàng đợi ưu tiên), dừng khi chốt dich."""
+    yield "bat_dau", nguon, None, None
+    khoang_cach, truoc, da_chot = {nguon: 0}, {}, set()
+    dem = itertools.count()
+    hang = [(0, next(dem), nguon)]
+    while hang:
+        d, _, u = heapq.heappop(hang)
+        if u in da_chot:
+            continue
+        da_chot.add(u)
+        yield "chot", u, truoc.get(u, "-"), d
+        if u == dich:
+            return
+        for v, du_lieu in G.adj[u].items():
+            moi = d + du_lieu.get(weight, 1)
+            if v not in da_chot and moi < khoang_cach.get(v, float("inf")):
+                khoang_cach[v], truoc[v] = moi, u
+                heapq.heappush(hang, (moi, next(dem), v))
+                yield "noi", u, v, moi
+
+
+def dijkstra_dem_nut_chot(G, nguon, dich, weight="weight"):
+    """(tổng trọng số, đường đi) của Dijkstra dừng tại dich; số đỉnh đã chốt gửi kèm qua thuc_thi.ghi_so_lieu.
+
+    Dijkstra dừng tại đích đã chốt mọi đỉnh có khoảng cách <= d(đích): đếm bằng một lượt có cutoff
+    (không sinh vết như buoc_dijkstra). Hàm cấp module để chạy được qua BoThucThi.
+    """
+    chi_phi, duong_di = nx.single_source_dijkstra(G, nguon, dich, weight=weight)
+    thuc_thi.ghi_so_lieu(so_nut_da_duyet=len(nx.single_source_dijkstra_path_length(G, nguon, cutoff=chi_phi,
+                                                                                     weight=weight)))
+    return chi_phi, duong_di
+
+
+def buoc_luong(kq_luong, so_moi_khoi=SO_DONG_MOI_KHOI):
+    """Cạnh có luồng (theo chiều luồng chạy) rồi các cạnh của lát cắt nhỏ nhất, từ KetQuaLuong."""
+    mang, cac_nut = kq_luong.mang, kq_luong.mang.cac_nut
+    suc_chua = mang.suc_chua[0::2]
+    for loai, chon in (("luong", np.flatnonzero(kq_luong.luong != 0)), ("cat", kq_luong.chi_so_cat())):
+        for dau in range(0, len(chon), so_moi_khoi):
+            khoi = chon[dau:dau + so_moi_khoi]
+            gia_tri = np.abs(kq_luong.luong[khoi]) if loai == "luong" else suc_chua[khoi]
+            nguoc = kq_luong.luong[khoi] < 0
+            for a, b, ng, w in zip(mang.canh_u[khoi].tolist(), mang.canh_v[khoi].tolist(), nguoc.tolist(),
+                                   gia_tri.tolist()):
+                if loai == "luong" and ng:
+                    a, b = b, a
+                elif loai == "cat" and not kq_luong.phia_nguon[a]:
+                    a, b = b, a
+                yield loai, cac_nut[a], cac_nut[b], w
+
+
+def buoc_canh(cac_canh, loai="canh_euler"):
+    """Từng cạnh của một danh sách / iterator (đường đi Euler, cây khung ...), đánh số từ 1."""
+    for i, (u, v, *_) in enumerate(cac_canh, 1):
+        yield loai, u, v, i
+
+
+# --- Vòng đệm ---------------------------------------------------------------
+class VetDuyet:
+    def __init__(self, ten, tao_buoc, suc_chua=SUC_CHUA_MAC_DINH, **thong_tin):
+        self.ten = ten
+        self.tao_buoc = tao_buoc          # hàm không đối số trả về generator mới (để xuất lại từ đầu)
+        self.thong_tin = thong_tin        # vd. phien_ban của đồ thị lúc chạy
+        self.vong_dem = deque(maxlen=max(1, suc_chua))
+        self.so_da_doc = 0                # tổng số bước đã rút khỏi generator
+        self.het = False
+        self._nguon = None
+
+    @property
+    def dau_vong_dem(self):
+        """Số thứ tự (từ 0) của bước cũ nhất còn trong vòng đệm."""
+        return self.so_da_doc - len(self.vong_dem)
+
+    def doc_them(self, so_buoc=SO_BUOC_MOI_LAN):
+        """Rút thêm tối đa so_buoc bước vào vòng đệm (bước cũ bị đẩy ra); trả về số bước đọc được."""
+        if self.het:
+            return 0
+        if self._nguon is None:
+            self._nguon = self.tao_buoc()
+        truoc = self.so_da_doc
+        for buoc in itertools.islice(self._nguon, so_buoc):
+            self.vong_dem.append(buoc)
+            self.so_da_doc += 1
+        if self.so_da_doc - truoc < so_buoc:
+            self.het, self._nguon = True, None
+        return self.so_da_doc - truoc
+
+    def doc_het(self):
+        """Đọc tới cuối; vòng đệm chỉ giữ các bước cuối cùng."""
+        while not self.het:
+            self.doc_them(self.vong_dem.maxlen)
+
+    def trang(self, dau, so_dong):
+        """[(số thứ tự từ 1, mô tả)] của so_dong bước từ vị trí dau trong vòng đệm."""
+        cac_buoc = itertools.islice(self.vong_dem, dau, dau + so_dong)
+        return [(self.dau_vong_dem + dau + i + 1, mo_ta(b)) for i, b in enumerate(cac_buoc)]
+
+
+def xuat_tsv_gz(tao_buoc, so_dong_moi_khoi=SO_DONG_MOI_KHOI):
+    """Toàn bộ vết (chạy lại generator từ đầu) dạng TSV nén gzip: stt, loai, u, v, gia_tri."""
+    dich = io.BytesIO()
+    with gzip.GzipFile(fileobj=dich, mode="wb") as f:
+        f.write(b"stt\tloai\tu\tv\tgia_tri\n")
+        cac_buoc = enumerate(tao_buoc(), 1)
+        while khoi := list(itertools.islice(cac_buoc, so_dong_moi_khoi)):
+            f.write("".join(f"{i}\t{loai}\t{'' if u is None else u}\t{'' if v is None else v}\t{_so(w)}\n"
+                            for i, (loai, u, v, w) in khoi).encode())
+    return dich.getvalue()